@@ -0,0 +1,290 @@
+"""
+API Gateway
+===========
+Authentication, rate limiting and usage accounting for the paid API
+(/api/v1/notarize, /api/v1/batch, /api/v1/export, /api/v1/notarizations),
+kept in memory so a busy integration costs almost no database work:
+
+- API keys resolve through a TTL cache (unknown keys are cached too,
+  for less time), along with the owner's subscription expiry
+- each key has a sliding-window limit of API_RATE_LIMIT_PER_DAY requests
+  per 24 hours (per process)
+- usage is counted in memory and written to api_keys in one batched
+  UPDATE every USAGE_FLUSH_INTERVAL seconds
+
+Keys are issued by the bot's /api command. Bare Telegram user ids (the
+old scheme) are only accepted when API_LEGACY_USER_KEYS is turned on,
+and never by endpoints that read a user's data (allow_legacy=False): a
+user id is public, so it can't stand in for a secret there.
+
+Usage:
+    from api_gateway import api_gateway, ApiAuthError
+
+    # On startup / shutdown
+    asyncio.create_task(api_gateway.run(db))
+    await api_gateway.stop(db)
+
+    # In handlers
+    try:
+        principal = await api_gateway.authorize(db, api_key, cost=len(contracts))
+    except ApiAuthError as e:
+        return e.response()
+"""
+
+import asyncio
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+
+from fastapi.responses import JSONResponse
+
+from config import API_RATE_LIMIT_PER_DAY
+
+KEY_CACHE_TTL = 300  # seconds a resolved key is trusted
+NEGATIVE_CACHE_TTL = 60  # seconds an unknown key stays rejected
+KEY_CACHE_MAX = 10000
+SUBSCRIPTION_TTL = 300  # seconds a subscription expiry is trusted
+WINDOW_SECONDS = 86400
+USAGE_FLUSH_INTERVAL = float(os.getenv("API_USAGE_FLUSH_INTERVAL", "30"))
+LEGACY_USER_KEYS = os.getenv("API_LEGACY_USER_KEYS", "false").lower() == "true"
+KEY_PREFIX = "nt_"
+SUBSCRIBE_URL = "https://t.me/NotaryTON_bot?start=subscribe"
+
+
+def new_api_key() -> str:
+    """Random key for api_keys (fits VARCHAR(64))"""
+    return KEY_PREFIX + secrets.token_urlsafe(24)
+
+
+@dataclass
+class ApiPrincipal:
+    """Who a request is from"""
+    key: str
+    user_id: int
+    legacy: bool = False  # Authenticated by bare user id (no api_keys row)
+
+
+class ApiAuthError(Exception):
+    """Request rejected by the gateway"""
+
+    def __init__(self, error: str, status_code: int = 200, retry_after: Optional[int] = None, **extra):
+        super().__init__(error)
+        self.error = error
+        self.status_code = status_code  # 200 keeps the API's {"success": false} contract
+        self.retry_after = retry_after
+        self.extra = extra
+
+    def response(self) -> JSONResponse:
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after else None
+        return JSONResponse(
+            {"success": False, "error": self.error, **self.extra},
+            status_code=self.status_code,
+            headers=headers
+        )
+
+
+class SlidingWindow:
+    """
+    Sliding-window counter: the previous fixed window's count, weighted
+    by how much of it still overlaps the last `window` seconds, plus the
+    current window's count. O(1) memory per key.
+    """
+
+    __slots__ = ("window", "start", "current", "previous")
+
+    def __init__(self, window: float, now: float):
+        self.window = window
+        self.start = now - now % window
+        self.current = 0
+        self.previous = 0
+
+    def _roll(self, now: float) -> None:
+        elapsed_windows = int((now - self.start) // self.window)
+        if elapsed_windows >= 1:
+            self.previous = self.current if elapsed_windows == 1 else 0
+            self.current = 0
+            self.start += elapsed_windows * self.window
+
+    def count(self, now: float) -> float:
+        self._roll(now)
+        overlap = 1 - (now - self.start) / self.window
+        return self.previous * overlap + self.current
+
+    def try_add(self, cost: int, limit: int, now: float) -> Tuple[bool, int]:
+        """Take `cost` requests; returns (allowed, seconds until allowed)"""
+        used = self.count(now)
+        if used + cost <= limit:
+            self.current += cost
+            return True, 0
+        elapsed = now - self.start
+        room = limit - self.current - cost
+        if room >= 0 and self.previous > 0:
+            # Wait for enough of the previous window to slide out
+            wait = self.window * (1 - room / self.previous) - elapsed
+        else:
+            wait = self.window - elapsed
+        return False, max(1, int(wait) + 1)
+
+
+class ApiGateway:
+    """In-memory key cache, rate limiter and usage buffer"""
+
+    def __init__(self, daily_limit: int = API_RATE_LIMIT_PER_DAY):
+        self.daily_limit = daily_limit
+        self._keys: Dict[str, Tuple[Optional[ApiPrincipal], float]] = {}
+        self._subscriptions: Dict[int, Tuple[Optional[datetime], float]] = {}
+        self._windows: Dict[str, SlidingWindow] = {}
+        self._usage: Dict[str, list] = {}  # key -> [requests, last_used]
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "limited": 0, "flushes": 0, "flushed": 0}
+
+    # ========================
+    # Resolution
+    # ========================
+
+    async def resolve(self, db, api_key: str) -> Optional[ApiPrincipal]:
+        """API key -> principal, or None if unknown"""
+        now = time.monotonic()
+        cached = self._keys.get(api_key)
+        if cached and cached[1] > now:
+            self.stats["hits"] += 1
+            return cached[0]
+        self.stats["misses"] += 1
+
+        principal = None
+        row = await db.api_keys.get(api_key) if len(api_key) <= 64 else None
+        if row:
+            principal = ApiPrincipal(key=row.key, user_id=row.user_id)
+        elif LEGACY_USER_KEYS and api_key.isdigit():
+            principal = ApiPrincipal(key=f"user:{api_key}", user_id=int(api_key), legacy=True)
+
+        if len(self._keys) >= KEY_CACHE_MAX:
+            self._keys = {k: v for k, v in self._keys.items() if v[1] > now}
+        ttl = KEY_CACHE_TTL if principal else NEGATIVE_CACHE_TTL
+        self._keys[api_key] = (principal, now + ttl)
+        return principal
+
+    async def has_subscription(self, db, user_id: int) -> bool:
+        now = time.monotonic()
+        cached = self._subscriptions.get(user_id)
+        if cached is None or cached[1] <= now:
+            expiry = await db.users.get_subscription_expiry(user_id)
+            cached = (expiry, now + SUBSCRIPTION_TTL)
+            self._subscriptions[user_id] = cached
+        return bool(cached[0] and cached[0] > datetime.now())
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget a cached subscription (call after it changes)"""
+        self._subscriptions.pop(user_id, None)
+
+    def invalidate_key(self, api_key: str) -> None:
+        self._keys.pop(api_key, None)
+
+    # ========================
+    # Authorization
+    # ========================
+
+    async def authorize(
+        self,
+        db,
+        api_key,
+        cost: int = 1,
+        require_subscription: bool = True,
+        subscription_error: str = "No active subscription",
+        allow_legacy: bool = True
+    ) -> ApiPrincipal:
+        """
+        Resolve, check subscription and charge `cost` requests, or raise ApiAuthError.
+        allow_legacy=False refuses bare user ids (for endpoints returning user data).
+        """
+        api_key = str(api_key or "").strip()
+        if not api_key:
+            raise ApiAuthError("Missing api_key")
+        principal = await self.resolve(db, api_key)
+        if principal is None:
+            raise ApiAuthError("Invalid api_key", status_code=401)
+        if principal.legacy and not allow_legacy:
+            raise ApiAuthError("This endpoint needs an API key issued by the bot's /api command", status_code=401)
+        if require_subscription and not await self.has_subscription(db, principal.user_id):
+            raise ApiAuthError(subscription_error, subscribe_url=SUBSCRIBE_URL)
+
+        now = time.time()
+        window = self._windows.get(principal.key)
+        if window is None:
+            window = self._windows[principal.key] = SlidingWindow(WINDOW_SECONDS, now)
+        allowed, retry_after = window.try_add(cost, self.daily_limit, now)
+        if not allowed:
+            self.stats["limited"] += 1
+            raise ApiAuthError(
+                f"Rate limit exceeded ({self.daily_limit} requests per day)",
+                status_code=429, retry_after=retry_after
+            )
+
+        if not principal.legacy:
+            usage = self._usage.setdefault(principal.key, [0, None])
+            usage[0] += cost
+            usage[1] = datetime.now()
+        return principal
+
+    def remaining(self, principal: ApiPrincipal) -> int:
+        window = self._windows.get(principal.key)
+        used = window.count(time.time()) if window else 0
+        return max(0, int(self.daily_limit - used))
+
+    # ========================
+    # Usage write-behind
+    # ========================
+
+    async def flush(self, db) -> int:
+        """Write buffered usage to api_keys in one statement; returns keys written"""
+        if not self._usage:
+            return 0
+        usage, self._usage = self._usage, {}
+        try:
+            await db.api_keys.record_usage_batch({key: (n, at) for key, (n, at) in usage.items()})
+        except Exception:
+            # Put it back so the next flush retries
+            for key, (n, at) in usage.items():
+                pending = self._usage.setdefault(key, [0, at])
+                pending[0] += n
+                pending[1] = max(pending[1], at)
+            raise
+        self.stats["flushes"] += 1
+        self.stats["flushed"] += len(usage)
+        return len(usage)
+
+    async def run(self, db) -> None:
+        """Flush usage every USAGE_FLUSH_INTERVAL seconds"""
+        self._task = asyncio.current_task()
+        while True:
+            await asyncio.sleep(USAGE_FLUSH_INTERVAL)
+            try:
+                await self.flush(db)
+            except Exception as e:
+                print(f"⚠️ API usage flush failed: {e}")
+
+    async def stop(self, db) -> None:
+        """Stop the flush loop and write what is buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush(db)
+        except Exception as e:
+            print(f"⚠️ Final API usage flush failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_keys": len(self._keys),
+            "tracked_windows": len(self._windows),
+            "pending_usage": sum(n for n, _ in self._usage.values()),
+        }
+
+
+# Global gateway
+api_gateway = ApiGateway()
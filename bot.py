@@ -7,21 +7,25 @@ import asyncio
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse, StreamingResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command
 from aiogram.types import Update, LabeledPrice, PreCheckoutQuery, InlineQuery, InlineQueryResultArticle, InputTextMessageContent, WebAppInfo
 from dotenv import load_dotenv
-from pytoniq import LiteBalancer, WalletV5R1, Address
+from pytoniq import Address
 import uvicorn
 
 # Database layer (PostgreSQL with Neon)
-from database import db
+from database import db, EXPORT_DATASETS
 
 # Social media auto-poster (X + Telegram channel)
 from social import social_poster, announce_seal
+from notify_bus import notification_bus
+
+# Rate-limited Telegram sends (global + per-chat limits, priorities)
+from telegram_sender import telegram_sender, Priority
 
 # MemeScan - Meme coin terminal
 from memescan.bot import router as memescan_router, get_client as get_memescan_client
@@ -30,6 +34,41 @@ from memescan.twitter import memescan_twitter
 # Token crawler - THE DATA MOAT
 from crawler import crawler, start_crawler, stop_crawler
 
+# Known wallet labels (in-memory entity detection)
+from wallet_labels import label_index, load_ton_labels, TON_LABELS_PATH, TON_LABELS_SOURCE
+
+# TON address codec (form-independent comparison)
+from utils.address import address_key
+
+# Contract hash prefix search (inline queries)
+from utils.hashing import MIN_PREFIX_CHARS, hash_to_bytes
+
+# Streaming bulk export (NDJSON/CSV/Parquet)
+from data_export import (
+    stream_export, ExportStats, available_formats, recent_exports, export_slots,
+    EXPORT_RETRY_AFTER, CONTENT_TYPES as EXPORT_CONTENT_TYPES
+)
+
+# Keyset pagination cursors for list endpoints
+from utils.cursor import decode_cursor, next_cursor
+
+# Verify fast path (LRU + Bloom filter of sealed hashes)
+from verify_cache import verify_cache
+
+# API key cache, rate limits and batched usage accounting
+from api_gateway import api_gateway, ApiAuthError, new_api_key
+from config import BATCH_MAX_CONTRACTS
+
+# Durable seal queue
+from seal_queue import SealWorkerPool, PermanentSealError, render, job_status, check_callback_url
+
+# Backfills real tx hashes for seals from wallet scans
+from confirmer import seal_confirmer, seal_transaction
+from payouts import payout_reconciler, PendingPayout, payout_memo
+
+# TON access: pytoniq via health-scored liteserver routing, or an in-memory chain
+from chain import create_backend, Transfer, TransferPending
+
 # Load .env
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
@@ -40,10 +79,18 @@ MEMESCAN_BOT_TOKEN = os.getenv("MEMESCAN_BOT_TOKEN")
 TON_CENTER_API_KEY = os.getenv("TON_CENTER_API_KEY")
 TON_WALLET_SECRET = os.getenv("TON_WALLET_SECRET")
 SERVICE_TON_WALLET = os.getenv("SERVICE_TON_WALLET")
+# Canonical key for matching webhook accounts in any address form
+SERVICE_WALLET_KEY = address_key(SERVICE_TON_WALLET) if SERVICE_TON_WALLET else None
+if SERVICE_WALLET_KEY is None:
+    print("🚨 SERVICE_TON_WALLET is unset or not a valid TON address - "
+          "TonAPI webhook transactions will not be filtered by account")
+CHAIN_BACKEND = os.getenv("CHAIN_BACKEND", "pytoniq")  # "fake" runs against an in-memory chain
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "https://notaryton.com")
 WEBHOOK_PATH = f"/webhook/{BOT_TOKEN}"
 MEMESEAL_WEBHOOK_PATH = f"/webhook/{MEMESEAL_BOT_TOKEN}" if MEMESEAL_BOT_TOKEN else None
 MEMESCAN_WEBHOOK_PATH = f"/webhook/{MEMESCAN_BOT_TOKEN}" if MEMESCAN_BOT_TOKEN else None
+
+chain_backend = create_backend(CHAIN_BACKEND, TON_WALLET_SECRET, wallet=SERVICE_TON_WALLET)
 GROUP_IDS = os.getenv("GROUP_IDS", "").split(",")  # Comma-separated chat IDs
 
 # TonAPI for real-time webhooks (replaces 30s polling!)
@@ -248,6 +295,35 @@ async def cleanup_pending_payments():
         await asyncio.sleep(300)  # Every 5 minutes
 
 
+async def compact_balance_ledger():
+    """Fold the append-only balance ledger into users balances every minute"""
+    while True:
+        try:
+            compacted = await db.users.compact_ledger()
+            if compacted:
+                print(f"📒 Compacted {compacted} ledger entries")
+        except Exception as e:
+            print(f"⚠️ Ledger compaction error: {e}")
+        await asyncio.sleep(60)
+
+
+async def backfill_address_keys():
+    """Fill canonical address key columns for rows written before they existed"""
+    try:
+        await db.backfill_address_keys()
+    except Exception as e:
+        print(f"⚠️ Address key backfill error: {e}")
+
+
+async def backfill_hash_bins():
+    """Index and fill notarizations.hash_bin for rows written before it existed"""
+    try:
+        if await db.backfill_hash_bins():
+            await verify_cache.load(db)  # The Bloom filter was built without them
+    except Exception as e:
+        print(f"⚠️ Hash backfill error: {e}")
+
+
 # 🎰 LOTTERY DRAW TASK - picks winner every Sunday at 00:00 UTC (midnight)
 async def run_sunday_lottery_draw():
     """Background task: Run lottery draw every Sunday at 00:00 UTC (midnight)"""
@@ -303,13 +379,10 @@ async def run_sunday_lottery_draw():
                 )
 
                 # Try both bots to reach the winner
-                for send_bot in [memeseal_bot, bot]:
-                    if send_bot:
-                        try:
-                            await send_bot.send_message(winner_id, winner_msg, parse_mode="Markdown")
-                            break
-                        except Exception as e:
-                            print(f"⚠️ Could not DM winner via {send_bot}: {e}")
+                telegram_sender.submit(
+                    winner_id, winner_msg, bots=[memeseal_bot, bot],
+                    priority=Priority.PAYMENT, parse_mode="Markdown"
+                )
 
                 # Announce on socials
                 try:
@@ -322,28 +395,34 @@ async def run_sunday_lottery_draw():
                     winner = await db.users.get(winner_id)
                     if winner and winner.withdrawal_wallet and pot_ton >= MIN_WITHDRAWAL_TON:
                         # Auto-payout to winner's wallet
+                        ref = f"lottery{draw_id}"
+                        memo = payout_memo(f"MemeSeal Lottery Win! {pot_stars} Stars", ref)
                         try:
-                            await send_payout_transaction(
-                                winner.withdrawal_wallet,
-                                pot_ton,
-                                f"MemeSeal Lottery Win! {pot_stars} Stars"
-                            )
+                            await send_payout_transaction(winner.withdrawal_wallet, pot_ton, memo)
                             print(f"✅ Auto-payout {pot_ton:.4f} TON to {winner.withdrawal_wallet[:20]}...")
                             # Notify winner about auto-payout
                             payout_msg = f"💸 **{pot_ton:.4f} TON** sent to your wallet!\nCheck: tonscan.org/address/{winner.withdrawal_wallet}"
-                            for send_bot in [memeseal_bot, bot]:
-                                if send_bot:
-                                    try:
-                                        await send_bot.send_message(winner_id, payout_msg, parse_mode="Markdown")
-                                        break
-                                    except Exception:
-                                        pass
+                            telegram_sender.submit(
+                                winner_id, payout_msg, bots=[memeseal_bot, bot],
+                                priority=Priority.PAYMENT, parse_mode="Markdown"
+                            )
+                        except TransferPending as pending:
+                            # May still land: credit the account only if it never does
+                            await payout_reconciler.add(db, PendingPayout(
+                                ref, winner_id, pot_ton, memo, pending.valid_until,
+                                failure_kind='lottery', failure_amount=pot_ton,
+                                failure_source=f"lottery:{draw_id}"
+                            ))
                         except Exception as payout_err:
                             print(f"⚠️ Auto-payout failed, crediting account instead: {payout_err}")
-                            await db.users.add_referral_earnings(winner_id, pot_ton)
+                            await db.users.add_referral_earnings(
+                                winner_id, pot_ton, source_tx=f"lottery:{draw_id}", kind='lottery'
+                            )
                     else:
                         # No wallet or pot too small - credit to account
-                        await db.users.add_referral_earnings(winner_id, pot_ton)
+                        await db.users.add_referral_earnings(
+                            winner_id, pot_ton, source_tx=f"lottery:{draw_id}", kind='lottery'
+                        )
                         print(f"✅ Credited {pot_ton:.4f} TON to winner's account (use /withdraw to claim)")
                 except Exception as e:
                     print(f"⚠️ Could not process winner payout: {e}")
@@ -370,15 +449,17 @@ async def get_user_subscription(user_id: int):
 async def add_subscription(user_id: int, months: int = 1):
     """Add or extend subscription"""
     await db.users.add_subscription(user_id, months)
+    api_gateway.invalidate_user(user_id)
 
 async def log_notarization(user_id: int, tx_hash: str, contract_hash: str, paid: bool = False):
     """Log a notarization event"""
-    await db.notarizations.create(
+    notarization = await db.notarizations.create(
         user_id=user_id,
         tx_hash=tx_hash,
         contract_hash=contract_hash,
         paid=paid
     )
+    verify_cache.add(notarization)
 
 # ========================
 # TON FUNCTIONS
@@ -482,26 +563,14 @@ def get_user_friendly_error(error: Exception, context: str = "") -> str:
 
 async def get_contract_code_from_tx(tx_id: str) -> bytes:
     """Fetch contract bytecode from transaction"""
-    client = None
     try:
-        client = LiteBalancer.from_mainnet_config(trust_level=1)
-        await client.start_up()
-
         # Try to parse the tx_id as a contract address
         try:
             address = Address(tx_id)
-            # Get account state
-            account_state = await client.run_get_method(
-                address=address.to_str(),
-                method="get_public_key",
-                stack=[]
-            )
-
             # Get the actual contract code
-            account = await client.get_account_state(address.to_str())
-            if account and hasattr(account, 'code') and account.code:
-                code = account.code
-                return code if isinstance(code, bytes) else str(code).encode()
+            account = await chain_backend.get_account_state(address.to_str())
+            if account.code:
+                return account.code
             else:
                 print(f"No code found for address: {tx_id}")
                 return b""
@@ -519,232 +588,159 @@ async def get_contract_code_from_tx(tx_id: str) -> bytes:
     except Exception as e:
         print(f"Error fetching contract code: {e}")
         return b""
-    finally:
-        if client:
-            await client.close_all()
-
-async def send_ton_transaction(comment: str, amount_ton: float = 0.005, retries: int = 3):
-    """Send TON transaction with comment (notarization proof)"""
-    last_error = None
-
-    for attempt in range(retries):
-        client = None
-        try:
-            client = LiteBalancer.from_mainnet_config(trust_level=1)
-            await client.start_up()
-
-            mnemonics = TON_WALLET_SECRET.split()
-            wallet = await WalletV5R1.from_mnemonic(provider=client, mnemonics=mnemonics, network_global_id=-239)
-
-            # Send transaction to self with comment (proof stored on-chain)
-            result = await wallet.transfer(
-                destination=SERVICE_TON_WALLET,
-                amount=int(amount_ton * 1e9),  # Convert to nanotons
-                body=comment
-            )
-
-            print(f"✅ Notarization transaction sent with comment: {comment}")
-            return result
-        except Exception as e:
-            last_error = e
-            error_str = str(e).lower()
-            print(f"⚠️ Attempt {attempt + 1}/{retries} failed: {e}")
-
-            # If contract not initialized, need to deploy wallet first
-            if "not initialized" in error_str or "-256" in error_str:
-                print("💡 Wallet contract not deployed. Attempting deploy...")
-                try:
-                    # Try to deploy wallet by sending minimal amount
-                    await wallet.transfer(
-                        destination=SERVICE_TON_WALLET,
-                        amount=1,  # 1 nanoton to deploy
-                        body="MemeSeal:WalletDeploy"
-                    )
-                    await asyncio.sleep(5)  # Wait for deploy
-                    continue  # Retry main transaction
-                except Exception as deploy_err:
-                    print(f"❌ Deploy attempt failed: {deploy_err}")
-
-            # Liteserver crash - wait and retry
-            if "liteserver" in error_str or "crashed" in error_str:
-                await asyncio.sleep(2)
-                continue
-
-        finally:
-            if client:
-                try:
-                    await client.close_all()
-                except:
-                    pass
-
-    print(f"❌ All {retries} attempts failed. Last error: {last_error}")
-    raise last_error
 
 async def send_payout_transaction(destination: str, amount_ton: float, memo: str = "NotaryTON Payout"):
     """Send TON payout to user wallet"""
-    client = None
     try:
-        client = LiteBalancer.from_mainnet_config(trust_level=1)
-        await client.start_up()
-
-        mnemonics = TON_WALLET_SECRET.split()
-        wallet = await WalletV5R1.from_mnemonic(provider=client, mnemonics=mnemonics, network_global_id=-239)
-
-        # Send to user's wallet
-        result = await wallet.transfer(
-            destination=destination,
-            amount=int(amount_ton * 1e9),  # Convert to nanotons
-            body=memo
-        )
-
+        result = await chain_backend.send_transfer([Transfer(destination, amount_ton, memo)])
         print(f"✅ Payout sent: {amount_ton} TON to {destination}")
         return result
     except Exception as e:
         print(f"❌ Error sending payout: {e}")
         raise
-    finally:
-        if client:
-            await client.close_all()
 
 
-async def seal_file_from_webhook(user_id: int, file_id: str, file_type: str, progress_msg):
+# ========================
+# SEAL JOBS (see seal_queue.py)
+# ========================
+
+def _seal_bot(name: str):
+    return memeseal_bot if name == "memeseal" and memeseal_bot else bot
+
+
+def _bot_name(sender) -> str:
+    return "memeseal" if sender is not None and sender is memeseal_bot else "notaryton"
+
+
+def seal_reply(progress_msg, success: str, failure: str, bot_name: str = None, retry: bool = False) -> dict:
     """
-    Seal file triggered by TonAPI webhook payment detection.
-    Module-level function that can be called from webhook handler.
+    Where a seal job reports back: the progress message to edit, with
+    templates for success and failure ({hash}, {hash16}, {tickets}).
+    retry=True offers the ms_retry_seal button when a file seal fails.
     """
-    file_path = None
-    try:
-        # Determine which bot to use (prefer memeseal_bot)
-        active_bot = memeseal_bot if memeseal_bot else bot
+    return {
+        "bot": bot_name or _bot_name(getattr(progress_msg, "bot", None)),
+        "chat_id": progress_msg.chat.id,
+        "message_id": progress_msg.message_id,
+        "success": success,
+        "failure": failure,
+        "retry": retry,
+    }
 
-        # Download file
-        if file_type == "photo":
-            file = await active_bot.get_file(file_id)
-            file_path = f"downloads/{file_id}.jpg"
-        else:
-            file = await active_bot.get_file(file_id)
-            file_path = f"downloads/{file_id}"
 
-        os.makedirs("downloads", exist_ok=True)
-        await active_bot.download_file(file.file_path, file_path)
-        file_hash = hash_file(file_path)
+async def download_and_hash(source_bot, file_id: str, file_type: str = "document") -> str:
+    """Download a Telegram file, hash it and delete it"""
+    file_path = f"downloads/{file_id}.jpg" if file_type == "photo" else f"downloads/{file_id}"
+    os.makedirs("downloads", exist_ok=True)
+    try:
+        file = await source_bot.get_file(file_id)
+        await source_bot.download_file(file.file_path, file_path)
+        return await asyncio.to_thread(hash_file, file_path)
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
 
-        # Seal to blockchain with retries
-        comment = f"MemeSeal:{file_hash[:16]}"
-        sealed = False
 
-        for attempt in range(5):
-            try:
-                await send_ton_transaction(comment)
-                sealed = True
-                break
-            except Exception as e:
-                print(f"⚠️ Webhook seal attempt {attempt+1}/5 failed: {e}")
-                await asyncio.sleep(5)
+async def prepare_seal(job):
+    """Seal job -> (hash, comment, amount): fetch and hash what is being sealed"""
+    payload = job.payload
+    contract_hash = job.contract_hash
+    if not contract_hash:
+        kind = payload.get("kind")
+        if kind == "file":
+            contract_hash = await download_and_hash(
+                _seal_bot(payload.get("bot")), payload["file_id"], payload.get("file_type", "document")
+            )
+        elif kind == "contract":
+            contract_code = await get_contract_code_from_tx(payload["contract_id"])
+            if not contract_code:
+                raise PermanentSealError("Failed to fetch contract")
+            contract_hash = hash_data(contract_code)
+        else:
+            raise PermanentSealError(f"Unknown seal kind: {kind}")
 
-        if sealed:
-            # Log and announce
-            await log_notarization(user_id, "webhook_ton_instant", file_hash, paid=True)
+    comment = render(payload["comment"], hash16=contract_hash[:16], hash12=contract_hash[:12])
+    return contract_hash, comment, payload.get("amount_ton", 0.005)
 
-            # Update progress message with success
-            if progress_msg:
-                try:
-                    await progress_msg.edit_text(
-                        f"✅ **SEALED TO BLOCKCHAIN!** 🐸\n\n"
-                        f"**Hash:** `{file_hash[:16]}...`\n\n"
-                        f"[View on TONScan](https://tonscan.org/) | "
-                        f"[Verify](https://notaryton.com/verify?hash={file_hash})\n\n"
-                        f"On TON forever. Receipts secured.",
-                        parse_mode="Markdown"
-                    )
-                except:
-                    pass
 
-            # Announce to socials
-            asyncio.create_task(announce_seal_to_socials(file_hash))
-            print(f"✅ Webhook seal success for user {user_id}: {file_hash[:16]}")
-        else:
-            if progress_msg:
-                try:
-                    await progress_msg.edit_text(
-                        f"⚠️ **Network Busy**\n\n"
-                        f"Seal failed after 5 attempts.\n"
-                        f"Your payment is credited - send the file again to retry!",
-                        parse_mode="Markdown"
-                    )
-                except:
-                    pass
-            print(f"❌ Webhook seal failed for user {user_id}")
+async def send_seal_batch(seals) -> None:
+    """Send every seal comment as one message of a single wallet transfer"""
+    await chain_backend.send_transfer([Transfer(SERVICE_TON_WALLET, seal.amount_ton, seal.comment) for seal in seals])
+    print(f"✅ Notarization transfer sent with {len(seals)} seal(s)")
 
-    except Exception as e:
-        print(f"❌ Webhook seal error: {e}")
-        if progress_msg:
-            try:
-                await progress_msg.edit_text(
-                    f"⚠️ **Error sealing**\n\n{str(e)[:100]}\n\nPlease try again.",
-                    parse_mode="Markdown"
-                )
-            except:
-                pass
-    finally:
-        if file_path:
-            try:
-                os.remove(file_path)
-            except:
-                pass
 
+async def fetch_seal_transactions(to_lt: int, limit: int, start=None) -> list:
+    """Service wallet transactions newer than to_lt (newest first, from `start` inclusive), for the confirmer"""
+    transactions = await chain_backend.get_transactions(
+        await chain_backend.wallet_address(), limit, to_lt=to_lt,
+        from_lt=start.lt if start else None, from_hash=start.tx_hash if start else None
+    )
+    return [seal_transaction(tx) for tx in transactions]
 
-async def resolve_ton_dns(domain: str) -> str:
-    """Resolve .ton domain to TON address"""
-    client = None
-    try:
-        # Clean up domain
-        domain = domain.lower().strip()
-        if not domain.endswith('.ton'):
-            return None
 
-        client = LiteBalancer.from_mainnet_config(trust_level=1)
-        await client.start_up()
+def seal_retry_keyboard():
+    return types.InlineKeyboardMarkup(inline_keyboard=[
+        [types.InlineKeyboardButton(text="🔄 Try Again", callback_data="ms_retry_seal")],
+        [types.InlineKeyboardButton(text="⭐ Use Stars Instead", callback_data="ms_pay_stars_single")]
+    ])
 
-        # TON DNS root contract address
-        DNS_ROOT = "EQC3dNlesgVD8YbAazcauIrXBPfiVhMMr5YYk2in0Mtsz0Bz"
 
-        # Resolve domain
-        domain_parts = domain[:-4].split('.')  # Remove .ton and split
-        domain_parts.reverse()  # TON DNS resolves from right to left
+async def finish_seal(job):
+    """Seal job done or failed: tell the user (db.seal_jobs.complete already recorded it)"""
+    payload = job.payload
+    reply = payload.get("reply")
+    values = {"hash": job.contract_hash or "", "hash16": (job.contract_hash or "")[:16], "tickets": ""}
+    keyboard = None
+
+    if job.status == "done":
+        verify_cache.add(job)
+        if payload.get("announce"):
+            asyncio.create_task(announce_seal_to_socials(job.contract_hash))
+        text = reply.get("success") if reply else None
+        print(f"✅ Seal job {job.id} sealed for user {job.user_id}: {job.contract_hash[:16]}")
+    else:
+        text = reply.get("failure") if reply else None
+        if reply and reply.get("retry") and payload.get("kind") == "file":
+            # Keep the file so the retry button can re-queue it (the user already paid)
+            pending_files[job.user_id] = {
+                "file_id": payload["file_id"],
+                "file_type": payload.get("file_type", "document"),
+                "timestamp": time.time()
+            }
+            keyboard = seal_retry_keyboard()
+
+    if text:
+        if "{tickets}" in text:
+            values["tickets"] = await db.lottery.count_user_entries(job.user_id)
+        await _seal_bot(reply.get("bot")).edit_message_text(
+            render(text, **values),
+            chat_id=reply["chat_id"],
+            message_id=reply["message_id"],
+            parse_mode="Markdown",
+            reply_markup=keyboard
+        )
 
-        current_address = DNS_ROOT
-        for part in domain_parts:
-            # Hash the domain part
-            part_hash = hashlib.sha256(part.encode()).digest()
 
-            # Call get_next_resolver on current address
-            try:
-                result = await client.run_get_method(
-                    address=current_address,
-                    method="dnsresolve",
-                    stack=[{"type": "slice", "value": part_hash}, {"type": "int", "value": 256}]
-                )
-                if result and len(result) > 1:
-                    # Extract wallet address from result
-                    current_address = result[1]
-            except Exception:
-                return None
+seal_workers = SealWorkerPool(
+    prepare=prepare_seal,
+    send=send_seal_batch,
+    finish=finish_seal,
+    base_url=WEBHOOK_URL or ""
+)
 
-        # Validate it's a proper address
-        try:
-            Address(current_address)
-            print(f"✅ Resolved {domain} -> {current_address}")
-            return current_address
-        except Exception:
-            return None
 
+async def resolve_ton_dns(domain: str) -> str:
+    """Resolve .ton domain to TON address"""
+    try:
+        address = await chain_backend.resolve_dns(domain)
+        if address:
+            print(f"✅ Resolved {domain} -> {address}")
+        return address
     except Exception as e:
         print(f"⚠️ DNS resolution failed for {domain}: {e}")
         return None
-    finally:
-        if client:
-            await client.close_all()
 
 async def poll_wallet_for_payments():
     """Background task to poll wallet for incoming payments with retry logic"""
@@ -763,17 +759,13 @@ async def poll_wallet_for_payments():
     max_backoff = 300  # Max 5 minutes between retries
 
     while True:
-        client = None
         try:
-            client = LiteBalancer.from_mainnet_config(trust_level=1)
-            await asyncio.wait_for(client.start_up(), timeout=30)  # 30s timeout
-
             # Get wallet address
             wallet_address = Address(SERVICE_TON_WALLET)
 
-            # Get recent transactions with timeout
+            # Get recent transactions (newest first)
             transactions = await asyncio.wait_for(
-                client.get_transactions(address=wallet_address.to_str(), count=10),
+                chain_backend.get_transactions(wallet_address.to_str(), limit=10),
                 timeout=30
             )
 
@@ -788,20 +780,9 @@ async def poll_wallet_for_payments():
                     continue
 
                 # Check if this is an incoming transaction
-                if hasattr(tx, 'in_msg') and tx.in_msg:
-                    in_msg = tx.in_msg
-
-                    # Extract amount (in nanotons)
-                    amount_nano = getattr(in_msg, 'value', 0) if hasattr(in_msg, 'value') else 0
-                    amount_ton = amount_nano / 1e9
-
-                    # Extract memo/comment
-                    memo = ""
-                    if hasattr(in_msg, 'body') and in_msg.body:
-                        try:
-                            memo = in_msg.body.decode('utf-8', errors='ignore')
-                        except Exception:
-                            memo = str(in_msg.body)
+                if tx.in_value:
+                    amount_ton = tx.in_value / 1e9
+                    memo = tx.in_comment
 
                     print(f"📥 Incoming payment: {amount_ton} TON, memo: {memo}")
 
@@ -815,12 +796,14 @@ async def poll_wallet_for_payments():
                         pass
 
                     if user_id:
+                        tx_hash = tx.tx_hash
+
                         # Credit referrer with 5% commission
                         user = await db.users.get(user_id)
                         if user and user.referred_by:
                             referrer_id = user.referred_by
                             commission = amount_ton * 0.05
-                            await db.users.add_referral_earnings(referrer_id, commission)
+                            await db.users.add_referral_earnings(referrer_id, commission, source_tx=tx_hash)
                             print(f"💰 Credited {commission:.4f} TON to referrer {referrer_id}")
 
                         # Check if it's a subscription payment (0.3 TON)
@@ -828,43 +811,35 @@ async def poll_wallet_for_payments():
                             await add_subscription(user_id, months=1)
                             print(f"✅ Activated subscription for user {user_id}")
 
-                            # Notify user via both bots
-                            for b in [bot, memeseal_bot]:
-                                if b:
-                                    try:
-                                        await b.send_message(
-                                            user_id,
-                                            "✅ **Subscription Activated!**\n\n"
-                                            "You now have unlimited notarizations for 30 days!\n\n"
-                                            "Send me a file or contract address to seal it! 🔒",
-                                            parse_mode="Markdown"
-                                        )
-                                        break  # Only send once
-                                    except Exception:
-                                        pass
+                            # Notify user (falls back to the other bot)
+                            telegram_sender.submit(
+                                user_id,
+                                "✅ **Subscription Activated!**\n\n"
+                                "You now have unlimited notarizations for 30 days!\n\n"
+                                "Send me a file or contract address to seal it! 🔒",
+                                bots=[bot, memeseal_bot],
+                                priority=Priority.PAYMENT,
+                                parse_mode="Markdown"
+                            )
 
                         # Check if it's a single notarization payment (0.15 TON)
                         elif amount_ton >= 0.014:  # Allow small variance
                             # Add to database as paid credit
                             await db.users.ensure_exists(user_id)
-                            await db.users.add_payment(user_id, amount_ton)
+                            await db.users.add_payment(user_id, amount_ton, source_tx=tx_hash)
 
                             print(f"✅ Credited {amount_ton} TON to user {user_id}")
 
-                            # Notify user via both bots
-                            for b in [bot, memeseal_bot]:
-                                if b:
-                                    try:
-                                        await b.send_message(
-                                            user_id,
-                                            "✅ **Payment Received!**\n\n"
-                                            f"You can now notarize one contract.\n\n"
-                                            "Send me a file or contract address! 🔒",
-                                            parse_mode="Markdown"
-                                        )
-                                        break  # Only send once
-                                    except Exception:
-                                        pass
+                            # Notify user (falls back to the other bot)
+                            telegram_sender.submit(
+                                user_id,
+                                "✅ **Payment Received!**\n\n"
+                                f"You can now notarize one contract.\n\n"
+                                "Send me a file or contract address! 🔒",
+                                bots=[bot, memeseal_bot],
+                                priority=Priority.PAYMENT,
+                                parse_mode="Markdown"
+                            )
 
                 # Update max LT seen
                 if tx.lt > new_max_lt:
@@ -895,12 +870,6 @@ async def poll_wallet_for_payments():
                 consecutive_errors = 0  # Reset since we fixed the issue
             else:
                 print(f"❌ Error polling wallet (attempt {consecutive_errors}): {error_msg}")
-        finally:
-            if client:
-                try:
-                    await client.close_all()
-                except Exception:
-                    pass
 
         # Exponential backoff on errors (30s -> 60s -> 120s -> 240s -> 300s max)
         if consecutive_errors > 0:
@@ -931,14 +900,12 @@ async def cmd_start(message: types.Message):
             await db.users.create(user_id, referred_by=referrer_id)
 
             # Notify referrer
-            try:
-                await bot.send_message(
-                    referrer_id,
-                    f"🎉 New referral! User {user_id} joined via your link.\n"
-                    f"You'll earn 5% of their payments!"
-                )
-            except Exception:
-                pass
+            telegram_sender.submit(
+                referrer_id,
+                f"🎉 New referral! User {user_id} joined via your link.\n"
+                f"You'll earn 5% of their payments!",
+                bots=[bot]
+            )
         except Exception:
             await db.users.ensure_exists(user_id)
     else:
@@ -1090,10 +1057,25 @@ async def process_inline_query(inline_query: InlineQuery):
                 )
             )
         )
+    elif len(query_text) < MIN_PREFIX_CHARS:
+        # Too short for a prefix search - ask for more of the hash
+        results.append(
+            InlineQueryResultArticle(
+                id="too_short",
+                title="⌨️ Keep typing...",
+                description=f"Enter at least {MIN_PREFIX_CHARS} hex characters of the hash",
+                input_message_content=InputTextMessageContent(
+                    message_text="🔐 **NotaryTON Verification**\n\nType at least the first "
+                                 f"{MIN_PREFIX_CHARS} characters of a contract hash:\n"
+                                 "`@NotaryTON_bot <contract_hash>`",
+                    parse_mode="Markdown"
+                )
+            )
+        )
     else:
-        # Query provided - look up the hash
+        # Query provided - look up the hash (full hash or 8+ char prefix)
         try:
-            notarizations = await db.notarizations.find_by_hash(query_text)
+            notarizations = await db.notarizations.search_by_prefix(query_text, limit=5)
 
             if notarizations:
                 for i, n in enumerate(notarizations[:5]):
@@ -1538,15 +1520,31 @@ async def cmd_withdraw(message: types.Message):
         return
 
     # Process withdrawal
+    ref = f"wd{user_id}-{int(time.time())}"
+    memo = payout_memo("NotaryTON Referral Payout", ref)
     try:
-        await send_payout_transaction(
-            destination=wallet_address,
-            amount_ton=available,
-            memo=f"NotaryTON Referral Payout"
-        )
+        try:
+            await send_payout_transaction(destination=wallet_address, amount_ton=available, memo=memo)
+        except TransferPending as pending:
+            # Broadcast but not landed yet: debit now so it can't be withdrawn twice,
+            # and reverse it only if the transfer never lands
+            await db.users.record_withdrawal(user_id, available, source_tx=ref)
+            await payout_reconciler.add(db, PendingPayout(
+                ref, user_id, available, memo, pending.valid_until,
+                failure_kind='withdrawal', failure_amount=-available
+            ))
+            await message.answer(
+                f"⏳ **Withdrawal Sent - Confirming**\n\n"
+                f"**Amount:** {available:.4f} TON\n"
+                f"**To:** `{wallet_address[:20]}...`\n\n"
+                f"The network is slow to confirm it. If it doesn't land, "
+                f"the amount goes back to your balance automatically.",
+                parse_mode="Markdown"
+            )
+            return
 
         # Update DB
-        await db.users.record_withdrawal(user_id, available)
+        await db.users.record_withdrawal(user_id, available, source_tx=ref)
 
         await message.answer(
             f"✅ **Withdrawal Sent!**\n\n"
@@ -1614,9 +1612,13 @@ async def cmd_api(message: types.Message):
         )
         return
     
+    keys = await db.api_keys.get_by_user(user_id)
+    api_key = keys[0].key if keys else (await db.api_keys.create(new_api_key(), user_id)).key
+
     await message.answer(
         f"🔌 **NotaryTON API**\n\n"
-        f"**Your API Key:** `{user_id}`\n\n"
+        f"**Your API Key:** `{api_key}`\n"
+        f"**Limit:** {api_gateway.daily_limit} requests/day\n\n"
         f"**Endpoints:**\n"
         f"• POST {WEBHOOK_URL}/api/v1/notarize\n"
         f"• POST {WEBHOOK_URL}/api/v1/batch\n"
@@ -1626,7 +1628,7 @@ async def cmd_api(message: types.Message):
         f"curl -X POST {WEBHOOK_URL}/api/v1/notarize \\\n"
         f"  -H 'Content-Type: application/json' \\\n"
         f"  -d '{{\n"
-        f"    \"api_key\": \"{user_id}\",\n"
+        f"    \"api_key\": \"{api_key}\",\n"
         f"    \"contract_address\": \"EQ...\",\n"
         f"    \"metadata\": {{\"project_name\": \"MyCoin\"}}\n"
         f"  }}'\n"
@@ -1732,7 +1734,7 @@ async def handle_text_message(message: types.Message):
     elif re.match(hash_pattern, text):
         # User is trying to verify a hash
         try:
-            notarization = await db.notarizations.get_by_hash(text)
+            notarization = await verify_cache.lookup(db, text)
             if notarization:
                 await message.reply(
                     f"✅ **VERIFIED**\n\n"
@@ -1788,36 +1790,32 @@ async def handle_text_message(message: types.Message):
             )
         return
 
-    # Notarize the contract
+    # Notarize the contract (sealed by the seal workers)
     try:
-        await message.reply("⏳ Fetching contract and sealing on TON...")
-
-        contract_code = await get_contract_code_from_tx(contract_id)
-        if not contract_code:
-            await message.reply(
-                "❌ **Could not fetch contract**\n\n"
-                "Make sure the address is valid and the contract is deployed.",
-                parse_mode="Markdown"
+        progress_msg = await message.reply("⏳ Fetching contract and sealing on TON...")
+
+        await seal_workers.enqueue(db, user_id, contract_id, {
+            "kind": "contract",
+            "contract_id": contract_id,
+            "comment": "NotaryTON:Contract:{hash16}",
+            "amount_ton": TON_SINGLE_SEAL,
+            "charge": 0 if has_sub else TON_SINGLE_SEAL,
+            "reply": seal_reply(
+                progress_msg,
+                bot_name="notaryton",
+                success=(
+                    f"✅ **SEALED!**\n\n"
+                    f"Contract: `{contract_id[:30]}...`\n"
+                    "Hash: `{hash}`\n\n"
+                    f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{{hash}}\n\n"
+                    "Sealed on TON blockchain forever! 🔒"
+                ),
+                failure=(
+                    "❌ **Could not seal contract**\n\n"
+                    "Make sure the address is valid and the contract is deployed."
+                )
             )
-            return
-
-        contract_hash = hash_data(contract_code)
-        comment = f"NotaryTON:Contract:{contract_hash[:16]}"
-        await send_ton_transaction(comment, amount_ton=TON_SINGLE_SEAL)
-        await log_notarization(user_id, contract_id, contract_hash, paid=True)
-
-        # Deduct credit if not subscription
-        if not has_sub:
-            await deduct_credit(user_id)
-
-        await message.reply(
-            f"✅ **SEALED!**\n\n"
-            f"Contract: `{contract_id[:30]}...`\n"
-            f"Hash: `{contract_hash}`\n\n"
-            f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{contract_hash}\n\n"
-            f"Sealed on TON blockchain forever! 🔒",
-            parse_mode="Markdown"
-        )
+        })
     except Exception as e:
         await message.reply(f"❌ Error notarizing: {str(e)}")
 
@@ -1839,42 +1837,32 @@ async def handle_document(message: types.Message):
         )
         return
 
-    # Download file
-    file_id = message.document.file_id
-    file = await bot.get_file(file_id)
-    file_path = f"downloads/{file_id}"
-    os.makedirs("downloads", exist_ok=True)
-    await bot.download_file(file.file_path, file_path)
-
-    # Hash it
-    file_hash = hash_file(file_path)
-    comment = f"NotaryTON:File:{file_hash[:16]}"
-
+    # Queue the seal (download, hash and send happen in the seal workers)
     try:
-        await send_ton_transaction(comment)
-        await log_notarization(user_id, "manual_file", file_hash, paid=True)
-
-        # Deduct credit if not subscription
-        if not has_sub:
-            await deduct_credit(user_id)
-
-        await message.answer(
-            f"✅ **SEALED!**\n\n"
-            f"File: `{message.document.file_name}`\n"
-            f"Hash: `{file_hash}`\n\n"
-            f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{file_hash}\n\n"
-            f"Proof stored on TON blockchain forever! 🔒",
-            parse_mode="Markdown"
-        )
+        progress_msg = await message.answer("⏳ Sealing on TON...")
+        await seal_workers.enqueue(db, user_id, "manual_file", {
+            "kind": "file",
+            "file_id": message.document.file_id,
+            "file_type": "document",
+            "bot": "notaryton",
+            "comment": "NotaryTON:File:{hash16}",
+            "charge": 0 if has_sub else TON_SINGLE_SEAL,
+            "reply": seal_reply(
+                progress_msg,
+                bot_name="notaryton",
+                success=(
+                    f"✅ **SEALED!**\n\n"
+                    f"File: `{message.document.file_name}`\n"
+                    "Hash: `{hash}`\n\n"
+                    f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{{hash}}\n\n"
+                    "Proof stored on TON blockchain forever! 🔒"
+                ),
+                failure="❌ **Seal failed**\n\nThe TON network is busy - please send the file again."
+            )
+        })
     except Exception as e:
         await message.answer(f"❌ Error: {str(e)}")
 
-    # Clean up
-    try:
-        os.remove(file_path)
-    except Exception:
-        pass
-
 
 @dp.message(F.photo)
 async def handle_photo(message: types.Message):
@@ -1892,38 +1880,31 @@ async def handle_photo(message: types.Message):
         )
         return
 
-    # Download largest photo
-    photo = message.photo[-1]
-    file = await bot.get_file(photo.file_id)
-    file_path = f"downloads/{photo.file_id}.jpg"
-    os.makedirs("downloads", exist_ok=True)
-    await bot.download_file(file.file_path, file_path)
-
-    file_hash = hash_file(file_path)
-    comment = f"NotaryTON:Screenshot:{file_hash[:12]}"
-
+    # Queue the largest photo
     try:
-        await send_ton_transaction(comment)
-        await log_notarization(user_id, "screenshot", file_hash, paid=True)
-
-        if not has_sub:
-            await deduct_credit(user_id)
-
-        await message.answer(
-            f"✅ **SCREENSHOT SEALED!**\n\n"
-            f"Hash: `{file_hash}`\n\n"
-            f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{file_hash}\n\n"
-            f"Proof secured on TON forever! 🔒",
-            parse_mode="Markdown"
-        )
+        progress_msg = await message.answer("⏳ Sealing on TON...")
+        await seal_workers.enqueue(db, user_id, "screenshot", {
+            "kind": "file",
+            "file_id": message.photo[-1].file_id,
+            "file_type": "photo",
+            "bot": "notaryton",
+            "comment": "NotaryTON:Screenshot:{hash12}",
+            "charge": 0 if has_sub else TON_SINGLE_SEAL,
+            "reply": seal_reply(
+                progress_msg,
+                bot_name="notaryton",
+                success=(
+                    "✅ **SCREENSHOT SEALED!**\n\n"
+                    "Hash: `{hash}`\n\n"
+                    f"🔗 Verify: {WEBHOOK_URL}/api/v1/verify/{{hash}}\n\n"
+                    "Proof secured on TON forever! 🔒"
+                ),
+                failure="❌ **Seal failed**\n\nThe TON network is busy - please send the screenshot again."
+            )
+        })
     except Exception as e:
         await message.answer(f"❌ Error: {str(e)}")
 
-    try:
-        os.remove(file_path)
-    except Exception:
-        pass
-
 
 # ========================
 # MEMESEAL TON HANDLERS (Degen branding)
@@ -2099,121 +2080,39 @@ if memeseal_dp:
             parse_mode="Markdown"
         )
 
-        # 🔥 BACKGROUND SEAL - do the actual work
-        asyncio.create_task(background_seal_ton(
-            user_id=user_id,
-            file_info=file_info,
-            message_to_edit=progress_msg
-        ))
-
-
-    async def background_seal_ton(user_id: int, file_info: dict, message_to_edit):
-        """Background task to seal file and update message with real link"""
-        file_hash = None
-        file_path = None
-
-        try:
-            # Download file
-            file_id = file_info["file_id"]
-            file_type = file_info["file_type"]
-
-            if file_type == "photo":
-                file = await memeseal_bot.get_file(file_id)
-                file_path = f"downloads/{file_id}.jpg"
-            else:
-                file = await memeseal_bot.get_file(file_id)
-                file_path = f"downloads/{file_id}"
-
-            os.makedirs("downloads", exist_ok=True)
-            await memeseal_bot.download_file(file.file_path, file_path)
-            file_hash = hash_file(file_path)
-
-            # Try to seal with retries
-            comment = f"MemeSeal:{file_hash[:16]}"
-            sealed = False
-
-            for attempt in range(5):
-                try:
-                    await send_ton_transaction(comment)
-                    sealed = True
-                    break
-                except Exception as e:
-                    error_str = str(e).lower()
-                    print(f"⚠️ Seal attempt {attempt+1}/5 failed: {e}")
-
-                    # Contract not initialized - try self-deploy
-                    if "not initialized" in error_str or "-256" in error_str:
-                        if attempt == 2:  # After 3rd fail, try deploy
-                            print("🔧 Attempting wallet self-deploy...")
-                            try:
-                                await send_ton_transaction("MemeSeal:Deploy", amount_ton=0.01)
-                                await asyncio.sleep(10)
-                            except:
-                                pass
-
-                    await asyncio.sleep(10)
-
-            if sealed:
-                await log_notarization(user_id, "memeseal_ton_instant", file_hash, paid=True)
-                await db.lottery.add_entry(user_id, amount_stars=1)
-                ticket_count = await db.lottery.count_user_entries(user_id)
-
-                # ✅ UPDATE MESSAGE WITH REAL LINK
-                await message_to_edit.edit_text(
-                    f"🚨 **TON PAYMENT CONFIRMED** 🟢\n\n"
-                    f"✅ **SEALED FOREVER!** 🐸⚡\n\n"
-                    f"Hash: `{file_hash}`\n"
-                    f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                    f"🎰 Lottery tickets: {ticket_count}\n"
-                    f"💰 Pot grew +0.003 TON\n\n"
-                    f"**Screenshot this. Post it. Become legend.**",
-                    parse_mode="Markdown"
-                )
-                asyncio.create_task(announce_seal_to_socials(file_hash))
-            else:
-                # ❌ All retries failed - show retry button
-                retry_keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-                    [types.InlineKeyboardButton(text="🔄 Try Again", callback_data="ms_retry_seal")],
-                    [types.InlineKeyboardButton(text="⭐ Use Stars Instead", callback_data="ms_pay_stars_single")]
-                ])
-                await message_to_edit.edit_text(
-                    f"⚠️ **TON Network Busy**\n\n"
-                    f"We tried 5 times but the network is congested.\n\n"
-                    f"**Your options:**\n"
-                    f"• Tap 'Try Again' in 30 seconds\n"
-                    f"• Use Stars for guaranteed instant seal\n\n"
-                    f"_Your file is safe - just try again!_",
-                    parse_mode="Markdown",
-                    reply_markup=retry_keyboard
-                )
-                # Store file for retry
-                pending_files[user_id] = file_info
-
-        except Exception as e:
-            print(f"❌ Background seal error: {e}")
-            # Agent 9: ALWAYS notify user of failures
-            retry_keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-                [types.InlineKeyboardButton(text="🔄 Try Again", callback_data="ms_retry_seal")],
-                [types.InlineKeyboardButton(text="⭐ Use Stars Instead", callback_data="ms_pay_stars_single")]
-            ])
-            try:
-                error_msg = get_user_friendly_error(e, "Sealing your file")
-                await message_to_edit.edit_text(
-                    error_msg,
-                    parse_mode="Markdown",
-                    reply_markup=retry_keyboard
+        # 🔥 QUEUE THE SEAL - a seal worker does the actual work
+        await seal_workers.enqueue(db, user_id, "memeseal_ton_instant", {
+            "kind": "file",
+            "file_id": file_info["file_id"],
+            "file_type": file_info["file_type"],
+            "bot": "memeseal",
+            "comment": "MemeSeal:{hash16}",
+            "lottery_stars": 1,
+            "announce": True,
+            "reply": seal_reply(
+                progress_msg,
+                bot_name="memeseal",
+                retry=True,
+                success=(
+                    "🚨 **TON PAYMENT CONFIRMED** 🟢\n\n"
+                    "✅ **SEALED FOREVER!** 🐸⚡\n\n"
+                    "Hash: `{hash}`\n"
+                    "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                    "🎰 Lottery tickets: {tickets}\n"
+                    "💰 Pot grew +0.003 TON\n\n"
+                    "**Screenshot this. Post it. Become legend.**"
+                ),
+                failure=(
+                    "⚠️ **TON Network Busy**\n\n"
+                    "We tried 5 times but the network is congested.\n\n"
+                    "**Your options:**\n"
+                    "• Tap 'Try Again' in 30 seconds\n"
+                    "• Use Stars for guaranteed instant seal\n\n"
+                    "_Your file is safe - just try again!_"
                 )
-                # Store file for retry
-                pending_files[user_id] = file_info
-            except:
-                pass
+            )
+        })
 
-        finally:
-            if file_path:
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
 
     @memeseal_dp.pre_checkout_query()
     async def memeseal_pre_checkout(pre_checkout_query: PreCheckoutQuery):
@@ -2258,13 +2157,8 @@ if memeseal_dp:
                     parse_mode="Markdown"
                 )
 
-                # Seal in background
-                asyncio.create_task(background_seal_stars(
-                    user_id=user_id,
-                    file_info=file_info,
-                    message_to_edit=progress_msg,
-                    ticket_count=ticket_count
-                ))
+                # Seal in the seal workers
+                await queue_stars_seal(user_id, file_info, progress_msg)
             else:
                 await db.users.add_payment(user_id, TON_SINGLE_SEAL)
                 await message.answer(
@@ -2278,83 +2172,36 @@ if memeseal_dp:
                 )
 
 
-    async def background_seal_stars(user_id: int, file_info: dict, message_to_edit, ticket_count: int):
-        """Background task to seal file paid with Stars"""
-        file_hash = None
-        file_path = None
-
-        try:
-            file_id = file_info["file_id"]
-            file_type = file_info["file_type"]
-
-            if file_type == "photo":
-                file = await memeseal_bot.get_file(file_id)
-                file_path = f"downloads/{file_id}.jpg"
-            else:
-                file = await memeseal_bot.get_file(file_id)
-                file_path = f"downloads/{file_id}"
-
-            os.makedirs("downloads", exist_ok=True)
-            await memeseal_bot.download_file(file.file_path, file_path)
-            file_hash = hash_file(file_path)
-
-            comment = f"MemeSeal:{file_hash[:16]}"
-            await send_ton_transaction(comment)
-            await log_notarization(user_id, "memeseal_stars_instant", file_hash, paid=True)
-
-            # ✅ UPDATE WITH REAL LINK
-            await message_to_edit.edit_text(
-                f"🚨 **STAR PAYMENT CONFIRMED** 🟢\n\n"
-                f"✅ **SEALED FOREVER!** 🐸⚡\n\n"
-                f"Hash: `{file_hash}`\n"
-                f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                f"🎰 Lottery tickets: {ticket_count}\n"
-                f"💰 Pot grew +0.002 TON\n\n"
-                f"**Screenshot this. Post it. Become legend.**",
-                parse_mode="Markdown"
+    async def queue_stars_seal(user_id: int, file_info: dict, progress_msg):
+        """Queue a seal already paid with Stars (lottery tickets were added at payment)"""
+        await seal_workers.enqueue(db, user_id, "memeseal_stars_instant", {
+            "kind": "file",
+            "file_id": file_info["file_id"],
+            "file_type": file_info["file_type"],
+            "bot": "memeseal",
+            "comment": "MemeSeal:{hash16}",
+            "announce": True,
+            "reply": seal_reply(
+                progress_msg,
+                bot_name="memeseal",
+                retry=True,
+                success=(
+                    "🚨 **STAR PAYMENT CONFIRMED** 🟢\n\n"
+                    "✅ **SEALED FOREVER!** 🐸⚡\n\n"
+                    "Hash: `{hash}`\n"
+                    "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                    "🎰 Lottery tickets: {tickets}\n"
+                    "💰 Pot grew +0.002 TON\n\n"
+                    "**Screenshot this. Post it. Become legend.**"
+                ),
+                failure=(
+                    "⚠️ **Network Delay**\n\n"
+                    "Payment received but the seal didn't go through.\n\n"
+                    "**Your payment is safe** - tap Retry to seal it.\n"
+                    "🎰 Lottery tickets: {tickets}"
+                )
             )
-            asyncio.create_task(announce_seal_to_socials(file_hash))
-
-        except Exception as e:
-            print(f"❌ Stars seal error: {e}")
-            # Agent 9: Notify user with retry option (they paid, we owe them!)
-            retry_keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-                [types.InlineKeyboardButton(text="🔄 Retry Seal", callback_data="ms_retry_seal")]
-            ])
-            if file_hash:
-                try:
-                    await message_to_edit.edit_text(
-                        f"⚠️ **Network Delay**\n\n"
-                        f"Payment received but seal pending.\n\n"
-                        f"Hash: `{file_hash}`\n\n"
-                        f"**Your seal is queued** - tap Retry or wait 30s.\n"
-                        f"🎰 Lottery tickets: {ticket_count}\n\n"
-                        f"_We'll keep trying automatically!_",
-                        parse_mode="Markdown",
-                        reply_markup=retry_keyboard
-                    )
-                    # Store for retry
-                    pending_files[user_id] = file_info
-                except:
-                    pass
-            else:
-                try:
-                    error_msg = get_user_friendly_error(e, "Processing your file")
-                    await message_to_edit.edit_text(
-                        error_msg,
-                        parse_mode="Markdown",
-                        reply_markup=retry_keyboard
-                    )
-                    pending_files[user_id] = file_info
-                except:
-                    pass
-
-        finally:
-            if file_path:
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
+        })
 
     # Agent 9: Retry handler for failed seals
     @memeseal_dp.callback_query(F.data == "ms_retry_seal")
@@ -2383,14 +2230,8 @@ if memeseal_dp:
             parse_mode="Markdown"
         )
 
-        # Retry in background
-        ticket_count = await db.lottery.count_user_entries(user_id)
-        asyncio.create_task(background_seal_stars(
-            user_id=user_id,
-            file_info=file_info,
-            message_to_edit=progress_msg,
-            ticket_count=ticket_count
-        ))
+        # Retry in the seal workers
+        await queue_stars_seal(user_id, file_info, progress_msg)
 
     @memeseal_dp.message(Command("api"))
     async def memeseal_api(message: types.Message):
@@ -2512,36 +2353,31 @@ if memeseal_dp:
             pending = pending_ton_payments[user_id]
             if time.time() - pending["timestamp"] < 600:  # 10 min window
                 # AUTO-SEAL: User clicked "Pay with TON" and is now sending the file
-                file_id = message.document.file_id
-                file = await memeseal_bot.get_file(file_id)
-                file_path = f"downloads/{file_id}"
-                os.makedirs("downloads", exist_ok=True)
-                await memeseal_bot.download_file(file.file_path, file_path)
-
-                file_hash = hash_file(file_path)
-                comment = f"MemeSeal:{file_hash[:16]}"
-
                 try:
-                    await send_ton_transaction(comment)
-                    await log_notarization(user_id, "memeseal_file_ton", file_hash, paid=True)
+                    progress_msg = await message.answer("⏳ Sealing to TON...")
+                    await seal_workers.enqueue(db, user_id, "memeseal_file_ton", {
+                        "kind": "file",
+                        "file_id": message.document.file_id,
+                        "file_type": "document",
+                        "bot": "memeseal",
+                        "comment": "MemeSeal:{hash16}",
+                        "announce": True,
+                        "reply": seal_reply(
+                            progress_msg,
+                            bot_name="memeseal",
+                            success=(
+                                "⚡ **TON PAYMENT DETECTED** ⚡\n\n"
+                                f"File: `{message.document.file_name}`\n"
+                                "Hash: `{hash}`\n\n"
+                                "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                                "Sealed forever. Memo matched. 🐸🎰"
+                            ),
+                            failure="❌ **Seal failed**\n\nThe TON network is busy - send the file again to retry."
+                        )
+                    })
                     del pending_ton_payments[user_id]
-
-                    await message.answer(
-                        f"⚡ **TON PAYMENT DETECTED** ⚡\n\n"
-                        f"File: `{message.document.file_name}`\n"
-                        f"Hash: `{file_hash}`\n\n"
-                        f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                        f"Sealed forever. Memo matched. 🐸🎰",
-                        parse_mode="Markdown"
-                    )
-                    asyncio.create_task(announce_seal_to_socials(file_hash))
                 except Exception as e:
                     await message.answer(f"❌ Seal failed: {str(e)}")
-
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
                 return
             else:
                 del pending_ton_payments[user_id]  # Expired
@@ -2578,43 +2414,33 @@ if memeseal_dp:
             )
             return
 
-        # Download and seal
-        file_id = message.document.file_id
-        file = await memeseal_bot.get_file(file_id)
-        file_path = f"downloads/{file_id}"
-        os.makedirs("downloads", exist_ok=True)
-        await memeseal_bot.download_file(file.file_path, file_path)
-
-        file_hash = hash_file(file_path)
-        comment = f"MemeSeal:{file_hash[:16]}"
-
+        # Queue the seal (📣 announced to X + Telegram channel once sealed)
         try:
-            await send_ton_transaction(comment)
-            await log_notarization(user_id, "memeseal_file", file_hash, paid=True)
-
-            if not has_sub:
-                await db.users.deduct_payment(user_id, TON_SINGLE_SEAL)
-
-            await message.answer(
-                f"⚡ **SEALED** ⚡\n\n"
-                f"File: `{message.document.file_name}`\n"
-                f"Hash: `{file_hash}`\n\n"
-                f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                f"On TON forever. Receipts secured. 🐸",
-                parse_mode="Markdown"
-            )
-
-            # 📣 ANNOUNCE TO X + TELEGRAM CHANNEL
-            asyncio.create_task(announce_seal_to_socials(file_hash))
-
+            progress_msg = await message.answer("⏳ Sealing to TON...")
+            await seal_workers.enqueue(db, user_id, "memeseal_file", {
+                "kind": "file",
+                "file_id": message.document.file_id,
+                "file_type": "document",
+                "bot": "memeseal",
+                "comment": "MemeSeal:{hash16}",
+                "charge": 0 if has_sub else TON_SINGLE_SEAL,
+                "announce": True,
+                "reply": seal_reply(
+                    progress_msg,
+                    bot_name="memeseal",
+                    success=(
+                        "⚡ **SEALED** ⚡\n\n"
+                        f"File: `{message.document.file_name}`\n"
+                        "Hash: `{hash}`\n\n"
+                        "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                        "On TON forever. Receipts secured. 🐸"
+                    ),
+                    failure="❌ **Seal failed**\n\nThe TON network is busy - send the file again to retry."
+                )
+            })
         except Exception as e:
             await message.answer(f"❌ Seal failed: {str(e)}")
 
-        try:
-            os.remove(file_path)
-        except Exception:
-            pass
-
     @memeseal_dp.message(F.photo)
     async def memeseal_handle_photo(message: types.Message):
         """Handle screenshots/photos"""
@@ -2625,35 +2451,30 @@ if memeseal_dp:
             pending = pending_ton_payments[user_id]
             if time.time() - pending["timestamp"] < 600:  # 10 min window
                 # AUTO-SEAL: User clicked "Pay with TON" and is now sending the photo
-                photo = message.photo[-1]
-                file = await memeseal_bot.get_file(photo.file_id)
-                file_path = f"downloads/{photo.file_id}.jpg"
-                os.makedirs("downloads", exist_ok=True)
-                await memeseal_bot.download_file(file.file_path, file_path)
-
-                file_hash = hash_file(file_path)
-                comment = f"MemeSeal:Screenshot:{file_hash[:12]}"
-
                 try:
-                    await send_ton_transaction(comment)
-                    await log_notarization(user_id, "memeseal_photo_ton", file_hash, paid=True)
+                    progress_msg = await message.answer("⏳ Sealing to TON...")
+                    await seal_workers.enqueue(db, user_id, "memeseal_photo_ton", {
+                        "kind": "file",
+                        "file_id": message.photo[-1].file_id,
+                        "file_type": "photo",
+                        "bot": "memeseal",
+                        "comment": "MemeSeal:Screenshot:{hash12}",
+                        "announce": True,
+                        "reply": seal_reply(
+                            progress_msg,
+                            bot_name="memeseal",
+                            success=(
+                                "⚡ **TON PAYMENT DETECTED** ⚡\n\n"
+                                "Hash: `{hash}`\n\n"
+                                "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                                "Screenshot sealed. Memo matched. 🐸🎰"
+                            ),
+                            failure="❌ **Seal failed**\n\nThe TON network is busy - send the screenshot again to retry."
+                        )
+                    })
                     del pending_ton_payments[user_id]
-
-                    await message.answer(
-                        f"⚡ **TON PAYMENT DETECTED** ⚡\n\n"
-                        f"Hash: `{file_hash}`\n\n"
-                        f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                        f"Screenshot sealed. Memo matched. 🐸🎰",
-                        parse_mode="Markdown"
-                    )
-                    asyncio.create_task(announce_seal_to_socials(file_hash))
                 except Exception as e:
                     await message.answer(f"❌ Seal failed: {str(e)}")
-
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
                 return
             else:
                 del pending_ton_payments[user_id]  # Expired
@@ -2689,42 +2510,32 @@ if memeseal_dp:
             )
             return
 
-        # Download largest photo
-        photo = message.photo[-1]
-        file = await memeseal_bot.get_file(photo.file_id)
-        file_path = f"downloads/{photo.file_id}.jpg"
-        os.makedirs("downloads", exist_ok=True)
-        await memeseal_bot.download_file(file.file_path, file_path)
-
-        file_hash = hash_file(file_path)
-        comment = f"MemeSeal:Screenshot:{file_hash[:12]}"
-
+        # Queue the largest photo (📣 announced to X + Telegram channel once sealed)
         try:
-            await send_ton_transaction(comment)
-            await log_notarization(user_id, "memeseal_photo", file_hash, paid=True)
-
-            if not has_sub:
-                await db.users.deduct_payment(user_id, TON_SINGLE_SEAL)
-
-            await message.answer(
-                f"⚡ **SCREENSHOT SEALED** ⚡\n\n"
-                f"Hash: `{file_hash}`\n\n"
-                f"🔗 Verify: notaryton.com/api/v1/verify/{file_hash}\n\n"
-                f"Proof secured. Now flex it. 🐸",
-                parse_mode="Markdown"
-            )
-
-            # 📣 ANNOUNCE TO X + TELEGRAM CHANNEL
-            asyncio.create_task(announce_seal_to_socials(file_hash))
-
+            progress_msg = await message.answer("⏳ Sealing to TON...")
+            await seal_workers.enqueue(db, user_id, "memeseal_photo", {
+                "kind": "file",
+                "file_id": message.photo[-1].file_id,
+                "file_type": "photo",
+                "bot": "memeseal",
+                "comment": "MemeSeal:Screenshot:{hash12}",
+                "charge": 0 if has_sub else TON_SINGLE_SEAL,
+                "announce": True,
+                "reply": seal_reply(
+                    progress_msg,
+                    bot_name="memeseal",
+                    success=(
+                        "⚡ **SCREENSHOT SEALED** ⚡\n\n"
+                        "Hash: `{hash}`\n\n"
+                        "🔗 Verify: notaryton.com/api/v1/verify/{hash}\n\n"
+                        "Proof secured. Now flex it. 🐸"
+                    ),
+                    failure="❌ **Seal failed**\n\nThe TON network is busy - send the screenshot again to retry."
+                )
+            })
         except Exception as e:
             await message.answer(f"❌ Seal failed: {str(e)}")
 
-        try:
-            os.remove(file_path)
-        except Exception:
-            pass
-
 # ========================
 # FASTAPI ENDPOINTS
 # ========================
@@ -2798,9 +2609,12 @@ async def tonapi_webhook(request: Request):
                 account = tx.get("account", {})
                 account_address = account.get("address", "")
 
-                # Normalize addresses for comparison
-                our_wallet = SERVICE_TON_WALLET.replace("UQ", "").replace("EQ", "").lower()
-                tx_wallet = account_address.replace("0:", "").lower()
+                # Compare in any address form (TonAPI sends raw "0:..."). Without a
+                # usable service wallet the filter is skipped (warned at startup)
+                # rather than dropping every payment.
+                if (account_address and SERVICE_WALLET_KEY is not None
+                        and address_key(account_address) != SERVICE_WALLET_KEY):
+                    continue
 
                 # Extract incoming message
                 in_msg = tx.get("in_msg", {})
@@ -2857,12 +2671,14 @@ async def tonapi_webhook(request: Request):
                         pass
 
                 if user_id:
+                    tx_hash = tx.get("hash") or None
+
                     # Credit referrer with 5% commission
                     user = await db.users.get(user_id)
                     if user and user.referred_by:
                         referrer_id = user.referred_by
                         commission = amount_ton * 0.05
-                        await db.users.add_referral_earnings(referrer_id, commission)
+                        await db.users.add_referral_earnings(referrer_id, commission, source_tx=tx_hash)
                         print(f"💰 Credited {commission:.4f} TON to referrer {referrer_id}")
 
                     # Check payment type (subscription vs single)
@@ -2874,26 +2690,23 @@ async def tonapi_webhook(request: Request):
                         ticket_count = await db.lottery.count_user_entries(user_id)
 
                         # Notify user instantly!
-                        for b in [bot, memeseal_bot]:
-                            if b:
-                                try:
-                                    await b.send_message(
-                                        user_id,
-                                        f"🚨 **INSTANT PAYMENT DETECTED!** 🟢\n\n"
-                                        f"✅ {amount_ton:.3f} TON received\n"
-                                        f"✅ Subscription activated (30 days)\n\n"
-                                        f"🎰 **+20 LOTTERY TICKETS!** (Total: {ticket_count})\n\n"
-                                        f"Send me anything to seal! 🐸⚡",
-                                        parse_mode="Markdown"
-                                    )
-                                except:
-                                    pass
+                        telegram_sender.submit(
+                            user_id,
+                            f"🚨 **INSTANT PAYMENT DETECTED!** 🟢\n\n"
+                            f"✅ {amount_ton:.3f} TON received\n"
+                            f"✅ Subscription activated (30 days)\n\n"
+                            f"🎰 **+20 LOTTERY TICKETS!** (Total: {ticket_count})\n\n"
+                            f"Send me anything to seal! 🐸⚡",
+                            bots=[bot, memeseal_bot],
+                            priority=Priority.PAYMENT,
+                            parse_mode="Markdown"
+                        )
 
                         print(f"⚡ INSTANT: Activated subscription for user {user_id}")
 
                     elif amount_ton >= TON_SINGLE_SEAL * 0.9:  # Single seal (with small variance)
                         await db.users.ensure_exists(user_id)
-                        await db.users.add_payment(user_id, amount_ton)
+                        await db.users.add_payment(user_id, amount_ton, source_tx=tx_hash)
 
                         # 🎰 LOTTERY: Add entry
                         await db.lottery.add_entry(user_id, amount_stars=1)
@@ -2909,56 +2722,69 @@ async def tonapi_webhook(request: Request):
                                 file_type = pending.get("file_type", "document")
                                 del pending_ton_payments[user_id]
 
-                                # Send progress message and trigger seal
-                                progress_msg = None
-                                for b in [memeseal_bot, bot]:
-                                    if b:
-                                        try:
-                                            progress_msg = await b.send_message(
-                                                user_id,
-                                                f"🚨 **PAYMENT DETECTED!** 🟢\n\n"
-                                                f"✅ {amount_ton:.4f} TON received\n"
-                                                f"⏳ Sealing your file now...",
-                                                parse_mode="Markdown"
-                                            )
-                                            break
-                                        except:
-                                            pass
-
-                                # Trigger seal using module-level function
-                                asyncio.create_task(seal_file_from_webhook(user_id, file_id, file_type, progress_msg))
+                                # Send progress message and queue the seal
+                                try:
+                                    progress_msg = await telegram_sender.send(
+                                        user_id,
+                                        f"🚨 **PAYMENT DETECTED!** 🟢\n\n"
+                                        f"✅ {amount_ton:.4f} TON received\n"
+                                        f"⏳ Sealing your file now...",
+                                        bots=[memeseal_bot, bot],
+                                        priority=Priority.PAYMENT,
+                                        parse_mode="Markdown"
+                                    )
+                                except Exception:
+                                    progress_msg = None
+
+                                await seal_workers.enqueue(db, user_id, "webhook_ton_instant", {
+                                    "kind": "file",
+                                    "file_id": file_id,
+                                    "file_type": file_type,
+                                    "bot": "memeseal" if memeseal_bot else "notaryton",
+                                    "comment": "MemeSeal:{hash16}",
+                                    "announce": True,
+                                    "reply": seal_reply(
+                                        progress_msg,
+                                        success=(
+                                            "✅ **SEALED TO BLOCKCHAIN!** 🐸\n\n"
+                                            "**Hash:** `{hash16}...`\n\n"
+                                            "[View on TONScan](https://tonscan.org/) | "
+                                            "[Verify](https://notaryton.com/verify?hash={hash})\n\n"
+                                            "On TON forever. Receipts secured."
+                                        ),
+                                        failure=(
+                                            "⚠️ **Network Busy**\n\n"
+                                            "Seal failed after 5 attempts.\n"
+                                            "Your payment is credited - send the file again to retry!"
+                                        )
+                                    ) if progress_msg else None
+                                })
                                 print(f"⚡ INSTANT: Auto-sealing file for user {user_id}")
                             else:
                                 # Payment received but no file - just notify
-                                for b in [bot, memeseal_bot]:
-                                    if b:
-                                        try:
-                                            await b.send_message(
-                                                user_id,
-                                                f"🚨 **INSTANT PAYMENT DETECTED!** 🟢\n\n"
-                                                f"✅ {amount_ton:.4f} TON received\n"
-                                                f"✅ Credit added to your account\n\n"
-                                                f"🎰 **+1 LOTTERY TICKET!** (Total: {ticket_count})\n\n"
-                                                f"Now send me what you want sealed! 🐸",
-                                                parse_mode="Markdown"
-                                            )
-                                        except:
-                                            pass
+                                telegram_sender.submit(
+                                    user_id,
+                                    f"🚨 **INSTANT PAYMENT DETECTED!** 🟢\n\n"
+                                    f"✅ {amount_ton:.4f} TON received\n"
+                                    f"✅ Credit added to your account\n\n"
+                                    f"🎰 **+1 LOTTERY TICKET!** (Total: {ticket_count})\n\n"
+                                    f"Now send me what you want sealed! 🐸",
+                                    bots=[bot, memeseal_bot],
+                                    priority=Priority.PAYMENT,
+                                    parse_mode="Markdown"
+                                )
                         else:
                             # Generic credit notification
-                            for b in [bot, memeseal_bot]:
-                                if b:
-                                    try:
-                                        await b.send_message(
-                                            user_id,
-                                            f"✅ **Payment Received!**\n\n"
-                                            f"{amount_ton:.4f} TON credited\n"
-                                            f"🎰 +1 lottery ticket (Total: {ticket_count})\n\n"
-                                            f"Send me a file to seal it! 🐸",
-                                            parse_mode="Markdown"
-                                        )
-                                    except:
-                                        pass
+                            telegram_sender.submit(
+                                user_id,
+                                f"✅ **Payment Received!**\n\n"
+                                f"{amount_ton:.4f} TON credited\n"
+                                f"🎰 +1 lottery ticket (Total: {ticket_count})\n\n"
+                                f"Send me a file to seal it! 🐸",
+                                bots=[bot, memeseal_bot],
+                                priority=Priority.PAYMENT,
+                                parse_mode="Markdown"
+                            )
 
                         print(f"⚡ INSTANT: Credited {amount_ton:.4f} TON to user {user_id}")
 
@@ -3171,6 +2997,7 @@ async def api_memescan_check(address: str):
                 "dev_wallet_percent": token.dev_wallet_percent,
                 "safety_level": token.safety_level.value,
                 "safety_warnings": token.safety_warnings,
+                "concentration": token.holder_metrics.as_dict() if token.holder_metrics else None,
             },
         }
     except Exception as e:
@@ -3201,18 +3028,10 @@ async def api_rugscore(address: str):
         if not (address.startswith("EQ") or address.startswith("UQ") or address.startswith("0:")):
             return {"success": False, "error": "Invalid TON address format", "score": 0}
 
-        # ENTITY DETECTION: Check known_wallets first
-        known = await db.wallets.get_wallet_label(address)
+        # ENTITY DETECTION: Check the in-memory label index first (no I/O)
+        known = label_index.get(address)
         if known:
-            import json
-            extra = {}
-            if known.notes:
-                try:
-                    extra = json.loads(known.notes)
-                except:
-                    pass
-
-            category = known.label
+            category = known.category
             entity_scores = {
                 'validator': 95, 'cex': 85, 'dex': 80, 'bridge': 75,
                 'liquid_staking': 80, 'lending': 75, 'infrastructure': 80,
@@ -3220,22 +3039,22 @@ async def api_rugscore(address: str):
                 'scammer': 0, 'scripted-activity': 40,
             }
 
-            if category == 'scammer':
-                subcategory = extra.get('subcategory', '')
-                warnings = [f"🚨 KNOWN SCAMMER: {known.owner_name or 'Unknown'}"]
+            if known.is_scammer:
+                subcategory = known.subcategory
+                warnings = [f"🚨 KNOWN SCAMMER: {known.name or 'Unknown'}"]
                 if subcategory:
                     warnings.append(f"⚠️ Type: {subcategory.replace('_', ' ').title()}")
-                if extra.get('description'):
-                    warnings.append(f"ℹ️ {extra['description']}")
+                if known.description:
+                    warnings.append(f"ℹ️ {known.description}")
 
                 return {
                     "success": True,
                     "score": 0,
                     "badge": "red",
                     "verdict": "SCAMMER",
-                    "token": {"address": address, "symbol": "⚠️", "name": known.owner_name or "SCAMMER", "holder_count": 0, "top_wallet_percent": 0},
+                    "token": {"address": address, "symbol": "⚠️", "name": known.name or "SCAMMER", "holder_count": 0, "top_wallet_percent": 0},
                     "warnings": warnings,
-                    "entityInfo": {"category": category, "label": known.owner_name, "website": extra.get('website')},
+                    "entityInfo": {"category": category, "label": known.name, "website": known.website},
                     "powered_by": "notaryton.com"
                 }
 
@@ -3249,12 +3068,12 @@ async def api_rugscore(address: str):
                 "score": score,
                 "badge": badge,
                 "verdict": verdict,
-                "token": {"address": address, "symbol": "✓", "name": known.owner_name or category.upper(), "holder_count": 0, "top_wallet_percent": 0},
+                "token": {"address": address, "symbol": "✓", "name": known.name or category.upper(), "holder_count": 0, "top_wallet_percent": 0},
                 "warnings": [],
                 "entityInfo": {
                     "category": category,
-                    "label": known.owner_name,
-                    "website": extra.get('website'),
+                    "label": known.name,
+                    "website": known.website,
                     "verified": True
                 },
                 "powered_by": "notaryton.com"
@@ -3310,6 +3129,7 @@ async def api_rugscore(address: str):
                 "holder_count": token.holder_count,
                 "top_wallet_percent": round(token.dev_wallet_percent, 1),
             },
+            "concentration": token.holder_metrics.as_dict() if token.holder_metrics else None,
             "warnings": token.safety_warnings,
             "powered_by": "notaryton.com"
         }
@@ -3342,11 +3162,103 @@ async def api_token_stats():
         return {"success": False, "error": str(e)}
 
 
+@app.get("/api/v1/crawler/stats")
+async def api_crawler_stats():
+    """
+    CRAWLER THROUGHPUT - crawl job queue depth and worker metrics.
+
+    `queue` is shared by every crawler process; `workers` and `stages`
+    cover this process only.
+    """
+    try:
+        queue = await db.crawl_jobs.get_stats()
+        return {
+            "success": True,
+            "queue": queue,
+            "workers": crawler.jobs.metrics.as_dict(),
+            "stages": dict(crawler.stage_counts),
+            "announce_failures": crawler.announce_failures,
+            "rechecks": {
+                "tracked": len(crawler.rechecks),
+                "checks": crawler.rechecks.checks,
+                "load_factor": round(crawler.rechecks.load_factor, 2),
+            },
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        print(f"❌ Crawler stats error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/api/v1/seal/stats")
+async def api_seal_stats():
+    """
+    SEAL QUEUE - seal job queue depth and worker metrics.
+
+    `queue` is shared by every process; `workers` covers this process only.
+    """
+    try:
+        return {
+            "success": True,
+            "queue": await db.seal_jobs.get_stats(),
+            "workers": seal_workers.metrics.as_dict(),
+            "confirmer": seal_confirmer.get_stats(),
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        print(f"❌ Seal stats error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/api/v1/chain/stats")
+async def api_chain_stats():
+    """
+    CHAIN - which backend is in use. For pytoniq: per-liteserver latency,
+    error rate and circuit state, plus hedging counters. Covers this
+    process only.
+    """
+    try:
+        return {
+            "success": True,
+            "backend": chain_backend.name,
+            **chain_backend.get_stats(),
+            "payouts": payout_reconciler.get_stats(),
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        print(f"❌ Chain stats error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/api/v1/notifications/stats")
+async def api_notification_stats():
+    """
+    NOTIFICATION BUS - outbox depth and delivery lag per channel.
+
+    `pending`/`failed`/`lag_seconds` come from the shared outbox; post
+    and merge counters and `telegram_sender` cover this process only.
+    """
+    try:
+        return {
+            "success": True,
+            "channels": await notification_bus.stats(),
+            "telegram_sender": telegram_sender.stats(),
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        print(f"❌ Notification stats error: {e}")
+        return {"success": False, "error": str(e)}
+
+
 @app.get("/api/v1/tokens/recent")
-async def api_recent_tokens(limit: int = 20):
-    """Get recently tracked tokens."""
+async def api_recent_tokens(limit: int = 20, cursor: str = None):
+    """Get recently tracked tokens. Pass `next_cursor` back as `cursor` for older pages."""
+    before = decode_cursor(cursor)
+    if cursor and before is None:
+        return {"success": False, "error": "Invalid cursor", "tokens": []}
     try:
-        tokens = await db.tokens.get_recent(limit=min(limit, 100))
+        limit = min(limit, 100)
+        tokens = await db.tokens.get_recent(limit=limit, before=before)
         return {
             "success": True,
             "tokens": [
@@ -3362,6 +3274,7 @@ async def api_recent_tokens(limit: int = 20):
                 }
                 for t in tokens
             ],
+            "next_cursor": next_cursor(tokens, limit, "first_seen", "address"),
             "powered_by": "notaryton.com"
         }
     except Exception as e:
@@ -3370,10 +3283,14 @@ async def api_recent_tokens(limit: int = 20):
 
 
 @app.get("/api/v1/tokens/rugged")
-async def api_rugged_tokens(limit: int = 20):
-    """Get tokens that have been detected as rugs."""
+async def api_rugged_tokens(limit: int = 20, cursor: str = None):
+    """Get tokens that have been detected as rugs. Pages with `cursor` like /tokens/recent."""
+    before = decode_cursor(cursor)
+    if cursor and before is None:
+        return {"success": False, "error": "Invalid cursor", "tokens": []}
     try:
-        tokens = await db.tokens.get_rugged(limit=min(limit, 100))
+        limit = min(limit, 100)
+        tokens = await db.tokens.get_rugged(limit=limit, before=before)
         return {
             "success": True,
             "count": len(tokens),
@@ -3388,6 +3305,7 @@ async def api_rugged_tokens(limit: int = 20):
                 }
                 for t in tokens
             ],
+            "next_cursor": next_cursor(tokens, limit, "rugged_at", "address"),
             "powered_by": "notaryton.com"
         }
     except Exception as e:
@@ -3395,6 +3313,106 @@ async def api_rugged_tokens(limit: int = 20):
         return {"success": False, "error": str(e), "tokens": []}
 
 
+@app.get("/api/v1/tokens/events")
+async def api_token_events(
+    type: str = None,
+    token: str = None,
+    hours: float = 24,
+    field: str = None,
+    min_value: float = None,
+    max_value: float = None,
+    limit: int = 50
+):
+    """
+    Query token events by type, time window and payload field.
+
+    Example - whale exits over 10% in the last hour:
+        /api/v1/tokens/events?type=whale_exit&hours=1&field=pct_sold&min_value=10
+    """
+    try:
+        events = await db.tokens.query_events(
+            event_type=type,
+            token_address=token,
+            since=datetime.now() - timedelta(hours=hours) if hours else None,
+            min_values={field: min_value} if field and min_value is not None else None,
+            max_values={field: max_value} if field and max_value is not None else None,
+            limit=min(limit, 100),
+        )
+        return {
+            "success": True,
+            "count": len(events),
+            "events": [
+                {
+                    "token_address": e.token_address,
+                    "type": e.event_type,
+                    "data": e.event_data,
+                    "created_at": e.created_at.isoformat() if e.created_at else None,
+                }
+                for e in events
+            ],
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        print(f"❌ Token events error: {e}")
+        return {"success": False, "error": str(e), "events": []}
+
+
+# ========================
+# BULK DATA EXPORT
+# ========================
+
+@app.get("/api/v1/export")
+async def api_export_index():
+    """Exportable datasets, formats and recent export throughput."""
+    return {
+        "success": True,
+        "datasets": list(EXPORT_DATASETS),
+        "formats": available_formats(),
+        "recent": [stats.as_dict() for stats in reversed(recent_exports)],
+        "powered_by": "notaryton.com"
+    }
+
+
+@app.get("/api/v1/export/{dataset}")
+async def api_export(dataset: str, api_key: str, format: str = "ndjson", since: str = None):
+    """
+    Stream a full or incremental dump of a token dataset.
+
+    GET /api/v1/export/events?api_key=<key>&format=csv&since=2025-12-01T00:00:00
+
+    Datasets: tokens, snapshots, events. Formats: ndjson, csv, parquet (if
+    pyarrow is installed). Rows are ordered by the dataset's watermark
+    column; pass the last row's value as `since` for the next pull.
+    """
+    if dataset not in EXPORT_DATASETS:
+        return {"success": False, "error": f"Unknown dataset (use one of: {', '.join(EXPORT_DATASETS)})"}
+    if format not in available_formats():
+        return {"success": False, "error": f"Unsupported format (use one of: {', '.join(available_formats())})"}
+    try:
+        since_dt = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return {"success": False, "error": "Invalid since (use ISO 8601)"}
+
+    try:
+        await api_gateway.authorize(
+            db, api_key, subscription_error="Subscription required for data export", allow_legacy=False
+        )
+    except ApiAuthError as e:
+        return e.response()
+    if export_slots.locked():
+        return JSONResponse(
+            {"success": False, "error": "Too many exports in progress, retry shortly"},
+            status_code=429, headers={"Retry-After": str(EXPORT_RETRY_AFTER)}
+        )
+
+    stats = ExportStats(dataset=dataset, fmt=format, since=since_dt)
+    return StreamingResponse(
+        stream_export(db, dataset, format, since_dt, stats),
+        media_type=EXPORT_CONTENT_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
+
+
 # ========================
 # LIVE TOKEN FEED - SSE
 # ========================
@@ -3846,15 +3864,20 @@ async def api_kol_detail(kol_id: int):
 
 
 @app.get("/api/v1/kols/calls/recent")
-async def api_kol_calls_recent(chain: str = None, limit: int = 50):
-    """Get recent KOL calls."""
+async def api_kol_calls_recent(chain: str = None, limit: int = 50, cursor: str = None):
+    """Get recent KOL calls. Pass `next_cursor` back as `cursor` for older pages."""
+    before = decode_cursor(cursor)
+    if cursor and before is None:
+        return {"success": False, "error": "Invalid cursor"}
     try:
         repo = await get_kol_repo()
-        calls = await repo.get_recent_calls(chain=chain, limit=min(limit, 100))
+        limit = min(limit, 100)
+        calls = await repo.get_recent_calls(chain=chain, limit=limit, before=before)
         return {
             "success": True,
             "count": len(calls),
             "calls": calls,
+            "next_cursor": next_cursor(calls, limit, "called_at", "id"),
             "powered_by": "notaryton.com"
         }
     except Exception as e:
@@ -4046,12 +4069,13 @@ async def tonid_auth_callback(code: str = None, state: str = None, error: str =
         await db.execute("""
             INSERT INTO verified_users (
                 telegram_id, tonid_sub, wallet_address, wallet_raw,
-                name, picture_url, twitter_verified, youtube_verified
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                name, picture_url, twitter_verified, youtube_verified, wallet_key
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
             ON CONFLICT (telegram_id) DO UPDATE SET
                 tonid_sub = EXCLUDED.tonid_sub,
                 wallet_address = EXCLUDED.wallet_address,
                 wallet_raw = EXCLUDED.wallet_raw,
+                wallet_key = EXCLUDED.wallet_key,
                 name = EXCLUDED.name,
                 picture_url = EXCLUDED.picture_url,
                 twitter_verified = EXCLUDED.twitter_verified,
@@ -4065,7 +4089,8 @@ async def tonid_auth_callback(code: str = None, state: str = None, error: str =
             user.name,
             user.picture,
             user.twitter_verified,
-            user.youtube_verified
+            user.youtube_verified,
+            address_key(user.wallet_raw or user.wallet_address or "")
         )
 
         print(f"✅ TON ID verified: TG={user.telegram_id}, wallet={user.wallet_address}")
@@ -4259,6 +4284,41 @@ async def rugscore_page(request: Request):
 # PUBLIC API ENDPOINTS (Make NotaryTON essential infrastructure)
 # ========================
 
+API_SYNC_WAIT_SECONDS = 30  # Synchronous API calls wait this long for the seal
+
+
+def _seal_request_options(data: dict, request: Request):
+    """(callback_url, respond_async) for a seal request, or raise ValueError"""
+    callback_url = data.get("callback_url")
+    if callback_url is not None:
+        check_callback_url(callback_url)
+    respond_async = (
+        bool(callback_url)
+        or data.get("async") is True
+        or "respond-async" in request.headers.get("prefer", "")
+    )
+    return callback_url, respond_async
+
+
+def _seal_job_url(job_id: int) -> str:
+    return f"{WEBHOOK_URL}/api/v1/seal/jobs/{job_id}"
+
+
+def _seal_job_accepted(jobs: list) -> JSONResponse:
+    """202 Accepted for queued seal jobs"""
+    body = {
+        "success": True,
+        "status": "pending",
+        "jobs": [{"job_id": job.id, "status_url": _seal_job_url(job.id)} for job in jobs],
+    }
+    headers = None
+    if len(jobs) == 1:
+        body["job_id"] = jobs[0].id
+        body["status_url"] = _seal_job_url(jobs[0].id)
+        headers = {"Location": body["status_url"]}
+    return JSONResponse(body, status_code=202, headers=headers)
+
+
 @app.post("/api/v1/notarize")
 async def api_notarize(request: Request):
     """
@@ -4266,92 +4326,237 @@ async def api_notarize(request: Request):
     
     POST /api/v1/notarize
     {
-        "api_key": "user_telegram_id",  // For now, use Telegram user ID
+        "api_key": "nt_...",             // From /api in the bot (or X-API-Key header)
         "contract_address": "EQ...",     // TON address or tx hash
         "metadata": {                    // Optional
             "project_name": "MyCoin",
             "launch_date": "2025-11-24"
-        }
+        },
+        "callback_url": "https://...",   // Optional: POSTed the job status when done
+        "async": true                    // Optional: don't wait for the seal
     }
     
-    Returns: {"success": true, "hash": "...", "tx_url": "https://tonscan.org/..."}
+    Returns: {"success": true, "hash": "...", "tx_url": "https://tonscan.org/"}
+    once sealed (waits up to 30s), or 202 {"job_id": ..., "status_url": "..."}
+    with callback_url, "async": true, `Prefer: respond-async`, or on timeout.
     """
     try:
         data = await request.json()
-        user_id = int(data.get("api_key", 0))
+        api_key = data.get("api_key") or request.headers.get("x-api-key")
         contract_id = data.get("contract_address", "")
         metadata = data.get("metadata", {})
         
-        if not user_id or not contract_id:
+        if not api_key or not contract_id:
             return {"success": False, "error": "Missing api_key or contract_address"}
+        try:
+            callback_url, respond_async = _seal_request_options(data, request)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
         
-        # Check if user has subscription or credits
-        has_sub = await get_user_subscription(user_id)
-        if not has_sub:
-            return {
-                "success": False, 
-                "error": "No active subscription",
-                "subscribe_url": f"https://t.me/NotaryTON_bot?start=subscribe"
-            }
-        
-        # Fetch and notarize contract
-        contract_code = await get_contract_code_from_tx(contract_id)
-        if not contract_code:
-            return {"success": False, "error": "Failed to fetch contract"}
-        
-        contract_hash = hash_data(contract_code)
-        comment = f"NotaryTON:API:{contract_hash[:16]}"
+        # Key, subscription and daily limit (cached in memory)
+        try:
+            user_id = (await api_gateway.authorize(db, api_key)).user_id
+        except ApiAuthError as e:
+            return e.response()
         
+        comment = "NotaryTON:API:{hash16}"
         # Add metadata to comment if provided
         if metadata.get("project_name"):
-            comment = f"NotaryTON:{metadata['project_name'][:20]}:{contract_hash[:12]}"
+            comment = f"NotaryTON:{metadata['project_name'][:20]}:{{hash12}}"
         
-        await send_ton_transaction(comment, amount_ton=TON_SINGLE_SEAL)
-        await log_notarization(user_id, contract_id, contract_hash, paid=True)
+        job = await seal_workers.enqueue(db, user_id, contract_id[:100], {
+            "kind": "contract",
+            "contract_id": contract_id,
+            "comment": comment,
+            "amount_ton": TON_SINGLE_SEAL,
+        }, callback_url=callback_url)
+        if respond_async:
+            return _seal_job_accepted([job])
+        
+        finished = await seal_workers.wait(db, job.id, timeout=API_SYNC_WAIT_SECONDS)
+        if finished is None:
+            return _seal_job_accepted([job])
+        if finished.status != "done":
+            return {"success": False, "error": finished.last_error, "job_id": job.id}
         
         return {
             "success": True,
-            "hash": contract_hash,
+            "hash": finished.contract_hash,
             "contract": contract_id,
+            "job_id": job.id,
             "timestamp": datetime.now().isoformat(),
             "tx_url": "https://tonscan.org/",
-            "verify_url": f"{WEBHOOK_URL}/api/v1/verify/{contract_hash}"
+            "verify_url": f"{WEBHOOK_URL}/api/v1/verify/{finished.contract_hash}"
         }
         
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+
+@app.get("/api/v1/seal/jobs/{job_id}")
+async def api_seal_job_status(job_id: int, request: Request, api_key: str = None):
+    """
+    Status of a queued seal (from POST /api/v1/notarize or /api/v1/batch)
+
+    GET /api/v1/seal/jobs/{job_id}?api_key=<key>   (or X-API-Key header)
+
+    Returns: {"success": true, "job_id": 1, "status": "pending|running|done|failed", ...}
+    Polling doesn't count against the daily limit.
+    """
+    try:
+        principal = await api_gateway.authorize(
+            db, api_key or request.headers.get("x-api-key"), cost=0, require_subscription=False,
+            allow_legacy=False
+        )
+    except ApiAuthError as e:
+        return e.response()
+    try:
+        job = await db.seal_jobs.get(job_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    if job is None or job.user_id != principal.user_id:
+        return JSONResponse({"success": False, "error": "Job not found"}, status_code=404)
+    return {"success": True, **job_status(job, WEBHOOK_URL)}
+
+
+def _verify_payload(contract_hash: str, notarization) -> dict:
+    """Response body for a verify lookup (shared by single and batch verify)"""
+    if notarization:
+        confirmed = notarization.confirmed_at is not None
+        return {
+            "verified": True,
+            "hash": contract_hash,
+            "tx_hash": notarization.tx_hash,
+            "tx_lt": notarization.tx_lt,
+            "confirmed": confirmed,
+            "timestamp": str(notarization.timestamp) if notarization.timestamp else None,
+            "notarized_by": "NotaryTON",
+            "blockchain": "TON",
+            "explorer_url": f"https://tonscan.org/tx/{notarization.tx_hash}" if confirmed else None
+        }
+    return {
+        "verified": False,
+        "hash": contract_hash,
+        "message": "No notarization found for this hash"
+    }
+
+
 @app.get("/api/v1/verify/{contract_hash}")
-async def api_verify(contract_hash: str):
+async def api_verify(contract_hash: str, request: Request):
     """
     Public verification endpoint - anyone can verify a notarization
 
     GET /api/v1/verify/{hash}
 
     Returns: Notarization details including timestamp, tx_hash, etc.
+
+    Confirmed results never change, so they carry a strong ETag and
+    `Cache-Control: immutable`. Seals still waiting for their on-chain tx
+    hash (see confirmer.py) and not-found results are only cached briefly.
     """
     try:
-        notarization = await db.notarizations.get_by_hash(contract_hash)
-
-        if notarization:
-            return {
-                "verified": True,
-                "hash": contract_hash,
-                "tx_hash": notarization.tx_hash,
-                "timestamp": str(notarization.timestamp) if notarization.timestamp else None,
-                "notarized_by": "NotaryTON",
-                "blockchain": "TON",
-                "explorer_url": f"https://tonscan.org/tx/{notarization.tx_hash}"
-            }
-        else:
-            return {
-                "verified": False,
-                "hash": contract_hash,
-                "message": "No notarization found for this hash"
-            }
+        notarization = await verify_cache.lookup(db, contract_hash)
     except Exception as e:
         return {"verified": False, "error": str(e)}
 
+    payload = _verify_payload(contract_hash, notarization)
+    if not notarization:
+        return JSONResponse(payload, headers={"Cache-Control": "public, max-age=60"})
+
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if payload["confirmed"] else "public, max-age=60",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/notarizations")
+async def api_notarization_history(api_key: str, limit: int = 20, cursor: str = None):
+    """
+    A user's notarization history, newest first
+
+    GET /api/v1/notarizations?api_key=<key>&limit=20&cursor=<next_cursor>
+    """
+    before = decode_cursor(cursor)
+    if cursor and before is None:
+        return {"success": False, "error": "Invalid cursor"}
+    try:
+        principal = await api_gateway.authorize(db, api_key, require_subscription=False, allow_legacy=False)
+    except ApiAuthError as e:
+        return e.response()
+    try:
+        limit = min(limit, 100)
+        notarizations = await db.notarizations.get_user_notarizations(
+            principal.user_id, limit=limit, before=before
+        )
+        return {
+            "success": True,
+            "notarizations": [
+                {
+                    "hash": n.contract_hash,
+                    "tx_hash": n.tx_hash,
+                    "timestamp": n.timestamp.isoformat() if n.timestamp else None,
+                    "paid": n.paid,
+                    "verify_url": f"{WEBHOOK_URL}/api/v1/verify/{n.contract_hash}",
+                }
+                for n in notarizations
+            ],
+            "next_cursor": next_cursor(notarizations, limit, "timestamp", "id"),
+            "powered_by": "notaryton.com"
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+VERIFY_BATCH_MAX = 5000
+
+
+@app.post("/api/v1/verify/batch")
+async def api_verify_batch(request: Request):
+    """
+    Verify many hashes in one round trip
+
+    POST /api/v1/verify/batch
+    {"hashes": ["a3f8...", "b4e9...", ...]}   // up to 5000
+
+    Returns: NDJSON, one /api/v1/verify/{hash} result per line in request order.
+    Cached and Bloom-rejected hashes are answered in memory; the rest are
+    resolved with a single query.
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        return {"success": False, "error": "Invalid JSON body"}
+
+    hashes = data.get("hashes") if isinstance(data, dict) else None
+    if not isinstance(hashes, list) or not hashes:
+        return {"success": False, "error": "Missing hashes"}
+    if len(hashes) > VERIFY_BATCH_MAX:
+        return {"success": False, "error": f"Too many hashes (max {VERIFY_BATCH_MAX})"}
+    hashes = [str(h).strip() for h in hashes]
+
+    try:
+        found = await verify_cache.lookup_many(db, hashes)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    async def ndjson_lines():
+        chunk = []
+        for contract_hash in hashes:
+            hash_bin = hash_to_bytes(contract_hash)
+            payload = _verify_payload(contract_hash, found.get(hash_bin) if hash_bin else None)
+            chunk.append(json.dumps(payload))
+            if len(chunk) >= 500:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @app.post("/api/v1/batch")
 async def api_batch_notarize(request: Request):
     """
@@ -4359,57 +4564,76 @@ async def api_batch_notarize(request: Request):
     
     POST /api/v1/batch
     {
-        "api_key": "user_id",
+        "api_key": "nt_...",
         "contracts": [
             {"address": "EQ...", "name": "Coin1"},
             {"address": "EQ...", "name": "Coin2"}
-        ]
+        ],
+        "callback_url": "https://...",   // Optional, called once per contract
+        "async": true                    // Optional: 202 with a job per contract
     }
     
-    Returns: Array of results
+    Returns: Array of results. Each contract counts as one request
+    against the daily limit.
     """
     try:
         data = await request.json()
-        user_id = int(data.get("api_key", 0))
+        api_key = data.get("api_key") or request.headers.get("x-api-key")
         contracts = data.get("contracts", [])
         
-        if not user_id or not contracts:
+        if not api_key or not contracts:
             return {"success": False, "error": "Missing api_key or contracts"}
+        try:
+            callback_url, respond_async = _seal_request_options(data, request)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
         
+        contracts = contracts[:BATCH_MAX_CONTRACTS]
         # Must have subscription for batch operations
-        has_sub = await get_user_subscription(user_id)
-        if not has_sub:
-            return {
-                "success": False,
-                "error": "Subscription required for batch operations",
-                "subscribe_url": f"https://t.me/NotaryTON_bot?start=subscribe"
-            }
+        try:
+            principal = await api_gateway.authorize(
+                db, api_key, cost=len(contracts),
+                subscription_error="Subscription required for batch operations"
+            )
+        except ApiAuthError as e:
+            return e.response()
+        user_id = principal.user_id
         
+        jobs = []
+        for contract in contracts:
+            address = contract.get("address", "")
+            name = contract.get("name", "")
+            comment = f"NotaryTON:{name[:20]}:{{hash12}}" if name else "NotaryTON:Batch:{hash16}"
+            jobs.append(await seal_workers.enqueue(db, user_id, address[:100], {
+                "kind": "contract",
+                "contract_id": address,
+                "comment": comment,
+                "amount_ton": TON_SINGLE_SEAL,
+            }, callback_url=callback_url))
+        if respond_async:
+            return _seal_job_accepted(jobs)
+        
+        # Seal workers send a whole batch in one transfer; wait for all of them
+        finished = await asyncio.gather(*(
+            seal_workers.wait(db, job.id, timeout=API_SYNC_WAIT_SECONDS) for job in jobs
+        ))
         results = []
-        for contract in contracts[:50]:  # Limit to 50 per batch
-            try:
-                address = contract.get("address", "")
-                name = contract.get("name", "")
-                
-                contract_code = await get_contract_code_from_tx(address)
-                contract_hash = hash_data(contract_code)
-                
-                comment = f"NotaryTON:{name[:20]}:{contract_hash[:12]}" if name else f"NotaryTON:Batch:{contract_hash[:16]}"
-                await send_ton_transaction(comment, amount_ton=TON_SINGLE_SEAL)
-                await log_notarization(user_id, address, contract_hash, paid=True)
-                
+        for contract, job, done in zip(contracts, jobs, finished):
+            address = contract.get("address", "")
+            if done is None:
+                results.append({"success": True, "address": address, "job_id": job.id,
+                                "status": "pending", "status_url": _seal_job_url(job.id)})
+            elif done.status == "done":
                 results.append({
                     "success": True,
                     "address": address,
-                    "hash": contract_hash,
-                    "verify_url": f"{WEBHOOK_URL}/api/v1/verify/{contract_hash}"
-                })
-            except Exception as e:
-                results.append({
-                    "success": False,
-                    "address": contract.get("address", ""),
-                    "error": str(e)
+                    "job_id": job.id,
+                    "hash": done.contract_hash,
+                    "verify_url": f"{WEBHOOK_URL}/api/v1/verify/{done.contract_hash}"
                 })
+            else:
+                results.append({"success": False, "address": address, "job_id": job.id,
+                                "error": done.last_error})
         
         return {
             "success": True,
@@ -4571,50 +4795,34 @@ async def seed_lottery(amount_stars: int = 2500, secret: str = ""):
 
 @app.post("/admin/import-ton-labels")
 async def import_ton_labels(secret: str = ""):
-    """Import ton-labels data into known_wallets table (one-time migration)"""
+    """Bulk import ton-labels into known_wallets (COPY + single merge) and refresh the label index"""
     if secret != ADMIN_SECRET:
         return {"error": "Unauthorized"}
 
-    import json
-    from pathlib import Path
-
-    # Load the ton-labels data
-    labels_path = Path(__file__).parent / "scripts" / "ton-labels-compiled.json"
-    if not labels_path.exists():
-        return {"error": f"Labels file not found at {labels_path}"}
-
-    with open(labels_path) as f:
-        data = json.load(f)
-
-    imported = 0
-    skipped = 0
+    if not TON_LABELS_PATH.exists():
+        return {"error": f"Labels file not found at {TON_LABELS_PATH}"}
 
-    for address, info in data['addresses'].items():
-        label = info.get('category', 'unknown')
-        owner_name = info.get('label') or info.get('organization', '')
+    started = time.time()
+    meta, records = load_ton_labels()
+    diff = await db.wallets.import_labels(records, source=TON_LABELS_SOURCE)
 
-        notes_data = {
-            'website': info.get('website'),
-            'subcategory': info.get('subcategory'),
-            'description': info.get('description'),
-            'tags': info.get('tags', []),
-            'source': 'ton-labels'
-        }
-        notes_data = {k: v for k, v in notes_data.items() if v}
-        notes = json.dumps(notes_data) if notes_data else None
+    # Hot-swap the in-memory label index
+    await label_index.load(db)
 
-        try:
-            await db.wallets.label_wallet(address, label, owner_name, notes)
-            imported += 1
-        except Exception as e:
-            skipped += 1
+    elapsed_ms = int((time.time() - started) * 1000)
+    print(f"🏷️ ton-labels import: +{len(diff['added'])} ~{len(diff['changed'])} -{len(diff['removed'])} in {elapsed_ms}ms")
 
     return {
         "success": True,
-        "imported": imported,
-        "skipped": skipped,
-        "total": data['total'],
-        "stats": data['stats']
+        "imported": len(records),
+        "skipped": 0,
+        "added": len(diff['added']),
+        "changed": len(diff['changed']),
+        "removed": len(diff['removed']),
+        "diff": {kind: addresses[:50] for kind, addresses in diff.items()},
+        "elapsed_ms": elapsed_ms,
+        "total": meta['total'],
+        "stats": meta['stats']
     }
 
 
@@ -4653,11 +4861,9 @@ async def dashboard(request: Request):
 
         # Top referrers
         top_referrers = await conn.fetch("""
-            SELECT u.user_id, COUNT(r.user_id) as ref_count, COALESCE(u.referral_earnings, 0) as earnings
+            SELECT u.user_id, COALESCE(u.referral_count, 0) as ref_count, COALESCE(u.referral_earnings, 0) as earnings
             FROM users u
-            LEFT JOIN users r ON r.referred_by = u.user_id
             WHERE u.referral_code IS NOT NULL
-            GROUP BY u.user_id, u.referral_earnings
             ORDER BY ref_count DESC
             LIMIT 5
         """)
@@ -4688,8 +4894,34 @@ async def on_startup():
     # Initialize database (PostgreSQL via Neon)
     await db.connect()
 
+    # Load known wallet labels into memory (entity detection without I/O)
+    try:
+        await label_index.load(db)
+    except Exception as e:
+        print(f"⚠️ Wallet label index load failed: {e}")
+
+    # Build the sealed-hash Bloom filter (verify misses without a DB query)
+    try:
+        await verify_cache.load(db)
+    except Exception as e:
+        print(f"⚠️ Verify cache load failed: {e}")
+    # Pull other processes' seals into it, rebuild it periodically
+    asyncio.create_task(verify_cache.run(db))
+
     # Initialize social media poster (X + Telegram channel)
     social_poster.initialize()
+    # Deliver queued posts (every process publishes, this one sends)
+    asyncio.create_task(notification_bus.run())
+
+    # Write buffered API usage to api_keys in batches
+    asyncio.create_task(api_gateway.run(db))
+
+    # Seal workers (every seal is a seal_jobs row; resumes what a restart interrupted)
+    asyncio.create_task(seal_workers.run(db))
+    # Backfill real tx hashes from one wallet scan per interval
+    asyncio.create_task(seal_confirmer.run(db, fetch_seal_transactions))
+    # Settle payouts that were broadcast but hadn't landed in time
+    asyncio.create_task(payout_reconciler.run(db, chain_backend))
 
     # Get bot info
     try:
@@ -4734,7 +4966,9 @@ async def on_startup():
     for group_id in GROUP_IDS:
         if group_id.strip():
             try:
-                await bot.send_message(group_id, "🔐 NotaryTON is now monitoring this group for auto-notarization!")
+                await telegram_sender.send(
+                    group_id, "🔐 NotaryTON is now monitoring this group for auto-notarization!", bots=[bot]
+                )
                 print(f"✅ Joined group: {group_id}")
             except Exception as e:
                 print(f"❌ Failed to join group {group_id}: {e}")
@@ -4745,6 +4979,15 @@ async def on_startup():
     # 🐸 Start pending payment cleanup task
     asyncio.create_task(cleanup_pending_payments())
 
+    # 📒 Start balance ledger compaction task
+    asyncio.create_task(compact_balance_ledger())
+
+    # 🔑 Backfill canonical address keys (no-op once complete)
+    asyncio.create_task(backfill_address_keys())
+
+    # #️⃣ Index and backfill binary notarization hashes (no-op once complete)
+    asyncio.create_task(backfill_hash_bins())
+
     # 🎰 Start lottery draw task (Sunday 20:00 UTC)
     asyncio.create_task(run_sunday_lottery_draw())
 
@@ -4758,6 +5001,16 @@ async def on_startup():
 @app.on_event("shutdown")
 async def on_shutdown():
     """Cleanup on shutdown - DO NOT delete webhook (causes issues with Render restarts)"""
+    # Stop crawler if running
+    await stop_crawler()
+    await seal_workers.stop()
+    await seal_confirmer.stop()
+    await payout_reconciler.stop()
+    await verify_cache.stop()
+    await chain_backend.stop()
+    await notification_bus.stop()
+    # Drain queued messages (payments first) while the bot sessions are still open
+    await telegram_sender.stop()
     await bot.session.close()
     if memeseal_bot:
         await memeseal_bot.session.close()
@@ -4766,8 +5019,7 @@ async def on_shutdown():
         # Also close memescan API clients
         client = get_memescan_client()
         await client.close()
-    # Stop crawler if running
-    await stop_crawler()
+    await api_gateway.stop(db)
     await db.disconnect()
     print("🛑 Bot sessions and database closed (webhooks preserved)")
 
@@ -0,0 +1,516 @@
+"""
+Chain Backends
+==============
+Everything the app does on TON goes through one ChainBackend:
+
+- send_transfer: one service wallet transfer (any number of messages),
+  returning once it has landed. If it was broadcast but hasn't landed in
+  time it raises TransferPending: it may still land, so callers moving
+  real TON must not retry it or treat it as failed (see payouts.py)
+- get_transactions / get_account_state / run_get_method
+- resolve_dns: .ton domain -> address
+
+PytoniqBackend is the real one (liteservers via ton_router). FakeChain
+is a deterministic in-memory chain for tests, benchmarks and offline
+runs: seeded latency and failure injection, optional block times, and
+deposits to simulate users paying the service wallet.
+
+Results are plain dataclasses (ChainTransaction, AccountState) so
+callers never touch pytoniq cells.
+
+Usage:
+    from chain import create_backend, Transfer
+
+    chain = create_backend("pytoniq", mnemonics)  # or "fake"
+    await chain.send_transfer([Transfer(address, 0.005, "MemeSeal:ab12...")])
+    txs = await chain.get_transactions(await chain.wallet_address(), limit=10)
+
+    fake = FakeChain(seed=1, latency=0.05, failure_rate=0.01, block_time=5)
+    fake.deposit(await fake.wallet_address(), 0.3, comment="123456")
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable, Union
+
+from pytoniq import WalletV5R1, Address
+from pytoniq.liteclient.client import RunGetMethodError
+
+from ton_router import ton_router, LiteserverRouter
+
+SEQNO_WAIT_SECONDS = 30  # How long a transfer may take to land
+TRANSFER_TTL = 60  # Seconds a signed transfer stays valid (wallet valid_until)
+DNS_ROOT = "EQC3dNlesgVD8YbAazcauIrXBPfiVhMMr5YYk2in0Mtsz0Bz"  # TON DNS root contract
+FAKE_WALLET = "EQ" + "A" * 46  # Service wallet address on a FakeChain
+
+
+class TransferPending(Exception):
+    """Broadcast, but not landed yet; after valid_until it never will"""
+
+    def __init__(self, seqno: int, valid_until: int):
+        super().__init__(f"transfer with seqno {seqno} not landed yet (valid until {valid_until})")
+        self.seqno = seqno
+        self.valid_until = valid_until
+
+
+@dataclass
+class Transfer:
+    """One message of a service wallet transfer"""
+    destination: str
+    amount_ton: float
+    comment: str = ""
+
+
+@dataclass
+class ChainTransaction:
+    """An account transaction: what came in and the comments it sent out"""
+    tx_hash: str
+    lt: int
+    utime: int
+    in_value: int = 0  # nanotons received (0 for external messages)
+    in_source: Optional[str] = None
+    in_comment: str = ""
+    out_comments: List[str] = field(default_factory=list)
+
+
+@dataclass
+class AccountState:
+    address: str
+    status: str  # "active", "uninitialized" or "frozen"
+    balance: int = 0  # nanotons
+    code: Optional[bytes] = None  # BoC of the contract code, if active
+
+
+def text_comment(body) -> Optional[str]:
+    """A message body cell -> its text comment, or None if it isn't one"""
+    if body is None:
+        return None
+    body_slice = body.begin_parse()
+    if body_slice.remaining_bits < 32 or body_slice.load_uint(32) != 0:
+        return None
+    try:
+        return body_slice.load_snake_string()
+    except Exception:
+        return None
+
+
+def pytoniq_transaction(tx) -> ChainTransaction:
+    """pytoniq Transaction -> ChainTransaction"""
+    chain_tx = ChainTransaction(tx_hash=tx.cell.hash.hex(), lt=tx.lt, utime=tx.now)
+    in_msg = tx.in_msg
+    if in_msg is not None and in_msg.is_internal:
+        chain_tx.in_value = in_msg.info.value.grams
+        chain_tx.in_source = in_msg.info.src.to_str()
+        chain_tx.in_comment = text_comment(in_msg.body) or ""
+    for message in tx.out_msgs:
+        comment = text_comment(message.body)
+        if comment is not None:
+            chain_tx.out_comments.append(comment)
+    return chain_tx
+
+
+class ChainBackend:
+    """What the app needs from TON; see module docstring"""
+
+    name = ""
+
+    async def wallet_address(self) -> str:
+        """The service wallet's address"""
+        raise NotImplementedError
+
+    async def send_transfer(self, transfers: List[Transfer]) -> Optional[str]:
+        """
+        Send from the service wallet; returns the tx hash when known.
+        Raises TransferPending if it was broadcast but hasn't landed yet.
+        """
+        raise NotImplementedError
+
+    async def get_transactions(
+        self,
+        address: str,
+        limit: int,
+        to_lt: int = 0,
+        from_lt: Optional[int] = None,
+        from_hash: Optional[str] = None
+    ) -> List[ChainTransaction]:
+        """
+        Up to `limit` transactions newer than `to_lt`, newest first.
+        Given (from_lt, from_hash), the page starts at that transaction
+        (inclusive) instead of the newest, to page further back.
+        """
+        raise NotImplementedError
+
+    async def get_account_state(self, address: str) -> AccountState:
+        raise NotImplementedError
+
+    async def run_get_method(self, address: str, method: str, stack: Optional[list] = None) -> list:
+        raise NotImplementedError
+
+    async def resolve_dns(self, domain: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+# ========================
+# pytoniq (mainnet)
+# ========================
+
+class PytoniqBackend(ChainBackend):
+    """Mainnet through the liteserver router, sending from a V5R1 wallet"""
+
+    name = "pytoniq"
+
+    def __init__(self, mnemonics: List[str], router: LiteserverRouter = ton_router):
+        self.mnemonics = mnemonics
+        self.router = router
+        self._wallet = None
+        self._lock = asyncio.Lock()  # One transfer per seqno: sends go one at a time
+        self._unsettled: Optional[TransferPending] = None  # Last transfer that may still land
+
+    async def wallet(self):
+        if self._wallet is None:
+            self._wallet = await WalletV5R1.from_mnemonic(
+                provider=self.router.provider(), mnemonics=self.mnemonics, network_global_id=-239
+            )
+        return self._wallet
+
+    async def wallet_address(self) -> str:
+        return (await self.wallet()).address.to_str()
+
+    async def send_transfer(self, transfers: List[Transfer]) -> Optional[str]:
+        async with self._lock:
+            wallet = await self.wallet()
+            # Seqno reads, the send and the landing check all go to one liteserver,
+            # so they can't disagree about the wallet's height
+            wallet.provider = await self.router.pin()
+            try:
+                return await self._send(wallet, transfers)
+            finally:
+                wallet.provider = self.router.provider()
+
+    async def _send(self, wallet, transfers: List[Transfer]) -> Optional[str]:
+        try:
+            seqno = await wallet.get_seqno()
+        except Exception as e:
+            error_str = str(e).lower()
+            if "not initialized" in error_str or "-256" in error_str:
+                # Deploy the wallet contract; the caller retries
+                print("💡 Wallet contract not deployed. Attempting deploy...")
+                await wallet.deploy_via_external()
+            raise
+
+        # A pending transfer with this seqno can still land: signing another one
+        # now would race it. Wait for it to land or expire.
+        unsettled = self._unsettled
+        if unsettled is not None and seqno <= unsettled.seqno and time.time() < unsettled.valid_until:
+            await self._wait_for_seqno(wallet, seqno, unsettled.valid_until + 5 - time.time())
+            seqno = await wallet.get_seqno()
+        self._unsettled = None
+
+        messages = [
+            wallet.create_wallet_internal_message(
+                destination=Address(transfer.destination),
+                value=int(transfer.amount_ton * 1e9),  # Convert to nanotons
+                body=transfer.comment
+            )
+            for transfer in transfers
+        ]
+        valid_until = int(time.time()) + TRANSFER_TTL
+        body = wallet.raw_create_transfer_msg(
+            private_key=wallet.private_key, seqno=seqno, wallet_id=wallet.wallet_id,
+            messages=messages, valid_until=valid_until
+        )
+        await wallet.send_external(body=body)
+
+        # Hold the lock until the seqno moves on, so the next transfer can't reuse it
+        if not await self._wait_for_seqno(wallet, seqno, SEQNO_WAIT_SECONDS):
+            self._unsettled = TransferPending(seqno, valid_until)
+            raise self._unsettled
+        return None
+
+    async def _wait_for_seqno(self, wallet, seqno: int, seconds: float) -> bool:
+        """
+        True once the wallet's seqno is past `seqno`, False if `seconds` pass first.
+        A failed read counts as "not yet": the transfer may be out, so an error
+        here must end as TransferPending, never as a failure the caller resends.
+        """
+        deadline = time.monotonic() + seconds
+        while True:
+            try:
+                if await wallet.get_seqno() > seqno:
+                    return True
+            except Exception as e:
+                print(f"⚠️ Seqno check failed: {e}")
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(2)
+
+    async def get_transactions(
+        self,
+        address: str,
+        limit: int,
+        to_lt: int = 0,
+        from_lt: Optional[int] = None,
+        from_hash: Optional[str] = None
+    ) -> List[ChainTransaction]:
+        transactions = await self.router.request(
+            "get_transactions", address, count=limit, to_lt=to_lt,
+            from_lt=from_lt, from_hash=bytes.fromhex(from_hash) if from_hash else None
+        )
+        return [pytoniq_transaction(tx) for tx in transactions]
+
+    async def get_account_state(self, address: str) -> AccountState:
+        account = await self.router.request("get_account_state", address)
+        state = AccountState(address=address, status=account.state.type_, balance=account.balance)
+        state_init = account.state.state_init
+        if state_init is not None and state_init.code is not None:
+            state.code = state_init.code.to_boc()
+        return state
+
+    async def run_get_method(self, address: str, method: str, stack: Optional[list] = None) -> list:
+        return await self.router.request("run_get_method", address=address, method=method, stack=stack or [])
+
+    async def resolve_dns(self, domain: str) -> Optional[str]:
+        domain = domain.lower().strip()
+        if not domain.endswith('.ton'):
+            return None
+
+        domain_parts = domain[:-4].split('.')  # Remove .ton and split
+        domain_parts.reverse()  # TON DNS resolves from right to left
+
+        current_address = DNS_ROOT
+        for part in domain_parts:
+            part_hash = hashlib.sha256(part.encode()).digest()
+            try:
+                result = await self.run_get_method(
+                    current_address, "dnsresolve",
+                    [{"type": "slice", "value": part_hash}, {"type": "int", "value": 256}]
+                )
+                if result and len(result) > 1:
+                    current_address = result[1]
+            except Exception:
+                return None
+
+        try:
+            Address(current_address)
+            return current_address
+        except Exception:
+            return None
+
+    async def stop(self) -> None:
+        await self.router.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"router": self.router.get_stats()}
+
+
+# ========================
+# In-memory chain
+# ========================
+
+@dataclass
+class FakeAccount:
+    balance: int = 0  # nanotons
+    code: Optional[bytes] = None
+    get_methods: Dict[str, Union[list, Callable[[list], list]]] = field(default_factory=dict)
+    transactions: List[ChainTransaction] = field(default_factory=list)  # oldest first
+
+
+class FakeChain(ChainBackend):
+    """
+    Deterministic in-memory TON. For a given seed, the same calls give
+    the same hashes, LTs, latencies and injected failures.
+
+    latency: seconds per call (jitter: +/- fraction of it)
+    failure_rate: chance that a call raises ConnectionError
+    block_time: transfers land on the next block boundary (0 = at once)
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        block_time: float = 0.0,
+        wallet: str = FAKE_WALLET,
+        balance_ton: float = 1_000_000
+    ):
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.block_time = block_time
+        self.wallet = wallet
+        self.rng = random.Random(seed)
+        self.accounts: Dict[str, FakeAccount] = {wallet: FakeAccount(balance=int(balance_ton * 1e9))}
+        self.dns: Dict[str, str] = {}
+        self.seqno = 0
+        self.height = 0
+        self.lt = 0
+        self.calls: Dict[str, int] = {}
+        self.injected = 0
+        self._scripted: List[Exception] = []
+        self._stalls: List[bool] = []  # Next transfers raise TransferPending (True: they still land)
+        self._lock = asyncio.Lock()
+        self._genesis: Optional[float] = None
+
+    # ========================
+    # Setup
+    # ========================
+
+    def account(self, address: str) -> FakeAccount:
+        return self.accounts.setdefault(address, FakeAccount())
+
+    def set_contract(self, address: str, code: bytes, get_methods: Optional[Dict[str, Any]] = None) -> None:
+        """Deploy a contract; get-methods map to a stack or a stack -> stack function"""
+        account = self.account(address)
+        account.code = code
+        account.get_methods.update(get_methods or {})
+
+    def fail_next(self, count: int = 1, error: Optional[Exception] = None) -> None:
+        """Make the next `count` calls fail, whatever the failure_rate"""
+        self._scripted.extend([error or ConnectionError("fake chain: scripted failure")] * count)
+
+    def stall_next(self, count: int = 1, land: bool = True) -> None:
+        """Make the next `count` transfers raise TransferPending; land=False drops them"""
+        self._stalls.extend([land] * count)
+
+    def deposit(self, destination: str, amount_ton: float, comment: str = "",
+                source: str = "EQ" + "U" * 46) -> ChainTransaction:
+        """Someone pays `destination` (lands at once, no latency or failures)"""
+        tx = self._record(destination, in_value=int(amount_ton * 1e9), in_source=source, in_comment=comment)
+        self.account(destination).balance += tx.in_value
+        return tx
+
+    # ========================
+    # ChainBackend
+    # ========================
+
+    async def wallet_address(self) -> str:
+        return self.wallet
+
+    async def send_transfer(self, transfers: List[Transfer]) -> Optional[str]:
+        async with self._lock:
+            await self._call("send_transfer")
+            total = sum(int(t.amount_ton * 1e9) for t in transfers)
+            wallet = self.accounts[self.wallet]
+            if total > wallet.balance:
+                raise ValueError("fake chain: insufficient balance")
+            stalled = self._stalls.pop(0) if self._stalls else None
+            if stalled is False:
+                raise TransferPending(self.seqno, int(time.time()))  # Expired without landing
+            await self._next_block()
+            wallet.balance -= total
+            self.seqno += 1
+            sent = self._record(self.wallet, out_comments=[t.comment for t in transfers])
+            for transfer in transfers:
+                self.deposit(transfer.destination, transfer.amount_ton, transfer.comment, source=self.wallet)
+            if stalled:
+                raise TransferPending(self.seqno - 1, int(time.time()) + TRANSFER_TTL)
+            return sent.tx_hash
+
+    async def get_transactions(
+        self,
+        address: str,
+        limit: int,
+        to_lt: int = 0,
+        from_lt: Optional[int] = None,
+        from_hash: Optional[str] = None
+    ) -> List[ChainTransaction]:
+        await self._call("get_transactions")
+        newer = [tx for tx in self.account(address).transactions
+                 if tx.lt > to_lt and (from_lt is None or tx.lt <= from_lt)]
+        return newer[::-1][:limit]
+
+    async def get_account_state(self, address: str) -> AccountState:
+        await self._call("get_account_state")
+        account = self.accounts.get(address)
+        if account is None:
+            return AccountState(address=address, status="uninitialized")
+        status = "active" if account.code is not None or address == self.wallet else "uninitialized"
+        return AccountState(address=address, status=status, balance=account.balance, code=account.code)
+
+    async def run_get_method(self, address: str, method: str, stack: Optional[list] = None) -> list:
+        await self._call("run_get_method")
+        if address == self.wallet and method == "seqno":
+            return [self.seqno]
+        account = self.accounts.get(address)
+        if account is None or account.code is None:
+            raise RunGetMethodError(address, method, -256)
+        if method not in account.get_methods:
+            raise RunGetMethodError(address, method, 11)
+        result = account.get_methods[method]
+        return result(stack or []) if callable(result) else list(result)
+
+    async def resolve_dns(self, domain: str) -> Optional[str]:
+        await self._call("resolve_dns")
+        return self.dns.get(domain.lower().strip())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fake": {
+                "seed": self.seed,
+                "height": self.height,
+                "seqno": self.seqno,
+                "transactions": sum(len(a.transactions) for a in self.accounts.values()),
+                "calls": dict(self.calls),
+                "failures_injected": self.injected,
+            }
+        }
+
+    # ========================
+    # Internals
+    # ========================
+
+    async def _call(self, op: str) -> None:
+        """Simulated round trip: latency, then maybe an injected failure"""
+        self.calls[op] = self.calls.get(op, 0) + 1
+        delay = self.latency * (1 + self.jitter * self.rng.uniform(-1, 1)) if self.latency else 0
+        roll = self.rng.random()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._scripted:
+            self.injected += 1
+            raise self._scripted.pop(0)
+        if roll < self.failure_rate:
+            self.injected += 1
+            raise ConnectionError(f"fake chain: injected {op} failure")
+
+    async def _next_block(self) -> None:
+        """Wait for the next block boundary (transfers land once per block)"""
+        if self.block_time <= 0:
+            self.height += 1
+            return
+        now = asyncio.get_running_loop().time()
+        if self._genesis is None:
+            self._genesis = now
+        height = max(int((now - self._genesis) / self.block_time) + 1, self.height + 1)
+        await asyncio.sleep(self._genesis + height * self.block_time - now)
+        self.height = height
+
+    def _record(self, address: str, **fields) -> ChainTransaction:
+        self.lt += 1
+        tx_hash = hashlib.sha256(f"{self.seed}:{address}:{self.lt}".encode()).hexdigest()
+        tx = ChainTransaction(tx_hash=tx_hash, lt=self.lt, utime=int(time.time()), **fields)
+        self.account(address).transactions.append(tx)
+        return tx
+
+
+def create_backend(name: str, mnemonics: Optional[str], wallet: Optional[str] = None) -> ChainBackend:
+    """Backend by name: "pytoniq" (mainnet) or "fake" (in-memory, offline)"""
+    if name == "fake":
+        return FakeChain(wallet=wallet or FAKE_WALLET)
+    if name != "pytoniq":
+        raise ValueError(f"Unknown chain backend: {name}")
+    return PytoniqBackend((mnemonics or "").split())
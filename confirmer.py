@@ -0,0 +1,192 @@
+"""
+Seal Confirmation Tracker
+=========================
+Seals are logged as soon as their wallet transfer lands, with a label
+('memeseal_file', 'screenshot', the contract address, ...) standing in
+for the tx hash. Once per CONFIRM_INTERVAL this:
+
+1. reads the service wallet's new transactions, newest first, paging
+   back until the last LT seen (or CONFIRM_LOOKBACK_HOURS on a first
+   pass), so a burst bigger than one page leaves no gap
+2. pulls the MemeSeal:/NotaryTON: comments out of their outgoing messages
+3. matches them to unconfirmed notarizations by hash prefix
+4. writes every real tx hash and LT in one batched UPDATE
+
+A batch transfer carries up to SEAL_BATCH seals, so one scan confirms
+hundreds of seals without a lookup per seal. A comment the scan sees
+before its notarization is written is kept and matched on a later
+pass (for up to UNMATCHED_TTL seconds).
+
+Usage:
+    from confirmer import seal_confirmer
+
+    # fetch(to_lt, limit, start) -> [ChainTx] newer than to_lt, newest first,
+    # beginning at `start` (a ChainTx, inclusive) when given (see seal_transaction)
+    asyncio.create_task(seal_confirmer.run(db, fetch_seal_transactions))
+    await seal_confirmer.stop()
+"""
+
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from verify_cache import verify_cache
+
+CONFIRM_INTERVAL = float(os.getenv("CONFIRM_INTERVAL", "60"))
+CONFIRM_LOOKBACK_HOURS = 48  # Older unconfirmed seals are left alone
+MAX_SCAN_TXS = 800  # Transactions read per fetch (liteservers return 16 per call)
+UNMATCHED_TTL = 900  # seconds a seal comment waits for its notarization row
+MIN_PREFIX = 12  # Shortest hash prefix we put in a comment (Screenshot seals)
+
+# MemeSeal:<hex>, MemeSeal:Screenshot:<hex>, NotaryTON:File:<hex>,
+# NotaryTON:<project name>:<hex>, ... - the hash prefix always comes last
+SEAL_COMMENT = re.compile(r"^(?:MemeSeal|NotaryTON):(?:.*:)?([0-9a-fA-F]{%d,64})$" % MIN_PREFIX, re.S)
+
+
+def parse_seal_comment(comment: str) -> Optional[str]:
+    """Hash prefix (lowercase hex) sealed by a comment, or None"""
+    match = SEAL_COMMENT.match(comment or "")
+    return match.group(1).lower() if match else None
+
+
+@dataclass
+class ChainTx:
+    """A service wallet transaction and the seal hash prefixes it carried"""
+    tx_hash: str
+    lt: int
+    utime: int
+    prefixes: List[str] = field(default_factory=list)
+
+
+def match_seals(
+    transactions: List[ChainTx],
+    pending: List[Any]
+) -> Tuple[List[Tuple[int, str, str, int]], List[ChainTx]]:
+    """
+    Pair seal comments with unconfirmed notarizations.
+
+    `pending` must be oldest first: when a hash was sealed more than once,
+    the oldest transaction goes to the oldest notarization. Returns
+    (confirmations for confirm_batch, transactions with comments left over).
+    """
+    by_prefix: Dict[str, List[Any]] = {}
+    for notarization in pending:
+        by_prefix.setdefault(notarization.contract_hash[:MIN_PREFIX].lower(), []).append(notarization)
+
+    confirmations = []
+    leftover = []
+    for tx in sorted(transactions, key=lambda t: t.lt):
+        unmatched = []
+        for prefix in tx.prefixes:
+            candidates = by_prefix.get(prefix[:MIN_PREFIX], [])
+            for i, notarization in enumerate(candidates):
+                if notarization.contract_hash.lower().startswith(prefix):
+                    confirmations.append((notarization.id, notarization.contract_hash, tx.tx_hash, tx.lt))
+                    del candidates[i]
+                    break
+            else:
+                unmatched.append(prefix)
+        if unmatched:
+            leftover.append(ChainTx(tx.tx_hash, tx.lt, tx.utime, unmatched))
+    return confirmations, leftover
+
+
+def seal_transaction(tx) -> ChainTx:
+    """chain.ChainTransaction -> ChainTx (no prefixes if it sealed nothing)"""
+    prefixes = [prefix for prefix in map(parse_seal_comment, tx.out_comments) if prefix]
+    return ChainTx(tx_hash=tx.tx_hash, lt=tx.lt, utime=tx.utime, prefixes=prefixes)
+
+
+class SealConfirmer:
+    """Periodic account scan that backfills real tx hashes"""
+
+    def __init__(self, interval: float = CONFIRM_INTERVAL):
+        self.interval = interval
+        self.last_lt = 0
+        self._leftover: List[ChainTx] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"scans": 0, "transactions": 0, "confirmed": 0, "unmatched": 0, "errors": 0}
+
+    async def scan(self, fetch: Callable[..., Awaitable[List[ChainTx]]]) -> List[ChainTx]:
+        """Every transaction since last_lt, paging back a fetch at a time"""
+        horizon = time.time() - CONFIRM_LOOKBACK_HOURS * 3600
+        page = await fetch(self.last_lt, MAX_SCAN_TXS)
+        transactions = list(page)
+        while len(page) >= MAX_SCAN_TXS:
+            oldest = transactions[-1]
+            if not self.last_lt and oldest.utime < horizon:
+                break  # First pass: older seals are left alone anyway
+            page = await fetch(self.last_lt, MAX_SCAN_TXS, oldest)
+            # The page starts at `oldest` again; keep only what lies past it
+            older = [tx for tx in page if tx.lt < oldest.lt]
+            if not older:
+                break
+            transactions += older
+        return transactions
+
+    async def confirm_once(
+        self,
+        db,
+        fetch: Callable[..., Awaitable[List[ChainTx]]]
+    ) -> int:
+        """
+        One pass. `fetch(to_lt, limit, start=None)` returns the wallet's
+        transactions newer than `to_lt` as ChainTx, newest first (from
+        `start` when given). Returns the number of seals confirmed.
+        """
+        transactions = await self.scan(fetch)
+        self.stats["scans"] += 1
+        self.stats["transactions"] += len(transactions)
+
+        cutoff = time.time() - UNMATCHED_TTL
+        candidates = [tx for tx in self._leftover if tx.utime >= cutoff]
+        candidates += [tx for tx in transactions if tx.prefixes]
+        if not candidates:
+            if transactions:
+                self.last_lt = max(self.last_lt, max(tx.lt for tx in transactions))
+            return 0
+
+        pending = await db.notarizations.get_unconfirmed(CONFIRM_LOOKBACK_HOURS)
+        confirmations, leftover = match_seals(candidates, pending)
+        confirmed = await db.notarizations.confirm_batch(confirmations) if confirmations else 0
+
+        # Only move on once written, so a failed pass rescans the same range
+        if transactions:
+            self.last_lt = max(self.last_lt, max(tx.lt for tx in transactions))
+        self._leftover = [tx for tx in leftover if tx.utime >= cutoff]
+        self.stats["confirmed"] += confirmed
+        self.stats["unmatched"] = sum(len(tx.prefixes) for tx in self._leftover)
+        for _, contract_hash, _, _ in confirmations:
+            verify_cache.invalidate(contract_hash)  # Cached copy still has the label
+        if confirmed:
+            print(f"⛓️ Confirmed {confirmed} seal(s) from {len(transactions)} wallet transaction(s)")
+        return confirmed
+
+    async def run(self, db, fetch) -> None:
+        """Confirm every `interval` seconds until stop()"""
+        self._task = asyncio.current_task()
+        while True:
+            try:
+                await self.confirm_once(db, fetch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Seal confirmation pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "last_lt": self.last_lt}
+
+
+# Global confirmer
+seal_confirmer = SealConfirmer()
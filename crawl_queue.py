@@ -0,0 +1,144 @@
+"""
+Crawl Job Queue Workers
+=======================
+Drains the durable `crawl_jobs` table (database.CrawlJobRepository).
+
+Discovery only enqueues jobs. Workers claim them with FOR UPDATE SKIP
+LOCKED, so a crash loses nothing: a job a dead worker held goes back to
+pending after STALE_AFTER seconds. More crawler processes add capacity
+without any other coordination. Failed jobs are retried with exponential
+backoff. After MAX_ATTEMPTS they move to the 'dead' state for inspection
+(db.crawl_jobs.get_dead / retry_dead).
+
+Usage:
+    pool = CrawlWorkerPool(process=crawler.process_jobs, workers=2)
+    asyncio.create_task(pool.run(db))
+    print(pool.metrics.as_dict())
+"""
+
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Any, List, Callable, Awaitable
+
+from job_queue import JobWorkers
+
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "2"))
+CLAIM_BATCH = int(os.getenv("CRAWL_CLAIM_BATCH", "8"))
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30  # seconds before the first retry
+BACKOFF_MAX = 3600
+STALE_AFTER = 600  # Running jobs older than this are assumed orphaned
+POLL_INTERVAL = 5  # Idle wait when the queue is empty
+RETENTION_DAYS = 7
+
+
+def backoff_delay(attempts: int, jitter: float = 0.2) -> float:
+    """Seconds before retrying a job that has failed `attempts` times."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * (1 + random.uniform(-jitter, jitter))
+
+
+@dataclass
+class QueueMetrics:
+    """Throughput counters for this process's workers"""
+    claimed: int = 0
+    completed: int = 0
+    retried: int = 0
+    dead: int = 0
+    released: int = 0  # Orphaned jobs returned to the queue
+    busy_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, Any]:
+        minutes = max(time.monotonic() - self.started, 1e-6) / 60
+        finished = self.completed + self.retried + self.dead
+        return {
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "released": self.released,
+            "jobs_per_min": round(self.completed / minutes, 2),
+            "failure_rate": round((self.retried + self.dead) / finished, 4) if finished else 0.0,
+            "avg_batch_seconds": round(self.busy_seconds / max(1, self.claimed), 3),
+        }
+
+
+class CrawlWorkerPool(JobWorkers):
+    """
+    N async workers claiming crawl jobs in batches.
+
+    `process(jobs)` handles one claimed batch and returns {job_id: error}
+    for the jobs that failed. A job missing from that dict succeeded.
+    """
+
+    label = "crawl"
+    poll_interval = POLL_INTERVAL
+    stale_after = STALE_AFTER
+    retention_days = RETENTION_DAYS
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[Dict[int, str]]],
+        workers: int = CRAWL_WORKERS,
+        batch_size: int = CLAIM_BATCH,
+        max_attempts: int = MAX_ATTEMPTS
+    ):
+        super().__init__()
+        self.process = process
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.metrics = QueueMetrics()
+
+    def queue(self, db):
+        return db.crawl_jobs
+
+    def steps(self, db) -> Dict[str, Callable[[], Awaitable[int]]]:
+        return {
+            f"worker {n}": partial(self.run_batch, db, f"{self.worker_prefix}:{n}")
+            for n in range(self.workers)
+        }
+
+    def on_released(self, count: int) -> None:
+        super().on_released(count)
+        self.metrics.released += count
+
+    async def run_batch(self, db, worker_id: str) -> int:
+        """Claim and process one batch. Returns the number of jobs claimed."""
+        jobs = await db.crawl_jobs.claim(worker_id, limit=self.batch_size)
+        if not jobs:
+            return 0
+        self.metrics.claimed += len(jobs)
+
+        started = time.monotonic()
+        try:
+            errors = await self.process(jobs)
+        except Exception as e:
+            errors = {job.id: str(e) for job in jobs}
+        self.metrics.busy_seconds += time.monotonic() - started
+
+        for job in jobs:
+            error = errors.get(job.id)
+            if error is None:
+                await db.crawl_jobs.complete(job.id)
+                self.metrics.completed += 1
+            elif job.attempts >= self.max_attempts:
+                await db.crawl_jobs.fail(job.id, error, retry_in=None)
+                self.metrics.dead += 1
+                print(f"💀 Crawl job {job.kind}:{job.address[:12]}... dead after "
+                      f"{job.attempts} attempts: {error}")
+            else:
+                await db.crawl_jobs.fail(job.id, error, retry_in=backoff_delay(job.attempts))
+                self.metrics.retried += 1
+        return len(jobs)
+
+    async def run(self, db) -> None:
+        """Run the workers until stop()"""
+        print(f"👷 {self.workers} crawl workers started ({self.worker_prefix})")
+        await super().run(db)
@@ -4,41 +4,132 @@ Token Crawler - THE DATA MOAT
 Continuously discovers and analyzes TON tokens for rug detection.
 Runs as a background task alongside the bot.
 
+Discovery enqueues jobs in the durable crawl_jobs table; workers (see
+crawl_queue) claim and analyze them. Extra worker processes add crawl
+capacity.
+
 Usage:
     # Start crawler as background task
     asyncio.create_task(start_crawler())
 
     # Or run standalone for testing
     python crawler.py
+
+    # Extra worker process (no discovery)
+    python crawler.py worker
 """
 
 import asyncio
 import os
+import sys
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Dict, Any, Tuple, Union, Callable, Awaitable
 
 from database import db, TrackedToken
-from memescan.api import MemeScanClient, TonAPI, GeckoTerminalAPI
-from memescan.models import SafetyLevel
+from memescan.api import MemeScanClient, FetchContext
+from memescan.models import SafetyLevel, Token
 from social import announce_rug, announce_danger_score, announce_whale
+from rug_scheduler import RecheckScheduler, GONE
+from crawl_queue import CrawlWorkerPool
+
+
+# Stage concurrency (the provider token buckets set the actual request rate)
+FETCH_CONCURRENCY = int(os.getenv("CRAWLER_FETCH_CONCURRENCY", "4"))
+PERSIST_CONCURRENCY = int(os.getenv("CRAWLER_PERSIST_CONCURRENCY", "2"))
+ANNOUNCE_CONCURRENCY = 1  # Social posting has its own pacing
+STAGE_SAMPLES = 2000  # Recent per-item durations kept per stage
+
+# Job priority by discovery source (higher is claimed first)
+SOURCE_PRIORITY = {"manual": 20, "new": 10, "trending": 5}
+
+
+@dataclass
+class CrawlItem:
+    """One token moving through the crawl pipeline."""
+    address: str
+    symbol: str = "?"
+    source: str = "new"  # 'new' | 'trending' | 'manual'
+    ctx: Optional[FetchContext] = None  # Each TonAPI resource fetched once per item
+    analysis: Optional[Token] = None
+    holders: List[dict] = field(default_factory=list)
+    jetton_info: Optional[dict] = None
+    total_supply: float = 0
+    safety_score: int = 50
+    tracked: Optional[TrackedToken] = None
+    is_new: bool = False
+    # (announce function, kwargs) queued by persist, sent by announce
+    announcements: List[Tuple[Callable[..., Awaitable], Dict[str, Any]]] = field(default_factory=list)
+    job_id: Optional[int] = None  # crawl_jobs row this item came from
+    error: Optional[str] = None  # Set when a stage fails
+
+
+def score_analysis(analysis: Token) -> int:
+    """Safety score (0-100) from a token analysis."""
+    safety_score = 50  # Default
+    if analysis.safety_level == SafetyLevel.SAFE:
+        safety_score = 90
+    elif analysis.safety_level == SafetyLevel.WARNING:
+        safety_score = 50
+    elif analysis.safety_level == SafetyLevel.DANGER:
+        safety_score = 20
+    elif analysis.safety_level == SafetyLevel.UNKNOWN:
+        safety_score = 30
+
+    # Adjust score based on holder metrics
+    if analysis.holder_count >= 100:
+        safety_score = min(100, safety_score + 10)
+    elif analysis.holder_count < 10:
+        safety_score = max(0, safety_score - 20)
+
+    if analysis.dev_wallet_percent > 50:
+        safety_score = max(0, safety_score - 30)
+    elif analysis.dev_wallet_percent > 20:
+        safety_score = max(0, safety_score - 15)
+
+    return safety_score
 
 
 class TokenCrawler:
     """
     Crawls TON blockchain for new tokens and analyzes their safety.
     Builds the data moat by tracking every token from launch.
+
+    Each cycle runs a staged pipeline:
+
+        discover -> fetch -> score -> persist -> announce
+
+    Stages are connected by bounded queues and run their own worker pools,
+    so a slow TonAPI call doesn't hold up persisting or announcing other
+    tokens. Provider calls are paced by per-provider token buckets
+    (memescan.ratelimit), not fixed sleeps.
+
+    Discovery and the pipeline are decoupled by the crawl_jobs table:
+    each worker claims a batch of jobs and runs it through the pipeline.
     """
 
     def __init__(self, tonapi_key: str = ""):
         self.client = MemeScanClient(tonapi_key=tonapi_key)
         self.running = False
         self._crawl_interval = 60  # seconds between crawl cycles
-        self._analyze_interval = 5  # seconds between token analyses (rate limit)
+        self._analyze_interval = 5  # seconds between rug re-checks
+        self.stage_counts: Dict[str, int] = defaultdict(int)  # items completed per stage
+        # Recent per-item durations (seconds) per stage, for p50/p99
+        self.stage_seconds: Dict[str, deque] = defaultdict(lambda: deque(maxlen=STAGE_SAMPLES))
+        self.announce_failures = 0  # Alerts that failed to post (their jobs still succeed)
+        self.rechecks = RecheckScheduler(check=self.recheck_token)
+        self._recheck_task: Optional[asyncio.Task] = None
+        self.jobs = CrawlWorkerPool(process=self.process_jobs)
+        self._jobs_task: Optional[asyncio.Task] = None
 
     async def start(self):
         """Start the crawler loop."""
         self.running = True
         print("🕷️ Token crawler started")
+        self._recheck_task = asyncio.create_task(self.rechecks.run(db))
+        self._jobs_task = asyncio.create_task(self.jobs.run(db))
 
         while self.running:
             try:
@@ -51,84 +142,146 @@ class TokenCrawler:
     async def stop(self):
         """Stop the crawler."""
         self.running = False
+        self.rechecks.stop()
+        if self._recheck_task:
+            self._recheck_task.cancel()
+        await self.jobs.stop()
         await self.client.close()
         print("🛑 Token crawler stopped")
 
     async def _crawl_cycle(self):
-        """Single crawl cycle - discover and analyze tokens."""
-        # 1. Get new token launches from GeckoTerminal
-        new_tokens = await self.client.get_new_launches(limit=20)
-        print(f"📡 Found {len(new_tokens)} new tokens")
-
-        for token in new_tokens:
-            if not token.address:
+        """Single crawl cycle - discover tokens and queue them for the workers."""
+        started = time.monotonic()
+        items = await self._discover()
+        self.stage_seconds["discover"].append(time.monotonic() - started)
+        queued = 0
+        for item in items:
+            queued += await db.crawl_jobs.enqueue(
+                item.address,
+                kind="analyze",
+                priority=SOURCE_PRIORITY.get(item.source, 0),
+                payload={"symbol": item.symbol, "source": item.source},
+            )
+        print(f"📡 Found {len(items)} tokens to analyze ({queued} newly queued)")
+
+    async def process_jobs(self, jobs) -> Dict[int, str]:
+        """Run a claimed batch of crawl jobs through the pipeline; {job_id: error} for failures."""
+        errors: Dict[int, str] = {}
+        items = []
+        for job in jobs:
+            if job.kind != "analyze":
+                errors[job.id] = f"unknown job kind: {job.kind}"
                 continue
-
-            # Check if we already track this token
-            existing = await db.tokens.get(token.address)
-            if existing:
-                # Update current state if > 1 hour since last update
-                if existing.last_updated:
-                    hours_ago = (datetime.now() - existing.last_updated).total_seconds() / 3600
-                    if hours_ago < 1:
-                        continue  # Skip, recently updated
-
-            # Analyze token safety
+            items.append(CrawlItem(
+                job.address,
+                symbol=job.payload.get("symbol", "?"),
+                source=job.payload.get("source", "new"),
+                job_id=job.id,
+            ))
+        if items:
+            await self._run_pipeline(items)
+        errors.update({item.job_id: item.error for item in items if item.error})
+        return errors
+
+    async def _run_pipeline(self, items: List[CrawlItem]) -> None:
+        """Run items through fetch -> score -> persist -> announce."""
+        fetch_q: asyncio.Queue = asyncio.Queue()
+        persist_q: asyncio.Queue = asyncio.Queue(maxsize=PERSIST_CONCURRENCY * 4)
+        announce_q: asyncio.Queue = asyncio.Queue(maxsize=ANNOUNCE_CONCURRENCY * 4)
+        for item in items:
+            fetch_q.put_nowait(item)
+
+        async def fetch_and_score(item: CrawlItem):
+            await self._fetch(item)
+            self._score(item)
+            return item
+
+        async def persist(item: CrawlItem):
+            await self._persist(item)
+            return item if item.announcements else None
+
+        stages = [
+            (fetch_q, "fetch", fetch_and_score, FETCH_CONCURRENCY, persist_q),
+            (persist_q, "persist", persist, PERSIST_CONCURRENCY, announce_q),
+            (announce_q, "announce", self._announce, ANNOUNCE_CONCURRENCY, None),
+        ]
+        workers = [
+            asyncio.create_task(self._stage_worker(name, in_q, handler, out_q))
+            for in_q, name, handler, concurrency, out_q in stages
+            for _ in range(concurrency)
+        ]
+        try:
+            # Items only move forward, so once a stage's queue is drained
+            # everything it will emit is already queued for the next stage.
+            for in_q, *_ in stages:
+                await in_q.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _stage_worker(self, name: str, in_q: asyncio.Queue, handler, out_q) -> None:
+        while True:
+            item = await in_q.get()
+            started = time.monotonic()
             try:
-                await self._analyze_and_store(token.address)
-                await asyncio.sleep(self._analyze_interval)  # Rate limit
+                result = await handler(item)
+                self.stage_counts[name] += 1
+                self.stage_seconds[name].append(time.monotonic() - started)
+                if out_q is not None and result is not None:
+                    await out_q.put(result)
             except Exception as e:
-                print(f"⚠️ Failed to analyze {token.symbol}: {e}")
-
-        # 2. Get trending tokens (these may be older but worth tracking)
-        trending = await self.client.get_trending(limit=10)
-        for token in trending:
-            if not token.address:
+                item.error = f"{name}: {e}"
+                print(f"⚠️ {name} failed for {item.symbol} ({item.address[:12]}...): {e}")
+            finally:
+                in_q.task_done()
+
+    # ========================
+    # Pipeline stages
+    # ========================
+
+    async def _discover(self) -> List[CrawlItem]:
+        """New launches not updated in the last hour, plus untracked trending tokens."""
+        items: Dict[str, CrawlItem] = {}
+
+        # 1. New token launches from GeckoTerminal
+        for token in await self.client.get_new_launches(limit=20):
+            if not token.address or token.address in items:
                 continue
-
             existing = await db.tokens.get(token.address)
-            if not existing:
-                try:
-                    await self._analyze_and_store(token.address)
-                    await asyncio.sleep(self._analyze_interval)
-                except Exception as e:
-                    print(f"⚠️ Failed to analyze trending {token.symbol}: {e}")
-
-    async def _analyze_and_store(self, address: str) -> Optional[TrackedToken]:
-        """Analyze a token and store results with holder snapshots."""
-        # Get detailed analysis
-        analysis = await self.client.analyze_token_safety(address)
-
-        # Get holder data for snapshots
-        holders = await self.client.tonapi.get_jetton_holders(address, limit=20)
-        jetton_info = await self.client.tonapi.get_jetton_info(address)
-        total_supply = float(jetton_info.get("total_supply", 0) or 0) if jetton_info else 0
-
-        # Convert safety level to score
-        safety_score = 50  # Default
-        if analysis.safety_level == SafetyLevel.SAFE:
-            safety_score = 90
-        elif analysis.safety_level == SafetyLevel.WARNING:
-            safety_score = 50
-        elif analysis.safety_level == SafetyLevel.DANGER:
-            safety_score = 20
-        elif analysis.safety_level == SafetyLevel.UNKNOWN:
-            safety_score = 30
-
-        # Adjust score based on holder metrics
-        if analysis.holder_count >= 100:
-            safety_score = min(100, safety_score + 10)
-        elif analysis.holder_count < 10:
-            safety_score = max(0, safety_score - 20)
-
-        if analysis.dev_wallet_percent > 50:
-            safety_score = max(0, safety_score - 30)
-        elif analysis.dev_wallet_percent > 20:
-            safety_score = max(0, safety_score - 15)
-
-        # Build tracked token
-        tracked = TrackedToken(
-            address=address,
+            if existing and existing.last_updated:
+                hours_ago = (datetime.now() - existing.last_updated).total_seconds() / 3600
+                if hours_ago < 1:
+                    continue  # Skip, recently updated
+            items[token.address] = CrawlItem(token.address, token.symbol, "new")
+
+        # 2. Trending tokens (these may be older but worth tracking)
+        for token in await self.client.get_trending(limit=10):
+            if not token.address or token.address in items:
+                continue
+            if not await db.tokens.get(token.address):
+                items[token.address] = CrawlItem(token.address, token.symbol, "trending")
+
+        self.stage_counts["discover"] += len(items)
+        return list(items.values())
+
+    async def _fetch(self, item: CrawlItem) -> None:
+        """Fetch analysis and holder data for a token."""
+        item.ctx = self.client.fetch_context(item.address)
+        item.analysis = await self.client.analyze_token_safety(item.address, ctx=item.ctx)
+        item.symbol = item.analysis.symbol
+
+        # Same holders/jetton info the analysis used - no second request
+        item.holders = await item.ctx.holders(limit=20)
+        item.jetton_info = await item.ctx.jetton_info()
+        item.total_supply = float(item.jetton_info.get("total_supply", 0) or 0) if item.jetton_info else 0
+
+    def _score(self, item: CrawlItem) -> None:
+        """Score the analysis and build the tracked token row."""
+        analysis = item.analysis
+        item.safety_score = score_analysis(analysis)
+        item.tracked = TrackedToken(
+            address=item.address,
             symbol=analysis.symbol,
             name=analysis.name,
             decimals=analysis.decimals or 9,
@@ -137,20 +290,22 @@ class TokenCrawler:
             initial_holder_count=analysis.holder_count or 0,
             initial_top_holder_pct=analysis.dev_wallet_percent or 0,
             initial_liquidity_usd=analysis.liquidity_usd or 0,
-            safety_score=safety_score,
+            safety_score=item.safety_score,
             current_holder_count=analysis.holder_count or 0,
             current_top_holder_pct=analysis.dev_wallet_percent or 0,
             current_price_usd=analysis.price_usd or 0,
         )
 
-        # Store in database
-        await db.tokens.upsert(tracked)
+    async def _persist(self, item: CrawlItem) -> None:
+        """Store the token, events and holder snapshots; queue announcements."""
+        analysis = item.analysis
+        address = item.address
+        holders, total_supply = item.holders, item.total_supply
 
-        # Log event for new token
-        existing = await db.tokens.get(address)
-        is_new = not existing or not existing.last_updated
+        # Store in database; the upsert reports whether the row is new
+        item.is_new = await db.tokens.upsert(item.tracked)
 
-        if is_new:
+        if item.is_new:
             await db.tokens.add_event(
                 address,
                 "deploy",
@@ -158,25 +313,31 @@ class TokenCrawler:
                     "symbol": analysis.symbol,
                     "holder_count": analysis.holder_count,
                     "top_holder_pct": analysis.dev_wallet_percent,
-                    "safety_score": safety_score,
+                    "safety_score": item.safety_score,
+                    "concentration": (
+                        analysis.holder_metrics.as_dict() if analysis.holder_metrics else None
+                    ),
                 }
             )
-            print(f"✅ New token tracked: {analysis.symbol} (score: {safety_score})")
+            print(f"✅ New token tracked: {analysis.symbol} (score: {item.safety_score})")
 
             # Auto-post danger alerts for very low scores
-            if safety_score < 40:
-                await announce_danger_score(
+            if item.safety_score < 40:
+                item.announcements.append((announce_danger_score, dict(
                     symbol=analysis.symbol,
                     address=address,
-                    safety_score=safety_score,
+                    safety_score=item.safety_score,
                     holder_count=analysis.holder_count or 0,
                     top_holder_pct=analysis.dev_wallet_percent or 0
-                )
+                )))
 
             # Snapshot initial holders for new tokens
             if holders and total_supply > 0:
                 count = await db.wallets.snapshot_holders(address, holders, total_supply)
                 print(f"   📸 Snapshotted {count} initial holders")
+
+            # Young tokens are the likeliest rugs - schedule re-checks now
+            self.rechecks.upsert(item.tracked)
         else:
             # For existing tokens, detect whale changes before snapshotting
             if holders and total_supply > 0:
@@ -189,100 +350,147 @@ class TokenCrawler:
                         await db.tokens.add_event(address, "whale_entry", change)
                         print(f"   🐋 Whale entry: {change['wallet'][:12]}... ({change['pct']:.1f}%)")
                         # Auto-post whale alert for big entries (>10%)
-                        await announce_whale(
+                        item.announcements.append((announce_whale, dict(
                             symbol=analysis.symbol,
                             address=address,
                             whale_wallet=change['wallet'],
                             event_type="entry",
                             pct=change['pct']
-                        )
+                        )))
                     elif change["type"] == "whale_exit":
                         await db.tokens.add_event(address, "whale_exit", change)
                         print(f"   🏃 Whale exit: {change['wallet'][:12]}... (sold {change['pct_sold']:.1f}%)")
                         # Auto-post whale alert for big exits (>10%)
-                        await announce_whale(
+                        item.announcements.append((announce_whale, dict(
                             symbol=analysis.symbol,
                             address=address,
                             whale_wallet=change['wallet'],
                             event_type="exit",
                             pct=change['pct_sold']
-                        )
+                        )))
 
                 # Snapshot current holders
                 await db.wallets.snapshot_holders(address, holders, total_supply)
 
-            print(f"🔄 Updated: {analysis.symbol} (score: {safety_score})")
+            print(f"🔄 Updated: {analysis.symbol} (score: {item.safety_score})")
 
-        return tracked
+    async def _announce(self, item: CrawlItem) -> None:
+        """
+        Post queued alerts to X / Telegram.
+
+        A failed post is counted, not raised: the token is already
+        persisted, and failing the job would re-run persist on retry.
+        """
+        for announce, kwargs in item.announcements:
+            try:
+                await announce(**kwargs)
+            except Exception as e:
+                self.announce_failures += 1
+                print(f"⚠️ Announcement failed for {item.symbol} ({item.address[:12]}...): {e}")
+
+    async def _analyze_and_store(self, address: str) -> Optional[TrackedToken]:
+        """Run one token through every stage in order."""
+        item = CrawlItem(address, source="manual")
+        await self._fetch(item)
+        self._score(item)
+        await self._persist(item)
+        await self._announce(item)
+        return item.tracked
 
     async def analyze_single(self, address: str) -> Optional[TrackedToken]:
         """Analyze a single token on-demand."""
         return await self._analyze_and_store(address)
 
+    async def _check_rug(self, token: TrackedToken) -> Optional[Token]:
+        """
+        Re-analyze a tracked token and record a rug if indicators fire.
+
+        Returns None, without touching the token, if the analysis failed or
+        scanned no holders: its 0% top holder would read as a dev exit.
+        """
+        analysis = await self.client.analyze_token_safety(token.address)
+        metrics = analysis.holder_metrics
+        if analysis.safety_level == SafetyLevel.UNKNOWN or not (metrics and metrics.scanned):
+            return None
+        detection = None
+        details: Dict[str, Any] = {}
+
+        # Rug indicators:
+        # 1. Dev sold > 90% of their holdings
+        if analysis.dev_wallet_percent < 5 and token.initial_top_holder_pct > 30:
+            detection = "dev_exit"
+            details = {
+                "initial_dev_pct": token.initial_top_holder_pct,
+                "current_dev_pct": analysis.dev_wallet_percent,
+            }
+            announce_kwargs = dict(
+                dev_exit_pct=token.initial_top_holder_pct - analysis.dev_wallet_percent
+            )
+
+        # 2. Holders dropped by 80%+
+        elif analysis.holder_count and token.initial_holder_count:
+            holder_drop = 1 - (analysis.holder_count / token.initial_holder_count)
+            if holder_drop > 0.8:
+                detection = "holder_exodus"
+                details = {
+                    "initial_holders": token.initial_holder_count,
+                    "current_holders": analysis.holder_count,
+                }
+                announce_kwargs = dict(
+                    initial_holders=token.initial_holder_count,
+                    current_holders=analysis.holder_count
+                )
+
+        if detection:
+            await db.tokens.mark_rugged(token.address)
+            await db.tokens.add_event(
+                token.address, "rug", {**details, "detection_method": detection}
+            )
+            print(f"🚨 RUG DETECTED ({detection}): {token.symbol}")
+            # Auto-post to X and Telegram
+            await announce_rug(
+                symbol=token.symbol,
+                address=token.address,
+                detection_method=detection,
+                **announce_kwargs
+            )
+            token.rugged = True
+        else:
+            await db.tokens.update_current_state(
+                token.address, analysis.holder_count or 0, analysis.dev_wallet_percent or 0
+            )
+        return analysis
+
+    async def recheck_token(self, address: str) -> Union[Tuple[int, float, bool], str, None]:
+        """
+        One scheduled rug re-check (see rug_scheduler).
+
+        Returns (holder_count, top_holder_pct, rugged), GONE if the token is
+        no longer tracked, or None if the analysis came back empty.
+        """
+        token = await db.tokens.get(address)
+        if not token:
+            return GONE
+        if token.rugged:
+            return (token.current_holder_count or 0, token.current_top_holder_pct or 0, True)
+        analysis = await self._check_rug(token)
+        if analysis is None:
+            return None
+        return (analysis.holder_count or 0, analysis.dev_wallet_percent or 0, token.rugged)
+
     async def refresh_rugged_detection(self):
         """
-        Check tracked tokens for rug indicators.
-        Run periodically to detect rugs as they happen.
+        Check every recent tracked token for rug indicators in one pass.
+        The background loop uses the adaptive RecheckScheduler instead;
+        this is for manual/standalone runs.
         """
         # Get tokens tracked in last 7 days that aren't already marked rugged
-        recent_tokens = await db.tokens.get_recent(limit=500)
+        recent_tokens = await db.tokens.get_recheck_candidates(days=7, limit=500)
 
         for token in recent_tokens:
-            if token.rugged:
-                continue  # Already marked
-
-            # Re-analyze
             try:
-                analysis = await self.client.analyze_token_safety(token.address)
-
-                # Rug indicators:
-                # 1. Dev sold > 90% of their holdings
-                if analysis.dev_wallet_percent < 5 and token.initial_top_holder_pct > 30:
-                    await db.tokens.mark_rugged(token.address)
-                    await db.tokens.add_event(
-                        token.address,
-                        "rug",
-                        {
-                            "initial_dev_pct": token.initial_top_holder_pct,
-                            "current_dev_pct": analysis.dev_wallet_percent,
-                            "detection_method": "dev_exit",
-                        }
-                    )
-                    print(f"🚨 RUG DETECTED: {token.symbol}")
-                    # Auto-post to X and Telegram
-                    await announce_rug(
-                        symbol=token.symbol,
-                        address=token.address,
-                        detection_method="dev_exit",
-                        dev_exit_pct=token.initial_top_holder_pct - analysis.dev_wallet_percent
-                    )
-
-                # 2. Holders dropped by 80%+
-                if analysis.holder_count and token.initial_holder_count:
-                    holder_drop = 1 - (analysis.holder_count / token.initial_holder_count)
-                    if holder_drop > 0.8:
-                        await db.tokens.mark_rugged(token.address)
-                        await db.tokens.add_event(
-                            token.address,
-                            "rug",
-                            {
-                                "initial_holders": token.initial_holder_count,
-                                "current_holders": analysis.holder_count,
-                                "detection_method": "holder_exodus",
-                            }
-                        )
-                        print(f"🚨 RUG DETECTED (holder exodus): {token.symbol}")
-                        # Auto-post to X and Telegram
-                        await announce_rug(
-                            symbol=token.symbol,
-                            address=token.address,
-                            detection_method="holder_exodus",
-                            initial_holders=token.initial_holder_count,
-                            current_holders=analysis.holder_count
-                        )
-
+                await self._check_rug(token)
                 await asyncio.sleep(self._analyze_interval)
-
             except Exception as e:
                 print(f"⚠️ Failed to check {token.symbol}: {e}")
 
@@ -305,6 +513,17 @@ async def stop_crawler():
 # STANDALONE MODE
 # ========================
 
+async def run_workers():
+    """Run crawl job workers only - start more of these to scale out."""
+    await db.connect()
+    try:
+        await crawler.jobs.run(db)
+    finally:
+        await crawler.jobs.stop()
+        await crawler.client.close()
+        await db.disconnect()
+
+
 async def main():
     """Run crawler standalone for testing."""
     print("🕷️ Starting Token Crawler (standalone mode)")
@@ -313,8 +532,12 @@ async def main():
     await db.connect()
 
     try:
-        # Run a single crawl cycle
+        # Run a single crawl cycle and drain the queue it filled
         await crawler._crawl_cycle()
+        while await crawler.jobs.run_batch(db, f"{crawler.jobs.worker_prefix}:standalone"):
+            pass
+        print(f"\n👷 Crawl jobs: {crawler.jobs.metrics.as_dict()}")
+        print(f"   Queue: {await db.crawl_jobs.get_stats()}")
 
         # Show stats
         stats = await db.tokens.get_stats()
@@ -331,4 +554,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if sys.argv[1:] == ["worker"]:
+        asyncio.run(run_workers())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,260 @@
+"""
+Bulk Data Export
+================
+Streams the token datasets (see database.EXPORT_DATASETS) as NDJSON, CSV
+or Parquet for /api/v1/export/{dataset}. Rows come from a server-side
+cursor one batch at a time and each batch is encoded and flushed before
+the next is fetched, so memory stays flat whatever the table size.
+
+Parquet needs pyarrow, which is optional: without it only NDJSON and CSV
+are offered.
+
+Each export holds a pooled connection for its whole dump, so at most
+EXPORT_CONCURRENCY run at once (export_slots); the endpoint turns further
+requests away with a 429 while they are all taken.
+
+Usage:
+    from data_export import stream_export, ExportStats
+
+    stats = ExportStats(dataset="events", fmt="ndjson")
+    async for chunk in stream_export(db, "events", "ndjson", since, stats):
+        ...
+    print(stats.as_dict())  # rows/s, bytes/s
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+from database import EXPORT_DATASETS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "2"))  # Exports streaming at once
+EXPORT_RETRY_AFTER = 30  # seconds suggested to a rejected client
+
+export_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def available_formats() -> List[str]:
+    return [fmt for fmt in CONTENT_TYPES if fmt != "parquet" or pa is not None]
+
+
+@dataclass
+class ExportStats:
+    """Throughput of one export"""
+    dataset: str
+    fmt: str
+    since: Optional[datetime] = None
+    rows: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    watermark: Optional[datetime] = None  # Last row's watermark = next `since`
+
+    @property
+    def elapsed(self) -> float:
+        return max((self.finished or time.monotonic()) - self.started, 1e-6)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "dataset": self.dataset,
+            "format": self.fmt,
+            "since": self.since.isoformat() if self.since else None,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows / self.elapsed),
+            "bytes_per_sec": round(self.bytes / self.elapsed),
+            "next_since": self.watermark.isoformat() if self.watermark else None,
+            "complete": self.finished is not None,
+        }
+
+
+# Most recent exports, newest last (for GET /api/v1/export)
+recent_exports: deque = deque(maxlen=20)
+
+
+def _json_default(obj):
+    """Decimals stay exact (NUMERIC(40,0) supplies overflow floats)"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+async def _encode_ndjson(batches, columns: List[str], dataset: str) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(row), default=_json_default) + "\n" for row in batch
+        ).encode()
+
+
+async def _encode_csv(batches, columns: List[str], dataset: str) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_value(row[column]) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # ParquetWriter records column chunk offsets from tell(), so it must
+        # keep counting across drains
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Parquet column types per dataset, from the table DDL. DECIMAL columns go
+# out as strings so NUMERIC(40,0) supplies stay exact; JSONB as JSON text.
+PARQUET_TYPES = {
+    "tokens": {
+        "address": "string", "symbol": "string", "name": "string",
+        "decimals": "int", "deployer": "string", "total_supply": "string",
+        "first_seen": "timestamp", "initial_holder_count": "int",
+        "initial_top_holder_pct": "string", "initial_liquidity_usd": "string",
+        "safety_score": "int", "lp_locked": "bool", "ownership_renounced": "bool",
+        "first_dev_sell_at": "timestamp", "first_dev_sell_pct": "string",
+        "rugged": "bool", "rugged_at": "timestamp",
+        "current_holder_count": "int", "current_top_holder_pct": "string",
+        "current_price_usd": "string", "last_updated": "timestamp",
+    },
+    "snapshots": {
+        "id": "int", "token_address": "string", "wallet_address": "string",
+        "balance": "string", "pct_of_supply": "string", "rank": "int",
+        "snapshot_at": "timestamp",
+    },
+    "events": {
+        "id": "int", "token_address": "string", "event_type": "string",
+        "event_data": "string", "created_at": "timestamp",
+    },
+}
+
+
+def _parquet_schema(dataset: str, columns: List[str]):
+    arrow_types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([
+        (column, arrow_types[PARQUET_TYPES[dataset][column]]) for column in columns
+    ])
+
+
+def _arrow_value(value, arrow_type):
+    if value is None or arrow_type != pa.string():
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+
+async def _encode_parquet(batches, columns: List[str], dataset: str) -> AsyncIterator[bytes]:
+    sink = _ChunkSink()
+    schema = _parquet_schema(dataset, columns)
+    writer = pq.ParquetWriter(sink, schema)
+    async for batch in batches:
+        arrays = [
+            pa.array([_arrow_value(row[column], schema.field(column).type) for row in batch],
+                     type=schema.field(column).type)
+            for column in columns
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "ndjson": _encode_ndjson,
+    "csv": _encode_csv,
+    "parquet": _encode_parquet,
+}
+
+
+async def stream_export(
+    db,
+    dataset: str,
+    fmt: str,
+    since: Optional[datetime],
+    stats: ExportStats
+) -> AsyncIterator[bytes]:
+    """Encode a dataset batch by batch, counting rows and bytes into `stats`"""
+    _, columns, watermark = EXPORT_DATASETS[dataset]
+    recent_exports.append(stats)
+
+    async def counted_batches():
+        async with export_slots:
+            async for batch in db.tokens.iter_export(dataset, since=since):
+                stats.rows += len(batch)
+                stats.watermark = batch[-1][watermark] or stats.watermark
+                yield batch
+
+    try:
+        async for chunk in ENCODERS[fmt](counted_batches(), columns, dataset):
+            if chunk:
+                stats.bytes += len(chunk)
+                yield chunk
+        stats.finished = time.monotonic()
+    finally:
+        summary = stats.as_dict()
+        print(f"📦 Export {dataset}.{fmt}: {summary['rows']} rows, {summary['bytes']} bytes "
+              f"in {summary['seconds']}s ({summary['rows_per_sec']} rows/s, "
+              f"{summary['bytes_per_sec']} B/s){'' if summary['complete'] else ' - aborted'}")
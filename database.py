@@ -18,15 +18,50 @@ Usage:
 """
 
 import os
+import json
+import time
 import asyncio
+from decimal import Decimal
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 
 import asyncpg
 from asyncpg import Pool, Connection
 
+from utils.address import address_key
+from utils.hashing import hash_to_bytes, hash_prefix_range
+from utils.cursor import Keyset
+
+# ========================
+# JSON CODECS
+# ========================
+
+def _json_default(obj):
+    """Encode values json.dumps can't (Decimal from NUMERIC columns, timestamps)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
+def _json_encode(value) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+async def _init_connection(conn: Connection) -> None:
+    """Register json/jsonb codecs so JSON columns map to Python dicts/lists"""
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            type_name,
+            encoder=_json_encode,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+
 # ========================
 # MODELS (Dataclasses)
 # ========================
@@ -38,6 +73,7 @@ class User:
     total_paid: float = 0.0
     referral_code: Optional[str] = None
     referred_by: Optional[int] = None
+    referral_count: int = 0
     referral_earnings: float = 0.0
     total_withdrawn: float = 0.0
     withdrawal_wallet: Optional[str] = None
@@ -64,6 +100,22 @@ class Notarization:
     timestamp: Optional[datetime] = None
     paid: bool = False
     via_api: bool = False
+    hash_bin: Optional[bytes] = None  # 32-byte form of contract_hash (indexed)
+    tx_lt: Optional[int] = None  # Logical time of the on-chain transaction, once confirmed
+    source: Optional[str] = None  # Label tx_hash held before confirmation, e.g. 'memeseal_file'
+    confirmed_at: Optional[datetime] = None
+
+
+@dataclass
+class LedgerEntry:
+    """Append-only balance movement, folded into users on compaction."""
+    id: Optional[int] = None
+    user_id: int = 0
+    kind: str = ""  # 'payment', 'spend', 'referral', 'lottery', 'withdrawal', 'referral_signup'
+    amount: float = 0.0
+    source_tx: Optional[str] = None
+    compacted: bool = False
+    created_at: Optional[datetime] = None
 
 
 @dataclass
@@ -133,6 +185,9 @@ class TrackedToken:
     current_price_usd: float = 0
     last_updated: Optional[datetime] = None
 
+    # Canonical address key (workchain byte + hash), see utils.address
+    address_key: Optional[bytes] = None
+
 
 @dataclass
 class TokenEvent:
@@ -144,6 +199,64 @@ class TokenEvent:
     created_at: Optional[datetime] = None
 
 
+@dataclass
+class CrawlJob:
+    """Durable unit of crawl work (see crawl_queue)."""
+    id: Optional[int] = None
+    address: str = ""
+    kind: str = "analyze"
+    priority: int = 0  # Higher runs first
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: str = "pending"  # 'pending' | 'running' | 'done' | 'dead'
+    attempts: int = 0
+    next_run_at: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    locked_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+@dataclass
+class SealJob:
+    """Durable seal request (see seal_queue)."""
+    id: Optional[int] = None
+    user_id: int = 0
+    source: str = ""  # Logged as the notarization's tx_hash label, e.g. 'memeseal_file'
+    payload: Dict[str, Any] = field(default_factory=dict)  # What to seal and who to tell
+    status: str = "pending"  # 'pending' | 'running' | 'done' | 'failed'
+    attempts: int = 0
+    max_attempts: int = 5
+    next_run_at: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    locked_at: Optional[datetime] = None
+    contract_hash: Optional[str] = None  # Known up front, or set once prepared
+    tx_hash: Optional[str] = None  # Wallet transfer that carried the seal
+    callback_url: Optional[str] = None
+    callback_status: Optional[int] = None  # HTTP status of the last callback attempt
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+@dataclass
+class OutboxMessage:
+    """Queued social post for one channel (see notify_bus)."""
+    id: Optional[int] = None
+    channel: str = ""  # 'x' | 'telegram'
+    kind: str = ""  # 'seal', 'rug', 'danger', 'whale', 'lottery'
+    priority: int = 0  # Higher is sent first
+    payload: Dict[str, Any] = field(default_factory=dict)  # text, buttons, digest data
+    status: str = "pending"  # 'pending' | 'sending' | 'sent' | 'failed'
+    attempts: int = 0
+    available_at: Optional[datetime] = None
+    locked_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    external_id: Optional[str] = None  # Tweet / message id
+    last_error: Optional[str] = None
+
+
 @dataclass
 class HolderSnapshot:
     """Snapshot of a token holder at a point in time."""
@@ -154,6 +267,7 @@ class HolderSnapshot:
     pct_of_supply: float = 0
     rank: int = 0  # 1 = top holder
     snapshot_at: Optional[datetime] = None
+    wallet_key: Optional[bytes] = None
 
 
 @dataclass
@@ -164,6 +278,49 @@ class KnownWallet:
     owner_name: Optional[str] = None
     notes: Optional[str] = None
     created_at: Optional[datetime] = None
+    address_key: Optional[bytes] = None
+    source: Optional[str] = None  # Dataset the label came from ('ton-labels'), NULL = manual
+
+
+# Address-bearing tables with a canonical key column:
+# (table, primary key, address column, key column)
+ADDRESS_KEY_COLUMNS = [
+    ("tracked_tokens", "address", "address", "address_key"),
+    ("holder_snapshots", "id", "wallet_address", "wallet_key"),
+    ("known_wallets", "address", "address", "address_key"),
+    ("kol_wallets", "id", "wallet_address", "wallet_key"),
+    ("verified_users", "id", "wallet_address", "wallet_key"),
+]
+
+
+def address_key_ddl(table: str, column: str) -> str:
+    """The one definition of a canonical address key column and its index"""
+    return f"""
+        ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} BYTEA
+        CHECK (octet_length({column}) = 33);
+        CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column});
+    """
+
+# Bulk-exportable datasets: name -> (table, columns, watermark column).
+# Rows stream in watermark order, so the last row's watermark is the next
+# `since` for an incremental pull.
+EXPORT_DATASETS = {
+    "tokens": ("tracked_tokens", [
+        "address", "symbol", "name", "decimals", "deployer", "total_supply",
+        "first_seen", "initial_holder_count", "initial_top_holder_pct",
+        "initial_liquidity_usd", "safety_score", "lp_locked", "ownership_renounced",
+        "first_dev_sell_at", "first_dev_sell_pct", "rugged", "rugged_at",
+        "current_holder_count", "current_top_holder_pct", "current_price_usd",
+        "last_updated",
+    ], "last_updated"),
+    "snapshots": ("holder_snapshots", [
+        "id", "token_address", "wallet_address", "balance", "pct_of_supply",
+        "rank", "snapshot_at",
+    ], "snapshot_at"),
+    "events": ("token_events", [
+        "id", "token_address", "event_type", "event_data", "created_at",
+    ], "created_at"),
+}
 
 
 # ========================
@@ -171,34 +328,73 @@ class KnownWallet:
 # ========================
 
 class UserRepository:
-    """Repository for user operations"""
+    """
+    Repository for user operations.
+
+    Balance changes (payments, spends, referral commissions, lottery credits,
+    withdrawals) and referral signups are appended to balance_ledger instead
+    of updating the users row in place, so a popular referrer never becomes a
+    contended row. compact_ledger() periodically folds the ledger into the
+    users columns; reads return the compacted row plus the uncompacted tail.
+    """
+
+    # Uncompacted ledger tail for the user in scope as ``u``
+    _LEDGER_TAIL = """
+        SELECT
+            COALESCE(SUM(amount) FILTER (WHERE kind IN ('payment', 'spend')), 0) AS tail_paid,
+            COALESCE(SUM(amount) FILTER (WHERE kind IN ('referral', 'lottery')), 0) AS tail_earned,
+            COALESCE(SUM(amount) FILTER (WHERE kind = 'withdrawal'), 0) AS tail_withdrawn,
+            COUNT(*) FILTER (WHERE kind = 'referral_signup') AS tail_referrals
+        FROM balance_ledger
+        WHERE user_id = u.user_id AND NOT compacted
+    """
+
+    _SELECT_WITH_TAIL = f"""
+        SELECT u.*, t.* FROM users u
+        CROSS JOIN LATERAL ({_LEDGER_TAIL}) t
+    """
 
     def __init__(self, pool: Pool):
         self._pool = pool
 
+    @staticmethod
+    def _row_to_user(row) -> User:
+        """Convert a users row joined with its ledger tail to a User"""
+        data = dict(row)
+        data['total_paid'] = float(data.get('total_paid') or 0) + float(data.pop('tail_paid', 0) or 0)
+        data['referral_earnings'] = float(data.get('referral_earnings') or 0) + float(data.pop('tail_earned', 0) or 0)
+        data['total_withdrawn'] = float(data.get('total_withdrawn') or 0) + float(data.pop('tail_withdrawn', 0) or 0)
+        data['referral_count'] = (data.get('referral_count') or 0) + (data.pop('tail_referrals', 0) or 0)
+        return User(**data)
+
     async def get(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM users WHERE user_id = $1",
+                self._SELECT_WITH_TAIL + " WHERE u.user_id = $1",
                 user_id
             )
             if row:
-                return User(**dict(row))
+                return self._row_to_user(row)
             return None
 
     async def create(self, user_id: int, **kwargs) -> User:
-        """Create a new user"""
+        """Create a new user (records a referral signup for the referrer)"""
+        referred_by = kwargs.get('referred_by')
         async with self._pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO users (user_id, referral_code, referred_by, language)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT (user_id) DO NOTHING
-            """, user_id,
-                kwargs.get('referral_code'),
-                kwargs.get('referred_by'),
-                kwargs.get('language', 'en')
-            )
+            async with conn.transaction():
+                inserted = await conn.fetchval("""
+                    INSERT INTO users (user_id, referral_code, referred_by, language)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (user_id) DO NOTHING
+                    RETURNING user_id
+                """, user_id,
+                    kwargs.get('referral_code'),
+                    referred_by,
+                    kwargs.get('language', 'en')
+                )
+                if inserted and referred_by:
+                    await self._append_ledger(conn, referred_by, 'referral_signup', 0, str(user_id))
         return await self.get(user_id) or User(user_id=user_id)
 
     async def ensure_exists(self, user_id: int) -> None:
@@ -262,63 +458,147 @@ class UserRepository:
         """Get user's total paid amount"""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT total_paid FROM users WHERE user_id = $1",
+                self._SELECT_WITH_TAIL + " WHERE u.user_id = $1",
                 user_id
             )
-            if row and row['total_paid']:
-                return float(row['total_paid'])
+            if row:
+                return self._row_to_user(row).total_paid
             return 0.0
 
-    async def add_payment(self, user_id: int, amount: float) -> None:
-        """Add to user's total paid"""
+    # ========================
+    # Balance Ledger
+    # ========================
+
+    @staticmethod
+    async def _append_ledger(
+        conn: Connection,
+        user_id: int,
+        kind: str,
+        amount: float,
+        source_tx: Optional[str] = None
+    ) -> bool:
+        """
+        Append a ledger row. A repeated (user, kind, source_tx) is ignored,
+        so the same on-chain transaction is never credited twice.
+
+        Returns:
+            True if the row was appended
+        """
+        await conn.execute(
+            "INSERT INTO users (user_id) VALUES ($1) ON CONFLICT DO NOTHING",
+            user_id
+        )
+        row_id = await conn.fetchval("""
+            INSERT INTO balance_ledger (user_id, kind, amount, source_tx)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (user_id, kind, source_tx) WHERE source_tx IS NOT NULL DO NOTHING
+            RETURNING id
+        """, user_id, kind, amount, source_tx)
+        return row_id is not None
+
+    async def append_ledger(
+        self,
+        user_id: int,
+        kind: str,
+        amount: float,
+        source_tx: Optional[str] = None
+    ) -> bool:
+        """Append a balance movement to the ledger"""
         async with self._pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO users (user_id, total_paid)
-                VALUES ($1, $2)
-                ON CONFLICT (user_id) DO UPDATE SET total_paid = users.total_paid + $2
-            """, user_id, amount)
+            async with conn.transaction():
+                return await self._append_ledger(conn, user_id, kind, amount, source_tx)
 
-    async def deduct_payment(self, user_id: int, amount: float) -> None:
-        """Deduct from user's total paid (for per-use payments)"""
+    async def get_ledger(self, user_id: int, limit: int = 20) -> List[LedgerEntry]:
+        """Get user's most recent ledger entries"""
         async with self._pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE users SET total_paid = total_paid - $2 WHERE user_id = $1",
-                user_id, amount
-            )
+            rows = await conn.fetch("""
+                SELECT * FROM balance_ledger
+                WHERE user_id = $1
+                ORDER BY id DESC
+                LIMIT $2
+            """, user_id, limit)
+            return [LedgerEntry(**{**dict(row), 'amount': float(row['amount'])}) for row in rows]
 
-    async def get_referral_stats(self, user_id: int) -> Dict[str, Any]:
-        """Get user's referral stats"""
+    async def compact_ledger(self, batch_size: int = 5000) -> int:
+        """
+        Fold uncompacted ledger rows into the users balance columns.
+
+        Each batch is marked compacted and applied in a single statement, so
+        readers see either the old row plus tail or the new row, never both.
+
+        Returns:
+            Number of ledger rows compacted
+        """
+        total = 0
         async with self._pool.acquire() as conn:
-            user_row = await conn.fetchrow("""
-                SELECT referral_code, referral_earnings, total_withdrawn
-                FROM users WHERE user_id = $1
-            """, user_id)
-
-            if not user_row:
-                return {
-                    'code': None,
-                    'count': 0,
-                    'earnings': 0.0,
-                    'withdrawn': 0.0,
-                    'available': 0.0
-                }
+            while True:
+                compacted = await conn.fetchval("""
+                    WITH batch AS (
+                        UPDATE balance_ledger SET compacted = TRUE
+                        WHERE id IN (
+                            SELECT id FROM balance_ledger
+                            WHERE NOT compacted
+                            ORDER BY id
+                            LIMIT $1
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING user_id, kind, amount
+                    ), totals AS (
+                        SELECT
+                            user_id,
+                            COALESCE(SUM(amount) FILTER (WHERE kind IN ('payment', 'spend')), 0) AS paid,
+                            COALESCE(SUM(amount) FILTER (WHERE kind IN ('referral', 'lottery')), 0) AS earned,
+                            COALESCE(SUM(amount) FILTER (WHERE kind = 'withdrawal'), 0) AS withdrawn,
+                            COUNT(*) FILTER (WHERE kind = 'referral_signup') AS referrals,
+                            COUNT(*) AS n_rows
+                        FROM batch
+                        GROUP BY user_id
+                    ), applied AS (
+                        UPDATE users u SET
+                            total_paid = COALESCE(u.total_paid, 0) + t.paid,
+                            referral_earnings = COALESCE(u.referral_earnings, 0) + t.earned,
+                            total_withdrawn = COALESCE(u.total_withdrawn, 0) + t.withdrawn,
+                            referral_count = COALESCE(u.referral_count, 0) + t.referrals
+                        FROM totals t
+                        WHERE u.user_id = t.user_id
+                        RETURNING t.n_rows
+                    )
+                    SELECT COALESCE(SUM(n_rows), 0)::INTEGER FROM applied
+                """, batch_size)
+                total += compacted
+                if compacted < batch_size:
+                    break
+        return total
+
+    async def add_payment(self, user_id: int, amount: float, source_tx: Optional[str] = None) -> None:
+        """Add to user's total paid"""
+        await self.append_ledger(user_id, 'payment', amount, source_tx)
 
-            count_row = await conn.fetchrow(
-                "SELECT COUNT(*) as count FROM users WHERE referred_by = $1",
-                user_id
-            )
+    async def deduct_payment(self, user_id: int, amount: float) -> None:
+        """Deduct from user's total paid (for per-use payments)"""
+        await self.append_ledger(user_id, 'spend', -amount)
 
-            earnings = float(user_row['referral_earnings'] or 0)
-            withdrawn = float(user_row['total_withdrawn'] or 0)
+    async def get_referral_stats(self, user_id: int) -> Dict[str, Any]:
+        """Get user's referral stats"""
+        user = await self.get(user_id)
 
+        if not user:
             return {
-                'code': user_row['referral_code'],
-                'count': count_row['count'] if count_row else 0,
-                'earnings': earnings,
-                'withdrawn': withdrawn,
-                'available': max(0, earnings - withdrawn)
+                'code': None,
+                'count': 0,
+                'earnings': 0.0,
+                'withdrawn': 0.0,
+                'available': 0.0
             }
 
+        return {
+            'code': user.referral_code,
+            'count': user.referral_count,
+            'earnings': user.referral_earnings,
+            'withdrawn': user.total_withdrawn,
+            'available': user.available_balance
+        }
+
     async def set_referral_code(self, user_id: int, code: str) -> None:
         """Set user's referral code"""
         async with self._pool.acquire() as conn:
@@ -326,13 +606,15 @@ class UserRepository:
                 UPDATE users SET referral_code = $2 WHERE user_id = $1
             """, user_id, code)
 
-    async def add_referral_earnings(self, user_id: int, amount: float) -> None:
-        """Add referral earnings to user"""
-        async with self._pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE users SET referral_earnings = referral_earnings + $2
-                WHERE user_id = $1
-            """, user_id, amount)
+    async def add_referral_earnings(
+        self,
+        user_id: int,
+        amount: float,
+        source_tx: Optional[str] = None,
+        kind: str = 'referral'
+    ) -> None:
+        """Add referral earnings to user ('lottery' kind for lottery credits)"""
+        await self.append_ledger(user_id, kind, amount, source_tx)
 
     async def get_withdrawal_wallet(self, user_id: int) -> Optional[str]:
         """Get user's withdrawal wallet"""
@@ -352,23 +634,19 @@ class UserRepository:
                 UPDATE users SET withdrawal_wallet = $2 WHERE user_id = $1
             """, user_id, wallet)
 
-    async def record_withdrawal(self, user_id: int, amount: float) -> None:
+    async def record_withdrawal(self, user_id: int, amount: float, source_tx: Optional[str] = None) -> None:
         """Record a withdrawal"""
-        async with self._pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE users SET total_withdrawn = total_withdrawn + $2
-                WHERE user_id = $1
-            """, user_id, amount)
+        await self.append_ledger(user_id, 'withdrawal', amount, source_tx)
 
     async def get_by_referral_code(self, code: str) -> Optional[User]:
         """Get user by referral code"""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM users WHERE referral_code = $1",
+                self._SELECT_WITH_TAIL + " WHERE u.referral_code = $1",
                 code
             )
             if row:
-                return User(**dict(row))
+                return self._row_to_user(row)
             return None
 
     async def count(self) -> int:
@@ -381,8 +659,14 @@ class UserRepository:
 class NotarizationRepository:
     """Repository for notarization operations"""
 
+    # Prefix search results are cached briefly: inline queries fire on every
+    # keystroke and users retype the same prefixes.
+    PREFIX_CACHE_TTL = 30  # seconds
+    PREFIX_CACHE_SIZE = 1024
+
     def __init__(self, pool: Pool):
         self._pool = pool
+        self._prefix_cache: Dict[Tuple[str, int], Tuple[float, List[Notarization]]] = {}
 
     async def create(
         self,
@@ -394,19 +678,40 @@ class NotarizationRepository:
     ) -> Notarization:
         """Create a new notarization record"""
         async with self._pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                INSERT INTO notarizations (user_id, tx_hash, contract_hash, paid, via_api)
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING *
-            """, user_id, tx_hash, contract_hash, paid, via_api)
-            return Notarization(**dict(row))
+            return await self.insert(conn, user_id, contract_hash, tx_hash, paid, via_api)
+
+    async def insert(
+        self,
+        conn: Connection,
+        user_id: int,
+        contract_hash: str,
+        tx_hash: Optional[str] = None,
+        paid: bool = False,
+        via_api: bool = False
+    ) -> Notarization:
+        """create() on the caller's connection, so it can share a transaction"""
+        row = await conn.fetchrow("""
+            INSERT INTO notarizations (user_id, tx_hash, contract_hash, paid, via_api, hash_bin)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING *
+        """, user_id, tx_hash, contract_hash, paid, via_api, hash_to_bytes(contract_hash))
+        self._prefix_cache.clear()
+        return Notarization(**dict(row))
 
     async def get_by_hash(self, contract_hash: str) -> Optional[Notarization]:
-        """Get notarization by contract hash"""
+        """
+        Get the original (earliest) notarization of a contract hash.
+
+        Re-sealing the same content adds rows but never changes this answer,
+        which is what lets confirmed verify results be cached as immutable.
+        """
+        hash_bin = hash_to_bytes(contract_hash)
+        if hash_bin is None:
+            return None
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM notarizations WHERE contract_hash = $1 ORDER BY timestamp DESC LIMIT 1",
-                contract_hash
+                "SELECT * FROM notarizations WHERE hash_bin = $1 ORDER BY timestamp, id LIMIT 1",
+                hash_bin
             )
             if row:
                 return Notarization(**dict(row))
@@ -414,26 +719,166 @@ class NotarizationRepository:
 
     async def find_by_hash(self, contract_hash: str) -> List[Notarization]:
         """Find all notarizations for a hash"""
+        hash_bin = hash_to_bytes(contract_hash)
+        if hash_bin is None:
+            return []
         async with self._pool.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT * FROM notarizations WHERE contract_hash = $1 ORDER BY timestamp DESC",
-                contract_hash
+                "SELECT * FROM notarizations WHERE hash_bin = $1 ORDER BY timestamp DESC",
+                hash_bin
             )
             return [Notarization(**dict(row)) for row in rows]
 
+    async def get_by_hashes(self, contract_hashes: List[str]) -> Dict[bytes, Notarization]:
+        """
+        Original seal for each of many hashes in one query.
+
+        Returns {hash_bin: Notarization}; invalid and unsealed hashes are absent.
+        """
+        hash_bins = list({b for b in map(hash_to_bytes, contract_hashes) if b is not None})
+        if not hash_bins:
+            return {}
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT DISTINCT ON (hash_bin) * FROM notarizations
+                WHERE hash_bin = ANY($1::bytea[])
+                ORDER BY hash_bin, timestamp, id
+            """, hash_bins)
+            return {row['hash_bin']: Notarization(**dict(row)) for row in rows}
+
+    async def search_by_prefix(self, prefix: str, limit: int = 5) -> List[Notarization]:
+        """
+        Find notarizations whose hash starts with a hex prefix (8+ chars).
+
+        Runs as a range scan on idx_notarizations_hash_bin. Results are cached
+        for PREFIX_CACHE_TTL seconds and the cache is dropped on every insert.
+        """
+        bounds = hash_prefix_range(prefix)
+        if bounds is None:
+            return []
+
+        cache_key = (prefix.strip().lower(), limit)
+        now = time.monotonic()
+        cached = self._prefix_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        low, high = bounds
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM notarizations
+                WHERE hash_bin BETWEEN $1 AND $2
+                ORDER BY hash_bin, timestamp DESC
+                LIMIT $3
+            """, low, high, limit)
+        results = [Notarization(**dict(row)) for row in rows]
+
+        if len(self._prefix_cache) >= self.PREFIX_CACHE_SIZE:
+            self._prefix_cache = {
+                key: value for key, value in self._prefix_cache.items() if value[0] > now
+            }
+            if len(self._prefix_cache) >= self.PREFIX_CACHE_SIZE:
+                self._prefix_cache.clear()
+        self._prefix_cache[cache_key] = (now + self.PREFIX_CACHE_TTL, results)
+        return results
+
+    async def get_unconfirmed(self, lookback_hours: int = 48, limit: int = 10000) -> List[Notarization]:
+        """Recent seals still waiting for their on-chain tx, oldest first"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM notarizations
+                WHERE confirmed_at IS NULL
+                  AND timestamp > NOW() - make_interval(hours => $1)
+                ORDER BY timestamp, id
+                LIMIT $2
+            """, lookback_hours, limit)
+            return [Notarization(**dict(row)) for row in rows]
+
+    async def confirm_batch(self, confirmations: List[Tuple[int, str, str, int]]) -> int:
+        """
+        Write on-chain tx hashes for many seals in one transaction.
+
+        `confirmations` are (notarization id, contract_hash, tx_hash, lt).
+        The placeholder label in tx_hash moves to `source`; finished seal
+        jobs for the same hashes get the tx hash too. Returns rows confirmed.
+        """
+        if not confirmations:
+            return 0
+        ids, hashes, tx_hashes, lts = (list(column) for column in zip(*confirmations))
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                result = await conn.execute("""
+                    UPDATE notarizations n
+                    SET source = COALESCE(n.source, n.tx_hash),
+                        tx_hash = u.tx_hash, tx_lt = u.tx_lt, confirmed_at = NOW()
+                    FROM unnest($1::int[], $2::text[], $3::bigint[]) AS u(id, tx_hash, tx_lt)
+                    WHERE n.id = u.id AND n.confirmed_at IS NULL
+                """, ids, tx_hashes, lts)
+                await conn.execute("""
+                    UPDATE seal_jobs s SET tx_hash = u.tx_hash
+                    FROM unnest($1::text[], $2::text[]) AS u(contract_hash, tx_hash)
+                    WHERE s.contract_hash = u.contract_hash
+                      AND s.status = 'done' AND s.tx_hash IS NULL
+                """, hashes, tx_hashes)
+        self._prefix_cache.clear()
+        return int(result.split()[-1])
+
+    async def iter_hash_bins(self, batch_size: int = 10000):
+        """Stream every stored hash_bin with a server-side cursor"""
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(
+                    "SELECT hash_bin FROM notarizations WHERE hash_bin IS NOT NULL",
+                    prefetch=batch_size
+                ):
+                    yield row['hash_bin']
+
+    async def get_hash_bins_since(
+        self,
+        since: Optional[datetime],
+        overlap_seconds: float = 300
+    ) -> List[Tuple[bytes, datetime]]:
+        """
+        (hash_bin, timestamp) of seals written after `since` (or in the last
+        `overlap_seconds` when None), reaching back `overlap_seconds` so a
+        seal committed late with an earlier timestamp is not missed.
+        Uses idx_notarizations_timestamp.
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT hash_bin, timestamp FROM notarizations
+                WHERE hash_bin IS NOT NULL
+                  AND timestamp > COALESCE($1, NOW()) - make_interval(secs => $2)
+            """, since, float(overlap_seconds))
+            return [(bytes(row['hash_bin']), row['timestamp']) for row in rows]
+
     async def get_user_notarizations(
         self,
         user_id: int,
-        limit: int = 10
+        limit: int = 10,
+        before: Optional[Keyset] = None
     ) -> List[Notarization]:
-        """Get user's notarizations"""
+        """
+        Get user's notarizations, newest first.
+
+        Pass the (timestamp, id) of the last row seen as `before` to get the
+        next page (keyset pagination on idx_notarizations_user_keyset).
+        """
         async with self._pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM notarizations
-                WHERE user_id = $1
-                ORDER BY timestamp DESC
-                LIMIT $2
-            """, user_id, limit)
+            if before:
+                rows = await conn.fetch("""
+                    SELECT * FROM notarizations
+                    WHERE user_id = $1 AND (timestamp, id) < ($2, $3)
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT $4
+                """, user_id, before[0], int(before[1]), limit)
+            else:
+                rows = await conn.fetch("""
+                    SELECT * FROM notarizations
+                    WHERE user_id = $1
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT $2
+                """, user_id, limit)
             return [Notarization(**dict(row)) for row in rows]
 
     async def get_recent(self, limit: int = 10) -> List[Notarization]:
@@ -493,6 +938,15 @@ class BotStateRepository:
         async with self._pool.acquire() as conn:
             await conn.execute("DELETE FROM bot_state WHERE key = $1", key)
 
+    async def get_prefix(self, prefix: str) -> Dict[str, str]:
+        """Get every state key starting with prefix"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT key, value FROM bot_state WHERE starts_with(key, $1)",
+                prefix
+            )
+            return {row['key']: row['value'] for row in rows}
+
 
 class LotteryRepository:
     """Repository for lottery operations - DEGEN MODE 🎰"""
@@ -503,12 +957,16 @@ class LotteryRepository:
     async def add_entry(self, user_id: int, amount_stars: int = 1) -> LotteryEntry:
         """Add lottery entry for user (20% of each seal payment)"""
         async with self._pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                INSERT INTO lottery_entries (user_id, amount_stars)
-                VALUES ($1, $2)
-                RETURNING *
-            """, user_id, amount_stars)
-            return LotteryEntry(**dict(row))
+            return await self._add_entry(conn, user_id, amount_stars)
+
+    @staticmethod
+    async def _add_entry(conn: Connection, user_id: int, amount_stars: int) -> LotteryEntry:
+        row = await conn.fetchrow("""
+            INSERT INTO lottery_entries (user_id, amount_stars)
+            VALUES ($1, $2)
+            RETURNING *
+        """, user_id, amount_stars)
+        return LotteryEntry(**dict(row))
 
     async def get_user_entries(self, user_id: int, current_only: bool = True) -> List[LotteryEntry]:
         """Get user's lottery entries"""
@@ -654,6 +1112,20 @@ class ApiKeyRepository:
                 WHERE key = $1
             """, key)
 
+    async def record_usage_batch(self, usage: Dict[str, Tuple[int, datetime]]) -> None:
+        """Add buffered request counts for many keys in one statement ({key: (requests, last_used)})"""
+        if not usage:
+            return
+        keys = list(usage)
+        async with self._pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE api_keys AS k
+                SET requests_count = k.requests_count + u.requests,
+                    last_used = GREATEST(k.last_used, u.last_used)
+                FROM unnest($1::text[], $2::int[], $3::timestamp[]) AS u(key, requests, last_used)
+                WHERE k.key = u.key
+            """, keys, [usage[k][0] for k in keys], [usage[k][1] for k in keys])
+
     async def delete(self, key: str) -> None:
         """Delete API key"""
         async with self._pool.acquire() as conn:
@@ -689,9 +1161,9 @@ class WalletRepository:
 
                 await conn.execute("""
                     INSERT INTO holder_snapshots
-                    (token_address, wallet_address, balance, pct_of_supply, rank)
-                    VALUES ($1, $2, $3, $4, $5)
-                """, token_address, wallet, balance, pct, rank)
+                    (token_address, wallet_address, balance, pct_of_supply, rank, wallet_key)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                """, token_address, wallet, balance, pct, rank, address_key(wallet))
                 count += 1
 
             return count
@@ -708,7 +1180,7 @@ class WalletRepository:
                     id, token_address, wallet_address, balance, pct_of_supply, rank, snapshot_at
                 FROM holder_snapshots
                 WHERE token_address = $1
-                ORDER BY snapshot_at DESC, wallet_address
+                ORDER BY snapshot_at::date DESC, wallet_address, snapshot_at DESC
                 LIMIT $2
             """, token_address, limit * 20)
 
@@ -723,9 +1195,9 @@ class WalletRepository:
                     t.symbol, t.name, t.safety_score, t.rugged
                 FROM holder_snapshots hs
                 JOIN tracked_tokens t ON hs.token_address = t.address
-                WHERE hs.wallet_address = $1
+                WHERE hs.wallet_address = $1 OR hs.wallet_key = $2
                 ORDER BY token_address, snapshot_at DESC
-            """, wallet_address)
+            """, wallet_address, address_key(wallet_address))
 
             return [dict(row) for row in rows]
 
@@ -805,27 +1277,122 @@ class WalletRepository:
         owner_name: Optional[str] = None,
         notes: Optional[str] = None
     ) -> None:
-        """Label a known wallet."""
+        """Label a known wallet. Manual labels (source NULL) are never touched by import_labels."""
         async with self._pool.acquire() as conn:
             await conn.execute("""
-                INSERT INTO known_wallets (address, label, owner_name, notes)
-                VALUES ($1, $2, $3, $4)
+                INSERT INTO known_wallets (address, label, owner_name, notes, address_key)
+                VALUES ($1, $2, $3, $4, $5)
                 ON CONFLICT (address) DO UPDATE SET
                     label = $2, owner_name = COALESCE($3, known_wallets.owner_name),
-                    notes = COALESCE($4, known_wallets.notes)
-            """, address, label, owner_name, notes)
+                    notes = COALESCE($4, known_wallets.notes),
+                    address_key = COALESCE(known_wallets.address_key, $5),
+                    source = NULL
+            """, address, label, owner_name, notes, address_key(address))
 
     async def get_wallet_label(self, address: str) -> Optional[KnownWallet]:
         """Get label for a wallet if known."""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM known_wallets WHERE address = $1",
-                address
+                "SELECT * FROM known_wallets WHERE address = $1 OR address_key = $2 LIMIT 1",
+                address, address_key(address)
             )
             if row:
                 return KnownWallet(**dict(row))
             return None
 
+    async def import_labels(
+        self,
+        records: List[Tuple[str, str, Optional[str], Optional[str]]],
+        source: str,
+        prune: bool = True
+    ) -> Dict[str, List[str]]:
+        """
+        Bulk import labels from a dataset.
+
+        COPYs the records into a temp staging table and merges them with a
+        single INSERT ... SELECT ... ON CONFLICT, all in one transaction.
+        Only rows this source imported are updated or pruned; manual labels
+        (label_wallet) and other datasets' rows are left as they are.
+
+        Args:
+            records: (address, label, owner_name, notes) tuples
+            source: Dataset name stored on each row, e.g. 'ton-labels'
+            prune: Delete rows from this source that are no longer in the dataset
+
+        Returns:
+            Addresses that were added, changed and removed
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE known_wallets_staging (
+                        address VARCHAR(100) PRIMARY KEY,
+                        label VARCHAR(50),
+                        owner_name VARCHAR(200),
+                        notes TEXT,
+                        address_key BYTEA
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    'known_wallets_staging',
+                    records=[
+                        (address, label, owner_name, notes, address_key(address))
+                        for address, label, owner_name, notes in records
+                    ],
+                    columns=['address', 'label', 'owner_name', 'notes', 'address_key']
+                )
+
+                added = await conn.fetch("""
+                    SELECT s.address FROM known_wallets_staging s
+                    LEFT JOIN known_wallets k ON k.address = s.address
+                    WHERE k.address IS NULL
+                """)
+                changed = await conn.fetch("""
+                    SELECT s.address FROM known_wallets_staging s
+                    JOIN known_wallets k ON k.address = s.address
+                    WHERE k.source = $1
+                      AND (k.label, k.owner_name, k.notes)
+                        IS DISTINCT FROM (s.label, s.owner_name, s.notes)
+                """, source)
+
+                await conn.execute("""
+                    INSERT INTO known_wallets (address, label, owner_name, notes, address_key, source)
+                    SELECT address, label, owner_name, notes, address_key, $1
+                    FROM known_wallets_staging
+                    ON CONFLICT (address) DO UPDATE SET
+                        label = EXCLUDED.label,
+                        owner_name = EXCLUDED.owner_name,
+                        notes = EXCLUDED.notes,
+                        address_key = EXCLUDED.address_key,
+                        source = EXCLUDED.source
+                    WHERE known_wallets.source = EXCLUDED.source
+                      AND (known_wallets.label, known_wallets.owner_name, known_wallets.notes)
+                        IS DISTINCT FROM (EXCLUDED.label, EXCLUDED.owner_name, EXCLUDED.notes)
+                """, source)
+
+                removed = []
+                if prune:
+                    removed = await conn.fetch("""
+                        DELETE FROM known_wallets k
+                        WHERE k.source = $1
+                        AND NOT EXISTS (
+                            SELECT 1 FROM known_wallets_staging s WHERE s.address = k.address
+                        )
+                        RETURNING k.address
+                    """, source)
+
+        return {
+            'added': [row['address'] for row in added],
+            'changed': [row['address'] for row in changed],
+            'removed': [row['address'] for row in removed],
+        }
+
+    async def get_all_labels(self) -> List[KnownWallet]:
+        """Get every labeled wallet (for the in-memory label index)."""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("SELECT * FROM known_wallets")
+            return [KnownWallet(**dict(row)) for row in rows]
+
     async def get_whales(self, min_appearances: int = 3) -> List[Dict[str, Any]]:
         """Get wallets that appear as top holders frequently."""
         async with self._pool.acquire() as conn:
@@ -856,24 +1423,29 @@ class TokenRepository:
         """Get token by address"""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM tracked_tokens WHERE address = $1",
-                address
+                "SELECT * FROM tracked_tokens WHERE address = $1 OR address_key = $2 LIMIT 1",
+                address, address_key(address)
             )
             if row:
                 return TrackedToken(**dict(row))
             return None
 
-    async def upsert(self, token: TrackedToken) -> None:
-        """Insert or update a token"""
+    async def upsert(self, token: TrackedToken) -> bool:
+        """
+        Insert or update a token.
+
+        Returns True if the row was inserted (xmax = 0 only on a fresh
+        insert), False if an existing token was updated.
+        """
         async with self._pool.acquire() as conn:
-            await conn.execute("""
+            return await conn.fetchval("""
                 INSERT INTO tracked_tokens (
                     address, symbol, name, decimals, deployer, total_supply,
                     first_seen, initial_holder_count, initial_top_holder_pct,
                     initial_liquidity_usd, safety_score, lp_locked,
                     ownership_renounced, current_holder_count,
-                    current_top_holder_pct, current_price_usd, last_updated
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, NOW())
+                    current_top_holder_pct, current_price_usd, last_updated, address_key
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, NOW(), $17)
                 ON CONFLICT (address) DO UPDATE SET
                     symbol = COALESCE($2, tracked_tokens.symbol),
                     name = COALESCE($3, tracked_tokens.name),
@@ -881,7 +1453,9 @@ class TokenRepository:
                     current_top_holder_pct = $15,
                     current_price_usd = $16,
                     safety_score = $11,
-                    last_updated = NOW()
+                    last_updated = NOW(),
+                    address_key = COALESCE(tracked_tokens.address_key, $17)
+                RETURNING (xmax = 0) AS inserted
             """,
                 token.address, token.symbol, token.name, token.decimals,
                 token.deployer, token.total_supply, token.first_seen,
@@ -889,7 +1463,7 @@ class TokenRepository:
                 token.initial_liquidity_usd, token.safety_score,
                 token.lp_locked, token.ownership_renounced,
                 token.current_holder_count, token.current_top_holder_pct,
-                token.current_price_usd
+                token.current_price_usd, address_key(token.address)
             )
 
     async def mark_rugged(self, address: str) -> None:
@@ -901,6 +1475,44 @@ class TokenRepository:
                 WHERE address = $1
             """, address)
 
+    async def get_recheck_candidates(self, days: int = 7, limit: int = 5000) -> List[TrackedToken]:
+        """Non-rugged tokens first seen in the last `days`, for rug re-checks"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM tracked_tokens
+                WHERE rugged = FALSE AND first_seen >= NOW() - make_interval(days => $1)
+                ORDER BY first_seen DESC
+                LIMIT $2
+            """, days, limit)
+            return [TrackedToken(**dict(row)) for row in rows]
+
+    async def update_current_state(
+        self,
+        address: str,
+        holder_count: int,
+        top_holder_pct: float
+    ) -> None:
+        """Refresh a token's current holder metrics after a re-check"""
+        async with self._pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE tracked_tokens
+                SET current_holder_count = $2, current_top_holder_pct = $3, last_updated = NOW()
+                WHERE address = $1
+            """, address, holder_count, top_holder_pct)
+
+    async def count_recent_events(
+        self,
+        address: str,
+        event_types: List[str],
+        since: datetime
+    ) -> int:
+        """Count a token's events of the given types since a time"""
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval("""
+                SELECT COUNT(*) FROM token_events
+                WHERE token_address = $1 AND event_type = ANY($2::text[]) AND created_at >= $3
+            """, address, event_types, since)
+
     async def record_dev_sell(self, address: str, sell_pct: float) -> None:
         """Record first developer sell"""
         async with self._pool.acquire() as conn:
@@ -910,25 +1522,57 @@ class TokenRepository:
                 WHERE address = $1 AND first_dev_sell_at IS NULL
             """, address, sell_pct)
 
-    async def get_recent(self, limit: int = 100) -> List[TrackedToken]:
-        """Get recently tracked tokens"""
+    async def get_recent(
+        self,
+        limit: int = 100,
+        before: Optional[Keyset] = None
+    ) -> List[TrackedToken]:
+        """
+        Get recently tracked tokens, newest first.
+
+        Pages by the (first_seen, address) keyset of the last row seen.
+        """
         async with self._pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM tracked_tokens
-                ORDER BY first_seen DESC
-                LIMIT $1
-            """, limit)
+            if before:
+                rows = await conn.fetch("""
+                    SELECT * FROM tracked_tokens
+                    WHERE (first_seen, address) < ($1, $2)
+                    ORDER BY first_seen DESC, address DESC
+                    LIMIT $3
+                """, before[0], str(before[1]), limit)
+            else:
+                rows = await conn.fetch("""
+                    SELECT * FROM tracked_tokens
+                    ORDER BY first_seen DESC, address DESC
+                    LIMIT $1
+                """, limit)
             return [TrackedToken(**dict(row)) for row in rows]
 
-    async def get_rugged(self, limit: int = 100) -> List[TrackedToken]:
-        """Get tokens that rugged"""
+    async def get_rugged(
+        self,
+        limit: int = 100,
+        before: Optional[Keyset] = None
+    ) -> List[TrackedToken]:
+        """
+        Get tokens that rugged, most recent rug first.
+
+        Pages by the (rugged_at, address) keyset of the last row seen.
+        """
         async with self._pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM tracked_tokens
-                WHERE rugged = TRUE
-                ORDER BY rugged_at DESC
-                LIMIT $1
-            """, limit)
+            if before:
+                rows = await conn.fetch("""
+                    SELECT * FROM tracked_tokens
+                    WHERE rugged = TRUE AND (rugged_at, address) < ($1, $2)
+                    ORDER BY rugged_at DESC NULLS LAST, address DESC
+                    LIMIT $3
+                """, before[0], str(before[1]), limit)
+            else:
+                rows = await conn.fetch("""
+                    SELECT * FROM tracked_tokens
+                    WHERE rugged = TRUE
+                    ORDER BY rugged_at DESC NULLS LAST, address DESC
+                    LIMIT $1
+                """, limit)
             return [TrackedToken(**dict(row)) for row in rows]
 
     async def get_safe(self, min_score: int = 80, limit: int = 100) -> List[TrackedToken]:
@@ -962,30 +1606,522 @@ class TokenRepository:
 
     async def add_event(self, token_address: str, event_type: str, event_data: Dict[str, Any] = None) -> None:
         """Log a token event"""
-        import json
         async with self._pool.acquire() as conn:
             await conn.execute("""
                 INSERT INTO token_events (token_address, event_type, event_data)
                 VALUES ($1, $2, $3)
-            """, token_address, event_type, json.dumps(event_data or {}))
+            """, token_address, event_type, event_data or {})
 
     async def get_events(self, token_address: str, limit: int = 50) -> List[TokenEvent]:
         """Get events for a token"""
-        import json
+        return await self.query_events(token_address=token_address, limit=limit)
+
+    async def query_events(
+        self,
+        event_type: Optional[str] = None,
+        token_address: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        contains: Optional[Dict[str, Any]] = None,
+        min_values: Optional[Dict[str, float]] = None,
+        max_values: Optional[Dict[str, float]] = None,
+        limit: int = 100
+    ) -> List[TokenEvent]:
+        """
+        Query token events by type, time window and payload predicates.
+
+        Example - whale exits over 10% in the last hour:
+            await db.tokens.query_events(
+                event_type='whale_exit',
+                since=datetime.now() - timedelta(hours=1),
+                min_values={'pct_sold': 10},
+            )
+
+        Args:
+            event_type: 'deploy', 'whale_entry', 'whale_exit', 'rug', ...
+            token_address: Only events for this token
+            since / until: created_at window
+            contains: Payload must contain these key/values (JSONB @>, GIN indexed)
+            min_values / max_values: Numeric payload field bounds (non-numeric values never match)
+            limit: Max events, newest first
+        """
+        conditions = []
+        params: List[Any] = []
+
+        def param(value) -> str:
+            params.append(value)
+            return f"${len(params)}"
+
+        if event_type:
+            conditions.append(f"event_type = {param(event_type)}")
+        if token_address:
+            conditions.append(f"token_address = {param(token_address)}")
+        if since:
+            conditions.append(f"created_at >= {param(since)}")
+        if until:
+            conditions.append(f"created_at < {param(until)}")
+        if contains:
+            conditions.append(f"event_data @> {param(contains)}::jsonb")
+        for op, bounds in ((">=", min_values), ("<=", max_values)):
+            for key, value in (bounds or {}).items():
+                key_param = param(key)
+                conditions.append(
+                    f"CASE WHEN jsonb_typeof(event_data -> {key_param}::text) = 'number' "
+                    f"THEN (event_data ->> {key_param}::text)::numeric END {op} {param(Decimal(str(value)))}"
+                )
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT * FROM token_events
+            {where}
+            ORDER BY created_at DESC
+            LIMIT {param(limit)}
+        """
+
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(query, *params)
+            return [TokenEvent(**dict(row)) for row in rows]
+
+    async def iter_export(
+        self,
+        dataset: str,
+        since: Optional[datetime] = None,
+        batch_size: int = 2000
+    ):
+        """
+        Stream a dataset in batches through a server-side cursor.
+
+        Yields lists of records ordered by the dataset's watermark column
+        (see EXPORT_DATASETS). `since` is inclusive, so an incremental pull
+        may repeat rows sharing the previous watermark; dedupe on the key.
+        Memory stays at one batch regardless of table size.
+        """
+        table, columns, watermark = EXPORT_DATASETS[dataset]
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        params = []
+        if since:
+            query += f" WHERE {watermark} >= $1"
+            params.append(since)
+        query += f" ORDER BY {watermark}"
+
+        async with self._pool.acquire() as conn:
+            # One snapshot for the whole dump
+            async with conn.transaction(isolation='repeatable_read', readonly=True):
+                cursor = await conn.cursor(query, *params)
+                while True:
+                    batch = await cursor.fetch(batch_size)
+                    if not batch:
+                        break
+                    yield batch
+
+
+class JobQueueRepository:
+    """
+    Postgres-backed job queue; one table per queue.
+
+    Workers claim with FOR UPDATE SKIP LOCKED, so any number of workers
+    in any number of processes can drain the same table without handing
+    out a job twice. A subclass names its table, row model and the
+    statuses/columns where its table differs; claim, retry, dead-letter,
+    orphan release and retention are shared.
+    """
+
+    table = ""
+    model: type
+    claim_order = "next_run_at, id"
+    due_column = "next_run_at"  # A pending job is claimable once this has passed
+    running = "running"
+    done = "done"
+    failed = "failed"  # Terminal state when a job is out of retries
+    owner_column: Optional[str] = "locked_by"  # Worker holding a claimed job
+    finished_column: Optional[str] = "finished_at"  # Stamped on done/failed
+    purged = ("done", "failed")  # Statuses removed after retention
+    retention_column = "finished_at"
+
+    def __init__(self, pool: Pool):
+        self._pool = pool
+
+    def _release_owner(self) -> str:
+        return f"{self.owner_column} = NULL, " if self.owner_column else ""
+
+    def _finish(self) -> str:
+        return f"{self.finished_column} = NOW(), " if self.finished_column else ""
+
+    async def get(self, job_id: int):
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT * FROM {self.table} WHERE id = $1", job_id)
+            return self.model(**dict(row)) if row else None
+
+    async def _claim(self, conn, selected: str, arg, worker_id: Optional[str] = None) -> list:
+        """Mark the pending rows `selected` (a SELECT of ids over $1 = arg) claimed, ordered by id"""
+        owner = f"{self.owner_column} = $2, " if self.owner_column else ""
+        args = [arg, worker_id] if self.owner_column else [arg]
+        rows = await conn.fetch(f"""
+            UPDATE {self.table}
+            SET status = '{self.running}', {owner}locked_at = NOW(), attempts = attempts + 1
+            WHERE id IN ({selected})
+            RETURNING *
+        """, *args)
+        return sorted((self.model(**dict(row)) for row in rows), key=lambda job: job.id)
+
+    async def claim(self, worker_id: str, limit: int = 1) -> list:
+        """Lock up to `limit` due jobs for this worker, in `claim_order`"""
+        async with self._pool.acquire() as conn:
+            return await self._claim(conn, f"""
+                SELECT id FROM {self.table}
+                WHERE status = 'pending' AND {self.due_column} <= NOW()
+                ORDER BY {self.claim_order}
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            """, limit, worker_id)
+
+    async def _complete(self, ids: List[int], extra: str = "", *extra_args) -> None:
+        """Shared success path; `extra` adds SET clauses over $2..."""
+        async with self._pool.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {self.table}
+                SET status = '{self.done}', {self._finish()}{self._release_owner()}last_error = NULL{extra}
+                WHERE id = ANY($1::bigint[])
+            """, ids, *extra_args)
+
+    async def complete(self, job_id: int) -> None:
+        """Mark a claimed job done"""
+        await self._complete([job_id])
+
+    async def _fail(
+        self,
+        ids: List[int],
+        error: str,
+        retry_in: Optional[float],
+        extra: str = "",
+        *extra_args
+    ) -> None:
+        """Shared failure path; `extra` adds SET clauses over $3..."""
+        args = [ids, error[:1000], *extra_args]
+        if retry_in is None:
+            state = f"status = '{self.failed}', {self._finish()}"
+        else:
+            args.append(float(retry_in))
+            state = f"status = 'pending', {self.due_column} = NOW() + make_interval(secs => ${len(args)}), "
+        async with self._pool.acquire() as conn:
+            await conn.execute(f"""
+                UPDATE {self.table}
+                SET {state}{self._release_owner()}last_error = $2{extra}
+                WHERE id = ANY($1::bigint[])
+            """, *args)
+
+    async def fail(self, job_id: int, error: str, retry_in: Optional[float]) -> None:
+        """
+        Record a failed attempt. The job is retried after `retry_in`
+        seconds, or moved to the terminal failed state when it is None.
+        """
+        await self._fail([job_id], error, retry_in)
+
+    async def release_stale(self, older_than_seconds: float) -> int:
+        """Return jobs whose worker died mid-run to the queue"""
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(f"""
+                UPDATE {self.table}
+                SET status = 'pending', {self._release_owner()}{self.due_column} = NOW(),
+                    last_error = 'worker lost'
+                WHERE status = '{self.running}'
+                  AND locked_at < NOW() - make_interval(secs => $1)
+            """, float(older_than_seconds))
+            return int(result.split()[-1])
+
+    async def purge(self, older_than_days: int) -> int:
+        """Delete finished jobs past retention"""
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(f"""
+                DELETE FROM {self.table}
+                WHERE status = ANY($2::text[])
+                  AND {self.retention_column} < NOW() - make_interval(days => $1)
+            """, older_than_days, list(self.purged))
+            return int(result.split()[-1])
+
+
+class CrawlJobRepository(JobQueueRepository):
+    """Crawl job queue (see crawl_queue). Exhausted jobs are dead-lettered."""
+
+    table = "crawl_jobs"
+    model = CrawlJob
+    claim_order = "priority DESC, next_run_at"
+    failed = "dead"
+    purged = ("done",)  # Dead jobs stay for get_dead / retry_dead
+
+    async def enqueue(
+        self,
+        address: str,
+        kind: str = "analyze",
+        priority: int = 0,
+        payload: Optional[Dict[str, Any]] = None,
+        delay_seconds: float = 0
+    ) -> bool:
+        """
+        Queue a job. A job already pending for the same (address, kind)
+        keeps its place but takes the higher priority.
+
+        Returns True if a new job was created.
+        """
+        async with self._pool.acquire() as conn:
+            inserted = await conn.fetchval("""
+                INSERT INTO crawl_jobs (address, kind, priority, payload, next_run_at)
+                VALUES ($1, $2, $3, $4, NOW() + make_interval(secs => $5))
+                ON CONFLICT (address, kind) WHERE status IN ('pending', 'running')
+                DO UPDATE SET priority = GREATEST(crawl_jobs.priority, EXCLUDED.priority)
+                RETURNING (xmax = 0) AS inserted
+            """, address, kind, priority, payload or {}, float(delay_seconds))
+            return bool(inserted)
+
+    async def retry_dead(self, kind: Optional[str] = None) -> int:
+        """Move dead-lettered jobs back to pending with a fresh attempt count"""
+        async with self._pool.acquire() as conn:
+            result = await conn.execute("""
+                UPDATE crawl_jobs
+                SET status = 'pending', attempts = 0, next_run_at = NOW(), finished_at = NULL
+                WHERE status = 'dead' AND ($1::text IS NULL OR kind = $1)
+            """, kind)
+            return int(result.split()[-1])
+
+    async def get_dead(self, limit: int = 50) -> List[CrawlJob]:
+        """Most recently dead-lettered jobs"""
         async with self._pool.acquire() as conn:
             rows = await conn.fetch("""
-                SELECT * FROM token_events
-                WHERE token_address = $1
-                ORDER BY created_at DESC
-                LIMIT $2
-            """, token_address, limit)
-            events = []
-            for row in rows:
-                d = dict(row)
-                if d.get('event_data'):
-                    d['event_data'] = json.loads(d['event_data'])
-                events.append(TokenEvent(**d))
-            return events
+                SELECT * FROM crawl_jobs
+                WHERE status = 'dead'
+                ORDER BY finished_at DESC
+                LIMIT $1
+            """, limit)
+            return [CrawlJob(**dict(row)) for row in rows]
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Queue depth by status, oldest due job and last-hour throughput"""
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                SELECT
+                    COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                    COUNT(*) FILTER (WHERE status = 'running') AS running,
+                    COUNT(*) FILTER (WHERE status = 'dead') AS dead,
+                    COUNT(*) FILTER (
+                        WHERE status = 'done' AND finished_at > NOW() - INTERVAL '1 hour'
+                    ) AS done_last_hour,
+                    EXTRACT(EPOCH FROM NOW() - MIN(next_run_at) FILTER (
+                        WHERE status = 'pending' AND next_run_at <= NOW()
+                    )) AS oldest_due_seconds
+                FROM crawl_jobs
+            """)
+            return {
+                "pending": row["pending"],
+                "running": row["running"],
+                "dead": row["dead"],
+                "done_last_hour": row["done_last_hour"],
+                "oldest_due_seconds": float(row["oldest_due_seconds"] or 0),
+            }
+
+
+class SealJobRepository(JobQueueRepository):
+    """
+    Seal queue (see seal_queue). Every seal entry point (bot handlers,
+    payment webhooks, the API) enqueues here.
+    """
+
+    table = "seal_jobs"
+    model = SealJob
+
+    def __init__(self, pool: Pool, notarizations: "NotarizationRepository"):
+        super().__init__(pool)
+        self._notarizations = notarizations
+
+    async def enqueue(
+        self,
+        user_id: int,
+        source: str,
+        payload: Dict[str, Any],
+        contract_hash: Optional[str] = None,
+        callback_url: Optional[str] = None,
+        max_attempts: int = 5
+    ) -> SealJob:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                INSERT INTO seal_jobs (user_id, source, payload, contract_hash, callback_url, max_attempts)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                RETURNING *
+            """, user_id, source, payload, contract_hash, callback_url, max_attempts)
+            return SealJob(**dict(row))
+
+    async def complete(self, job_id: int, contract_hash: str, tx_hash: Optional[str]) -> bool:
+        """
+        Mark a running job done and apply its effects in the same
+        transaction: the notarization row, the payload's 'charge' (a spend
+        keyed by the job) and its 'lottery_stars' entry. A crash can't
+        leave a done job without them, or apply them twice.
+
+        Returns:
+            False if the job was no longer running (already completed)
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow("""
+                    UPDATE seal_jobs
+                    SET status = 'done', finished_at = NOW(), locked_by = NULL, last_error = NULL,
+                        contract_hash = $2, tx_hash = $3
+                    WHERE id = $1 AND status = 'running'
+                    RETURNING user_id, source, payload
+                """, job_id, contract_hash, tx_hash)
+                if row is None:
+                    return False
+                user_id, payload = row['user_id'], row['payload'] or {}
+                await self._notarizations.insert(conn, user_id, contract_hash, row['source'], paid=True)
+                if payload.get('charge'):
+                    await UserRepository._append_ledger(
+                        conn, user_id, 'spend', -payload['charge'], f"seal_job:{job_id}"
+                    )
+                if payload.get('lottery_stars'):
+                    await LotteryRepository._add_entry(conn, user_id, payload['lottery_stars'])
+                return True
+
+    async def fail(
+        self,
+        job_id: int,
+        error: str,
+        retry_in: Optional[float],
+        contract_hash: Optional[str] = None
+    ) -> None:
+        """Retry after `retry_in` seconds, or mark failed when it is None"""
+        await self._fail([job_id], error, retry_in, ", contract_hash = COALESCE($3, contract_hash)", contract_hash)
+
+    async def set_callback_status(self, job_id: int, status: int) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE seal_jobs SET callback_status = $2 WHERE id = $1", job_id, status
+            )
+
+    async def get_stats(self) -> Dict[str, Any]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                SELECT
+                    COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                    COUNT(*) FILTER (WHERE status = 'running') AS running,
+                    COUNT(*) FILTER (
+                        WHERE status = 'failed' AND finished_at > NOW() - INTERVAL '1 day'
+                    ) AS failed_last_day,
+                    COUNT(*) FILTER (
+                        WHERE status = 'done' AND finished_at > NOW() - INTERVAL '1 hour'
+                    ) AS done_last_hour,
+                    EXTRACT(EPOCH FROM NOW() - MIN(created_at) FILTER (
+                        WHERE status IN ('pending', 'running')
+                    )) AS oldest_open_seconds
+                FROM seal_jobs
+            """)
+            return {
+                "pending": row["pending"],
+                "running": row["running"],
+                "failed_last_day": row["failed_last_day"],
+                "done_last_hour": row["done_last_hour"],
+                "oldest_open_seconds": float(row["oldest_open_seconds"] or 0),
+            }
+
+
+class OutboxRepository(JobQueueRepository):
+    """
+    Persistent outbox for social posts, one row per channel (see
+    notify_bus). Claimed per channel, so a post is sent once even with
+    several bot processes running.
+    """
+
+    table = "notification_outbox"
+    model = OutboxMessage
+    due_column = "available_at"
+    running = "sending"
+    done = "sent"
+    owner_column = None
+    finished_column = None
+    purged = ("sent", "failed")
+    retention_column = "created_at"
+
+    async def enqueue(
+        self,
+        channel: str,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        delay_seconds: float = 0
+    ) -> int:
+        """Queue a post; returns its id"""
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval("""
+                INSERT INTO notification_outbox (channel, kind, payload, priority, available_at)
+                VALUES ($1, $2, $3, $4, NOW() + make_interval(secs => $5))
+                RETURNING id
+            """, channel, kind, payload, priority, float(delay_seconds))
+
+    async def claim(
+        self,
+        channel: str,
+        digest_kinds: List[str],
+        digest_max: int = 50
+    ) -> List[OutboxMessage]:
+        """
+        Lock the next due post for a channel.
+
+        If it is of a digest kind, every other pending post of that kind
+        is claimed with it (due or not), so a burst goes out as one post.
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                head = await conn.fetchrow("""
+                    SELECT id, kind FROM notification_outbox
+                    WHERE channel = $1 AND status = 'pending' AND available_at <= NOW()
+                    ORDER BY priority DESC, id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                """, channel)
+                if head is None:
+                    return []
+                ids = [head["id"]]
+                if head["kind"] in digest_kinds:
+                    ids = [row["id"] for row in await conn.fetch("""
+                        SELECT id FROM notification_outbox
+                        WHERE channel = $1 AND kind = $2 AND status = 'pending'
+                        ORDER BY id
+                        LIMIT $3
+                        FOR UPDATE SKIP LOCKED
+                    """, channel, head["kind"], digest_max)]
+                return await self._claim(conn, "SELECT unnest($1::bigint[])", ids)
+
+    async def mark_sent(self, ids: List[int], external_id: Optional[str] = None) -> None:
+        await self._complete(ids, ", sent_at = NOW(), external_id = $2", external_id)
+
+    async def mark_failed(self, ids: List[int], error: str, retry_in: Optional[float]) -> None:
+        """Retry after `retry_in` seconds, or give up when it is None"""
+        await self._fail(ids, error, retry_in)
+
+    async def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per channel: queue depth, lag of the oldest pending post, last-hour sends"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT
+                    channel,
+                    COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                    COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+                    COUNT(*) FILTER (
+                        WHERE status = 'sent' AND sent_at > NOW() - INTERVAL '1 hour'
+                    ) AS sent_last_hour,
+                    EXTRACT(EPOCH FROM NOW() - MIN(created_at) FILTER (
+                        WHERE status IN ('pending', 'sending')
+                    )) AS lag_seconds
+                FROM notification_outbox
+                GROUP BY channel
+            """)
+            return {
+                row["channel"]: {
+                    "pending": row["pending"],
+                    "failed": row["failed"],
+                    "sent_last_hour": row["sent_last_hour"],
+                    "lag_seconds": float(row["lag_seconds"] or 0),
+                }
+                for row in rows
+            }
 
 
 # ========================
@@ -1016,6 +2152,9 @@ class Database:
         self._lottery: Optional[LotteryRepository] = None
         self._tokens: Optional[TokenRepository] = None
         self._wallets: Optional[WalletRepository] = None
+        self._crawl_jobs: Optional[CrawlJobRepository] = None
+        self._outbox: Optional[OutboxRepository] = None
+        self._seal_jobs: Optional[SealJobRepository] = None
 
     @property
     def pool(self) -> Pool:
@@ -1065,13 +2204,33 @@ class Database:
             raise RuntimeError("Database not connected. Call await db.connect() first.")
         return self._wallets
 
-    async def connect(self, database_url: Optional[str] = None) -> None:
+    @property
+    def crawl_jobs(self) -> CrawlJobRepository:
+        if self._crawl_jobs is None:
+            raise RuntimeError("Database not connected. Call await db.connect() first.")
+        return self._crawl_jobs
+
+    @property
+    def outbox(self) -> OutboxRepository:
+        if self._outbox is None:
+            raise RuntimeError("Database not connected. Call await db.connect() first.")
+        return self._outbox
+
+    @property
+    def seal_jobs(self) -> SealJobRepository:
+        if self._seal_jobs is None:
+            raise RuntimeError("Database not connected. Call await db.connect() first.")
+        return self._seal_jobs
+
+    async def connect(self, database_url: Optional[str] = None, ssl: Optional[str] = None) -> None:
         """
         Connect to the database and initialize connection pool.
 
         Args:
             database_url: PostgreSQL connection URL. If not provided,
                          reads from DATABASE_URL environment variable.
+            ssl: SSL mode (default DATABASE_SSL or 'require'); 'disable'
+                 for a local Postgres
         """
         if self._pool is not None:
             return  # Already connected
@@ -1091,7 +2250,8 @@ class Database:
             min_size=2,
             max_size=10,
             command_timeout=30,
-            ssl='require'
+            ssl=ssl or os.getenv("DATABASE_SSL", "require"),
+            init=_init_connection
         )
 
         # Initialize repositories
@@ -1102,6 +2262,9 @@ class Database:
         self._lottery = LotteryRepository(self._pool)
         self._tokens = TokenRepository(self._pool)
         self._wallets = WalletRepository(self._pool)
+        self._crawl_jobs = CrawlJobRepository(self._pool)
+        self._outbox = OutboxRepository(self._pool)
+        self._seal_jobs = SealJobRepository(self._pool, self._notarizations)
 
         # Initialize schema
         await self._init_schema()
@@ -1120,6 +2283,9 @@ class Database:
             self._lottery = None
             self._tokens = None
             self._wallets = None
+            self._crawl_jobs = None
+            self._outbox = None
+            self._seal_jobs = None
             print("Database disconnected")
 
     async def _init_schema(self) -> None:
@@ -1141,6 +2307,33 @@ class Database:
                 )
             """)
 
+            # Maintained referral counter, backfilled once from referred_by
+            await conn.execute("""
+                ALTER TABLE users ADD COLUMN IF NOT EXISTS referral_count INTEGER
+            """)
+            await conn.execute("""
+                UPDATE users u SET referral_count = (
+                    SELECT COUNT(*) FROM users r WHERE r.referred_by = u.user_id
+                )
+                WHERE u.referral_count IS NULL
+            """)
+            await conn.execute("""
+                ALTER TABLE users ALTER COLUMN referral_count SET DEFAULT 0
+            """)
+
+            # Balance ledger - append-only, compacted into users periodically
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS balance_ledger (
+                    id BIGSERIAL PRIMARY KEY,
+                    user_id BIGINT REFERENCES users(user_id),
+                    kind VARCHAR(20) NOT NULL,  -- 'payment', 'spend', 'referral', 'lottery', 'withdrawal', 'referral_signup'
+                    amount DECIMAL(20, 8) DEFAULT 0,
+                    source_tx VARCHAR(100),
+                    compacted BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+
             # Notarizations table
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS notarizations (
@@ -1368,14 +2561,138 @@ class Database:
                 )
             """)
 
+            # Crawl job queue - consumed with SKIP LOCKED, see crawl_queue
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    address VARCHAR(100) NOT NULL,
+                    kind VARCHAR(30) NOT NULL DEFAULT 'analyze',
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    payload JSONB NOT NULL DEFAULT '{}',
+                    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending, running, done, dead
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    locked_by VARCHAR(100),
+                    locked_at TIMESTAMP,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    finished_at TIMESTAMP
+                )
+            """)
+            # One live job per (address, kind); finished jobs don't block re-queueing
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_jobs_live
+                ON crawl_jobs(address, kind) WHERE status IN ('pending', 'running')
+            """)
+            # Claim order, covering only claimable rows
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_crawl_jobs_claim
+                ON crawl_jobs(priority DESC, next_run_at) WHERE status = 'pending'
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_crawl_jobs_running
+                ON crawl_jobs(locked_at) WHERE status = 'running'
+            """)
+
+            # Social post outbox - drained per channel by notify_bus
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id BIGSERIAL PRIMARY KEY,
+                    channel VARCHAR(20) NOT NULL,
+                    kind VARCHAR(20) NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    payload JSONB NOT NULL DEFAULT '{}',
+                    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending, sending, sent, failed
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    locked_at TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    sent_at TIMESTAMP,
+                    external_id VARCHAR(100),
+                    last_error TEXT
+                )
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending
+                ON notification_outbox(channel, priority DESC, id) WHERE status = 'pending'
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_notification_outbox_sending
+                ON notification_outbox(locked_at) WHERE status = 'sending'
+            """)
+
+            # Seal job queue - every seal goes through seal_queue workers
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS seal_jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    user_id BIGINT NOT NULL,
+                    source VARCHAR(100) NOT NULL,
+                    payload JSONB NOT NULL DEFAULT '{}',
+                    status VARCHAR(10) NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 5,
+                    next_run_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    locked_by VARCHAR(100),
+                    locked_at TIMESTAMP,
+                    contract_hash VARCHAR(64),
+                    tx_hash VARCHAR(100),
+                    callback_url TEXT,
+                    callback_status INTEGER,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    finished_at TIMESTAMP
+                )
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seal_jobs_claim
+                ON seal_jobs(next_run_at, id) WHERE status = 'pending'
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seal_jobs_running
+                ON seal_jobs(locked_at) WHERE status = 'running'
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seal_jobs_user
+                ON seal_jobs(user_id, created_at DESC)
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_seal_jobs_unconfirmed
+                ON seal_jobs(contract_hash) WHERE status = 'done' AND tx_hash IS NULL
+            """)
+
+            # On-chain confirmation of seals (see confirmer.py)
+            await conn.execute("""
+                ALTER TABLE notarizations
+                ADD COLUMN IF NOT EXISTS tx_lt BIGINT,
+                ADD COLUMN IF NOT EXISTS source VARCHAR(100),
+                ADD COLUMN IF NOT EXISTS confirmed_at TIMESTAMP
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_notarizations_unconfirmed
+                ON notarizations(timestamp) WHERE confirmed_at IS NULL
+            """)
+
+            # Canonical address keys (workchain byte + 32-byte hash), see utils.address
+            for table, _, _, column in ADDRESS_KEY_COLUMNS:
+                await conn.execute(address_key_ddl(table, column))
+
             # Create indexes for performance
+            # (user_id, timestamp, id) serves per-user keyset pages and
+            # plain user_id lookups, so it replaces idx_notarizations_user_id
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notarizations_user_id
-                ON notarizations(user_id)
+                CREATE INDEX IF NOT EXISTS idx_notarizations_user_keyset
+                ON notarizations(user_id, timestamp DESC, id DESC)
             """)
+            await conn.execute("DROP INDEX IF EXISTS idx_notarizations_user_id")
+
+            # Hashes are stored as 32-byte BYTEA next to the hex text. The
+            # index on hash_bin replaces the text index at about half the size
+            # and serves both exact lookups and prefix range scans. Older rows
+            # and the index are filled by backfill_hash_bins() in the background.
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_notarizations_contract_hash
-                ON notarizations(contract_hash)
+                ALTER TABLE notarizations
+                ADD COLUMN IF NOT EXISTS hash_bin BYTEA
+                CHECK (hash_bin IS NULL OR octet_length(hash_bin) = 32)
             """)
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_notarizations_timestamp
@@ -1389,6 +2706,18 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_users_referred_by
                 ON users(referred_by)
             """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_balance_ledger_tail
+                ON balance_ledger(user_id) WHERE NOT compacted
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_balance_ledger_user
+                ON balance_ledger(user_id, id DESC)
+            """)
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_balance_ledger_source_tx
+                ON balance_ledger(user_id, kind, source_tx) WHERE source_tx IS NOT NULL
+            """)
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_api_keys_user_id
                 ON api_keys(user_id)
@@ -1404,8 +2733,17 @@ class Database:
 
             # Token tracking indexes
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_tracked_tokens_first_seen
-                ON tracked_tokens(first_seen DESC)
+                CREATE INDEX IF NOT EXISTS idx_tracked_tokens_recent_keyset
+                ON tracked_tokens(first_seen DESC, address DESC)
+            """)
+            await conn.execute("DROP INDEX IF EXISTS idx_tracked_tokens_first_seen")
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tracked_tokens_rugged_keyset
+                ON tracked_tokens(rugged_at DESC NULLS LAST, address DESC) WHERE rugged = TRUE
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tracked_tokens_last_updated
+                ON tracked_tokens(last_updated)
             """)
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_tracked_tokens_safety_score
@@ -1423,6 +2761,23 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_token_events_type
                 ON token_events(event_type)
             """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_token_events_type_time
+                ON token_events(event_type, created_at DESC)
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_token_events_time
+                ON token_events(created_at DESC)
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_token_events_data
+                ON token_events USING GIN (event_data jsonb_path_ops)
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_token_events_wallet
+                ON token_events((event_data ->> 'wallet'))
+                WHERE event_data ? 'wallet'
+            """)
 
             # Holder snapshot indexes
             await conn.execute("""
@@ -1438,6 +2793,26 @@ class Database:
                 ON holder_snapshots(snapshot_at DESC)
             """)
 
+            # Label provenance, so dataset re-imports can prune removed labels.
+            # Rows imported before the column existed are tagged once, when it
+            # is added: later manual relabels (source NULL) keep the dataset's
+            # notes and must not be claimed back on the next restart.
+            has_source = await conn.fetchval("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'known_wallets' AND column_name = 'source'
+                )
+            """)
+            if not has_source:
+                async with conn.transaction():
+                    await conn.execute("""
+                        ALTER TABLE known_wallets ADD COLUMN IF NOT EXISTS source VARCHAR(30)
+                    """)
+                    await conn.execute("""
+                        UPDATE known_wallets SET source = 'ton-labels'
+                        WHERE notes LIKE '%"source": "ton-labels"%'
+                    """)
+
             # Known wallet indexes
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_known_wallets_label
@@ -1465,10 +2840,16 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_kol_calls_token
                 ON kol_calls(token_address)
             """)
+            # Keyset pagination of call lists (see KOLRepository.get_recent_calls)
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_kol_calls_time
-                ON kol_calls(called_at DESC)
+                CREATE INDEX IF NOT EXISTS idx_kol_calls_keyset
+                ON kol_calls(called_at DESC, id DESC)
             """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_kol_calls_chain_keyset
+                ON kol_calls(chain, called_at DESC, id DESC)
+            """)
+            await conn.execute("DROP INDEX IF EXISTS idx_kol_calls_time")
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_kol_wallets_kol
                 ON kol_wallets(kol_id)
@@ -1492,6 +2873,114 @@ class Database:
                 ON verified_users(kol_id) WHERE kol_id IS NOT NULL
             """)
 
+    async def backfill_address_keys(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Fill missing canonical address keys in batches.
+
+        Walks each table in primary key order, so rows whose address cannot
+        be parsed (e.g. non-TON chains) are visited once and left NULL.
+
+        Returns:
+            Number of keys filled per table
+        """
+        filled = {}
+        for table, pk, column, key_column in ADDRESS_KEY_COLUMNS:
+            first_query = f"""
+                SELECT {pk} AS pk, {column} AS address FROM {table}
+                WHERE {key_column} IS NULL AND {column} IS NOT NULL
+                ORDER BY {pk} LIMIT $1
+            """
+            next_query = f"""
+                SELECT {pk} AS pk, {column} AS address FROM {table}
+                WHERE {key_column} IS NULL AND {column} IS NOT NULL AND {pk} > $2
+                ORDER BY {pk} LIMIT $1
+            """
+            update_query = f"UPDATE {table} SET {key_column} = $2 WHERE {pk} = $1"
+
+            count = 0
+            last_pk = None
+            while True:
+                async with self.pool.acquire() as conn:
+                    if last_pk is None:
+                        rows = await conn.fetch(first_query, batch_size)
+                    else:
+                        rows = await conn.fetch(next_query, batch_size, last_pk)
+                    if not rows:
+                        break
+                    last_pk = rows[-1]['pk']
+
+                    updates = [
+                        (row['pk'], key) for row in rows
+                        if (key := address_key(row['address'])) is not None
+                    ]
+                    if updates:
+                        await conn.executemany(update_query, updates)
+                        count += len(updates)
+
+                if len(rows) < batch_size:
+                    break
+                await asyncio.sleep(0.1)  # Let request traffic through between batches
+
+            filled[table] = count
+            if count:
+                print(f"🔑 Backfilled {count} address keys in {table}")
+        return filled
+
+    async def backfill_hash_bins(self, batch_size: int = 10000) -> int:
+        """
+        Build idx_notarizations_hash_bin and fill hash_bin for older rows.
+
+        The index is built CONCURRENTLY (an interrupted build leaves an
+        invalid index, which is dropped and rebuilt), then rows are filled
+        in primary key order, one short transaction per batch, so neither
+        step blocks seals. The old text index is dropped once done.
+
+        Returns:
+            Number of rows filled
+        """
+        async with self.pool.acquire() as conn:
+            valid = await conn.fetchval("""
+                SELECT i.indisvalid FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = 'idx_notarizations_hash_bin'
+            """)
+            if valid is False:
+                await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_notarizations_hash_bin")
+            if not valid:
+                print("🔑 Building idx_notarizations_hash_bin")
+                await conn.execute("""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notarizations_hash_bin
+                    ON notarizations(hash_bin)
+                """)
+
+        count = 0
+        last_id = 0
+        while True:
+            async with self.pool.acquire() as conn:
+                ids = await conn.fetch("""
+                    SELECT id FROM notarizations
+                    WHERE id > $1 AND hash_bin IS NULL
+                    ORDER BY id LIMIT $2
+                """, last_id, batch_size)
+                if not ids:
+                    break
+                last_id = ids[-1]['id']
+                status = await conn.execute("""
+                    UPDATE notarizations SET hash_bin = decode(contract_hash, 'hex')
+                    WHERE id = ANY($1::bigint[]) AND hash_bin IS NULL
+                      AND contract_hash ~ '^[0-9a-fA-F]{64}$'
+                """, [row['id'] for row in ids])
+                count += int(status.split()[-1])
+            if len(ids) < batch_size:
+                break
+            await asyncio.sleep(0.1)  # Let request traffic through between batches
+
+        async with self.pool.acquire() as conn:
+            await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_notarizations_contract_hash")
+        if count:
+            print(f"🔑 Backfilled {count} notarization hash_bin values")
+        return count
+
     @asynccontextmanager
     async def transaction(self):
         """
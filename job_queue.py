@@ -0,0 +1,115 @@
+"""
+Job Queue Workers
+=================
+The run loop shared by every Postgres job queue
+(database.JobQueueRepository): crawl_queue.CrawlWorkerPool,
+seal_queue.SealWorkerPool and notify_bus.NotificationBus.
+
+A subclass names its repository and its worker steps. Each step claims
+and handles one batch; when a step finds nothing to do the worker idles
+until wake() or poll_interval. A maintenance task returns jobs whose
+worker died to the queue after stale_after seconds and purges finished
+ones past retention_days.
+
+Usage:
+    class ExportWorkers(JobWorkers):
+        label = "export"
+
+        def queue(self, db):
+            return db.export_jobs
+
+        def steps(self, db):
+            return {f"worker {n}": partial(self.run_batch, db, n) for n in range(2)}
+
+    asyncio.create_task(workers.run(db))
+    await workers.stop()
+"""
+
+import asyncio
+from typing import Dict, List, Callable, Awaitable
+
+MAINTENANCE_INTERVAL = 60
+
+
+class JobWorkers:
+    """Worker loops plus orphan release and retention for one job queue"""
+
+    label = "job"  # Used in log lines
+    poll_interval: float = 5  # Idle wait when the queue is empty
+    stale_after: float = 600  # Claimed jobs older than this are assumed orphaned
+    retention_days: int = 7
+    maintenance_interval: float = MAINTENANCE_INTERVAL
+
+    def __init__(self):
+        self.running = False
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def queue(self, db):
+        """The JobQueueRepository these workers drain"""
+        raise NotImplementedError
+
+    def steps(self, db) -> Dict[str, Callable[[], Awaitable[int]]]:
+        """Worker name -> one pass, returning how many jobs it claimed"""
+        raise NotImplementedError
+
+    def wake(self) -> None:
+        """New work was queued: end an idle wait early"""
+        self._wakeup.set()
+
+    def on_released(self, count: int) -> None:
+        print(f"♻️ Released {count} orphaned {self.label} jobs")
+
+    async def _idle(self) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self, name: str, step: Callable[[], Awaitable[int]]) -> None:
+        while self.running:
+            try:
+                if not await step():
+                    await self._idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {self.label.capitalize()} {name} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def maintain(self, db) -> None:
+        """One maintenance pass"""
+        queue = self.queue(db)
+        released = await queue.release_stale(self.stale_after)
+        if released:
+            self.on_released(released)
+        await queue.purge(older_than_days=self.retention_days)
+
+    async def _maintenance(self, db) -> None:
+        while self.running:
+            try:
+                await self.maintain(db)
+            except Exception as e:
+                print(f"⚠️ {self.label.capitalize()} queue maintenance failed: {e}")
+            await asyncio.sleep(self.maintenance_interval)
+
+    async def run(self, db) -> None:
+        """Run the workers until stop()"""
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._worker(name, step)) for name, step in self.steps(db).items()
+        ]
+        self._tasks.append(asyncio.create_task(self._maintenance(db)))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+
+    async def stop(self) -> None:
+        """Stop claiming; jobs in flight are released by the next maintenance pass"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
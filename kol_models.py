@@ -22,7 +22,7 @@ class KOL:
     telegram_note: Optional[str] = None  # Notes about TG access
 
     # Classification
-    chain_focus: str = "multi"  # JSON array stored as string: '["ton","sol"]'
+    chain_focus: List[str] = field(default_factory=lambda: ["multi"])  # JSONB array: ["ton", "sol"]
     category: str = "general"  # 'general', 'ton', 'solana', 'watchdog', 'regional', 'cross_chain'
     tier: str = "unknown"  # 'whale', 'alpha', 'mid', 'micro', 'unknown'
     language: str = "en"  # Primary language: en, ru, zh, hi, ar, es, fr, de, ko, pt, id, vi, th, fa, uk, pl, nl, it, sv
@@ -118,6 +118,7 @@ class KOLWallet:
     notes: Optional[str] = None
     first_seen: Optional[datetime] = None
     last_active: Optional[datetime] = None
+    wallet_key: Optional[bytes] = None  # Canonical TON address key (NULL for other chains)
 
 
 # ========================
@@ -238,10 +239,13 @@ CREATE INDEX IF NOT EXISTS idx_kols_verified ON kols(verified);
 CREATE INDEX IF NOT EXISTS idx_kol_calls_kol ON kol_calls(kol_id);
 CREATE INDEX IF NOT EXISTS idx_kol_calls_token ON kol_calls(token_address);
 CREATE INDEX IF NOT EXISTS idx_kol_calls_outcome ON kol_calls(outcome);
-CREATE INDEX IF NOT EXISTS idx_kol_calls_time ON kol_calls(called_at DESC);
+-- Keyset indexes are created at startup by database._init_schema
 
 CREATE INDEX IF NOT EXISTS idx_kol_wallets_kol ON kol_wallets(kol_id);
 CREATE INDEX IF NOT EXISTS idx_kol_wallets_address ON kol_wallets(wallet_address);
+
+-- wallet_key is added by database.address_key_ddl (see KOLRepository.init_schema)
+DROP INDEX IF EXISTS idx_kol_wallets_key;
 """
 
 
@@ -11,7 +11,10 @@ from typing import Optional, List, Dict, Any
 
 from asyncpg import Pool
 
+from database import address_key_ddl
 from kol_models import KOL, KOLCall, KOLWallet, KOL_SCHEMA, GROK_KOL_SEED
+from utils.address import address_key
+from utils.cursor import Keyset
 
 
 class KOLRepository:
@@ -24,6 +27,7 @@ class KOLRepository:
         """Initialize KOL tables."""
         async with self._pool.acquire() as conn:
             await conn.execute(KOL_SCHEMA)
+            await conn.execute(address_key_ddl("kol_wallets", "wallet_key"))
         print("KOL schema initialized")
 
     async def seed_from_grok(self) -> int:
@@ -45,10 +49,13 @@ class KOLRepository:
 
     async def create(self, **kwargs) -> KOL:
         """Create a new KOL profile."""
-        # Convert chain_focus list to JSON
+        # chain_focus is JSONB (encoded by the pool's json codec)
         chain_focus = kwargs.get('chain_focus', ['multi'])
-        if isinstance(chain_focus, list):
-            chain_focus = json.dumps(chain_focus)
+        if isinstance(chain_focus, str):
+            try:
+                chain_focus = json.loads(chain_focus)
+            except ValueError:
+                chain_focus = [chain_focus]
 
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow("""
@@ -373,37 +380,40 @@ class KOLRepository:
     async def get_recent_calls(
         self,
         chain: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        before: Optional[Keyset] = None
     ) -> List[Dict[str, Any]]:
-        """Get recent KOL calls."""
+        """
+        Get recent KOL calls, newest first.
+
+        Pass the (called_at, id) of the last call seen as `before` to get the
+        next page.
+        """
+        conditions = []
+        params: List[Any] = []
+        if chain:
+            params.append(chain)
+            conditions.append(f"c.chain = ${len(params)}")
+        if before:
+            params.extend([before[0], int(before[1])])
+            conditions.append(f"(c.called_at, c.id) < (${len(params) - 1}, ${len(params)})")
+        params.append(limit)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
         async with self._pool.acquire() as conn:
-            if chain:
-                rows = await conn.fetch("""
-                    SELECT
-                        c.*,
-                        k.x_handle,
-                        k.telegram,
-                        k.category,
-                        k.reputation_score
-                    FROM kol_calls c
-                    JOIN kols k ON c.kol_id = k.id
-                    WHERE c.chain = $1
-                    ORDER BY c.called_at DESC
-                    LIMIT $2
-                """, chain, limit)
-            else:
-                rows = await conn.fetch("""
-                    SELECT
-                        c.*,
-                        k.x_handle,
-                        k.telegram,
-                        k.category,
-                        k.reputation_score
-                    FROM kol_calls c
-                    JOIN kols k ON c.kol_id = k.id
-                    ORDER BY c.called_at DESC
-                    LIMIT $1
-                """, limit)
+            rows = await conn.fetch(f"""
+                SELECT
+                    c.*,
+                    k.x_handle,
+                    k.telegram,
+                    k.category,
+                    k.reputation_score
+                FROM kol_calls c
+                JOIN kols k ON c.kol_id = k.id
+                {where}
+                ORDER BY c.called_at DESC, c.id DESC
+                LIMIT ${len(params)}
+            """, *params)
             return [self._row_to_dict(row) for row in rows]
 
     # ========================
@@ -424,14 +434,16 @@ class KOLRepository:
             row = await conn.fetchrow("""
                 INSERT INTO kol_wallets (
                     kol_id, wallet_address, chain, verified,
-                    verification_method, notes, first_seen
-                ) VALUES ($1, $2, $3, $4, $5, $6, NOW())
+                    verification_method, notes, first_seen, wallet_key
+                ) VALUES ($1, $2, $3, $4, $5, $6, NOW(), $7)
                 ON CONFLICT (wallet_address, chain) DO UPDATE SET
                     verified = COALESCE($4, kol_wallets.verified),
-                    notes = COALESCE($6, kol_wallets.notes)
+                    notes = COALESCE($6, kol_wallets.notes),
+                    wallet_key = COALESCE(kol_wallets.wallet_key, $7)
                 RETURNING *
             """, kol_id, wallet_address, chain, verified,
-                verification_method, notes
+                verification_method, notes,
+                address_key(wallet_address) if chain == "ton" else None
             )
             return self._row_to_wallet(row)
 
@@ -456,8 +468,9 @@ class KOLRepository:
                     w.verification_method
                 FROM kol_wallets w
                 JOIN kols k ON w.kol_id = k.id
-                WHERE w.wallet_address = $1
-            """, wallet_address)
+                WHERE w.wallet_address = $1 OR w.wallet_key = $2
+                LIMIT 1
+            """, wallet_address, address_key(wallet_address))
             return self._row_to_dict(row) if row else None
 
     # ========================
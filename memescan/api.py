@@ -8,40 +8,86 @@ from datetime import datetime
 import os
 
 from .models import Token, Pool, WhaleMovement, SafetyLevel
+from .ratelimit import TokenBucket
+from .holders import (
+    HolderScan, HOLDER_PAGE_SIZE, HOLDER_PAGE_ATTEMPTS, HOLDER_SCAN_LIMIT,
+    balances_from_page, join_balances, concentration_metrics
+)
 
 
-class StonFiAPI:
-    """STON.fi DEX API client - NO RATE LIMITS!"""
+def _retry_after(resp: aiohttp.ClientResponse, default: float = 5.0) -> float:
+    """Seconds to back off after a 429 (Retry-After header if sent)."""
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", default)))
+    except ValueError:
+        return default
 
-    BASE_URL = "https://api.ston.fi"
+
+class _ProviderAPI:
+    """
+    Shared request path for the provider clients.
+
+    Each provider class has ONE token bucket shared by every instance (bot
+    handlers and the crawler alike), so together they stay under the
+    provider's limit instead of sleeping a fixed interval per call.
+    """
+
+    BASE_URL = ""
+    limiter: TokenBucket
 
     def __init__(self):
         self._session: Optional[aiohttp.ClientSession] = None
-        self._asset_cache: dict[str, dict] = {}  # address -> asset info
+        self.requests = 0
+        self.throttled = 0  # 429 responses
+
+    def _session_headers(self) -> dict:
+        return {}
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            self._session = aiohttp.ClientSession(headers=self._session_headers())
         return self._session
 
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
 
-    async def get_assets(self, limit: int = 100) -> list[dict]:
-        """Get all listed assets."""
+    async def _get_json(self, path: str, params: Optional[dict] = None) -> Optional[dict]:
+        """Rate-limited GET. Returns the JSON body, or None on any non-200."""
+        await self.limiter.acquire()
         session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/v1/assets") as resp:
+        self.requests += 1
+        async with session.get(f"{self.BASE_URL}{path}", params=params) as resp:
             if resp.status == 200:
-                data = await resp.json()
-                assets = data.get("asset_list", [])[:limit]
-                # Cache for symbol lookups
-                for asset in assets:
-                    addr = asset.get("contract_address", "")
-                    if addr:
-                        self._asset_cache[addr] = asset
-                return assets
+                return await resp.json()
+            if resp.status == 429:
+                self.throttled += 1
+                self.limiter.penalize(_retry_after(resp))
+            return None
+
+
+class StonFiAPI(_ProviderAPI):
+    """STON.fi DEX API client - no published rate limits, kept polite."""
+
+    BASE_URL = os.getenv("STONFI_BASE_URL", "https://api.ston.fi")
+    limiter = TokenBucket(rate=float(os.getenv("STONFI_RPS", "5")), burst=5)
+
+    def __init__(self):
+        super().__init__()
+        self._asset_cache: dict[str, dict] = {}  # address -> asset info
+
+    async def get_assets(self, limit: int = 100) -> list[dict]:
+        """Get all listed assets."""
+        data = await self._get_json("/v1/assets")
+        if data is None:
             return []
+        assets = data.get("asset_list", [])[:limit]
+        # Cache for symbol lookups
+        for asset in assets:
+            addr = asset.get("contract_address", "")
+            if addr:
+                self._asset_cache[addr] = asset
+        return assets
 
     async def _ensure_asset_cache(self):
         """Load assets into cache if empty."""
@@ -55,28 +101,16 @@ class StonFiAPI:
 
     async def get_pools(self, limit: int = 100) -> list[dict]:
         """Get all liquidity pools."""
-        session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/v1/pools") as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("pool_list", [])[:limit]
-            return []
+        data = await self._get_json("/v1/pools")
+        return data.get("pool_list", [])[:limit] if data else []
 
     async def get_pool(self, pool_address: str) -> Optional[dict]:
         """Get specific pool details."""
-        session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/v1/pools/{pool_address}") as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+        return await self._get_json(f"/v1/pools/{pool_address}")
 
     async def get_dex_stats(self) -> dict:
         """Get overall DEX statistics."""
-        session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/v1/stats/dex") as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return {}
+        return await self._get_json("/v1/stats/dex") or {}
 
     async def get_trending_pools(self, limit: int = 10) -> list[Pool]:
         """Get top pools by volume."""
@@ -114,66 +148,45 @@ class StonFiAPI:
         return pools
 
 
-class TonAPI:
+class TonAPI(_ProviderAPI):
     """TonAPI client for blockchain data."""
 
-    BASE_URL = "https://tonapi.io/v2"
+    BASE_URL = os.getenv("TONAPI_BASE_URL", "https://tonapi.io/v2")
+    # Free tier is 1 RPS; set TONAPI_RPS to your plan's limit
+    limiter = TokenBucket(
+        rate=float(os.getenv("TONAPI_RPS", "1")),
+        burst=max(1.0, float(os.getenv("TONAPI_RPS", "1")))
+    )
 
     def __init__(self, api_key: str = ""):
+        super().__init__()
         self.api_key = api_key or os.getenv("TONAPI_KEY", "")
-        self._session: Optional[aiohttp.ClientSession] = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-            self._session = aiohttp.ClientSession(headers=headers)
-        return self._session
 
-    async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+    def _session_headers(self) -> dict:
+        if self.api_key:
+            return {"Authorization": f"Bearer {self.api_key}"}
+        return {}
 
     async def get_jettons(self, limit: int = 100, offset: int = 0) -> list[dict]:
         """Get list of jettons (tokens)."""
-        session = await self._get_session()
-        params = {"limit": limit, "offset": offset}
-        async with session.get(f"{self.BASE_URL}/jettons", params=params) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("jettons", [])
-            return []
+        data = await self._get_json("/jettons", params={"limit": limit, "offset": offset})
+        return data.get("jettons", []) if data else []
 
     async def get_jetton_info(self, address: str) -> Optional[dict]:
         """Get specific jetton details."""
-        session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/jettons/{address}") as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+        return await self._get_json(f"/jettons/{address}")
 
-    async def get_jetton_holders(self, address: str, limit: int = 100) -> list[dict]:
-        """Get jetton holders."""
-        session = await self._get_session()
-        params = {"limit": limit}
-        async with session.get(
-            f"{self.BASE_URL}/jettons/{address}/holders",
-            params=params
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("addresses", [])
-            return []
+    async def get_jetton_holders(self, address: str, limit: int = 100, offset: int = 0) -> Optional[list[dict]]:
+        """Get jetton holders, largest first. None if the request failed (e.g. 429)."""
+        data = await self._get_json(
+            f"/jettons/{address}/holders", params={"limit": limit, "offset": offset}
+        )
+        return data.get("addresses", []) if data is not None else None
 
     async def get_account_jettons(self, account: str) -> list[dict]:
         """Get all jettons held by an account (whale tracking)."""
-        session = await self._get_session()
-        async with session.get(f"{self.BASE_URL}/accounts/{account}/jettons") as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("balances", [])
-            return []
+        data = await self._get_json(f"/accounts/{account}/jettons")
+        return data.get("balances", []) if data else []
 
     async def get_account_events(
         self,
@@ -181,107 +194,114 @@ class TonAPI:
         limit: int = 20
     ) -> list[dict]:
         """Get account events (transactions)."""
-        session = await self._get_session()
-        params = {"limit": limit}
-        async with session.get(
-            f"{self.BASE_URL}/accounts/{account}/events",
-            params=params
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("events", [])
-            return []
+        data = await self._get_json(f"/accounts/{account}/events", params={"limit": limit})
+        return data.get("events", []) if data else []
 
 
-class GeckoTerminalAPI:
+class GeckoTerminalAPI(_ProviderAPI):
     """GeckoTerminal API - 30 calls/min free tier."""
 
-    BASE_URL = "https://api.geckoterminal.com/api/v2"
+    BASE_URL = os.getenv("GECKO_BASE_URL", "https://api.geckoterminal.com/api/v2")
     NETWORK = "ton"
-
-    def __init__(self):
-        self._session: Optional[aiohttp.ClientSession] = None
-        self._last_call = 0
-        self._min_interval = 2.0  # 30 calls/min = 2s between calls
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
-
-    async def _rate_limit(self):
-        """Respect rate limits."""
-        import time
-        now = time.time()
-        elapsed = now - self._last_call
-        if elapsed < self._min_interval:
-            await asyncio.sleep(self._min_interval - elapsed)
-        self._last_call = time.time()
-
-    async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+    limiter = TokenBucket(rate=float(os.getenv("GECKO_RPM", "30")) / 60, burst=1)
 
     async def get_trending_pools(self, limit: int = 10) -> list[dict]:
         """Get trending pools on TON."""
-        await self._rate_limit()
-        session = await self._get_session()
-        async with session.get(
-            f"{self.BASE_URL}/networks/{self.NETWORK}/trending_pools"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("data", [])[:limit]
-            return []
+        data = await self._get_json(f"/networks/{self.NETWORK}/trending_pools")
+        return data.get("data", [])[:limit] if data else []
 
     async def get_new_pools(self, limit: int = 10) -> list[dict]:
         """Get newly created pools."""
-        await self._rate_limit()
-        session = await self._get_session()
-        async with session.get(
-            f"{self.BASE_URL}/networks/{self.NETWORK}/new_pools"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("data", [])[:limit]
-            return []
+        data = await self._get_json(f"/networks/{self.NETWORK}/new_pools")
+        return data.get("data", [])[:limit] if data else []
 
     async def get_pool(self, pool_address: str) -> Optional[dict]:
         """Get specific pool details."""
-        await self._rate_limit()
-        session = await self._get_session()
-        async with session.get(
-            f"{self.BASE_URL}/networks/{self.NETWORK}/pools/{pool_address}"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("data")
-            return None
+        data = await self._get_json(f"/networks/{self.NETWORK}/pools/{pool_address}")
+        return data.get("data") if data else None
 
     async def get_token(self, token_address: str) -> Optional[dict]:
         """Get token details."""
-        await self._rate_limit()
-        session = await self._get_session()
-        async with session.get(
-            f"{self.BASE_URL}/networks/{self.NETWORK}/tokens/{token_address}"
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("data")
-            return None
+        data = await self._get_json(f"/networks/{self.NETWORK}/tokens/{token_address}")
+        return data.get("data") if data else None
 
     async def get_top_pools(self, limit: int = 10) -> list[dict]:
         """Get top pools by liquidity."""
-        await self._rate_limit()
-        session = await self._get_session()
-        async with session.get(
-            f"{self.BASE_URL}/networks/{self.NETWORK}/pools",
-            params={"page": 1}
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                return data.get("data", [])[:limit]
-            return []
+        data = await self._get_json(f"/networks/{self.NETWORK}/pools", params={"page": 1})
+        return data.get("data", [])[:limit] if data else []
+
+
+class FetchContext:
+    """
+    Per-analysis memo of TonAPI reads for one token.
+
+    Scoring, holder snapshots and whale diffing all need the same holder
+    list and jetton info. The context fetches each resource once, shares
+    an in-flight request between concurrent callers, and hands every
+    caller the same result.
+
+    Holders are scanned page by page up to `max_holders` (0 = all); the
+    top-N lists for snapshots are slices of the first page.
+    """
+
+    def __init__(self, tonapi: TonAPI, address: str, max_holders: int = HOLDER_SCAN_LIMIT):
+        self.tonapi = tonapi
+        self.address = address
+        self.max_holders = max_holders
+        self._tasks: dict[tuple, asyncio.Future] = {}
+        self.fetches = 0  # Resources fetched
+
+    def _memo(self, key: tuple, fetch) -> asyncio.Future:
+        task = self._tasks.get(key)
+        if task is None:
+            self.fetches += 1
+            task = asyncio.ensure_future(fetch())
+            self._tasks[key] = task
+        return task
+
+    async def _scan_holders(self) -> HolderScan:
+        scan = HolderScan()
+        chunks = []
+        offset = 0
+        while True:
+            page_size = HOLDER_PAGE_SIZE
+            if self.max_holders:
+                page_size = min(page_size, self.max_holders - offset)
+            page = None
+            for _ in range(HOLDER_PAGE_ATTEMPTS):  # A 429 penalizes the limiter, so retries wait
+                page = await self.tonapi.get_jetton_holders(self.address, limit=page_size, offset=offset)
+                if page is not None:
+                    break
+            if page is None:
+                # Not the end of the list: keep what we have, left incomplete
+                print(f"⚠️ Holder scan of {self.address} stopped at offset {offset}: TonAPI request failed")
+                break
+            if offset == 0:
+                scan.top = page
+            chunks.append(balances_from_page(page))
+            offset += len(page)
+            if len(page) < page_size:
+                scan.complete = True
+                break
+            if self.max_holders and offset >= self.max_holders:
+                break
+        scan.balances = join_balances(chunks)
+        return scan
+
+    async def holder_scan(self) -> HolderScan:
+        """Balances of the largest `max_holders` holders (paginated)"""
+        return await self._memo(("holder_scan",), self._scan_holders)
+
+    async def holders(self, limit: int = 20) -> list[dict]:
+        """The `limit` largest holders, raw (within the first page)"""
+        scan = await self.holder_scan()
+        return scan.top[:limit]
+
+    async def jetton_info(self) -> Optional[dict]:
+        return await self._memo(
+            ("jetton_info",),
+            lambda: self.tonapi.get_jetton_info(self.address)
+        )
 
 
 class MemeScanClient:
@@ -302,6 +322,10 @@ class MemeScanClient:
             self.gecko.close()
         )
 
+    def fetch_context(self, token_address: str) -> FetchContext:
+        """Fresh per-analysis fetch memo for a token."""
+        return FetchContext(self.tonapi, token_address)
+
     async def get_trending(self, limit: int = 10) -> list[Token]:
         """Get trending meme coins from multiple sources."""
         # Fetch from GeckoTerminal (best for trending)
@@ -357,11 +381,21 @@ class MemeScanClient:
 
         return tokens
 
-    async def analyze_token_safety(self, token_address: str) -> Token:
-        """Analyze a token for safety (rug risk)."""
-        # Get holder distribution from TonAPI
-        holders = await self.tonapi.get_jetton_holders(token_address, limit=20)
-        jetton_info = await self.tonapi.get_jetton_info(token_address)
+    async def analyze_token_safety(
+        self,
+        token_address: str,
+        ctx: Optional[FetchContext] = None
+    ) -> Token:
+        """
+        Analyze a token for safety (rug risk).
+
+        Pass a FetchContext to reuse its holder/jetton data afterwards
+        without fetching it again.
+        """
+        ctx = ctx or self.fetch_context(token_address)
+
+        # Get holder distribution and jetton info from TonAPI
+        scan, jetton_info = await asyncio.gather(ctx.holder_scan(), ctx.jetton_info())
 
         warnings = []
         safety_level = SafetyLevel.SAFE
@@ -369,11 +403,15 @@ class MemeScanClient:
 
         if jetton_info:
             total_supply = float(jetton_info.get("total_supply", 0) or 0)
+            # Real holder count - the scan may stop at HOLDER_SCAN_LIMIT
+            holder_count = max(int(jetton_info.get("holders_count", 0) or 0), scan.scanned)
+            metrics = concentration_metrics(
+                scan.balances, total_supply, holder_count, complete=scan.complete
+            )
 
             # Check top holder concentration
-            if holders and total_supply > 0:
-                top_holder_balance = float(holders[0].get("balance", 0) or 0)
-                dev_percent = (top_holder_balance / total_supply) * 100
+            if metrics.scanned and total_supply > 0:
+                dev_percent = metrics.top1_pct
 
                 if dev_percent > 50:
                     warnings.append(f"🚨 Top wallet holds {dev_percent:.0f}%")
@@ -382,8 +420,12 @@ class MemeScanClient:
                     warnings.append(f"⚠️ Top wallet holds {dev_percent:.0f}%")
                     safety_level = SafetyLevel.WARNING
 
+                if metrics.top10_pct > 80 and dev_percent <= 50:
+                    warnings.append(f"⚠️ Top 10 wallets hold {metrics.top10_pct:.0f}%")
+                    if safety_level == SafetyLevel.SAFE:
+                        safety_level = SafetyLevel.WARNING
+
             # Check holder count
-            holder_count = len(holders)
             if holder_count < 10:
                 warnings.append(f"⚠️ Only {holder_count} holders")
                 if safety_level == SafetyLevel.SAFE:
@@ -401,6 +443,7 @@ class MemeScanClient:
                 safety_level=safety_level,
                 safety_warnings=warnings,
                 dev_wallet_percent=dev_percent,
+                holder_metrics=metrics,
             )
 
         return Token(
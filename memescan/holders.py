@@ -0,0 +1,86 @@
+"""
+Holder distribution analytics.
+
+TonAPI pages holders largest-first. Each page's balances go straight into
+a float64 array, and every concentration metric comes from one pass over
+the sorted array and its cumulative sum. Tens of thousands of holders
+score in milliseconds.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import List, Any
+
+import numpy as np
+
+from .models import HolderMetrics
+
+HOLDER_PAGE_SIZE = 1000  # TonAPI maximum per request
+HOLDER_PAGE_ATTEMPTS = 3  # Tries per page before the scan is left incomplete
+# Holders scanned per analysis (0 = all of them)
+HOLDER_SCAN_LIMIT = int(os.getenv("HOLDER_SCAN_LIMIT", "1000"))
+
+
+def balances_from_page(page: List[dict]):
+    """Raw holder dicts -> float64 balance array"""
+    values = (float(holder.get("balance", 0) or 0) for holder in page)
+    return np.fromiter(values, dtype=np.float64, count=len(page))
+
+
+def join_balances(chunks: list):
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float64)
+
+
+@dataclass
+class HolderScan:
+    """One paginated holder fetch"""
+    top: List[dict] = field(default_factory=list)  # First page, raw (for snapshots)
+    balances: Any = field(default_factory=list)  # Every scanned balance
+    complete: bool = False  # Reached the end of the holder list
+
+    @property
+    def scanned(self) -> int:
+        return len(self.balances)
+
+
+def concentration_metrics(
+    balances,
+    total_supply: float,
+    holder_count: int = 0,
+    complete: bool = False
+) -> HolderMetrics:
+    """
+    Top-k shares, Gini, HHI and Nakamoto coefficient of a holder list.
+
+    Shares are of `total_supply`. Gini is over the scanned balances only,
+    so for a partial (top-N) scan it measures inequality among the
+    largest holders.
+    """
+    scanned = len(balances)
+    metrics = HolderMetrics(
+        holder_count=holder_count or scanned,
+        scanned=scanned,
+        complete=complete,
+    )
+    if not scanned or total_supply <= 0:
+        return metrics
+    ordered = np.sort(np.asarray(balances, dtype=np.float64))[::-1]
+    cumulative = np.cumsum(ordered)
+    shares = ordered / total_supply * 100
+
+    metrics.top1_pct = float(shares[0])
+    metrics.top10_pct = float(cumulative[min(9, len(ordered) - 1)] / total_supply * 100)
+    metrics.top20_pct = float(cumulative[min(19, len(ordered) - 1)] / total_supply * 100)
+    metrics.hhi = float(np.dot(shares, shares))
+
+    half = total_supply / 2
+    if cumulative[-1] > half:
+        metrics.nakamoto = int(np.searchsorted(cumulative, half, side="right")) + 1
+
+    total = cumulative[-1]
+    n = len(ordered)
+    if total > 0 and n > 1:
+        # Gini = 1 - 2 * (area under the Lorenz curve), holders ascending
+        lorenz = np.cumsum(ordered[::-1]) / total
+        metrics.gini = float(1 - (2 * lorenz.sum() - 1) / n)
+    return metrics
+
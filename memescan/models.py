@@ -14,6 +14,33 @@ class SafetyLevel(Enum):
     UNKNOWN = "unknown"
 
 
+@dataclass
+class HolderMetrics:
+    """Holder concentration of a token (see memescan.holders)."""
+    holder_count: int = 0  # All holders, from jetton info
+    scanned: int = 0  # Balances the metrics were computed from
+    complete: bool = False  # True if every holder was scanned
+    top1_pct: float = 0  # Shares of total supply
+    top10_pct: float = 0
+    top20_pct: float = 0
+    gini: float = 0  # Among scanned holders, 0 = equal, 1 = one wallet
+    hhi: float = 0  # Herfindahl-Hirschman index of supply shares, 0-10000
+    nakamoto: Optional[int] = None  # Fewest holders with > 50% of supply (None if not reached)
+
+    def as_dict(self) -> dict:
+        return {
+            "holder_count": self.holder_count,
+            "scanned": self.scanned,
+            "complete": self.complete,
+            "top1_pct": round(self.top1_pct, 2),
+            "top10_pct": round(self.top10_pct, 2),
+            "top20_pct": round(self.top20_pct, 2),
+            "gini": round(self.gini, 4),
+            "hhi": round(self.hhi, 1),
+            "nakamoto": self.nakamoto,
+        }
+
+
 @dataclass
 class Token:
     """Meme coin token data."""
@@ -48,6 +75,7 @@ class Token:
     safety_warnings: list = field(default_factory=list)
     dev_wallet_percent: float = 0
     liquidity_locked: bool = False
+    holder_metrics: Optional[HolderMetrics] = None
 
     def format_price(self) -> str:
         if self.price_usd < 0.00001:
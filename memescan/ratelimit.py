@@ -0,0 +1,48 @@
+"""
+Token-bucket rate limiting for external data providers.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests/second sustained, up to `burst` at once.
+
+    Waiters are served in arrival order (the lock is held while sleeping),
+    so one busy caller can't starve the rest.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0  # Total seconds callers spent waiting
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until `tokens` are available and take them."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= tokens
+
+    def penalize(self, seconds: float) -> None:
+        """Back off after a 429: nothing is granted for `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
@@ -98,7 +98,7 @@ class MemeScanTwitter:
 
             tweet = "\n".join(lines)
 
-            response = self.client.create_tweet(text=tweet)
+            response = await asyncio.to_thread(self.client.create_tweet, text=tweet)
             self._record_tweet()
             print(f"Posted trending update: {response.data['id']}")
 
@@ -136,7 +136,7 @@ class MemeScanTwitter:
                 f"#TON #NewListing #MemeCoin"
             )
 
-            response = self.client.create_tweet(text=tweet)
+            response = await asyncio.to_thread(self.client.create_tweet, text=tweet)
             self._record_tweet()
             print(f"Posted new launch: ${token.symbol}")
 
@@ -163,7 +163,7 @@ class MemeScanTwitter:
                 f"#TON #WhaleAlert #MemeCoin"
             )
 
-            response = self.client.create_tweet(text=tweet)
+            response = await asyncio.to_thread(self.client.create_tweet, text=tweet)
             self._record_tweet()
             print(f"Posted whale alert: ${symbol}")
 
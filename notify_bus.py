@@ -0,0 +1,423 @@
+"""
+Notification Bus
+================
+Every outbound social post (seal announcements, rug/danger/whale alerts,
+lottery winners) goes through one persistent outbox (notification_outbox)
+with one async sender per channel:
+
+- x: tweepy's blocking create_tweet runs in a small thread pool, so the
+  event loop never waits on Twitter's round trip
+- telegram: the MemeSeal channel, via aiogram
+
+Each channel sends at its own rate (token bucket). Nothing is dropped
+when a channel is rate limited: posts wait in the outbox, and bursts of
+a digest kind are merged into one post. 30 seals in a minute become one
+"30 bags sealed" post. Posts survive restarts, and any process can
+publish: crawler workers enqueue, and the bot process delivers.
+
+Usage:
+    from notify_bus import notification_bus
+
+    # On startup (after db.connect)
+    notification_bus.initialize()
+    asyncio.create_task(notification_bus.run())
+
+    # Anywhere
+    await notification_bus.publish("rug", x_text=..., telegram_text=..., buttons=[...])
+
+    # Queue depth and lag per channel
+    await notification_bus.stats()
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import tweepy
+from aiogram import Bot
+
+from database import db, OutboxMessage
+from job_queue import JobWorkers
+from memescan.ratelimit import TokenBucket
+from telegram_sender import telegram_sender, Priority
+
+X_POSTS_PER_HOUR = float(os.getenv("X_POSTS_PER_HOUR", "30"))
+TELEGRAM_MIN_INTERVAL = 10  # seconds between channel posts
+DIGEST_WINDOW = float(os.getenv("NOTIFY_DIGEST_WINDOW", "60"))  # Hold digest kinds this long
+DIGEST_MAX = 50  # Posts merged into one digest at most
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60  # seconds, doubled per attempt
+POLL_INTERVAL = 2
+STALE_AFTER = 300  # 'sending' rows older than this are assumed orphaned
+RETENTION_DAYS = 14
+
+# Higher is sent first
+PRIORITY = {"rug": 100, "lottery": 80, "danger": 20, "whale": 20, "seal": 10}
+# Kinds that wait DIGEST_WINDOW and are merged when several are queued
+DIGEST_KINDS = ["seal", "danger", "whale"]
+
+# Blocking social clients (tweepy) run here
+SOCIAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SOCIAL_THREADS", "2")),
+    thread_name_prefix="social"
+)
+
+
+class RateLimited(Exception):
+    """The channel's API rejected a post for rate limiting"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class PermanentFailure(Exception):
+    """A post that will never succeed (e.g. forbidden) - don't retry"""
+
+
+class ChannelSender:
+    """One outbound channel with its own send rate"""
+
+    name = ""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+
+    async def send(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Post; returns the platform's id for it"""
+        raise NotImplementedError
+
+
+class XSender(ChannelSender):
+    """X (Twitter) via tweepy, off the event loop"""
+
+    name = "x"
+
+    def __init__(self, client: tweepy.Client):
+        super().__init__(TokenBucket(rate=X_POSTS_PER_HOUR / 3600, burst=1))
+        self.client = client
+
+    async def send(self, payload: Dict[str, Any]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(
+                SOCIAL_EXECUTOR, partial(self.client.create_tweet, text=payload["text"])
+            )
+        except tweepy.TooManyRequests as e:
+            reset = e.response.headers.get("x-rate-limit-reset") if e.response is not None else None
+            raise RateLimited(max(60.0, float(reset) - time.time()) if reset else 900.0)
+        except tweepy.Forbidden as e:
+            raise PermanentFailure(f"forbidden (check permissions): {e}")
+        return str(response.data["id"])
+
+
+class TelegramChannelSender(ChannelSender):
+    """The public Telegram channel"""
+
+    name = "telegram"
+
+    def __init__(self, bot: Bot, channel: str):
+        super().__init__(TokenBucket(rate=1 / TELEGRAM_MIN_INTERVAL, burst=1))
+        self.bot = bot
+        self.channel = channel
+
+    async def send(self, payload: Dict[str, Any]) -> Optional[str]:
+        from aiogram.exceptions import TelegramRetryAfter
+        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+        keyboard = None
+        if payload.get("buttons"):
+            keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text=text, url=url)] for text, url in payload["buttons"]
+            ])
+        try:
+            # Shares the bot's global limit with DMs, behind payment messages
+            message = await telegram_sender.send(
+                self.channel,
+                payload["text"],
+                bots=[self.bot],
+                priority=Priority.MARKETING,
+                parse_mode="HTML",
+                reply_markup=keyboard
+            )
+        except TelegramRetryAfter as e:
+            raise RateLimited(float(e.retry_after))
+        return str(message.message_id)
+
+
+# ========================
+# Digests
+# ========================
+
+def _span(messages: List[OutboxMessage]) -> str:
+    stamps = [m.created_at for m in messages if m.created_at]
+    seconds = (max(stamps) - min(stamps)).total_seconds() if stamps else 0
+    minutes = max(1, round(seconds / 60))
+    return "minute" if minutes == 1 else f"{minutes} minutes"
+
+
+def _digest_seal(channel: str, messages: List[OutboxMessage]) -> Dict[str, Any]:
+    latest = messages[-1].payload.get("data", {})
+    count = len(messages)
+    pot = f"{latest.get('pot_stars', 0)}⭐ (~{latest.get('pot_ton', 0):.4f} TON)"
+    if channel == "x":
+        text = (
+            f"🐸 {count} bags sealed forever in the last {_span(messages)}!\n\n"
+            f"🎰 Pot: {pot}\n"
+            f"⏰ Draw: {latest.get('next_draw', '')}\n\n"
+            f"Seal yours 👉 t.me/MemeSealTON_bot\n\n"
+            f"#TON #MemeSeal #Crypto #Web3"
+        )
+    else:
+        text = (
+            f"🐸 <b>{count} bags sealed forever</b> in the last {_span(messages)}!\n\n"
+            f"🎰 Lottery pot: {pot}\n"
+            f"⏰ Next draw: {latest.get('next_draw', '')}\n\n"
+            f"Seal yours or stay poor.\n"
+            f"👉 t.me/MemeSealTON_bot"
+        )
+    return {"text": text, "buttons": [["🐸 Start Sealing", "https://t.me/MemeSealTON_bot"]]}
+
+
+def _digest_danger(channel: str, messages: List[OutboxMessage]) -> Dict[str, Any]:
+    shown = 5 if channel == "x" else 10
+    lines = [
+        f"${m.payload['data'].get('symbol', '?')} - {m.payload['data'].get('safety_score', 0)}/100"
+        for m in messages[:shown]
+    ]
+    more = f"\n+{len(messages) - shown} more" if len(messages) > shown else ""
+    if channel == "x":
+        text = (f"⚠️ {len(messages)} HIGH RISK TOKENS on TON\n\n" + "\n".join(lines) + more +
+                "\n\nhttps://notaryton.com/memescan\n\n#TON #CryptoRisk #DYOR")
+    else:
+        text = (f"⚠️ <b>{len(messages)} HIGH RISK TOKENS</b>\n\n" + "\n".join(lines) + more +
+                "\n\nDYOR 🔍 #TON #MemeScan")
+    return {"text": text, "buttons": [["🔍 MemeScan", "https://notaryton.com/memescan"]]}
+
+
+def _digest_whale(channel: str, messages: List[OutboxMessage]) -> Dict[str, Any]:
+    shown = 5 if channel == "x" else 10
+    lines = []
+    for m in messages[:shown]:
+        data = m.payload["data"]
+        emoji, verb = ("🐋", "bought") if data.get("event_type") == "entry" else ("🏃", "dumped")
+        lines.append(f"{emoji} ${data.get('symbol', '?')} - whale {verb} {data.get('pct', 0):.1f}%")
+    more = f"\n+{len(messages) - shown} more" if len(messages) > shown else ""
+    header = f"{len(messages)} WHALE MOVES"
+    if channel == "x":
+        text = f"🐋 {header} on TON\n\n" + "\n".join(lines) + more + "\n\n#TON #WhaleAlert"
+    else:
+        text = f"🐋 <b>{header}</b>\n\n" + "\n".join(lines) + more
+    return {"text": text, "buttons": [["🔍 MemeScan", "https://notaryton.com/memescan"]]}
+
+
+DIGESTS = {
+    "seal": _digest_seal,
+    "danger": _digest_danger,
+    "whale": _digest_whale,
+}
+
+
+def build_payload(channel: str, messages: List[OutboxMessage]) -> Dict[str, Any]:
+    """A single post as queued, or several of one kind merged into a digest"""
+    if len(messages) == 1:
+        return messages[0].payload
+    return DIGESTS[messages[0].kind](channel, messages)
+
+
+# ========================
+# Bus
+# ========================
+
+@dataclass
+class ChannelMetrics:
+    """Delivery counters for one channel in this process"""
+    posts: int = 0  # Platform posts made
+    messages: int = 0  # Outbox rows delivered (digests count every row)
+    merged: int = 0  # Rows folded into a digest
+    failed: int = 0
+    throttled: int = 0
+    lags: deque = field(default_factory=lambda: deque(maxlen=500))  # enqueue -> sent, seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        return {
+            "posts": self.posts,
+            "messages": self.messages,
+            "merged": self.merged,
+            "errors": self.failed,  # Send attempts that raised
+            "throttled": self.throttled,
+            "lag_p50_seconds": round(lags[len(lags) // 2], 1) if lags else 0,
+            "lag_max_seconds": round(lags[-1], 1) if lags else 0,
+        }
+
+
+class NotificationBus(JobWorkers):
+    """Persistent outbox plus one sender loop per configured channel"""
+
+    label = "outbox"
+    poll_interval = POLL_INTERVAL
+    stale_after = STALE_AFTER
+    retention_days = RETENTION_DAYS
+
+    def __init__(self):
+        super().__init__()
+        self.senders: Dict[str, ChannelSender] = {}
+        self.metrics: Dict[str, ChannelMetrics] = {}
+        self._initialized = False
+
+    def add_sender(self, sender: ChannelSender) -> None:
+        self.senders[sender.name] = sender
+        self.metrics.setdefault(sender.name, ChannelMetrics())
+
+    def initialize(self) -> None:
+        """Set up channels from environment variables"""
+        if self._initialized:
+            return
+
+        # Twitter/X API v2 setup
+        twitter_api_key = os.getenv("TWITTER_API_KEY")
+        twitter_api_secret = os.getenv("TWITTER_API_SECRET")
+        twitter_access_token = os.getenv("TWITTER_ACCESS_TOKEN")
+        twitter_access_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
+
+        if all([twitter_api_key, twitter_api_secret, twitter_access_token, twitter_access_secret]):
+            try:
+                self.add_sender(XSender(tweepy.Client(
+                    consumer_key=twitter_api_key,
+                    consumer_secret=twitter_api_secret,
+                    access_token=twitter_access_token,
+                    access_token_secret=twitter_access_secret
+                )))
+                print("✅ Twitter/X client initialized")
+            except Exception as e:
+                print(f"⚠️ Twitter init failed: {e}")
+        else:
+            print("⚠️ Twitter credentials not set, skipping X posting")
+
+        # Telegram channel setup
+        telegram_token = os.getenv("MEMESEAL_BOT_TOKEN")
+        telegram_channel = os.getenv("TELEGRAM_CHANNEL_ID", "@MemeSealTON")
+
+        if telegram_token:
+            try:
+                self.add_sender(TelegramChannelSender(Bot(token=telegram_token), telegram_channel))
+                print(f"✅ Telegram bot initialized for channel {telegram_channel}")
+            except Exception as e:
+                print(f"⚠️ Telegram init failed: {e}")
+
+        self._initialized = True
+
+    async def publish(
+        self,
+        kind: str,
+        x_text: Optional[str] = None,
+        telegram_text: Optional[str] = None,
+        buttons: Optional[List[List[str]]] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Queue a post for each configured channel given a text.
+
+        `data` holds the fields a digest needs to merge this post with
+        others of the same kind. `buttons` are [label, url] rows (Telegram).
+        """
+        if not self._initialized:
+            self.initialize()
+        delay = DIGEST_WINDOW if kind in DIGEST_KINDS else 0
+        for channel, text in (("x", x_text), ("telegram", telegram_text)):
+            if text is None or channel not in self.senders:
+                continue
+            payload = {"text": text, "data": data or {}}
+            if buttons and channel == "telegram":
+                payload["buttons"] = buttons
+            try:
+                await db.outbox.enqueue(
+                    channel, kind, payload,
+                    priority=PRIORITY.get(kind, 0),
+                    delay_seconds=delay
+                )
+            except Exception as e:
+                print(f"❌ Outbox enqueue failed ({channel}/{kind}): {e}")
+        self.wake()
+
+    async def deliver(self, sender: ChannelSender, messages: List[OutboxMessage]) -> bool:
+        """Send one claimed post (or digest) and settle its outbox rows"""
+        metrics = self.metrics.setdefault(sender.name, ChannelMetrics())
+        ids = [m.id for m in messages]
+        payload = build_payload(sender.name, messages)
+
+        await sender.bucket.acquire()
+        try:
+            external_id = await sender.send(payload)
+        except RateLimited as e:
+            # Not the post's fault: hold the channel and keep the post queued
+            metrics.throttled += 1
+            sender.bucket.penalize(e.retry_after)
+            await db.outbox.mark_failed(ids, str(e), retry_in=e.retry_after)
+            print(f"⏳ {sender.name} rate limited, {len(ids)} post(s) retry in {e.retry_after:.0f}s")
+            return False
+        except Exception as e:
+            metrics.failed += 1
+            attempts = max(m.attempts for m in messages)
+            give_up = isinstance(e, PermanentFailure) or attempts >= MAX_ATTEMPTS
+            retry_in = None if give_up else RETRY_DELAY * 2 ** (attempts - 1)
+            await db.outbox.mark_failed(ids, str(e), retry_in=retry_in)
+            print(f"❌ {sender.name} post failed ({messages[0].kind}): {e}")
+            return False
+
+        await db.outbox.mark_sent(ids, external_id)
+        now = datetime.now()
+        metrics.posts += 1
+        metrics.messages += len(messages)
+        metrics.merged += len(messages) - 1
+        for m in messages:
+            if m.created_at:
+                metrics.lags.append((now - m.created_at).total_seconds())
+        label = f"digest of {len(messages)} {messages[0].kind}" if len(messages) > 1 else messages[0].kind
+        print(f"✅ Posted to {sender.name} ({label}): {external_id}")
+        return True
+
+    def queue(self, db):
+        return db.outbox
+
+    def steps(self, db) -> Dict[str, Callable[[], Awaitable[int]]]:
+        return {f"sender {name}": partial(self.send_next, sender) for name, sender in self.senders.items()}
+
+    async def send_next(self, sender: ChannelSender) -> int:
+        """Deliver the channel's next post (or digest). Returns the number of posts claimed."""
+        # Claim only once the channel can send, so the backlog keeps
+        # growing (and merging) while we wait for budget
+        while sender.bucket.available < 1:
+            await asyncio.sleep((1 - sender.bucket.available) / sender.bucket.rate)
+        messages = await db.outbox.claim(sender.name, DIGEST_KINDS, DIGEST_MAX)
+        if messages:
+            await self.deliver(sender, messages)
+        return len(messages)
+
+    async def run(self) -> None:
+        """Deliver queued posts until stop()"""
+        if not self._initialized:
+            self.initialize()
+        print(f"📣 Notification bus started ({', '.join(self.senders) or 'no channels'})")
+        await super().run(db)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Outbox depth/lag per channel, plus this process's delivery metrics"""
+        queue = await db.outbox.get_stats()
+        channels = {}
+        for channel in sorted(set(queue) | set(self.metrics)):
+            channels[channel] = dict(queue.get(channel, {}))
+            if channel in self.metrics:
+                channels[channel].update(self.metrics[channel].as_dict())
+        return channels
+
+
+# Global notification bus
+notification_bus = NotificationBus()
@@ -0,0 +1,146 @@
+"""
+Pending Payout Reconciliation
+=============================
+A payout that was broadcast but hasn't landed within SEQNO_WAIT_SECONDS
+raises chain.TransferPending. It may still land, so it is neither paid
+again nor treated as failed: the caller records it here (a bot_state
+row, 'payout:<ref>') and, once per PAYOUT_INTERVAL, this resolves it:
+
+- landed: its memo shows up in the service wallet's outgoing comments
+- expired: valid_until + PAYOUT_GRACE passed without that, so the wallet
+  can no longer accept it, and the scan reached back to when it was
+  sent (a busier wallet waits for a pass that does); the payout's
+  on-failure ledger entry is appended (a withdrawal reversal, or the
+  lottery pot credited to the winner's balance). Ledger rows are keyed by source_tx, so a repeated
+  pass never applies it twice.
+
+Every payout memo carries its ref, so a landed transfer can be told
+apart from any other payout of the same amount.
+
+Usage:
+    from payouts import payout_reconciler, PendingPayout, payout_memo
+
+    memo = payout_memo("NotaryTON Referral Payout", ref)
+    try:
+        await chain.send_transfer([Transfer(wallet, amount, memo)])
+    except TransferPending as pending:
+        await payout_reconciler.add(db, PendingPayout(
+            ref, user_id, amount, memo, pending.valid_until,
+            failure_kind="withdrawal", failure_amount=-amount
+        ))
+
+    asyncio.create_task(payout_reconciler.run(db, chain_backend))
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List
+
+from chain import TRANSFER_TTL
+
+PAYOUT_INTERVAL = 60  # seconds between reconcile passes
+PAYOUT_GRACE = 120  # seconds after valid_until before an unseen payout counts as expired
+SCAN_TXS = 1000  # Service wallet transactions read per pass
+KEY_PREFIX = "payout:"
+
+
+def payout_memo(memo: str, ref: str) -> str:
+    """Transfer comment for a payout, carrying its ref"""
+    return f"{memo} #{ref}"
+
+
+@dataclass
+class PendingPayout:
+    """A broadcast payout whose outcome is not known yet"""
+    ref: str
+    user_id: int
+    amount_ton: float
+    memo: str  # Full transfer comment (see payout_memo)
+    valid_until: int  # unix time the wallet stops accepting it
+    failure_kind: str  # Ledger kind appended if it never lands
+    failure_amount: float
+    failure_source: Optional[str] = None  # Ledger source_tx (default '<ref>:failed')
+
+    @property
+    def source_tx(self) -> str:
+        return self.failure_source or f"{self.ref}:failed"
+
+
+class PayoutReconciler:
+    """Settles pending payouts from the service wallet's transactions"""
+
+    def __init__(self, interval: float = PAYOUT_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"pending": 0, "landed": 0, "expired": 0, "errors": 0}
+
+    async def add(self, db, payout: PendingPayout) -> None:
+        """Record a payout that raised TransferPending"""
+        await db.bot_state.set(KEY_PREFIX + payout.ref, json.dumps(asdict(payout)))
+        self.stats["pending"] += 1
+        print(f"⏳ Payout {payout.ref} ({payout.amount_ton:.4f} TON) pending confirmation")
+
+    async def pending(self, db) -> List[PendingPayout]:
+        rows = await db.bot_state.get_prefix(KEY_PREFIX)
+        return [PendingPayout(**json.loads(value)) for value in rows.values()]
+
+    async def reconcile_once(self, db, chain) -> Dict[str, int]:
+        """One pass; returns how many payouts landed and expired"""
+        payouts = await self.pending(db)
+        result = {"landed": 0, "expired": 0}
+        if not payouts:
+            self.stats["pending"] = 0
+            return result
+
+        transactions = await chain.get_transactions(await chain.wallet_address(), SCAN_TXS)
+        sent = {comment for tx in transactions for comment in tx.out_comments}
+        # A full page may not reach back far enough to prove a payout never landed
+        covered_since = min(tx.utime for tx in transactions) if len(transactions) >= SCAN_TXS else 0
+        now = time.time()
+        for payout in payouts:
+            if payout.memo in sent:
+                print(f"✅ Pending payout {payout.ref} landed")
+                result["landed"] += 1
+            elif now > payout.valid_until + PAYOUT_GRACE and covered_since <= payout.valid_until - TRANSFER_TTL:
+                await db.users.append_ledger(
+                    payout.user_id, payout.failure_kind, payout.failure_amount, payout.source_tx
+                )
+                print(f"⚠️ Pending payout {payout.ref} expired; applied {payout.failure_kind} "
+                      f"{payout.failure_amount:+.4f} TON")
+                result["expired"] += 1
+            else:
+                continue
+            await db.bot_state.delete(KEY_PREFIX + payout.ref)
+
+        self.stats["landed"] += result["landed"]
+        self.stats["expired"] += result["expired"]
+        self.stats["pending"] = len(payouts) - result["landed"] - result["expired"]
+        return result
+
+    async def run(self, db, chain) -> None:
+        """Reconcile every `interval` seconds until stop()"""
+        self._task = asyncio.current_task()
+        while True:
+            try:
+                await self.reconcile_once(db, chain)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Payout reconcile pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+# Global reconciler
+payout_reconciler = PayoutReconciler()
@@ -0,0 +1,274 @@
+"""
+Rug Re-check Scheduler
+======================
+Decides when each tracked token is analyzed again for rug indicators.
+
+Every token gets its own re-check interval from how likely it is to rug
+soon: young tokens, low safety scores, concentrated holders, a holder
+count that is moving and recent whale activity all shorten it. Stable
+week-old tokens drift out to hours.
+
+All re-checks share one API budget (RUG_RECHECK_PER_MIN). When the sum
+of every token's desired rate exceeds it, all intervals are stretched by
+the same factor. Priorities keep their ratios and the total stays within
+the budget.
+
+Usage:
+    scheduler = RecheckScheduler(check=crawler.recheck_token)
+    asyncio.create_task(scheduler.run(db))
+"""
+
+import asyncio
+import heapq
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Union, Dict, Callable, Awaitable, List
+
+from memescan.ratelimit import TokenBucket
+
+RECHECK_PER_MIN = float(os.getenv("RUG_RECHECK_PER_MIN", "20"))
+MIN_INTERVAL = 15  # seconds
+MAX_INTERVAL = 24 * 3600
+SYNC_INTERVAL = 300  # Reload candidate tokens every 5 minutes
+WHALE_EVENT_TYPES = ["whale_entry", "whale_exit"]
+GONE = "gone"  # check() result for a token that is no longer tracked
+
+
+def recheck_interval(
+    age_hours: float,
+    safety_score: float,
+    top_holder_pct: float = 0,
+    holder_volatility: float = 0,
+    whale_events: int = 0
+) -> float:
+    """
+    Seconds until the next re-check of a token (before budget scaling).
+
+    Args:
+        age_hours: Hours since the token was first seen
+        safety_score: 0-100, lower is riskier
+        top_holder_pct: Largest holder's share of supply
+        holder_volatility: Relative holder count change since the last check
+        whale_events: Whale entries/exits in the last hour
+    """
+    if age_hours < 6:
+        base = 60
+    elif age_hours < 24:
+        base = 300
+    elif age_hours < 72:
+        base = 1800
+    else:
+        base = 6 * 3600
+
+    # Riskier tokens get checked sooner: score 0 -> 1/4 of base, 100 -> base
+    interval = base * (0.25 + 0.75 * max(0.0, min(safety_score, 100)) / 100)
+    if top_holder_pct > 50:
+        interval /= 2
+    interval /= 1 + 5 * abs(holder_volatility)
+    interval /= 1 + whale_events
+
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+@dataclass
+class RecheckEntry:
+    """Scheduling state for one token."""
+    address: str
+    first_seen: datetime
+    safety_score: float = 50
+    top_holder_pct: float = 0
+    holder_count: int = 0
+    interval: float = 0.0  # Desired interval before budget scaling (0 = unscheduled)
+    due: float = 0.0  # time.monotonic() of the next check
+    checks: int = 0
+
+
+@dataclass(order=True)
+class _HeapItem:
+    due: float
+    address: str = field(compare=False)
+
+
+class RecheckScheduler:
+    """
+    Min-heap of tokens by next-due time, drained under a global budget.
+
+    `check(address)` runs one re-check. It returns (holder_count,
+    top_holder_pct, rugged), GONE if the token is no longer tracked, or
+    None if the check failed. Failed checks are retried next interval;
+    gone tokens are dropped.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[str], Awaitable[Union[tuple, str, None]]],
+        per_minute: float = RECHECK_PER_MIN
+    ):
+        self.check = check
+        self.budget = TokenBucket(rate=per_minute / 60, burst=max(1.0, per_minute / 12))
+        self._entries: Dict[str, RecheckEntry] = {}
+        self._heap: List[_HeapItem] = []
+        self._demand = 0.0  # Sum of 1/interval over all entries (checks/sec wanted)
+        self._wakeup = asyncio.Event()
+        self.running = False
+        self.checks = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def load_factor(self) -> float:
+        """How far desired check rate exceeds the budget (>= 1)"""
+        return max(1.0, self._demand / self.budget.rate)
+
+    def _set_interval(self, entry: RecheckEntry, interval: float) -> None:
+        self._demand += 1 / interval - (1 / entry.interval if entry.interval else 0)
+        entry.interval = interval
+
+    def _schedule(self, entry: RecheckEntry, delay: float) -> None:
+        entry.due = time.monotonic() + delay
+        heapq.heappush(self._heap, _HeapItem(entry.due, entry.address))
+        self._wakeup.set()
+
+    def upsert(self, token, whale_events: int = 0) -> None:
+        """Add a tracked token or refresh its scoring inputs."""
+        entry = self._entries.get(token.address)
+        if entry is None:
+            entry = RecheckEntry(
+                address=token.address,
+                first_seen=token.first_seen or datetime.now(),
+                holder_count=token.current_holder_count or 0,
+            )
+            self._entries[token.address] = entry
+            is_new = True
+        else:
+            is_new = False
+        entry.safety_score = float(token.safety_score or 0)
+        entry.top_holder_pct = float(token.current_top_holder_pct or 0)
+
+        interval = self._interval_for(entry, whale_events=whale_events)
+        self._set_interval(entry, interval)
+        if is_new:
+            # Spread the first checks over one interval instead of all at once
+            jitter = zlib.crc32(entry.address.encode()) % 1000 / 1000
+            self._schedule(entry, interval * self.load_factor * jitter)
+
+    def remove(self, address: str) -> None:
+        """Stop re-checking a token (rugged or no longer tracked)."""
+        entry = self._entries.pop(address, None)
+        if entry is not None and entry.interval:
+            self._demand = max(0.0, self._demand - 1 / entry.interval)
+
+    def _interval_for(
+        self,
+        entry: RecheckEntry,
+        volatility: float = 0,
+        whale_events: int = 0
+    ) -> float:
+        age_hours = (datetime.now() - entry.first_seen).total_seconds() / 3600
+        return recheck_interval(
+            age_hours, entry.safety_score, entry.top_holder_pct, volatility, whale_events
+        )
+
+    async def sync(self, db) -> None:
+        """Load candidate tokens from the database; drop rugged/aged-out ones."""
+        tokens = await db.tokens.get_recheck_candidates(days=7)
+        seen = set()
+        for token in tokens:
+            seen.add(token.address)
+            if token.address not in self._entries:
+                self.upsert(token)
+        for address in list(self._entries):
+            if address not in seen:
+                self.remove(address)
+
+    async def _pop_due(self, timeout: float) -> Optional[RecheckEntry]:
+        """Wait up to `timeout` seconds for the next due entry (skipping stale heap items)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            while self._heap:
+                item = self._heap[0]
+                entry = self._entries.get(item.address)
+                if entry is None or entry.due != item.due:
+                    heapq.heappop(self._heap)  # Removed or rescheduled
+                    continue
+                delay = item.due - time.monotonic()
+                if delay <= 0:
+                    heapq.heappop(self._heap)
+                    return entry
+                break
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            self._wakeup.clear()
+            wake_at = min(self._heap[0].due, deadline) if self._heap else deadline
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self, db, timeout: float = SYNC_INTERVAL) -> Optional[RecheckEntry]:
+        """Run the next due check and reschedule that token (None if nothing came due)."""
+        entry = await self._pop_due(timeout)
+        if entry is None:
+            return None
+        await self.budget.acquire()
+
+        self.checks += 1
+        entry.checks += 1
+        try:
+            result = await self.check(entry.address)
+        except Exception as e:
+            print(f"⚠️ Re-check failed for {entry.address[:12]}...: {e}")
+            result = None
+
+        if result == GONE:
+            self.remove(entry.address)
+            return entry
+
+        if result is None:
+            self.failures += 1
+            self._schedule(entry, entry.interval * self.load_factor)
+            return entry
+
+        holder_count, top_holder_pct, rugged = result
+        if rugged:
+            self.remove(entry.address)
+            return entry
+
+        volatility = 0.0
+        if entry.holder_count:
+            volatility = (holder_count - entry.holder_count) / entry.holder_count
+        entry.holder_count = holder_count
+        entry.top_holder_pct = top_holder_pct
+        whale_events = await db.tokens.count_recent_events(
+            entry.address, WHALE_EVENT_TYPES, datetime.now() - timedelta(hours=1)
+        )
+
+        self._set_interval(entry, self._interval_for(entry, volatility, whale_events))
+        self._schedule(entry, entry.interval * self.load_factor)
+        return entry
+
+    async def run(self, db) -> None:
+        """Re-check tokens forever, re-syncing candidates every few minutes."""
+        self.running = True
+        print(f"⏱️ Rug re-check scheduler started ({self.budget.rate * 60:.0f} checks/min budget)")
+        next_sync = 0.0
+        while self.running:
+            try:
+                if time.monotonic() >= next_sync:
+                    await self.sync(db)
+                    next_sync = time.monotonic() + SYNC_INTERVAL
+                    print(f"⏱️ Re-checking {len(self)} tokens (load x{self.load_factor:.1f})")
+                await self.run_once(db, timeout=max(0.0, next_sync - time.monotonic()))
+            except Exception as e:
+                print(f"❌ Re-check scheduler error: {e}")
+                await asyncio.sleep(5)
+
+    def stop(self) -> None:
+        self.running = False
+        self._wakeup.set()
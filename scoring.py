@@ -9,11 +9,12 @@ Usage:
     score = await calculate_minter_score(db, address)
 """
 
-import json
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
 from enum import Enum
 
+from wallet_labels import label_index
+
 # Entity category scores (0-1000 scale, matching creative-hub)
 ENTITY_SCORES = {
     'validator': 950,        # A+ - Network validators are trustworthy
@@ -86,9 +87,12 @@ async def calculate_minter_score(db, address: str) -> ScoreResult:
     """
     Calculate minter credit score for a TON address.
 
+    Entity detection is served from the in-memory label index; db is only
+    used to load the index if it has not been loaded yet.
+
     Args:
         db: Database instance with wallets repository
-        address: TON address to score
+        address: TON address to score (any form)
 
     Returns:
         ScoreResult with score, grade, warnings, and entity info
@@ -96,28 +100,22 @@ async def calculate_minter_score(db, address: str) -> ScoreResult:
     warnings = []
     entity_info = None
 
-    # Step 1: Check known_wallets for entity label
-    known = await db.wallets.get_wallet_label(address)
+    # Step 1: Check the in-memory label index for an entity label
+    if not label_index.loaded:
+        await label_index.load(db)
+    known = label_index.get(address)
 
     if known:
-        category = known.label
+        category = known.category
 
         # Handle scammer detection with highest priority
-        if category == 'scammer':
-            # Parse notes for extra info
-            extra = {}
-            if known.notes:
-                try:
-                    extra = json.loads(known.notes)
-                except:
-                    pass
-
-            subcategory = extra.get('subcategory', '')
-            description = extra.get('description', '')
+        if known.is_scammer:
+            subcategory = known.subcategory
+            description = known.description
 
             # Build scammer warning
             scam_type = subcategory or 'unknown'
-            warning = f"🚨 KNOWN SCAMMER: {known.owner_name or 'Unknown'}"
+            warning = f"🚨 KNOWN SCAMMER: {known.name or 'Unknown'}"
             if scam_type:
                 warning += f" - {scam_type.replace('_', ' ').title()}"
             if description:
@@ -137,9 +135,9 @@ async def calculate_minter_score(db, address: str) -> ScoreResult:
                 warnings=warnings,
                 entity_info={
                     'category': category,
-                    'label': known.owner_name,
-                    'organization': known.owner_name,
-                    'notes': extra,
+                    'label': known.name,
+                    'organization': known.name,
+                    'notes': dict(known.notes),
                 }
             )
 
@@ -148,44 +146,35 @@ async def calculate_minter_score(db, address: str) -> ScoreResult:
         grade, color, desc = score_to_grade(score)
         risk_level = get_risk_level(score)
 
-        # Parse extra info from notes
-        extra = {}
-        if known.notes:
-            try:
-                extra = json.loads(known.notes)
-            except:
-                pass
-
         # Build entity info
         entity_info = {
             'category': category,
-            'label': known.owner_name,
-            'organization': known.owner_name,
-            'website': extra.get('website'),
-            'tags': extra.get('tags', []),
+            'label': known.name,
+            'organization': known.name,
+            'website': known.website,
+            'tags': list(known.tags),
         }
 
         # Build trust flags
         trust_flags = []
         cat_upper = category.upper().replace('_', ' ')
-        if extra.get('website'):
-            trust_flags.append(f"✅ VERIFIED {cat_upper}: {known.owner_name} ({extra['website']})")
+        if known.website:
+            trust_flags.append(f"✅ VERIFIED {cat_upper}: {known.name} ({known.website})")
         else:
-            trust_flags.append(f"✅ VERIFIED {cat_upper}: {known.owner_name}")
+            trust_flags.append(f"✅ VERIFIED {cat_upper}: {known.name}")
 
-        for tag in extra.get('tags', []):
-            if tag == 'has-custodial-wallets':
-                trust_flags.append("ℹ️ Has custodial wallet services")
+        if 'has-custodial-wallets' in known.tags:
+            trust_flags.append("ℹ️ Has custodial wallet services")
 
         entity_info['trustFlags'] = trust_flags
 
         # Build recommendation based on category
         if category in ('cex', 'dex', 'validator'):
-            recommendation = f"✅ VERIFIED {cat_upper.replace('_', ' ')} - {known.owner_name or category} is a known {category.replace('_', ' ')}."
+            recommendation = f"✅ VERIFIED {cat_upper.replace('_', ' ')} - {known.name or category} is a known {category.replace('_', ' ')}."
         elif category in ('bridge', 'liquid_staking', 'lending'):
-            recommendation = f"✅ VERIFIED PROTOCOL - {known.owner_name or 'This address'} is a known DeFi protocol."
+            recommendation = f"✅ VERIFIED PROTOCOL - {known.name or 'This address'} is a known DeFi protocol."
         else:
-            recommendation = f"✅ KNOWN ENTITY - {known.owner_name or 'This address'} is recognized in the TON ecosystem."
+            recommendation = f"✅ KNOWN ENTITY - {known.name or 'This address'} is recognized in the TON ecosystem."
 
         return ScoreResult(
             score=score,
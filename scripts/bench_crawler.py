@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Crawler throughput benchmark against the offline provider stub.
+
+Runs full crawl cycles (discover -> queue -> workers -> pipeline) with
+every provider served by scripts/provider_stub.py. The database is a
+real Postgres. Reports:
+
+- tokens per minute
+- p50 / p99 seconds per pipeline stage
+- rows written per token, in total and per table (pg_stat_user_tables)
+
+Use a scratch database: bench tokens are written like real ones, and
+--reset deletes them first.
+
+Usage:
+    python scripts/bench_crawler.py --database-url postgresql://localhost/notaryton_bench \\
+        --synthetic 200 --latency-ms 80 --error-rate 0.01 --rate-429 0.02
+
+    # Crawler overhead only (provider rate limits lifted)
+    python scripts/bench_crawler.py --database-url ... --synthetic 200 --unlimited
+
+    # Against recorded fixtures
+    python scripts/bench_crawler.py --database-url ... --fixtures fixtures.json --cycles 3
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import crawler as crawler_module
+from crawler import TokenCrawler
+from database import db
+from memescan.ratelimit import TokenBucket
+from scripts.provider_stub import (
+    PROVIDERS, NEW_POOLS_PAGE, add_stub_arguments, build_stub, point_clients_at
+)
+
+BENCH_TABLES = ["tracked_tokens", "token_events", "holder_snapshots", "crawl_jobs"]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100); 0 for no samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def table_writes() -> Dict[str, int]:
+    """Cumulative inserted + updated + deleted rows per bench table"""
+    async with db.pool.acquire() as conn:
+        await conn.execute("SELECT pg_stat_clear_snapshot()")
+        rows = await conn.fetch("""
+            SELECT relname, n_tup_ins + n_tup_upd + n_tup_del AS writes
+            FROM pg_stat_user_tables
+            WHERE relname = ANY($1::text[])
+        """, BENCH_TABLES)
+        return {row["relname"]: row["writes"] for row in rows}
+
+
+async def reset(addresses: List[str]) -> None:
+    """Delete earlier runs' rows for the fixture tokens"""
+    async with db.pool.acquire() as conn:
+        for table, column in [
+            ("token_events", "token_address"),
+            ("holder_snapshots", "token_address"),
+            ("crawl_jobs", "address"),
+            ("tracked_tokens", "address"),
+        ]:
+            await conn.execute(f"DELETE FROM {table} WHERE {column} = ANY($1::text[])", addresses)
+
+
+async def run(args) -> Dict:
+    # Never post bench tokens to X / Telegram
+    async def no_announce(**kwargs):
+        return None
+    for name in ("announce_rug", "announce_danger_score", "announce_whale"):
+        setattr(crawler_module, name, no_announce)
+
+    stub = build_stub(args)
+    base_url = await stub.start()
+    point_clients_at(base_url)
+    if args.unlimited:
+        for api in PROVIDERS.values():
+            api.limiter = TokenBucket(rate=1e6, burst=1e6)
+
+    await db.connect(args.database_url, ssl=args.ssl)
+    crawler = TokenCrawler()
+    try:
+        if args.reset:
+            addresses = [key.split("/")[2] for key in stub.fixtures
+                         if key.startswith("tonapi/jettons/") and key.count("/") == 2]
+            await reset(addresses)
+
+        cycles = args.cycles or max(1, math.ceil(args.synthetic / NEW_POOLS_PAGE))
+        writes_before = await table_writes()
+        worker_id = f"{crawler.jobs.worker_prefix}:bench"
+        started = time.monotonic()
+
+        for _ in range(cycles):
+            await crawler._crawl_cycle()
+            workers = [
+                asyncio.create_task(_drain(crawler, f"{worker_id}:{n}"))
+                for n in range(args.workers)
+            ]
+            await asyncio.gather(*workers)
+
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(1)  # Let table stats flush
+        writes_after = await table_writes()
+    finally:
+        await crawler.client.close()
+        await db.disconnect()
+        await stub.stop()
+
+    metrics = crawler.jobs.metrics.as_dict()
+    tokens = metrics["completed"]
+    writes = {
+        table: writes_after.get(table, 0) - writes_before.get(table, 0)
+        for table in BENCH_TABLES
+    }
+    return {
+        "cycles": cycles,
+        "seconds": round(elapsed, 2),
+        "tokens": tokens,
+        "tokens_per_min": round(tokens / (elapsed / 60), 1) if elapsed else 0,
+        "jobs": metrics,
+        "stages": {
+            name: {
+                "count": len(samples),
+                "p50": round(percentile(list(samples), 50), 4),
+                "p99": round(percentile(list(samples), 99), 4),
+            }
+            for name, samples in sorted(crawler.stage_seconds.items())
+        },
+        "db_writes_per_token": round(sum(writes.values()) / tokens, 2) if tokens else 0,
+        "db_writes_by_table": writes,
+        "provider_requests": {
+            name: {"requests": client.requests, "throttled": client.throttled}
+            for name, client in [
+                ("tonapi", crawler.client.tonapi),
+                ("gecko", crawler.client.gecko),
+                ("stonfi", crawler.client.stonfi),
+            ]
+        },
+        "stub": stub.stats,
+    }
+
+
+async def _drain(crawler, worker_id: str) -> None:
+    """Claim batches until the queue has nothing due (retries may still be waiting)"""
+    while await crawler.jobs.run_batch(db, worker_id):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawler against the provider stub")
+    add_stub_arguments(parser)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Scratch Postgres (default BENCH_DATABASE_URL)")
+    parser.add_argument("--ssl", default="disable", help="asyncpg SSL mode (default disable)")
+    parser.add_argument("--cycles", type=int, default=0,
+                        help="Crawl cycles (default: enough for every synthetic token)")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent job workers")
+    parser.add_argument("--unlimited", action="store_true", help="Lift provider rate limits")
+    parser.add_argument("--reset", action="store_true", help="Delete earlier bench rows first")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON only")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required")
+    if not args.synthetic and not args.fixtures:
+        parser.error("pass --synthetic N or --fixtures FILE")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n🏁 {report['tokens']} tokens in {report['seconds']}s "
+          f"over {report['cycles']} cycles = {report['tokens_per_min']} tokens/min")
+    print(f"   Jobs: {report['jobs']}")
+    print("\n⏱️ Stage latency (seconds)")
+    for name, stage in report["stages"].items():
+        print(f"   {name:<10} n={stage['count']:<6} p50={stage['p50']:<8} p99={stage['p99']}")
+    print(f"\n💾 DB writes per token: {report['db_writes_per_token']}")
+    for table, writes in report["db_writes_by_table"].items():
+        print(f"   {table:<18} {writes}")
+    print(f"\n🌐 Provider requests: {report['provider_requests']}")
+    print(f"   Stub: {report['stub']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Repository micro-benchmarks on large seeded datasets.
+
+Seeds a scratch Postgres with production-like volumes, then times the
+heavy repository methods (database.py, kol_repository.py) against it:
+
+- holder_snapshots: ~2M rows (10k tokens x 10 snapshots x top 20, plus
+  one "hot" token with 300 snapshots), wallets skewed so whales recur
+- lottery_entries: 300k rows over past draws, 20k in the open draw
+- kols / kol_calls: 5k KOLs with JSONB chain_focus, 300k calls
+
+Every timed run happens inside a transaction that is rolled back, so
+mutating methods (pick_winner) see the same data each run. The SQL each
+method sends is recorded and replayed under EXPLAIN (ANALYZE, BUFFERS)
+for the plan. The report has p50 / p99 ms per method, and per query the
+execution time, the root plan node and any sequential scans.
+
+Use a scratch database: --reset TRUNCATEs the seeded tables (and what
+references them) before seeding. Without it, existing bench data is
+reused. --scale 0.1 seeds a tenth of the rows.
+
+--save writes the report as a baseline. --baseline diffs against one
+and exits 1 when a method gets slower than --tolerance or a query
+starts sequentially scanning a table.
+
+Usage:
+    python scripts/bench_repositories.py --database-url postgresql://localhost/notaryton_bench \\
+        --reset --save baselines/repositories.json
+
+    python scripts/bench_repositories.py --database-url ... --baseline baselines/repositories.json
+
+    # Quick check of two methods on a small dataset
+    python scripts/bench_repositories.py --database-url ... --reset --scale 0.05 \\
+        --only get_whales,pick_winner --runs 5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import db, LotteryRepository, WalletRepository
+from kol_repository import KOLRepository
+from scripts.bench_crawler import percentile
+from utils.address import address_key
+
+# Rows at --scale 1
+BASE_SIZES = {
+    "users": 50_000,
+    "wallets": 200_000,
+    "tokens": 10_000,
+    "snapshots_per_token": 10,
+    "hot_snapshots": 300,
+    "lottery_entries": 300_000,
+    "open_entries": 20_000,
+    "kols": 5_000,
+    "kol_calls": 300_000,
+}
+HOLDERS_PER_SNAPSHOT = 20
+ENTRIES_PER_DRAW = 1_000
+TOTAL_SUPPLY = 10 ** 18  # 1B tokens at 9 decimals
+BENCH_USER_BASE = 8_000_000_000
+COPY_CHUNK = 50_000
+LATENCY_FLOOR_MS = 1.0  # Ignore regressions smaller than this (timer noise)
+
+SEEDED_TABLES = ["users", "tracked_tokens", "holder_snapshots", "lottery_entries", "kols", "kol_calls"]
+CATEGORIES = ["general", "ton", "solana", "watchdog", "regional", "cross_chain"]
+LANGUAGES = ["en", "ru", "zh", "hi", "ar", "es", "fr", "de", "ko", "pt", "id", "vi", "th", "fa", "uk"]
+TIERS = ["whale", "alpha", "mid", "micro", "unknown"]
+CHAINS = ["ton", "sol", "eth", "base", "bsc", "multi"]
+OUTCOMES = ["win", "win", "loss", "loss", "loss", "rug", "pending"]
+
+
+def dataset_sizes(scale: float) -> Dict[str, int]:
+    """Row counts for a scale factor (never below 1; snapshots per token stay fixed)"""
+    fixed = {"snapshots_per_token", "hot_snapshots"}
+    return {
+        name: count if name in fixed else max(1, int(count * scale))
+        for name, count in BASE_SIZES.items()
+    }
+
+
+# ========================
+# Data generators
+# ========================
+
+def bench_address(kind: str, n: int) -> str:
+    """Deterministic raw address, e.g. bench_address("token", 0)"""
+    return "0:" + hashlib.sha256(f"bench-{kind}-{n}".encode()).hexdigest()
+
+
+def token_holders(rng: random.Random, wallets: int, count: int) -> List[str]:
+    """A token's holder set; low wallet numbers are picked far more often (recurring whales)"""
+    picked: Dict[int, None] = {}
+    while len(picked) < min(count, wallets):
+        picked[int(wallets * rng.random() ** 3)] = None
+    return [bench_address("wallet", n) for n in picked]
+
+
+def snapshot_holders(rng: random.Random, holders: List[str]) -> List[Tuple[str, Decimal, Decimal]]:
+    """Top 20 of a holder set at one moment: (wallet, balance, pct) by rank"""
+    top = rng.sample(holders, min(HOLDERS_PER_SNAPSHOT, len(holders)))
+    shares = sorted((rng.paretovariate(1.2) for _ in top), reverse=True)
+    scale = rng.uniform(40, 90) / sum(shares)  # Top 20 hold 40-90% of supply
+    rows = []
+    for wallet, share in zip(top, shares):
+        pct = round(share * scale, 4)
+        rows.append((wallet, Decimal(int(TOTAL_SUPPLY * pct / 100)), Decimal(str(pct))))
+    return rows
+
+
+def token_rows(sizes: Dict[str, int], now: datetime) -> Iterator[Tuple]:
+    """tracked_tokens: (address, symbol, name, total_supply, first_seen)"""
+    for n in range(sizes["tokens"]):
+        yield (bench_address("token", n), f"B{n}", f"Bench Token {n}", Decimal(TOTAL_SUPPLY),
+               now - timedelta(hours=n % 5000))
+
+
+def snapshot_rows(sizes: Dict[str, int], seed: int, now: datetime) -> Iterator[Tuple]:
+    """holder_snapshots: (token_address, wallet_address, balance, pct_of_supply, rank, snapshot_at, wallet_key)"""
+    rng = random.Random(seed)
+    for n in range(sizes["tokens"]):
+        token = bench_address("token", n)
+        holders = token_holders(rng, sizes["wallets"], HOLDERS_PER_SNAPSHOT + 10)
+        snapshots = sizes["hot_snapshots"] if n == 0 else sizes["snapshots_per_token"]
+        for age in range(snapshots):
+            taken_at = now - timedelta(hours=age * 6, minutes=n % 60)
+            for rank, (wallet, balance, pct) in enumerate(snapshot_holders(rng, holders), 1):
+                yield (token, wallet, balance, pct, rank, taken_at, address_key(wallet))
+
+
+def user_rows(sizes: Dict[str, int]) -> Iterator[Tuple]:
+    """users: (user_id, language)"""
+    for n in range(sizes["users"]):
+        yield (BENCH_USER_BASE + n, LANGUAGES[n % len(LANGUAGES)])
+
+
+def lottery_rows(sizes: Dict[str, int], seed: int, now: datetime) -> Iterator[Tuple]:
+    """lottery_entries: (user_id, amount_stars, created_at, draw_id, won); the last open_entries are undrawn"""
+    rng = random.Random(seed + 1)
+    drawn = sizes["lottery_entries"] - sizes["open_entries"]
+    for n in range(sizes["lottery_entries"]):
+        user_id = BENCH_USER_BASE + int(sizes["users"] * rng.random() ** 2)
+        created_at = now - timedelta(minutes=sizes["lottery_entries"] - n)
+        if n < drawn:
+            draw_id = n // ENTRIES_PER_DRAW + 1
+            yield (user_id, rng.choice((1, 1, 1, 5, 25)), created_at, draw_id, n % ENTRIES_PER_DRAW == 0)
+        else:
+            yield (user_id, rng.choice((1, 1, 1, 5, 25)), created_at, None, False)
+
+
+def kol_rows(sizes: Dict[str, int], seed: int) -> Iterator[Tuple]:
+    """kols: (name, x_handle, chain_focus, category, tier, language, avg_views, verified, reputation_score, source)"""
+    rng = random.Random(seed + 2)
+    for n in range(sizes["kols"]):
+        chain_focus = rng.sample(CHAINS, rng.choice((1, 1, 2, 3)))
+        yield (f"Bench KOL {n}", f"bench_kol_{n}", chain_focus, rng.choice(CATEGORIES),
+               rng.choice(TIERS), rng.choice(LANGUAGES), min(int(rng.paretovariate(1.1) * 1000), 10 ** 8),
+               rng.random() < 0.1, rng.randint(0, 100), "bench")
+
+
+def kol_call_rows(sizes: Dict[str, int], kol_ids: List[int], seed: int, now: datetime) -> Iterator[Tuple]:
+    """kol_calls: (kol_id, token_address, token_symbol, chain, return_pct, outcome, rugged, called_at)"""
+    rng = random.Random(seed + 3)
+    for n in range(sizes["kol_calls"]):
+        token = int(sizes["tokens"] * rng.random() ** 2)
+        outcome = rng.choice(OUTCOMES)
+        return_pct = {"win": rng.uniform(20, 900), "loss": rng.uniform(-90, 10),
+                      "rug": -100.0, "pending": 0.0}[outcome]
+        yield (kol_ids[int(len(kol_ids) * rng.random() ** 2)], bench_address("token", token), f"B{token}",
+               rng.choice(CHAINS[:3]), Decimal(str(round(return_pct, 2))), outcome, outcome == "rug",
+               now - timedelta(minutes=n))
+
+
+def chunks(rows: Iterable[Tuple], size: int = COPY_CHUNK) -> Iterator[List[Tuple]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# ========================
+# Seeding
+# ========================
+
+async def _copy(conn, table: str, columns: List[str], rows: Iterable[Tuple]) -> int:
+    started = time.monotonic()
+    total = 0
+    for chunk in chunks(rows):
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        total += len(chunk)
+    elapsed = time.monotonic() - started
+    print(f"   🌱 {table:<17} {total:>10,} rows in {elapsed:.1f}s")
+    return total
+
+
+async def seed(sizes: Dict[str, int], seed_value: int, reset: bool) -> None:
+    """Load the bench dataset (skipped when it is already there and not --reset)"""
+    now = datetime.now().replace(microsecond=0)
+    async with db.pool.acquire() as conn:
+        if reset:
+            await conn.execute(f"TRUNCATE {', '.join(SEEDED_TABLES)} RESTART IDENTITY CASCADE")
+        elif await conn.fetchval("SELECT EXISTS (SELECT 1 FROM holder_snapshots)"):
+            print("♻️ Reusing the seeded dataset (pass --reset to reseed)")
+            return
+
+        print("🌱 Seeding bench dataset")
+        await _copy(conn, "users", ["user_id", "language"], user_rows(sizes))
+        await _copy(conn, "tracked_tokens", ["address", "symbol", "name", "total_supply", "first_seen"],
+                    token_rows(sizes, now))
+        await _copy(conn, "holder_snapshots",
+                    ["token_address", "wallet_address", "balance", "pct_of_supply", "rank",
+                     "snapshot_at", "wallet_key"],
+                    snapshot_rows(sizes, seed_value, now))
+        await _copy(conn, "lottery_entries", ["user_id", "amount_stars", "created_at", "draw_id", "won"],
+                    lottery_rows(sizes, seed_value, now))
+
+        # chain_focus is JSONB, which only has the pool's text codec, so no binary COPY
+        await conn.executemany("""
+            INSERT INTO kols (name, x_handle, chain_focus, category, tier, language,
+                              avg_views, verified, reputation_score, source)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+        """, list(kol_rows(sizes, seed_value)))
+        kol_ids = [row["id"] for row in await conn.fetch("SELECT id FROM kols ORDER BY id")]
+        print(f"   🌱 {'kols':<17} {len(kol_ids):>10,} rows")
+        await _copy(conn, "kol_calls",
+                    ["kol_id", "token_address", "token_symbol", "chain", "return_pct",
+                     "outcome", "rugged", "called_at"],
+                    kol_call_rows(sizes, kol_ids, seed_value, now))
+
+        # Same aggregates KOLRepository.update_stats keeps, for every KOL at once
+        await conn.execute("""
+            UPDATE kols k SET
+                total_calls = s.total_calls,
+                winning_calls = s.winning_calls,
+                rug_calls = s.rug_calls,
+                avg_return_pct = s.avg_return_pct,
+                best_call_return = s.best_call_return
+            FROM (
+                SELECT kol_id,
+                    COUNT(*) AS total_calls,
+                    COUNT(*) FILTER (WHERE outcome = 'win') AS winning_calls,
+                    COUNT(*) FILTER (WHERE outcome = 'rug' OR rugged = TRUE) AS rug_calls,
+                    COALESCE(AVG(return_pct), 0) AS avg_return_pct,
+                    COALESCE(MAX(return_pct), 0) AS best_call_return
+                FROM kol_calls GROUP BY kol_id
+            ) s
+            WHERE k.id = s.kol_id
+        """)
+        for table in SEEDED_TABLES:
+            await conn.execute(f"ANALYZE {table}")
+
+
+async def table_rows() -> Dict[str, int]:
+    """Planner row estimates for the seeded tables (cheap on millions of rows)"""
+    async with db.pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT relname, reltuples::bigint AS rows FROM pg_class
+            WHERE relname = ANY($1::text[]) AND relkind = 'r'
+        """, SEEDED_TABLES)
+        return {row["relname"]: max(0, row["rows"]) for row in rows}
+
+
+# ========================
+# Query recording
+# ========================
+
+class RecordingConnection:
+    """Connection proxy that records (query, args) for every statement a repository sends"""
+
+    def __init__(self, conn, queries: List[Tuple[str, tuple]]):
+        self._conn = conn
+        self.queries = queries
+
+    def _recorded(self, name: str):
+        method = getattr(self._conn, name)
+
+        async def call(query, *args, **kwargs):
+            self.queries.append((query, args))
+            return await method(query, *args, **kwargs)
+        return call
+
+    def __getattr__(self, name):
+        if name in ("fetch", "fetchrow", "fetchval", "execute"):
+            return self._recorded(name)
+        return getattr(self._conn, name)
+
+
+class PinnedPool:
+    """Pool stand-in handing repositories one (transaction-bound) connection"""
+
+    def __init__(self, conn):
+        self.queries: List[Tuple[str, tuple]] = []
+        self._conn = RecordingConnection(conn, self.queries)
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def plan_summary(explained: Any) -> Dict[str, Any]:
+    """Condense EXPLAIN (ANALYZE, FORMAT JSON) output to what a regression check needs"""
+    if isinstance(explained, str):
+        explained = json.loads(explained)
+    top = explained[0]
+    nodes, seq_scans = [top["Plan"]], []
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in seq_scans:
+            seq_scans.append(node.get("Relation Name"))
+        nodes.extend(node.get("Plans", []))
+    return {
+        "root": top["Plan"]["Node Type"],
+        "rows": top["Plan"].get("Actual Rows", 0),
+        "planning_ms": round(top.get("Planning Time", 0), 3),
+        "execution_ms": round(top.get("Execution Time", 0), 3),
+        "seq_scans": sorted(seq_scans),
+    }
+
+
+def compact_sql(query: str, width: int = 90) -> str:
+    line = " ".join(query.split())
+    return line if len(line) <= width else line[:width - 3] + "..."
+
+
+# ========================
+# Cases
+# ========================
+
+@dataclass
+class BenchCase:
+    name: str
+    repository: Callable[[Any], Any]  # Repository class, built on a PinnedPool
+    call: Callable[[Any], Awaitable[Any]]
+
+
+def current_holders(seed_value: int, wallets: int) -> List[Dict[str, Any]]:
+    """A fresh TonAPI-shaped holder list for the hot token (some whales move)"""
+    rng = random.Random(seed_value + 4)
+    holders = token_holders(rng, wallets, HOLDERS_PER_SNAPSHOT + 10)
+    return [
+        {"owner": {"address": wallet}, "balance": str(balance)}
+        for wallet, balance, _ in snapshot_holders(rng, holders)
+    ]
+
+
+def bench_cases(sizes: Dict[str, int], seed_value: int, next_draw: int) -> List[BenchCase]:
+    hot_token = bench_address("token", 0)
+    holders = current_holders(seed_value, sizes["wallets"])
+    return [
+        BenchCase("wallets.detect_whale_changes", WalletRepository,
+                  lambda repo: repo.detect_whale_changes(hot_token, holders, float(TOTAL_SUPPLY))),
+        BenchCase("wallets.get_whales", WalletRepository, lambda repo: repo.get_whales(3)),
+        BenchCase("wallets.get_holder_history", WalletRepository,
+                  lambda repo: repo.get_holder_history(hot_token, 5)),
+        BenchCase("lottery.pick_winner", LotteryRepository, lambda repo: repo.pick_winner(next_draw)),
+        BenchCase("kols.get_leaderboard", KOLRepository, lambda repo: repo.get_leaderboard(20)),
+        BenchCase("kols.list_all[chain]", KOLRepository, lambda repo: repo.list_all(chain_focus="ton")),
+        BenchCase("kols.list_all[chain+category+language]", KOLRepository,
+                  lambda repo: repo.list_all(chain_focus="sol", category="solana", language="en")),
+        BenchCase("kols.list_all[verified]", KOLRepository,
+                  lambda repo: repo.list_all(min_reputation=70, verified_only=True)),
+    ]
+
+
+async def run_case(case: BenchCase, runs: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time `runs` calls (each rolled back), then EXPLAIN ANALYZE the queries of one call"""
+    samples: List[float] = []
+    queries: List[Tuple[str, tuple]] = []
+    async with db.pool.acquire() as conn:
+        for n in range(warmup + runs):
+            pool = PinnedPool(conn)
+            transaction = conn.transaction()
+            await transaction.start()
+            started = time.perf_counter()
+            try:
+                await case.call(case.repository(pool))
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                await transaction.rollback()
+            if n >= warmup:
+                samples.append(elapsed_ms)
+            queries = pool.queries
+
+        # Replay in order so writes (pick_winner's UPDATEs) see the state they saw in the call
+        plans = []
+        transaction = conn.transaction()
+        await transaction.start()
+        try:
+            for query, args in queries:
+                explained = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args)
+                explained = json.loads(explained) if isinstance(explained, str) else explained
+                plans.append({"sql": compact_sql(query), **plan_summary(explained), "plan": explained})
+        finally:
+            await transaction.rollback()
+
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0,
+        "queries": plans,
+    }
+
+
+def diff_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Methods slower than the baseline by more than `tolerance`, with new sequential scans, or failing"""
+    regressions = []
+    for name, before in baseline.get("methods", {}).items():
+        after = current.get("methods", {}).get(name)
+        if after is None or "error" in before:
+            continue
+        if "error" in after:
+            regressions.append(f"{name}: failed ({after['error']})")
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if after[key] > before[key] * (1 + tolerance) and after[key] - before[key] > LATENCY_FLOOR_MS:
+                regressions.append(f"{name}: {key} {before[key]} -> {after[key]}")
+        scanned_before = {table for query in before["queries"] for table in query["seq_scans"]}
+        scanned_after = {table for query in after["queries"] for table in query["seq_scans"]}
+        for table in sorted(scanned_after - scanned_before):
+            regressions.append(f"{name}: now seq-scans {table}")
+    return regressions
+
+
+# ========================
+# Runner
+# ========================
+
+async def run(args) -> Dict[str, Any]:
+    sizes = dataset_sizes(args.scale)
+    await db.connect(args.database_url, ssl=args.ssl)
+    try:
+        await KOLRepository(db.pool).init_schema()  # GIN index on chain_focus
+        await seed(sizes, args.seed, args.reset)
+        rows = await table_rows()
+        async with db.pool.acquire() as conn:
+            next_draw = (await conn.fetchval("SELECT COALESCE(MAX(draw_id), 0) FROM lottery_entries")) + 1
+
+        methods = {}
+        for case in bench_cases(sizes, args.seed, next_draw):
+            if args.only and not any(part in case.name for part in args.only):
+                continue
+            print(f"⏱️ {case.name}")
+            try:
+                methods[case.name] = await run_case(case, args.runs)
+            except Exception as e:
+                print(f"❌ {case.name} failed: {e}")
+                methods[case.name] = {"error": str(e)}
+    finally:
+        await db.disconnect()
+
+    return {"scale": args.scale, "seed": args.seed, "rows": rows, "methods": methods}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n💾 Dataset (scale {report['scale']}): "
+          + ", ".join(f"{table}={count:,}" for table, count in report["rows"].items()))
+    print("\n⏱️ Repository methods (ms)")
+    for name, method in report["methods"].items():
+        if "error" in method:
+            print(f"   {name:<42} ❌ {method['error']}")
+            continue
+        print(f"   {name:<42} p50={method['p50_ms']:<9} p99={method['p99_ms']:<9} runs={method['runs']}")
+        for query in method["queries"]:
+            scans = f" ⚠️ seq scan: {', '.join(query['seq_scans'])}" if query["seq_scans"] else ""
+            print(f"      {query['execution_ms']:>9}ms {query['root']:<16} rows={query['rows']:<7}{scans}")
+            print(f"      {query['sql']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repository methods on a large seeded dataset")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Scratch Postgres (default BENCH_DATABASE_URL)")
+    parser.add_argument("--ssl", default="disable", help="asyncpg SSL mode (default disable)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Dataset size factor (1 = ~2M snapshots)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Truncate and reseed the bench tables")
+    parser.add_argument("--runs", type=int, default=20, help="Timed calls per method")
+    parser.add_argument("--only", type=lambda value: [part.strip() for part in value.split(",") if part.strip()],
+                        help="Comma-separated substrings of the methods to run")
+    parser.add_argument("--save", type=Path, help="Write the report here as a baseline")
+    parser.add_argument("--baseline", type=Path, help="Compare against this saved report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON only")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2, default=str))
+        print(f"\n💾 Baseline saved to {args.save}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("scale") != report["scale"]:
+            print(f"\n⚠️ Baseline was taken at scale {baseline.get('scale')}, this run is {report['scale']}")
+        regressions = diff_reports(baseline, report, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    if any("error" in method for method in report["methods"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
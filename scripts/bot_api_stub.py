@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Local stub for the Telegram Bot API.
+
+Answers every call an aiogram Bot makes (sendMessage, editMessageText,
+getFile, answerInlineQuery, setWebhook, ...) with a well-formed result,
+and serves file downloads with deterministic bytes, so the bots can run
+under load without touching Telegram. Latency and 5xx errors can be
+injected like scripts/provider_stub.py.
+
+Usage:
+    stub = BotApiStub(BotApiConfig(latency_ms=40))
+    point_bots_at(await stub.start(), bot, memeseal_bot)
+    ...
+    print(stub.stats)  # {"calls": {"sendMessage": 120, ...}, "errors": 0}
+    await stub.stop()
+
+    # Standalone (e.g. for a bot process started elsewhere)
+    python scripts/bot_api_stub.py --port 8081 --latency-ms 40
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+from aiohttp import web
+from aiogram.client.telegram import TelegramAPIServer
+
+FILE_SIZE = 2048  # Bytes served per downloaded file
+
+
+@dataclass
+class BotApiConfig:
+    latency_ms: float = 0  # Mean added latency; actual is uniform in [0.5x, 1.5x]
+    error_rate: float = 0  # Fraction of calls answered with 500
+    seed: int = 0
+
+
+def stub_file_bytes(file_path: str, size: int = FILE_SIZE) -> bytes:
+    """What the stub serves for a file (same path, same bytes)"""
+    block = hashlib.sha256(file_path.encode()).digest()
+    return (block * (size // len(block) + 1))[:size]
+
+
+def point_bots_at(base_url: str, *bots) -> None:
+    """Send these aiogram bots' API calls and downloads to the stub"""
+    api = TelegramAPIServer.from_base(base_url)
+    for bot in bots:
+        if bot is not None:
+            bot.session.api = api
+
+
+class BotApiStub:
+    """aiohttp app answering /bot<token>/<method> and /file/bot<token>/<path>"""
+
+    def __init__(self, config: Optional[BotApiConfig] = None):
+        self.config = config or BotApiConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats: Dict[str, Any] = {"calls": {}, "downloads": 0, "errors": 0}
+        self._message_id = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._call)
+        app.router.add_get("/file/bot{token}/{path:.+}", self._download)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL (port 0 picks a free port)"""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ========================
+    # Handlers
+    # ========================
+
+    async def _delay(self) -> bool:
+        """Injected latency; False if this call should fail"""
+        if self.config.latency_ms:
+            await asyncio.sleep(self.config.latency_ms * self.rng.uniform(0.5, 1.5) / 1000)
+        if self.rng.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return False
+        return True
+
+    async def _call(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        calls = self.stats["calls"]
+        calls[method] = calls.get(method, 0) + 1
+        data = dict(await request.post()) if request.can_read_body else {}
+        if not await self._delay():
+            return web.json_response({"ok": False, "error_code": 500, "description": "stub error"}, status=500)
+        return web.json_response({"ok": True, "result": self.result(method, data)})
+
+    async def _download(self, request: web.Request) -> web.Response:
+        self.stats["downloads"] += 1
+        if not await self._delay():
+            return web.Response(status=500)
+        return web.Response(body=stub_file_bytes(request.match_info["path"]))
+
+    def result(self, method: str, data: Dict[str, Any]) -> Any:
+        """A valid Bot API result for `method`"""
+        name = method.lower()
+        if name == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot"}
+        if name == "getfile":
+            file_id = str(data.get("file_id", "file"))
+            return {"file_id": file_id, "file_unique_id": f"u{file_id}",
+                    "file_size": FILE_SIZE, "file_path": f"documents/{file_id}"}
+        if name.startswith("send") or name.startswith("edit"):
+            self._message_id += 1
+            chat_id = data.get("chat_id", 0)
+            try:
+                chat = {"id": int(chat_id), "type": "private"}
+            except ValueError:
+                chat = {"id": -100, "type": "channel", "username": str(chat_id).lstrip("@")}
+            return {"message_id": int(data.get("message_id", self._message_id)),
+                    "date": int(time.time()), "chat": chat, "text": str(data.get("text", ""))}
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local Telegram Bot API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    stub = BotApiStub(BotApiConfig(latency_ms=args.latency_ms, error_rate=args.error_rate))
+    print(f"🤖 Bot API stub on http://{args.host}:{args.port}")
+    web.run_app(stub.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
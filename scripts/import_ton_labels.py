@@ -4,6 +4,8 @@ Import ton-labels data into notaryton's known_wallets table.
 
 This script migrates 2,958 labeled addresses from the ton-labels dataset
 into notaryton's PostgreSQL database for enhanced rug score detection.
+Records are COPYed into a staging table and merged in one statement;
+labels dropped from the dataset are removed. Prints an added/changed/removed diff.
 
 Usage:
     python scripts/import_ton_labels.py
@@ -15,12 +17,14 @@ import asyncio
 import json
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import asyncpg
+from database import db
+from wallet_labels import load_ton_labels, TON_LABELS_PATH, TON_LABELS_SOURCE
 
 # Load from .env if dotenv is available
 try:
@@ -31,7 +35,7 @@ except ImportError:
 
 
 async def import_labels():
-    """Import ton-labels into known_wallets table."""
+    """Bulk import ton-labels into known_wallets table."""
 
     # Get database URL from environment
     database_url = os.getenv("DATABASE_URL")
@@ -41,82 +45,39 @@ async def import_labels():
         return
 
     # Load the ton-labels data
-    labels_path = Path(__file__).parent / "ton-labels-compiled.json"
-    if not labels_path.exists():
-        print(f"ERROR: {labels_path} not found")
+    if not TON_LABELS_PATH.exists():
+        print(f"ERROR: {TON_LABELS_PATH} not found")
         print("Copy ton-labels-compiled.json from creative-hub/data/")
         return
 
-    with open(labels_path) as f:
-        data = json.load(f)
+    started = time.time()
+    meta, records = load_ton_labels()
 
-    print(f"Loaded {data['total']} addresses from ton-labels")
-    print(f"Stats: {json.dumps(data['stats'], indent=2)}")
+    print(f"Loaded {meta['total']} addresses from ton-labels")
+    print(f"Stats: {json.dumps(meta['stats'], indent=2)}")
 
-    # Connect to PostgreSQL
+    # Connect to PostgreSQL (also ensures schema)
     print(f"\nConnecting to database...")
-    conn = await asyncpg.connect(database_url, ssl='require')
-
-    # Ensure table exists
-    await conn.execute("""
-        CREATE TABLE IF NOT EXISTS known_wallets (
-            address VARCHAR(66) PRIMARY KEY,
-            label VARCHAR(50) NOT NULL,
-            owner_name VARCHAR(200),
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT NOW()
-        )
-    """)
-    await conn.execute("""
-        CREATE INDEX IF NOT EXISTS idx_known_wallets_label
-        ON known_wallets(label)
-    """)
-
-    # Import addresses
-    imported = 0
-    skipped = 0
-
-    for address, info in data['addresses'].items():
-        # Map ton-labels structure to notaryton structure
-        label = info.get('category', 'unknown')
-        owner_name = info.get('label') or info.get('organization', '')
-
-        # Build notes from extra info
-        notes_data = {
-            'website': info.get('website'),
-            'subcategory': info.get('subcategory'),
-            'description': info.get('description'),
-            'tags': info.get('tags', []),
-            'source': 'ton-labels'
-        }
-        # Remove empty values
-        notes_data = {k: v for k, v in notes_data.items() if v}
-        notes = json.dumps(notes_data) if notes_data else None
-
-        try:
-            await conn.execute("""
-                INSERT INTO known_wallets (address, label, owner_name, notes)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT (address) DO UPDATE SET
-                    label = $2,
-                    owner_name = COALESCE($3, known_wallets.owner_name),
-                    notes = COALESCE($4, known_wallets.notes)
-            """, address, label, owner_name, notes)
-            imported += 1
-        except Exception as e:
-            print(f"  Error importing {address}: {e}")
-            skipped += 1
-
-        # Progress indicator
-        if imported % 500 == 0:
-            print(f"  Imported {imported} addresses...")
-
-    await conn.close()
-
-    print(f"\n✅ Import complete!")
-    print(f"   Imported: {imported}")
-    print(f"   Skipped: {skipped}")
-    print(f"   Total: {data['total']}")
+    await db.connect(database_url)
+
+    try:
+        diff = await db.wallets.import_labels(records, source=TON_LABELS_SOURCE)
+    finally:
+        await db.disconnect()
+
+    elapsed = time.time() - started
+
+    print(f"\n✅ Import complete in {elapsed:.2f}s!")
+    print(f"   Added: {len(diff['added'])}")
+    print(f"   Changed: {len(diff['changed'])}")
+    print(f"   Removed: {len(diff['removed'])}")
+    print(f"   Total: {meta['total']}")
+
+    for kind in ('added', 'changed', 'removed'):
+        for address in diff[kind][:10]:
+            print(f"   {kind}: {address}")
+        if len(diff[kind]) > 10:
+            print(f"   ... and {len(diff[kind]) - 10} more {kind}")
 
     # Verification query suggestion
     print(f"\nTo verify, run:")
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the bot webhooks, the API and payment flows.
+
+Runs the real FastAPI app (bot.py) in-process under uvicorn, wired to:
+- scripts/bot_api_stub.py for every Telegram call and file download
+- the in-memory FakeChain (CHAIN_BACKEND=fake) for seals and payouts
+- a scratch Postgres
+
+and drives synthesized traffic at it over HTTP. The traffic is Telegram
+updates (documents, photos, commands, inline queries), TonAPI payment
+webhooks and /api/v1/* calls. It reports, per route, requests/s, error
+rate and p50/p90/p99 latency. It also reports the seals the queue
+completed once traffic stops, and the Bot API calls the bots made.
+
+Load users get a subscription and load contracts are deployed on the
+fake chain first, so documents and API calls go all the way to a seal.
+Use a scratch database: load users, seals and payments are written like
+real ones.
+
+--save writes the report as a baseline. --baseline diffs against one
+and exits 1 when a route regresses past --tolerance.
+
+Usage:
+    python scripts/load_test.py --database-url postgresql://localhost/notaryton_load \\
+        --duration 60 --concurrency 50 --save baselines/load.json
+
+    python scripts/load_test.py --database-url ... --baseline baselines/load.json
+
+    # Seals only, slow chain with 5s blocks and 2% liteserver errors
+    python scripts/load_test.py --database-url ... --mix document=3,notarize=1 \\
+        --chain-latency-ms 150 --block-time 5 --chain-failure-rate 0.02
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional
+
+import aiohttp
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.bench_crawler import percentile
+from scripts.bot_api_stub import BotApiStub, BotApiConfig, point_bots_at, stub_file_bytes
+
+LOAD_BOT_TOKEN = "123456789:LoadTestLoadTestLoadTestLoadTest000"
+LOAD_USER_BASE = 7_000_000_000  # Load users' Telegram ids start here
+DEFAULT_MIX = {
+    "document": 3, "photo": 1, "command": 2, "inline": 2,
+    "tonapi": 1, "verify": 3, "notarize": 1,
+}
+COMMANDS = ["/start", "/status", "/pot", "/mytickets", "/referral"]
+LATENCY_FLOOR_MS = 5  # Latency changes smaller than this are never regressions
+
+
+# ========================
+# Payloads
+# ========================
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": "Load", "username": f"load{user_id}"}
+
+
+def telegram_message(update_id: int, user_id: int, **content) -> Dict[str, Any]:
+    """A private-chat message Update"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            **content,
+        },
+    }
+
+
+def document_update(update_id: int, user_id: int) -> Dict[str, Any]:
+    return telegram_message(update_id, user_id, document={
+        "file_id": f"doc{update_id}", "file_unique_id": f"udoc{update_id}",
+        "file_name": f"load{update_id}.pdf", "mime_type": "application/pdf", "file_size": 2048,
+    })
+
+
+def photo_update(update_id: int, user_id: int) -> Dict[str, Any]:
+    return telegram_message(update_id, user_id, photo=[
+        {"file_id": f"photo{update_id}", "file_unique_id": f"uphoto{update_id}",
+         "width": 1280, "height": 720, "file_size": 2048},
+    ])
+
+
+def command_update(update_id: int, user_id: int, command: str) -> Dict[str, Any]:
+    return telegram_message(update_id, user_id, text=command, entities=[
+        {"type": "bot_command", "offset": 0, "length": len(command.split()[0])},
+    ])
+
+
+def inline_update(update_id: int, user_id: int, query: str) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "inline_query": {"id": str(update_id), "from": _user(user_id), "query": query, "offset": ""},
+    }
+
+
+def tonapi_payment(wallet: str, user_id: int, amount_ton: float, tx_hash: str) -> Dict[str, Any]:
+    """A TonAPI transaction webhook: user_id pays the service wallet"""
+    return {
+        "event_type": "transaction",
+        "transactions": [{
+            "hash": tx_hash,
+            "account": {"address": wallet},
+            "in_msg": {
+                "value": int(amount_ton * 1e9),
+                "msg_data": {"@type": "msg.dataText", "text": str(user_id)},
+            },
+        }],
+    }
+
+
+def sealed_file_hash(file_id: str) -> str:
+    """Hash the app records for a stub file (for verify hits)"""
+    return hashlib.sha256(stub_file_bytes(f"documents/{file_id}")).hexdigest()
+
+
+def contract_address(i: int) -> str:
+    """Raw address of the i-th load contract"""
+    return "0:" + hashlib.sha256(f"load-contract-{i}".encode()).hexdigest()
+
+
+class Traffic:
+    """Deterministic request stream for a route mix"""
+
+    def __init__(self, mix: Dict[str, int], users: List[int], contracts: List[str],
+                 wallet: str, webhook_path: str, seed: int = 0):
+        self.routes = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.routes]
+        self.users = users
+        self.contracts = contracts
+        self.wallet = wallet
+        self.webhook_path = webhook_path
+        self.rng = random.Random(seed)
+        self.n = 0
+        self.sent_files: List[str] = []
+
+    def next(self) -> Tuple[str, str, str, Optional[Dict[str, Any]]]:
+        """(route, HTTP method, path, JSON body)"""
+        self.n += 1
+        n = self.n
+        route = self.rng.choices(self.routes, self.weights)[0]
+        user_id = self.rng.choice(self.users)
+
+        if route == "document":
+            self.sent_files.append(f"doc{n}")
+            return route, "POST", self.webhook_path, document_update(n, user_id)
+        if route == "photo":
+            return route, "POST", self.webhook_path, photo_update(n, user_id)
+        if route == "command":
+            return route, "POST", self.webhook_path, command_update(n, user_id, self.rng.choice(COMMANDS))
+        if route == "inline":
+            return route, "POST", self.webhook_path, inline_update(n, user_id, self._verify_hash()[:12])
+        if route == "tonapi":
+            tx_hash = hashlib.sha256(f"load-payment-{n}".encode()).hexdigest()
+            amount = self.rng.choice([0.015, 0.3])
+            return route, "POST", "/webhook/tonapi", tonapi_payment(self.wallet, user_id, amount, tx_hash)
+        if route == "verify":
+            return route, "GET", f"/api/v1/verify/{self._verify_hash()}", None
+        if route == "notarize":
+            return route, "POST", "/api/v1/notarize", {
+                "api_key": str(user_id), "contract_address": self.rng.choice(self.contracts), "async": True,
+            }
+        raise ValueError(f"Unknown route: {route}")
+
+    def _verify_hash(self) -> str:
+        """Half the lookups are files sent earlier (hits once sealed), half misses"""
+        if self.sent_files and self.rng.random() < 0.5:
+            return sealed_file_hash(self.rng.choice(self.sent_files))
+        return "%064x" % self.rng.getrandbits(256)
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """"document=3,verify=1" -> {"document": 3, "verify": 1}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown route: {name} (one of {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+# ========================
+# Driving and reporting
+# ========================
+
+def response_ok(status: int, body: Any) -> bool:
+    """2xx/3xx and no application-level error in the JSON body"""
+    if status >= 400:
+        return False
+    if isinstance(body, dict):
+        return body.get("success") is not False and body.get("ok") is not False and "error" not in body
+    return True
+
+
+async def drive(base_url: str, traffic: Traffic, duration: float, concurrency: int,
+                max_requests: int = 0) -> Tuple[Dict[str, List[Tuple[float, bool]]], float]:
+    """Run `concurrency` clients until `duration` (or `max_requests`); returns (samples, seconds)"""
+    samples: Dict[str, List[Tuple[float, bool]]] = {}
+    started = time.monotonic()
+    deadline = started + duration
+    sent = 0
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        nonlocal sent
+        while time.monotonic() < deadline and (not max_requests or sent < max_requests):
+            sent += 1
+            route, method, path, body = traffic.next()
+            t0 = time.monotonic()
+            try:
+                async with session.request(method, base_url + path, json=body) as resp:
+                    status = resp.status
+                    try:
+                        payload = await resp.json(content_type=None)
+                    except Exception:
+                        payload = None
+                ok = response_ok(status, payload)
+            except Exception:
+                ok = False
+            samples.setdefault(route, []).append((time.monotonic() - t0, ok))
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return samples, time.monotonic() - started
+
+
+def summarize(samples: Dict[str, List[Tuple[float, bool]]], seconds: float) -> Dict[str, Dict[str, float]]:
+    """Per route: requests, rps, error_rate and p50/p90/p99 latency (ms)"""
+    routes = {}
+    for route, results in sorted(samples.items()):
+        latencies = [latency * 1000 for latency, _ in results]
+        errors = sum(1 for _, ok in results if not ok)
+        routes[route] = {
+            "requests": len(results),
+            "rps": round(len(results) / seconds, 2) if seconds else 0.0,
+            "error_rate": round(errors / len(results), 4) if results else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p90_ms": round(percentile(latencies, 90), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+    return routes
+
+
+def diff_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Routes that got worse than the baseline by more than `tolerance` (0.2 = 20%)"""
+    regressions = []
+    for route, before in baseline.get("routes", {}).items():
+        after = current.get("routes", {}).get(route)
+        if after is None:
+            continue
+        if after["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: rps {before['rps']} -> {after['rps']}")
+        for key in ("p50_ms", "p99_ms"):
+            if after[key] > before[key] * (1 + tolerance) and after[key] - before[key] > LATENCY_FLOOR_MS:
+                regressions.append(f"{route}: {key} {before[key]} -> {after[key]}")
+        if after["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{route}: error_rate {before['error_rate']} -> {after['error_rate']}")
+    return regressions
+
+
+# ========================
+# App under test
+# ========================
+
+def configure_environment(args) -> None:
+    """Point the app at the scratch database and fake chain; keep it off the network"""
+    os.environ.update({
+        "BOT_TOKEN": LOAD_BOT_TOKEN,
+        "MEMESEAL_BOT_TOKEN": "",
+        "MEMESCAN_BOT_TOKEN": "",
+        "DATABASE_URL": args.database_url,
+        "DATABASE_SSL": args.ssl,
+        "CHAIN_BACKEND": "fake",
+        "TON_WALLET_SECRET": "",
+        "WEBHOOK_URL": "http://127.0.0.1",
+        "TONAPI_WEBHOOK_SECRET": "",
+        "API_LEGACY_USER_KEYS": "true",  # Load users authenticate with their ids
+        "TWITTER_API_KEY": "",
+        "GROUP_IDS": "",
+        "CRAWLER_ENABLED": "false",
+        "MEMESCAN_TWITTER_ENABLED": "false",
+    })
+    # bot.py reads SERVICE_TON_WALLET at import; the fake chain uses it as its wallet
+    from chain import FAKE_WALLET
+    os.environ["SERVICE_TON_WALLET"] = FAKE_WALLET
+
+
+async def start_app(app, port: int):
+    """Serve the app (startup hooks included) in the background"""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # Startup failed: raise it
+        await asyncio.sleep(0.05)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://127.0.0.1:{bound_port}"
+
+
+async def wait_for_seals(db, timeout: float) -> float:
+    """Wait for the seal queue to drain; returns the seconds it took"""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        stats = await db.seal_jobs.get_stats()
+        if not stats["pending"] and not stats["running"]:
+            break
+        await asyncio.sleep(0.5)
+    return time.monotonic() - started
+
+
+async def run(args) -> Dict[str, Any]:
+    configure_environment(args)
+    stub = BotApiStub(BotApiConfig(latency_ms=args.telegram_latency_ms, seed=args.seed))
+    stub_url = await stub.start()
+
+    import bot as app_module  # Reads the environment set above
+    from chain import FakeChain
+    from database import db
+
+    point_bots_at(stub_url, app_module.bot, app_module.memeseal_bot, app_module.memescan_bot)
+    chain = app_module.chain_backend
+    assert isinstance(chain, FakeChain), "CHAIN_BACKEND must be fake for a load test"
+    chain.latency = args.chain_latency_ms / 1000
+    chain.jitter = 0.5
+    chain.failure_rate = args.chain_failure_rate
+    chain.block_time = args.block_time
+
+    server, server_task, base_url = await start_app(app_module.app, args.port)
+    try:
+        users = [LOAD_USER_BASE + i for i in range(args.users)]
+        for user_id in users:
+            await db.users.ensure_exists(user_id)
+            await app_module.add_subscription(user_id, months=1)
+        contracts = []
+        for i in range(args.contracts):
+            raw = contract_address(i)
+            chain.set_contract(app_module.Address(raw).to_str(), f"load-code-{i}".encode())
+            contracts.append(raw)
+
+        traffic = Traffic(args.mix, users, contracts, await chain.wallet_address(),
+                          app_module.WEBHOOK_PATH, seed=args.seed)
+        print(f"🚚 Driving {base_url} for {args.duration}s with {args.concurrency} clients: {args.mix}")
+        samples, seconds = await drive(base_url, traffic, args.duration, args.concurrency, args.requests)
+        drain_seconds = await wait_for_seals(db, args.drain)
+        queue = await db.seal_jobs.get_stats()
+        seals = app_module.seal_workers.metrics.as_dict()
+    finally:
+        server.should_exit = True
+        await server_task
+        await stub.stop()
+
+    routes = summarize(samples, seconds)
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "config": {
+            "duration": args.duration, "concurrency": args.concurrency, "mix": args.mix,
+            "users": args.users, "seed": args.seed, "telegram_latency_ms": args.telegram_latency_ms,
+            "chain_latency_ms": args.chain_latency_ms, "chain_failure_rate": args.chain_failure_rate,
+            "block_time": args.block_time,
+        },
+        "seconds": round(seconds, 2),
+        "requests": total,
+        "rps": round(total / seconds, 2) if seconds else 0.0,
+        "routes": routes,
+        "seals": {**seals, "drain_seconds": round(drain_seconds, 2), "queue_after": queue},
+        "chain": chain.get_stats()["fake"],
+        "bot_api": stub.stats,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n🏁 {report['requests']} requests in {report['seconds']}s = {report['rps']} req/s")
+    print(f"\n{'route':<10} {'requests':>9} {'rps':>9} {'errors':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for name, route in report["routes"].items():
+        print(f"{name:<10} {route['requests']:>9} {route['rps']:>9} {route['error_rate']:>8.2%} "
+              f"{route['p50_ms']:>9} {route['p90_ms']:>9} {route['p99_ms']:>9}")
+    seals = report["seals"]
+    print(f"\n🔏 Seals: {seals['sealed']} sealed, {seals['failed']} failed, "
+          f"{seals['seals_per_transfer']} per transfer, queue drained in {seals['drain_seconds']}s")
+    print(f"⛓️ Chain: {report['chain']}")
+    print(f"🤖 Bot API: {report['bot_api']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot webhooks, API and payment flows")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Scratch Postgres (default BENCH_DATABASE_URL)")
+    parser.add_argument("--ssl", default="disable", help="asyncpg SSL mode (default disable)")
+    parser.add_argument("--port", type=int, default=0, help="Port for the app (default: any free port)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--users", type=int, default=200, help="Subscribed load users")
+    parser.add_argument("--contracts", type=int, default=100, help="Contracts deployed on the fake chain")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Route weights, e.g. document=3,verify=2 (default: all routes)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30, help="Bot API stub latency")
+    parser.add_argument("--chain-latency-ms", type=float, default=50, help="Fake chain latency per call")
+    parser.add_argument("--chain-failure-rate", type=float, default=0, help="Fake chain call failure rate")
+    parser.add_argument("--block-time", type=float, default=0, help="Fake chain block time in seconds")
+    parser.add_argument("--drain", type=float, default=60, help="Seconds to wait for queued seals")
+    parser.add_argument("--save", type=Path, help="Write the report here as a baseline")
+    parser.add_argument("--baseline", type=Path, help="Compare against this saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression (0.2 = 20%%)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON only")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Baseline saved to {args.save}")
+    if args.baseline:
+        regressions = diff_reports(json.loads(args.baseline.read_text()), report, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Local stub for the TonAPI, GeckoTerminal and STON.fi endpoints.
+
+Serves recorded (or synthetic) responses so the crawler can be exercised
+and benchmarked offline, with injected latency, 5xx errors and 429s.
+
+Routes mirror each provider under a prefix: /tonapi/..., /gecko/... and
+/stonfi/.... Point the clients at it with TONAPI_BASE_URL /
+GECKO_BASE_URL / STONFI_BASE_URL, or point_clients_at() in-process.
+
+Fixtures are JSON: {"tonapi/jettons/EQ...": <body>, ...}, keyed by
+provider + path (query string ignored). A value of {"sequence": [...]}
+is served in turn, cycling, e.g. successive new-pool pages.
+
+Usage:
+    # Record real responses while the crawler runs against the stub
+    python scripts/provider_stub.py --record --fixtures fixtures.json
+
+    # Replay them with 80ms latency, 1% errors and 2% 429s
+    python scripts/provider_stub.py --fixtures fixtures.json \\
+        --latency-ms 80 --error-rate 0.01 --rate-429 0.02
+
+    # Synthetic data for 500 tokens, no recording needed
+    python scripts/provider_stub.py --synthetic 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from aiohttp import web, ClientSession
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memescan.api import TonAPI, GeckoTerminalAPI, StonFiAPI
+from utils.address import to_friendly
+
+PROVIDERS = {
+    "tonapi": TonAPI,
+    "gecko": GeckoTerminalAPI,
+    "stonfi": StonFiAPI,
+}
+# Real endpoints, captured before anything re-points the clients
+UPSTREAMS = {name: api.BASE_URL for name, api in PROVIDERS.items()}
+
+NEW_POOLS_PAGE = 20  # TokenCrawler._discover asks for 20 new launches
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0  # Mean added latency; actual is uniform in [0.5x, 1.5x]
+    error_rate: float = 0  # Fraction of requests answered with 500
+    rate_429: float = 0  # Fraction answered with 429 + Retry-After
+    retry_after: float = 1.0
+    seed: int = 0
+    record: bool = False  # Proxy misses upstream and keep the response
+
+
+def point_clients_at(base_url: str) -> None:
+    """Send every provider client in this process to the stub"""
+    for name, api in PROVIDERS.items():
+        api.BASE_URL = f"{base_url}/{name}"
+
+
+def synthetic_fixtures(tokens: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Deterministic fixtures for `tokens` jettons.
+
+    New pools are paged NEW_POOLS_PAGE at a time, one page per request,
+    so each crawl cycle discovers fresh tokens. Top-holder shares range
+    from spread out to dev-held, so every scoring branch is exercised.
+    """
+    rng = random.Random(seed)
+    fixtures: Dict[str, Any] = {}
+    pools = []
+    for i in range(tokens):
+        address = to_friendly(f"0:{rng.getrandbits(256):064x}")
+        symbol = f"BENCH{i}"
+        supply = 10 ** 18
+        holder_count = rng.choice([3, 8, 25, 60, 150, 400])
+        top_share = rng.choice([0.02, 0.1, 0.3, 0.6, 0.9])
+        balances = [int(supply * top_share)]
+        remaining = supply - balances[0]
+        for _ in range(min(holder_count, 20) - 1):
+            balances.append(remaining // holder_count)
+        holders = [
+            {
+                "address": to_friendly(f"0:{rng.getrandbits(256):064x}"),
+                "owner": {"address": to_friendly(f"0:{rng.getrandbits(256):064x}")},
+                "balance": str(balance),
+            }
+            for balance in balances
+        ]
+        fixtures[f"tonapi/jettons/{address}"] = {
+            "total_supply": str(supply),
+            "holders_count": holder_count,
+            "metadata": {"symbol": symbol, "name": f"Bench Token {i}", "decimals": "9"},
+        }
+        fixtures[f"tonapi/jettons/{address}/holders"] = {"addresses": holders}
+        pools.append({"attributes": {
+            "address": address,
+            "name": f"{symbol} / TON",
+            "base_token_price_usd": f"{rng.random():.8f}",
+            "reserve_in_usd": f"{rng.uniform(500, 50000):.2f}",
+            "pool_created_at": "2025-12-01T00:00:00Z",
+            "volume_usd": {"h24": f"{rng.uniform(0, 10000):.2f}"},
+            "price_change_percentage": {"h24": f"{rng.uniform(-50, 50):.2f}"},
+        }})
+
+    network = GeckoTerminalAPI.NETWORK
+    fixtures[f"gecko/networks/{network}/new_pools"] = {"sequence": [
+        {"data": pools[start:start + NEW_POOLS_PAGE]}
+        for start in range(0, len(pools), NEW_POOLS_PAGE)
+    ] or [{"data": []}]}
+    fixtures[f"gecko/networks/{network}/trending_pools"] = {"data": pools[:10]}
+    return fixtures
+
+
+class ProviderStub:
+    """aiohttp app replaying fixtures with injected latency and failures"""
+
+    def __init__(self, fixtures: Optional[Dict[str, Any]] = None, config: Optional[StubConfig] = None):
+        self.fixtures = fixtures or {}
+        self.config = config or StubConfig()
+        self._rng = random.Random(self.config.seed)
+        self._cursors: Dict[str, int] = {}  # Position in each sequence fixture
+        self._runner: Optional[web.AppRunner] = None
+        self._upstream: Optional[ClientSession] = None
+        self.stats = {"served": 0, "errors": 0, "throttled": 0, "misses": 0, "recorded": 0}
+
+        self.app = web.Application()
+        self.app.router.add_get("/{provider}/{path:.*}", self._handle)
+
+    def _replay(self, key: str):
+        fixture = self.fixtures.get(key)
+        if isinstance(fixture, dict) and "sequence" in fixture:
+            sequence = fixture["sequence"]
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+            return sequence[position % len(sequence)]
+        return fixture
+
+    async def _record(self, provider: str, path: str, request: web.Request):
+        if self._upstream is None:
+            self._upstream = ClientSession()
+        headers = {}
+        if "Authorization" in request.headers:
+            headers["Authorization"] = request.headers["Authorization"]
+        url = f"{UPSTREAMS[provider]}/{path}"
+        async with self._upstream.get(url, params=request.query, headers=headers) as resp:
+            if resp.status != 200:
+                return None
+            body = await resp.json()
+
+        key = f"{provider}/{path}"
+        existing = self.fixtures.get(key)
+        if existing is None:
+            self.fixtures[key] = body
+        elif existing != body:
+            # Same path answered differently (e.g. new pools) - keep every version
+            sequence = existing["sequence"] if "sequence" in existing else [existing]
+            if body not in sequence:
+                sequence.append(body)
+            self.fixtures[key] = {"sequence": sequence}
+        self.stats["recorded"] += 1
+        return body
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        provider = request.match_info["provider"]
+        path = request.match_info["path"]
+        if provider not in PROVIDERS:
+            return web.json_response({"error": "unknown provider"}, status=404)
+
+        if self.config.latency_ms:
+            await asyncio.sleep(self.config.latency_ms / 1000 * self._rng.uniform(0.5, 1.5))
+
+        roll = self._rng.random()
+        if roll < self.config.rate_429:
+            self.stats["throttled"] += 1
+            return web.json_response(
+                {"error": "rate limit"}, status=429,
+                headers={"Retry-After": str(self.config.retry_after)}
+            )
+        if roll < self.config.rate_429 + self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+
+        key = f"{provider}/{path}"
+        body = self._replay(key)
+        if body is None and self.config.record:
+            body = await self._record(provider, path, request)
+        if body is None:
+            self.stats["misses"] += 1
+            return web.json_response({"error": f"no fixture for {key}"}, status=404)
+
+        self.stats["served"] += 1
+        return web.json_response(body)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL (port 0 picks a free port)"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._upstream is not None:
+            await self._upstream.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.fixtures, indent=1))
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Fault-injection flags shared with bench_crawler.py"""
+    parser.add_argument("--fixtures", type=Path, help="Fixture JSON file")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate fixtures for N tokens")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def build_stub(args) -> ProviderStub:
+    if args.synthetic:
+        fixtures = synthetic_fixtures(args.synthetic, seed=args.seed)
+    elif args.fixtures and args.fixtures.exists():
+        fixtures = json.loads(args.fixtures.read_text())
+    else:
+        fixtures = {}
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        seed=args.seed,
+        record=getattr(args, "record", False),
+    )
+    return ProviderStub(fixtures, config)
+
+
+async def serve(args) -> None:
+    stub = build_stub(args)
+    base_url = await stub.start(port=args.port)
+    print(f"🧪 Provider stub on {base_url} ({len(stub.fixtures)} fixtures"
+          f"{', recording' if stub.config.record else ''})")
+    for name in PROVIDERS:
+        print(f"   {name.upper()}_BASE_URL={base_url}/{name}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if stub.config.record and args.fixtures:
+            stub.save(args.fixtures)
+            print(f"💾 Saved {len(stub.fixtures)} fixtures to {args.fixtures}")
+        print(f"📊 {stub.stats}")
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_stub_arguments(parser)
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--record", action="store_true", help="Proxy misses upstream and save them")
+    args = parser.parse_args()
+    if args.record and not args.fixtures:
+        parser.error("--record needs --fixtures")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
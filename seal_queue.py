@@ -0,0 +1,372 @@
+"""
+Seal Job Workers
+================
+Drains the durable `seal_jobs` table (database.SealJobRepository).
+
+Every seal (bot uploads, Stars/TON payments, the API) is enqueued, so
+handlers answer in milliseconds and a restart loses nothing: a job a dead
+worker held goes back to pending after STALE_AFTER seconds.
+
+All seals are sent from one service wallet, and a wallet accepts one
+transfer per seqno. Parallel single-seal sends would collide, so each
+worker instead:
+
+1. claims up to SEAL_BATCH jobs
+2. prepares them concurrently (download the file / fetch the contract,
+   hash, build the comment)
+3. sends them all as the messages of one wallet transfer
+
+Throughput therefore scales with batch size, and more workers overlap
+preparation with sending. Failed jobs retry with backoff. After
+max_attempts they are marked failed and the user (or callback URL) is told.
+A transfer that raised chain.TransferPending may still land, so its jobs
+are never resent: they complete with their label as the tx hash and
+confirmer.py backfills the real one if it lands.
+
+Usage:
+    pool = SealWorkerPool(prepare=prepare_seal, send=send_ton_batch, finish=finish_seal)
+    asyncio.create_task(pool.run(db))
+
+    job = await pool.enqueue(db, user_id, "api", {"kind": "contract", ...})
+    job = await pool.wait(db, job.id, timeout=30)  # Optional: block until done
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from aiohttp.resolver import ThreadedResolver
+
+from chain import TransferPending
+from job_queue import JobWorkers
+
+SEAL_WORKERS = int(os.getenv("SEAL_WORKERS", "2"))
+SEAL_BATCH = int(os.getenv("SEAL_BATCH", "50"))  # Messages per wallet transfer (V5R1 allows 255)
+MAX_ATTEMPTS = 5
+RETRY_BASE = 10  # seconds before the first retry, doubled per attempt
+RETRY_MAX = 300
+STALE_AFTER = 300  # Running jobs older than this are assumed orphaned
+POLL_INTERVAL = 2
+WAIT_POLL = 1  # seconds between status reads while an API caller waits
+RETENTION_DAYS = 30  # Finished jobs kept this long (the notarization row stays)
+CALLBACK_TIMEOUT = 10
+CALLBACK_ATTEMPTS = 3
+
+
+class PermanentSealError(Exception):
+    """A seal that will never succeed (e.g. no such contract) - don't retry"""
+
+
+def check_callback_url(url: str) -> None:
+    """Raise ValueError unless url is https:// to a host that isn't an internal address"""
+    parsed = urlparse(url) if isinstance(url, str) else None
+    if parsed is None or parsed.scheme != "https" or not parsed.hostname:
+        raise ValueError("callback_url must be an https:// URL")
+    host = parsed.hostname.rstrip(".").lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError("callback_url must not point at a private or loopback host")
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return  # A name: checked again when it is resolved (see PublicResolver)
+    if not address.is_global:
+        raise ValueError("callback_url must not point at a private or loopback host")
+
+
+class PublicResolver(ThreadedResolver):
+    """DNS resolver that drops private, loopback and link-local answers"""
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET):
+        hosts = await super().resolve(host, port, family)
+        public = [entry for entry in hosts if ipaddress.ip_address(entry["host"]).is_global]
+        if not public:
+            raise OSError(f"{host} does not resolve to a public address")
+        return public
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_MAX, RETRY_BASE * 2 ** max(0, attempts - 1))
+
+
+def render(template: str, **values) -> str:
+    """Fill {name} placeholders without str.format (templates hold user text)"""
+    for name, value in values.items():
+        template = template.replace("{" + name + "}", str(value))
+    return template
+
+
+@dataclass
+class PreparedSeal:
+    """A claimed job, ready to go on chain"""
+    job: Any
+    contract_hash: str
+    comment: str
+    amount_ton: float
+
+
+@dataclass
+class SealMetrics:
+    claimed: int = 0
+    sealed: int = 0
+    retried: int = 0
+    failed: int = 0
+    transfers: int = 0  # Wallet transfers sent (each carries a batch)
+    unconfirmed_transfers: int = 0  # Broadcast but not seen landing (TransferPending)
+    released: int = 0
+    callbacks_ok: int = 0
+    callbacks_failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, Any]:
+        minutes = max(time.monotonic() - self.started, 1e-6) / 60
+        return {
+            "claimed": self.claimed,
+            "sealed": self.sealed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "transfers": self.transfers,
+            "unconfirmed_transfers": self.unconfirmed_transfers,
+            "seals_per_transfer": round(self.sealed / self.transfers, 2) if self.transfers else 0.0,
+            "seals_per_min": round(self.sealed / minutes, 2),
+            "released": self.released,
+            "callbacks_ok": self.callbacks_ok,
+            "callbacks_failed": self.callbacks_failed,
+        }
+
+
+def job_status(job, base_url: str = "") -> Dict[str, Any]:
+    """Public view of a job (status endpoint and callbacks)"""
+    body = {
+        "job_id": job.id,
+        "status": job.status,
+        "hash": job.contract_hash,
+        "tx_hash": job.tx_hash,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == "done" and job.contract_hash:
+        body["verify_url"] = f"{base_url}/api/v1/verify/{job.contract_hash}"
+    if job.status == "failed":
+        body["error"] = job.last_error
+    return body
+
+
+class SealWorkerPool(JobWorkers):
+    """
+    N async workers claiming seal jobs in batches.
+
+    `prepare(job)` returns (contract_hash, comment, amount_ton) and may
+    raise PermanentSealError. `send(seals)` puts every PreparedSeal on
+    chain in one wallet transfer and returns its hash (or None).
+    `finish(job)` runs once a job is done or failed to tell the user; the
+    notarization and payment effects are already recorded by
+    `db.seal_jobs.complete`, so a failing hook loses nothing durable.
+    """
+
+    label = "seal"
+    poll_interval = POLL_INTERVAL
+    stale_after = STALE_AFTER
+    retention_days = RETENTION_DAYS
+
+    def __init__(
+        self,
+        prepare: Callable[[Any], Awaitable[Tuple[str, str, float]]],
+        send: Callable[[List[PreparedSeal]], Awaitable[Optional[str]]],
+        finish: Callable[[Any], Awaitable[None]],
+        workers: int = SEAL_WORKERS,
+        batch_size: int = SEAL_BATCH,
+        base_url: str = ""
+    ):
+        super().__init__()
+        self.prepare = prepare
+        self.send = send
+        self.finish = finish
+        self.workers = workers
+        self.batch_size = batch_size
+        self.base_url = base_url
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.metrics = SealMetrics()
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+
+    def queue(self, db):
+        return db.seal_jobs
+
+    def steps(self, db) -> Dict[str, Callable[[], Awaitable[int]]]:
+        return {
+            f"worker {n}": partial(self.run_batch, db, f"{self.worker_prefix}:{n}")
+            for n in range(self.workers)
+        }
+
+    def on_released(self, count: int) -> None:
+        super().on_released(count)
+        self.metrics.released += count
+
+    # ========================
+    # Producers
+    # ========================
+
+    async def enqueue(
+        self,
+        db,
+        user_id: int,
+        source: str,
+        payload: Dict[str, Any],
+        contract_hash: Optional[str] = None,
+        callback_url: Optional[str] = None
+    ):
+        """Queue a seal and wake an idle worker"""
+        job = await db.seal_jobs.enqueue(
+            user_id, source, payload,
+            contract_hash=contract_hash, callback_url=callback_url, max_attempts=MAX_ATTEMPTS
+        )
+        self.wake()
+        return job
+
+    async def wait(self, db, job_id: int, timeout: float):
+        """
+        The finished job, or None if it isn't done within `timeout` seconds.
+
+        Polls the table every WAIT_POLL seconds, since another instance's
+        workers may be the ones sealing it; a local worker wakes us sooner.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        future = loop.create_future()
+        self._waiters.setdefault(job_id, []).append(future)
+        try:
+            while True:
+                job = await db.seal_jobs.get(job_id)
+                if job is not None and job.status in ("done", "failed"):
+                    return job
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), min(WAIT_POLL, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            waiters = self._waiters.get(job_id, [])
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+
+    # ========================
+    # Workers
+    # ========================
+
+    async def run_batch(self, db, worker_id: str) -> int:
+        """Claim, prepare and send one batch. Returns the number of jobs claimed."""
+        jobs = await db.seal_jobs.claim(worker_id, limit=self.batch_size)
+        if not jobs:
+            return 0
+        self.metrics.claimed += len(jobs)
+
+        results = await asyncio.gather(*(self.prepare(job) for job in jobs), return_exceptions=True)
+        prepared: List[PreparedSeal] = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                await self._fail(db, job, str(result), permanent=isinstance(result, PermanentSealError))
+            else:
+                contract_hash, comment, amount_ton = result
+                job.contract_hash = contract_hash
+                prepared.append(PreparedSeal(job, contract_hash, comment, amount_ton))
+        if not prepared:
+            return len(jobs)
+
+        try:
+            tx_hash = await self.send(prepared)
+        except TransferPending as e:
+            # Resending could seal (and pay) twice; the confirmer sees it if it lands
+            tx_hash = None
+            self.metrics.unconfirmed_transfers += 1
+            print(f"⏳ Seal transfer for {len(prepared)} job(s) not confirmed yet, not resending: {e}")
+        except Exception as e:
+            for seal in prepared:
+                await self._fail(db, seal.job, str(e) or type(e).__name__)
+            return len(jobs)
+
+        self.metrics.transfers += 1
+        for seal in prepared:
+            job = seal.job
+            # Records the notarization, charge and lottery entry atomically with 'done'
+            if not await db.seal_jobs.complete(job.id, seal.contract_hash, tx_hash):
+                print(f"⚠️ Seal job {job.id} was already completed elsewhere")
+                continue
+            job.status, job.tx_hash = "done", tx_hash
+            self.metrics.sealed += 1
+            await self._settle(db, job)
+        print(f"🔏 Sealed {len(prepared)} job(s) in one transfer ({worker_id})")
+        return len(jobs)
+
+    async def _fail(self, db, job, error: str, permanent: bool = False) -> None:
+        if permanent or job.attempts >= job.max_attempts:
+            await db.seal_jobs.fail(job.id, error, retry_in=None, contract_hash=job.contract_hash)
+            job.status, job.last_error = "failed", error
+            self.metrics.failed += 1
+            print(f"💀 Seal job {job.id} failed after {job.attempts} attempt(s): {error}")
+            await self._settle(db, job)
+        else:
+            await db.seal_jobs.fail(job.id, error, retry_in=retry_delay(job.attempts),
+                                    contract_hash=job.contract_hash)
+            self.metrics.retried += 1
+            print(f"⚠️ Seal job {job.id} attempt {job.attempts}/{job.max_attempts} failed: {error}")
+
+    async def _settle(self, db, job) -> None:
+        """A job reached done/failed: run the app hook, callback, wake waiters"""
+        try:
+            await self.finish(job)
+        except Exception as e:
+            print(f"⚠️ Seal job {job.id} finish hook failed: {e}")
+        if job.callback_url:
+            asyncio.create_task(self.deliver_callback(db, job))
+        for future in self._waiters.pop(job.id, []):
+            if not future.done():
+                future.set_result(job)
+
+    async def deliver_callback(self, db, job) -> None:
+        """POST the job status to its callback URL, with a few retries"""
+        body = job_status(job, self.base_url)
+        status = 0
+        try:
+            check_callback_url(job.callback_url)
+        except ValueError as e:
+            print(f"⚠️ Seal callback for job {job.id} refused: {e}")
+            attempts = 0
+        else:
+            attempts = CALLBACK_ATTEMPTS
+        for attempt in range(attempts):
+            try:
+                async with aiohttp.ClientSession(
+                    timeout=aiohttp.ClientTimeout(total=CALLBACK_TIMEOUT),
+                    connector=aiohttp.TCPConnector(resolver=PublicResolver())
+                ) as session:
+                    async with session.post(job.callback_url, json=body, allow_redirects=False) as resp:
+                        status = resp.status
+                if status < 500:
+                    break
+            except Exception as e:
+                print(f"⚠️ Seal callback for job {job.id} failed: {e}")
+            await asyncio.sleep(2 ** attempt)
+        if 200 <= status < 300:
+            self.metrics.callbacks_ok += 1
+        else:
+            self.metrics.callbacks_failed += 1
+        try:
+            await db.seal_jobs.set_callback_status(job.id, status)
+        except Exception:
+            pass
+
+    async def run(self, db) -> None:
+        """Run the workers until stop()"""
+        print(f"🔏 {self.workers} seal workers started ({self.worker_prefix})")
+        await super().run(db)
@@ -2,112 +2,23 @@
 Social Media Auto-Poster for MemeSeal
 =====================================
 Posts to X (Twitter) and Telegram channel on every seal.
-Rate-limited to avoid bans.
+
+Posts are queued on the notification bus (notify_bus), which delivers
+them per channel at safe rates and merges bursts into digests.
 """
 
-import os
-import asyncio
-import time
-from datetime import datetime, timedelta
-from typing import Optional
-from dataclasses import dataclass
-import tweepy
-from aiogram import Bot
-
-# Rate limiting config
-TWITTER_MIN_INTERVAL = 60  # Minimum 60 seconds between tweets
-TELEGRAM_MIN_INTERVAL = 10  # Minimum 10 seconds between TG posts
-MAX_POSTS_PER_HOUR = 30  # Max posts to either platform per hour
-
-@dataclass
-class RateLimiter:
-    """Simple rate limiter to avoid API bans"""
-    last_twitter_post: float = 0
-    last_telegram_post: float = 0
-    hourly_posts: int = 0
-    hour_start: float = 0
-
-    def can_post_twitter(self) -> bool:
-        now = time.time()
-        self._reset_hourly_if_needed(now)
-        if self.hourly_posts >= MAX_POSTS_PER_HOUR:
-            return False
-        return (now - self.last_twitter_post) >= TWITTER_MIN_INTERVAL
-
-    def can_post_telegram(self) -> bool:
-        now = time.time()
-        self._reset_hourly_if_needed(now)
-        if self.hourly_posts >= MAX_POSTS_PER_HOUR:
-            return False
-        return (now - self.last_telegram_post) >= TELEGRAM_MIN_INTERVAL
-
-    def record_twitter_post(self):
-        self.last_twitter_post = time.time()
-        self.hourly_posts += 1
-
-    def record_telegram_post(self):
-        self.last_telegram_post = time.time()
-        self.hourly_posts += 1
-
-    def _reset_hourly_if_needed(self, now: float):
-        if now - self.hour_start > 3600:
-            self.hourly_posts = 0
-            self.hour_start = now
-
-
-# Global rate limiter
-rate_limiter = RateLimiter()
+from notify_bus import notification_bus
 
 
 class SocialPoster:
     """
-    Handles posting to X (Twitter) and Telegram channel.
-    Thread-safe and rate-limited.
+    Builds seal and lottery posts for X (Twitter) and the Telegram channel.
+    Delivery and rate limiting are done by the notification bus.
     """
 
-    def __init__(self):
-        self.twitter_client: Optional[tweepy.Client] = None
-        self.telegram_bot: Optional[Bot] = None
-        self.telegram_channel: Optional[str] = None
-        self._initialized = False
-
     def initialize(self):
-        """Initialize API clients from environment variables"""
-        if self._initialized:
-            return
-
-        # Twitter/X API v2 setup
-        twitter_api_key = os.getenv("TWITTER_API_KEY")
-        twitter_api_secret = os.getenv("TWITTER_API_SECRET")
-        twitter_access_token = os.getenv("TWITTER_ACCESS_TOKEN")
-        twitter_access_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
-
-        if all([twitter_api_key, twitter_api_secret, twitter_access_token, twitter_access_secret]):
-            try:
-                self.twitter_client = tweepy.Client(
-                    consumer_key=twitter_api_key,
-                    consumer_secret=twitter_api_secret,
-                    access_token=twitter_access_token,
-                    access_token_secret=twitter_access_secret
-                )
-                print("✅ Twitter/X client initialized")
-            except Exception as e:
-                print(f"⚠️ Twitter init failed: {e}")
-        else:
-            print("⚠️ Twitter credentials not set, skipping X posting")
-
-        # Telegram channel setup
-        telegram_token = os.getenv("MEMESEAL_BOT_TOKEN")
-        self.telegram_channel = os.getenv("TELEGRAM_CHANNEL_ID", "@MemeSealTON")
-
-        if telegram_token:
-            try:
-                self.telegram_bot = Bot(token=telegram_token)
-                print(f"✅ Telegram bot initialized for channel {self.telegram_channel}")
-            except Exception as e:
-                print(f"⚠️ Telegram init failed: {e}")
-
-        self._initialized = True
+        """Set up the bus's channels from environment variables"""
+        notification_bus.initialize()
 
     async def post_seal_announcement(
         self,
@@ -119,11 +30,8 @@ class SocialPoster:
     ):
         """
         Post seal announcement to all platforms.
-        Rate-limited to avoid bans.
+        Seals close together go out as one digest post.
         """
-        if not self._initialized:
-            self.initialize()
-
         # Build the message
         verify_url = f"https://notaryton.com/api/v1/verify/{file_hash}"
         short_hash = file_hash[:12]
@@ -146,66 +54,16 @@ class SocialPoster:
             f"#TON #MemeSeal #Crypto #Web3"
         )
 
-        # Post to Twitter (with rate limiting)
-        asyncio.create_task(self._post_to_twitter(twitter_message))
-
-        # Post to Telegram channel (with rate limiting)
-        asyncio.create_task(self._post_to_telegram(message, verify_url))
-
-    async def _post_to_twitter(self, message: str):
-        """Post to Twitter/X with rate limiting"""
-        if not self.twitter_client:
-            return
-
-        if not rate_limiter.can_post_twitter():
-            print("⏳ Twitter rate limited, skipping")
-            return
-
-        try:
-            response = self.twitter_client.create_tweet(text=message)
-            rate_limiter.record_twitter_post()
-            print(f"✅ Posted to X: {response.data['id']}")
-        except tweepy.TooManyRequests:
-            print("⚠️ Twitter rate limit hit (API side)")
-        except tweepy.Forbidden as e:
-            print(f"⚠️ Twitter forbidden (check permissions): {e}")
-        except Exception as e:
-            print(f"❌ Twitter post failed: {e}")
-
-    async def _post_to_telegram(self, message: str, verify_url: str):
-        """Post to Telegram channel with rate limiting"""
-        if not self.telegram_bot or not self.telegram_channel:
-            return
-
-        if not rate_limiter.can_post_telegram():
-            print("⏳ Telegram rate limited, skipping")
-            return
-
-        try:
-            # Send with inline button
-            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔍 Verify Seal", url=verify_url)],
-                [InlineKeyboardButton(text="🐸 Start Sealing", url="https://t.me/MemeSealTON_bot")]
-            ])
-
-            await self.telegram_bot.send_message(
-                chat_id=self.telegram_channel,
-                text=message,
-                parse_mode="HTML",
-                reply_markup=keyboard
-            )
-            rate_limiter.record_telegram_post()
-            print(f"✅ Posted to Telegram channel {self.telegram_channel}")
-        except Exception as e:
-            print(f"❌ Telegram post failed: {e}")
+        await notification_bus.publish(
+            "seal",
+            x_text=twitter_message,
+            telegram_text=message,
+            buttons=[["🔍 Verify Seal", verify_url], ["🐸 Start Sealing", "https://t.me/MemeSealTON_bot"]],
+            data={"hash": file_hash, "pot_stars": pot_stars, "pot_ton": pot_ton, "next_draw": next_draw},
+        )
 
     async def post_lottery_winner(self, winner_id: int, prize_amount: float, prize_stars: int):
         """Announce lottery winner"""
-        if not self._initialized:
-            self.initialize()
-
         message = (
             f"🎉🐸 LOTTERY WINNER! 🐸🎉\n\n"
             f"Someone just won the pot!\n"
@@ -223,8 +81,12 @@ class SocialPoster:
             f"#TON #MemeSeal #Lottery #Winner"
         )
 
-        asyncio.create_task(self._post_to_twitter(twitter_msg))
-        asyncio.create_task(self._post_to_telegram(message, "https://t.me/MemeSealTON_bot"))
+        await notification_bus.publish(
+            "lottery",
+            x_text=twitter_msg,
+            telegram_text=message,
+            buttons=[["🐸 Start Sealing", "https://t.me/MemeSealTON_bot"]],
+        )
 
 
 # Global singleton
@@ -248,43 +110,9 @@ class TokenPoster:
     - Whale movements (optional)
     """
 
-    def __init__(self):
-        self.twitter_client: Optional[tweepy.Client] = None
-        self.telegram_bot: Optional[Bot] = None
-        self.telegram_channel: Optional[str] = None
-        self._initialized = False
-
     def initialize(self):
-        """Initialize from environment (shares creds with SocialPoster)"""
-        if self._initialized:
-            return
-
-        twitter_api_key = os.getenv("TWITTER_API_KEY")
-        twitter_api_secret = os.getenv("TWITTER_API_SECRET")
-        twitter_access_token = os.getenv("TWITTER_ACCESS_TOKEN")
-        twitter_access_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
-
-        if all([twitter_api_key, twitter_api_secret, twitter_access_token, twitter_access_secret]):
-            try:
-                self.twitter_client = tweepy.Client(
-                    consumer_key=twitter_api_key,
-                    consumer_secret=twitter_api_secret,
-                    access_token=twitter_access_token,
-                    access_token_secret=twitter_access_secret
-                )
-            except Exception as e:
-                print(f"⚠️ TokenPoster Twitter init failed: {e}")
-
-        telegram_token = os.getenv("MEMESEAL_BOT_TOKEN")
-        self.telegram_channel = os.getenv("TELEGRAM_CHANNEL_ID", "@MemeSealTON")
-
-        if telegram_token:
-            try:
-                self.telegram_bot = Bot(token=telegram_token)
-            except Exception as e:
-                print(f"⚠️ TokenPoster Telegram init failed: {e}")
-
-        self._initialized = True
+        """Set up the bus's channels (shares creds with SocialPoster)"""
+        notification_bus.initialize()
 
     async def post_rug_detected(
         self,
@@ -298,9 +126,6 @@ class TokenPoster:
         """
         🚨 RUG DETECTED - Always post, high priority
         """
-        if not self._initialized:
-            self.initialize()
-
         short_addr = address[:8] + "..." + address[-4:] if len(address) > 16 else address
         score_url = f"https://notaryton.com/score/{address}"
 
@@ -329,9 +154,14 @@ class TokenPoster:
             f"#TON #RugPull #CryptoScam #MemeScan"
         )
 
-        # Post immediately (rugs are high priority)
-        await self._post_twitter(twitter_msg)
-        await self._post_telegram(telegram_msg, score_url)
+        # Rugs jump the queue and are never merged into a digest
+        await notification_bus.publish(
+            "rug",
+            x_text=twitter_msg,
+            telegram_text=telegram_msg,
+            buttons=[["🔍 View Analysis", score_url], ["🐸 MemeScan Bot", "https://t.me/MemeSealTON_bot"]],
+            data={"symbol": symbol, "address": address, "detection_method": detection_method},
+        )
 
     async def post_danger_score(
         self,
@@ -344,9 +174,6 @@ class TokenPoster:
         """
         ⚠️ LOW SAFETY SCORE WARNING - Post for scores < 40
         """
-        if not self._initialized:
-            self.initialize()
-
         if safety_score >= 40:
             return  # Only post danger warnings
 
@@ -371,8 +198,13 @@ class TokenPoster:
             f"#TON #CryptoRisk #DYOR"
         )
 
-        await self._post_twitter(twitter_msg)
-        await self._post_telegram(telegram_msg, score_url)
+        await notification_bus.publish(
+            "danger",
+            x_text=twitter_msg,
+            telegram_text=telegram_msg,
+            buttons=[["🔍 View Analysis", score_url], ["🐸 MemeScan Bot", "https://t.me/MemeSealTON_bot"]],
+            data={"symbol": symbol, "address": address, "safety_score": safety_score},
+        )
 
     async def post_whale_alert(
         self,
@@ -385,9 +217,6 @@ class TokenPoster:
         """
         🐋 WHALE MOVEMENT - Post for significant moves (>10%)
         """
-        if not self._initialized:
-            self.initialize()
-
         if pct < 10:
             return  # Only post big moves
 
@@ -416,56 +245,13 @@ class TokenPoster:
             f"#TON #WhaleAlert"
         )
 
-        await self._post_twitter(twitter_msg)
-        await self._post_telegram(telegram_msg, score_url)
-
-    async def _post_twitter(self, message: str):
-        """Post to Twitter with rate limiting"""
-        if not self.twitter_client:
-            return
-
-        if not rate_limiter.can_post_twitter():
-            print("⏳ Token Twitter rate limited, skipping")
-            return
-
-        try:
-            response = self.twitter_client.create_tweet(text=message)
-            rate_limiter.record_twitter_post()
-            print(f"✅ Token alert posted to X: {response.data['id']}")
-        except tweepy.TooManyRequests:
-            print("⚠️ Twitter rate limit (API)")
-        except tweepy.Forbidden as e:
-            print(f"⚠️ Twitter forbidden: {e}")
-        except Exception as e:
-            print(f"❌ Twitter post failed: {e}")
-
-    async def _post_telegram(self, message: str, url: str):
-        """Post to Telegram channel"""
-        if not self.telegram_bot or not self.telegram_channel:
-            return
-
-        if not rate_limiter.can_post_telegram():
-            print("⏳ Token Telegram rate limited, skipping")
-            return
-
-        try:
-            from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔍 View Analysis", url=url)],
-                [InlineKeyboardButton(text="🐸 MemeScan Bot", url="https://t.me/MemeSealTON_bot")]
-            ])
-
-            await self.telegram_bot.send_message(
-                chat_id=self.telegram_channel,
-                text=message,
-                parse_mode="HTML",
-                reply_markup=keyboard
-            )
-            rate_limiter.record_telegram_post()
-            print(f"✅ Token alert posted to Telegram")
-        except Exception as e:
-            print(f"❌ Telegram post failed: {e}")
+        await notification_bus.publish(
+            "whale",
+            x_text=twitter_msg,
+            telegram_text=telegram_msg,
+            buttons=[["🔍 View Analysis", score_url], ["🐸 MemeScan Bot", "https://t.me/MemeSealTON_bot"]],
+            data={"symbol": symbol, "address": address, "event_type": event_type, "pct": pct},
+        )
 
 
 # Global token poster singleton
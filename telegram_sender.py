@@ -0,0 +1,306 @@
+"""
+Telegram Send Engine
+====================
+One queue for every bot-initiated Telegram message (payment confirmations,
+lottery DMs, group notices, channel posts), so bursts never trip flood
+limits and handlers never wait on a slow send.
+
+- Per bot: token bucket at Telegram's ~30 messages/second
+- Per chat: one message a second to a user, one every 3 seconds to a
+  group or channel (20/minute)
+- retry_after (flood wait) pauses that chat and the bot's bucket (chats
+  are already paced within their limits, so a 429 means the bot as a
+  whole is over), and the message is re-queued, not dropped
+- Priority classes: payment confirmations go before service notices,
+  and service notices before marketing
+- Fallback bots: a user who never started MemeSeal is reached via
+  NotaryTON (the old "try both bots" loops)
+
+Usage:
+    from telegram_sender import telegram_sender, Priority
+
+    # Fire and forget (returns a future)
+    telegram_sender.submit(user_id, "✅ Paid!", bots=[memeseal_bot, bot], priority=Priority.PAYMENT)
+
+    # Wait for the Message (raises if every bot failed)
+    msg = await telegram_sender.send(user_id, "⏳ Sealing...", bots=[memeseal_bot, bot])
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional, Dict, Any, List, Tuple
+
+from memescan.ratelimit import TokenBucket
+
+GLOBAL_PER_SECOND = float(os.getenv("TELEGRAM_SEND_RATE", "30"))  # Per bot
+PRIVATE_CHAT_INTERVAL = 1.0  # seconds between messages to one user
+GROUP_CHAT_INTERVAL = 3.0  # 20 per minute to one group/channel
+MAX_IN_FLIGHT = 16  # Concurrent send_message calls
+MAX_FLOOD_RETRIES = 3  # retry_after waits per message before giving up
+CHAT_PACING_MAX = 10000  # Pacing entries kept before expired ones are pruned
+DRAIN_TIMEOUT = 10  # seconds stop() keeps sending what is queued
+
+
+class Priority(IntEnum):
+    """Lower is sent first"""
+    PAYMENT = 0  # Payment confirmations, payouts, lottery wins
+    SERVICE = 1  # Seal progress, referral and group notices
+    MARKETING = 2  # Channel posts, announcements
+
+
+@dataclass
+class OutgoingMessage:
+    chat_id: Any  # int user/group id, or "@channel"
+    text: str
+    bots: List[Any]  # aiogram Bots to try in order
+    priority: int = Priority.SERVICE
+    kwargs: Dict[str, Any] = field(default_factory=dict)  # parse_mode, reply_markup, ...
+    future: Optional[asyncio.Future] = None
+    bot_index: int = 0
+    flood_waits: int = 0
+    queued_at: float = field(default_factory=time.monotonic)
+    error: Optional[Exception] = None
+
+    @property
+    def bot(self):
+        return self.bots[self.bot_index]
+
+
+def chat_interval(chat_id) -> float:
+    """Minimum seconds between messages to one chat"""
+    if isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0):
+        return GROUP_CHAT_INTERVAL  # @channel or negative group id
+    return PRIVATE_CHAT_INTERVAL
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds Telegram asked us to wait, if this is a flood-wait error"""
+    retry_after = getattr(error, "retry_after", None)
+    return float(retry_after) if retry_after is not None else None
+
+
+@dataclass
+class SenderMetrics:
+    sent: int = 0
+    failed: int = 0
+    fallbacks: int = 0  # Delivered by a later bot in the list
+    flood_waits: int = 0
+    deferred: int = 0  # Held back by per-chat pacing or the bot's bucket
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "fallbacks": self.fallbacks,
+            "flood_waits": self.flood_waits,
+            "deferred": self.deferred,
+        }
+
+
+class TelegramSender:
+    """Priority queue in front of Bot.send_message"""
+
+    def __init__(self, rate: float = GLOBAL_PER_SECOND, max_in_flight: int = MAX_IN_FLIGHT):
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.metrics = SenderMetrics()
+        self._ready: List[Tuple[int, int, OutgoingMessage]] = []  # (priority, seq, msg)
+        self._delayed: List[Tuple[float, int, OutgoingMessage]] = []  # (due monotonic, seq, msg)
+        self._seq = itertools.count()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._chat_next: Dict[Tuple[str, Any], float] = defaultdict(float)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+    # ========================
+    # Public API
+    # ========================
+
+    def submit(
+        self,
+        chat_id,
+        text: str,
+        bots: List[Any],
+        priority: int = Priority.SERVICE,
+        **kwargs
+    ) -> asyncio.Future:
+        """
+        Queue a message; returns a future for the sent Message.
+
+        `bots` are tried in order (None entries are skipped). The future
+        fails if every bot failed. Nobody has to await it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        future.add_done_callback(_consume)
+        bots = [b for b in bots if b is not None]
+        if not bots:
+            future.set_exception(RuntimeError("no bot to send with"))
+            return future
+
+        self._push_ready(OutgoingMessage(
+            chat_id=chat_id, text=text, bots=bots, priority=priority,
+            kwargs=kwargs, future=future
+        ))
+        self._ensure_running()
+        return future
+
+    async def send(self, chat_id, text: str, bots: List[Any], priority: int = Priority.SERVICE, **kwargs):
+        """Queue a message and wait until it is sent"""
+        return await self.submit(chat_id, text, bots, priority, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._ready) + len(self._delayed),
+            "in_flight": len(self._in_flight),
+            **self.metrics.as_dict(),
+        }
+
+    async def stop(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """Send what is queued (highest priority first) for up to `timeout` seconds, then stop"""
+        if self._task is not None:
+            deadline = time.monotonic() + timeout
+            while (self._ready or self._delayed or self._in_flight) and not self._task.done():
+                if time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(0.05)
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        left = [msg for _, _, msg in self._ready + self._delayed]
+        self._ready, self._delayed = [], []
+        if left:
+            print(f"⚠️ Telegram sender stopped with {len(left)} message(s) unsent "
+                  f"({sum(1 for msg in left if msg.priority == Priority.PAYMENT)} payment)")
+        for msg in left:
+            if not msg.future.done():
+                msg.future.set_exception(RuntimeError("sender stopped before the message was sent"))
+
+    # ========================
+    # Dispatch
+    # ========================
+
+    def _push_ready(self, msg: OutgoingMessage) -> None:
+        heapq.heappush(self._ready, (msg.priority, next(self._seq), msg))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _defer(self, msg: OutgoingMessage, due: float) -> None:
+        heapq.heappush(self._delayed, (due, next(self._seq), msg))
+
+    def _bucket(self, bot) -> TokenBucket:
+        # Keyed by token: two Bot objects for one token share a limit
+        key = getattr(bot, "token", None) or str(id(bot))
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(rate=self.rate, burst=self.rate)
+        return self._buckets[key]
+
+    def _chat_key(self, msg: OutgoingMessage) -> Tuple[str, Any]:
+        return (getattr(msg.bot, "token", None) or str(id(msg.bot)), msg.chat_id)
+
+    def _ensure_running(self) -> None:
+        # (Re)start on first use, and after a restart on a new event loop
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, msg = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (msg.priority, next(self._seq), msg))
+
+            if not self._ready:
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, msg = heapq.heappop(self._ready)
+
+            # Pacing: hold the message back instead of blocking the queue
+            chat_due = self._chat_next[self._chat_key(msg)]
+            bucket = self._bucket(msg.bot)
+            if chat_due > now or bucket.available < 1:
+                wait = max(chat_due - now, (1 - bucket.available) / bucket.rate)
+                self.metrics.deferred += 1
+                self._defer(msg, now + wait)
+                continue
+
+            await bucket.acquire()
+            if len(self._chat_next) > CHAT_PACING_MAX:
+                self._chat_next = defaultdict(float, {
+                    key: due for key, due in self._chat_next.items() if due > now
+                })
+            self._chat_next[self._chat_key(msg)] = now + chat_interval(msg.chat_id)
+            await self._slots.acquire()
+            task = asyncio.create_task(self._deliver(msg))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(self, msg: OutgoingMessage) -> None:
+        try:
+            result = await msg.bot.send_message(msg.chat_id, msg.text, **msg.kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._handle_error(msg, e)
+        else:
+            self.metrics.sent += 1
+            if msg.bot_index:
+                self.metrics.fallbacks += 1
+            if not msg.future.done():
+                msg.future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _handle_error(self, msg: OutgoingMessage, error: Exception) -> None:
+        retry_after = _retry_after(error)
+        if retry_after is not None and msg.flood_waits < MAX_FLOOD_RETRIES:
+            # Flood wait: pause this chat and the whole bot, then try again
+            msg.flood_waits += 1
+            self.metrics.flood_waits += 1
+            due = time.monotonic() + retry_after
+            self._chat_next[self._chat_key(msg)] = due
+            self._bucket(msg.bot).penalize(retry_after)
+            self._defer(msg, due)
+            self._wakeup.set()
+            print(f"⏳ Telegram flood wait {retry_after:.0f}s for chat {msg.chat_id}")
+            return
+
+        msg.error = error
+        if msg.bot_index + 1 < len(msg.bots):
+            # e.g. user blocked or never started this bot - try the next one
+            msg.bot_index += 1
+            self._push_ready(msg)
+            return
+
+        self.metrics.failed += 1
+        print(f"⚠️ Telegram send to {msg.chat_id} failed: {error}")
+        if not msg.future.done():
+            msg.future.set_exception(error)
+
+
+def _consume(future: asyncio.Future) -> None:
+    """Mark a fire-and-forget failure as seen (already logged)"""
+    if not future.cancelled():
+        future.exception()
+
+
+# Global sender
+telegram_sender = TelegramSender()
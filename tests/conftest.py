@@ -1,16 +1,22 @@
 """
 Pytest fixtures and configuration for NotaryTON tests.
 
-This file provides shared test fixtures used across all test files.
+This file provides shared test fixtures used across all test files, and
+the in-memory repository fakes (FakeDB, FakeJobQueue, FakeNotarizations)
+that tests import from tests.conftest.
 """
 
 import pytest
 import asyncio
 import os
 import tempfile
+import time
 import aiosqlite
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from utils.hashing import hash_to_bytes
+
 
 # ========================
 # Database Fixtures
@@ -123,6 +129,148 @@ def temp_file():
         pass
 
 
+# ========================
+# In-memory Repository Fakes
+# ========================
+
+class FakeDB:
+    """
+    Stand-in for database.db carrying only the repositories a test uses:
+
+        db = FakeDB(crawl_jobs=FakeJobQueue(CrawlJob))
+    """
+
+    def __init__(self, **repositories):
+        self.__dict__.update(repositories)
+
+
+class FakeJobQueue:
+    """
+    In-memory database.JobQueueRepository: `rows` (id -> model) with the
+    same claim / complete / fail semantics. Pass the statuses and due
+    column a queue overrides; `order` is the claim sort key.
+    """
+
+    def __init__(self, model, order=None, due="next_run_at", running="running",
+                 done="done", failed="failed"):
+        self.model = model
+        self.order = order or (lambda job: (getattr(job, due), job.id))
+        self.due, self.running, self.done, self.failed = due, running, done, failed
+        self.rows = {}
+
+    def add(self, **fields):
+        now = datetime.now()
+        fields.setdefault(self.due, now)
+        fields.setdefault("created_at", now)
+        job = self.model(id=len(self.rows) + 1, **fields)
+        self.rows[job.id] = job
+        return job
+
+    def make_due(self):
+        for job in self.rows.values():
+            setattr(job, self.due, datetime.now())
+
+    def due_jobs(self):
+        return sorted(
+            (j for j in self.rows.values()
+             if j.status == "pending" and getattr(j, self.due) <= datetime.now()),
+            key=self.order
+        )
+
+    def _claim(self, jobs, worker_id=None):
+        for job in jobs:
+            job.status = self.running
+            job.attempts += 1
+            if worker_id is not None:
+                job.locked_by = worker_id
+        return sorted(jobs, key=lambda job: job.id)
+
+    def _complete(self, ids, **fields):
+        for job_id in ids:
+            job = self.rows[job_id]
+            job.status, job.last_error = self.done, None
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def _fail(self, ids, error, retry_in, **fields):
+        for job_id in ids:
+            job = self.rows[job_id]
+            job.last_error = error
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if retry_in is None:
+                job.status = self.failed
+            else:
+                job.status = "pending"
+                setattr(job, self.due, datetime.now() + timedelta(seconds=retry_in))
+
+    async def get(self, job_id):
+        return self.rows.get(job_id)
+
+    async def claim(self, worker_id, limit=1):
+        return self._claim(self.due_jobs()[:limit], worker_id)
+
+    async def complete(self, job_id):
+        self._complete([job_id])
+
+    async def fail(self, job_id, error, retry_in):
+        self._fail([job_id], error, retry_in)
+
+    async def release_stale(self, older_than_seconds):
+        return 0
+
+    async def purge(self, older_than_days):
+        return 0
+
+
+class FakeNotarizations:
+    """In-memory NotarizationRepository over a list of Notarization rows"""
+
+    def __init__(self, rows=None):
+        self.rows = rows if rows is not None else []  # Shared with the test
+        self.queries = 0  # Point lookups (get_by_hash / get_by_hashes)
+        self.batches = []  # confirm_batch calls
+
+    def add(self, notarization):
+        self.rows.append(notarization)
+        return notarization
+
+    def _by_hash(self):
+        return {n.contract_hash: n for n in self.rows}
+
+    async def count(self):
+        return len(self.rows)
+
+    async def iter_hash_bins(self):
+        for n in self.rows:
+            yield hash_to_bytes(n.contract_hash)
+
+    async def get_hash_bins_since(self, since, overlap_seconds=300):
+        start = (since or datetime.now()) - timedelta(seconds=overlap_seconds)
+        return [(hash_to_bytes(n.contract_hash), n.timestamp) for n in self.rows
+                if n.timestamp is not None and n.timestamp > start]
+
+    async def get_by_hash(self, contract_hash):
+        self.queries += 1
+        return self._by_hash().get(contract_hash)
+
+    async def get_by_hashes(self, contract_hashes):
+        self.queries += 1
+        rows = self._by_hash()
+        return {hash_to_bytes(h): rows[h] for h in contract_hashes if h in rows}
+
+    async def get_unconfirmed(self, lookback_hours=48, limit=10000):
+        return [n for n in self.rows if n.confirmed_at is None]
+
+    async def confirm_batch(self, confirmations):
+        self.batches.append(confirmations)
+        by_id = {n.id: n for n in self.rows}
+        for row_id, _, tx_hash, lt in confirmations:
+            n = by_id[row_id]
+            n.source, n.tx_hash, n.tx_lt, n.confirmed_at = n.tx_hash, tx_hash, lt, time.time()
+        return len(confirmations)
+
+
 # ========================
 # Mock Environment Variables
 # ========================
@@ -0,0 +1,58 @@
+"""
+Unit tests for the TON address codec.
+"""
+
+import pytest
+
+from utils.address import (
+    parse_address, address_key, to_raw, to_friendly, same_address, is_valid_address
+)
+
+
+BOUNCEABLE = "EQB4XClemsAbLvlDjobh-VjUn7oEy9CITWPoG9WkTO2qRx_m"
+NON_BOUNCEABLE = "UQB4XClemsAbLvlDjobh-VjUn7oEy9CITWPoG9WkTO2qR0Ij"
+RAW = "0:785c295e9ac01b2ef9438e86e1f958d49fba04cbd0884d63e81bd5a44cedaa47"
+MASTERCHAIN = "Ef-8DxboHIl9wqClB9BWOYn5M0umlyFMiONJRIVhjaYv9T2y"
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_all_forms_share_one_key():
+    """Test that bounceable, non-bounceable and raw forms map to the same key."""
+    key = address_key(BOUNCEABLE)
+
+    assert len(key) == 33
+    assert address_key(NON_BOUNCEABLE) == key
+    assert address_key(RAW) == key
+    assert same_address(BOUNCEABLE, RAW)
+
+
+@pytest.mark.unit
+def test_round_trip_conversion():
+    """Test raw <-> user-friendly conversion."""
+    assert to_raw(BOUNCEABLE) == RAW
+    assert to_friendly(RAW) == BOUNCEABLE
+    assert to_friendly(RAW, bounceable=False) == NON_BOUNCEABLE
+
+
+@pytest.mark.unit
+def test_masterchain_workchain():
+    """Test that workchain -1 is encoded as a signed byte."""
+    workchain, _ = parse_address(MASTERCHAIN)
+
+    assert workchain == -1
+    assert address_key(MASTERCHAIN)[0] == 0xFF
+    assert to_raw(MASTERCHAIN).startswith("-1:")
+
+
+@pytest.mark.unit
+def test_invalid_addresses_rejected():
+    """Test that bad checksums and malformed input are rejected."""
+    assert not is_valid_address(BOUNCEABLE[:-1] + "n")  # CRC mismatch
+    assert not is_valid_address("0:abc")
+    assert not is_valid_address("")
+    assert address_key("not-an-address") is None
+    assert not same_address("not-an-address", "not-an-address")
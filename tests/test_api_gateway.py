@@ -0,0 +1,158 @@
+"""
+Unit tests for the API gateway (key cache, sliding-window limits, usage flush).
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+import api_gateway as gateway_module
+from api_gateway import ApiGateway, ApiAuthError, SlidingWindow, new_api_key
+from database import ApiKey
+from tests.conftest import FakeDB
+
+
+class _ApiKeys:
+    def __init__(self):
+        self.keys = {}
+        self.lookups = 0
+        self.batches = []
+        self.fail_next = False
+
+    async def get(self, key):
+        self.lookups += 1
+        return self.keys.get(key)
+
+    async def record_usage_batch(self, usage):
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("db down")
+        self.batches.append(usage)
+
+
+class _Users:
+    def __init__(self):
+        self.expiry = {}
+        self.lookups = 0
+
+    async def get_subscription_expiry(self, user_id):
+        self.lookups += 1
+        return self.expiry.get(user_id)
+
+
+@pytest.fixture
+def fake_db():
+    db = FakeDB(api_keys=_ApiKeys(), users=_Users())
+    db.api_keys.keys["nt_good"] = ApiKey(key="nt_good", user_id=7)
+    db.users.expiry[7] = datetime.now() + timedelta(days=10)
+    return db
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_keys_and_subscriptions_are_cached(fake_db):
+    """Test repeated calls resolve without touching the database."""
+    gateway = ApiGateway(daily_limit=100)
+    for _ in range(20):
+        principal = await gateway.authorize(fake_db, "nt_good")
+    assert principal.user_id == 7
+    assert fake_db.api_keys.lookups == 1
+    assert fake_db.users.lookups == 1
+
+    with pytest.raises(ApiAuthError) as err:
+        await gateway.authorize(fake_db, "nt_bogus")
+    assert err.value.status_code == 401
+    with pytest.raises(ApiAuthError):
+        await gateway.authorize(fake_db, "nt_bogus")
+    assert fake_db.api_keys.lookups == 2  # Unknown key cached as well
+
+
+@pytest.mark.unit
+async def test_subscription_required_and_invalidated(fake_db):
+    """Test expired subscriptions are rejected until the cache is invalidated."""
+    fake_db.users.expiry[7] = datetime.now() - timedelta(days=1)
+    gateway = ApiGateway()
+    with pytest.raises(ApiAuthError) as err:
+        await gateway.authorize(fake_db, "nt_good")
+    assert err.value.extra["subscribe_url"]
+
+    fake_db.users.expiry[7] = datetime.now() + timedelta(days=30)
+    gateway.invalidate_user(7)
+    assert (await gateway.authorize(fake_db, "nt_good")).user_id == 7
+
+
+@pytest.mark.unit
+async def test_daily_limit_is_enforced_with_retry_after(fake_db):
+    """Test a key over its daily limit gets 429 and a Retry-After."""
+    gateway = ApiGateway(daily_limit=10)
+    await gateway.authorize(fake_db, "nt_good", cost=8)
+    await gateway.authorize(fake_db, "nt_good", cost=2)
+    with pytest.raises(ApiAuthError) as err:
+        await gateway.authorize(fake_db, "nt_good")
+    assert err.value.status_code == 429
+    response = err.value.response()
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+@pytest.mark.unit
+def test_sliding_window_weights_previous_window():
+    """Test the previous window's count fades out as the window slides."""
+    window = SlidingWindow(100, now=0)
+    assert window.try_add(10, limit=10, now=50)[0]
+    # Half of the previous window still overlaps at t=150
+    assert window.count(150) == pytest.approx(5)
+    allowed, wait = window.try_add(6, limit=10, now=150)
+    assert not allowed and 1 <= wait <= 12
+    assert window.try_add(6, limit=10, now=162)[0]
+    assert window.count(400) == 0
+
+
+@pytest.mark.unit
+async def test_usage_is_flushed_in_batches(fake_db, monkeypatch):
+    """Test usage is buffered, written once per flush and kept on failure."""
+    monkeypatch.setattr(gateway_module, "LEGACY_USER_KEYS", True)
+    fake_db.users.expiry[42] = datetime.now() + timedelta(days=1)
+    gateway = ApiGateway()
+    for _ in range(5):
+        await gateway.authorize(fake_db, "nt_good")
+    await gateway.authorize(fake_db, "42")  # Legacy: limited, not persisted
+
+    fake_db.api_keys.fail_next = True
+    with pytest.raises(ConnectionError):
+        await gateway.flush(fake_db)
+    await gateway.authorize(fake_db, "nt_good", cost=2)
+
+    assert await gateway.flush(fake_db) == 1
+    assert await gateway.flush(fake_db) == 0
+    [batch] = fake_db.api_keys.batches
+    assert list(batch) == ["nt_good"]
+    assert batch["nt_good"][0] == 7
+
+
+@pytest.mark.unit
+def test_new_keys_fit_the_column():
+    """Test generated keys are unique and fit api_keys.key."""
+    keys = {new_api_key() for _ in range(100)}
+    assert len(keys) == 100
+    assert all(k.startswith("nt_") and len(k) <= 64 for k in keys)
+
+
+@pytest.mark.unit
+async def test_user_id_keys_are_off_by_default_and_never_read_data(fake_db, monkeypatch):
+    """Test bare user ids are refused by default, and by data endpoints even when enabled."""
+    fake_db.users.expiry[42] = datetime.now() + timedelta(days=1)
+    assert gateway_module.LEGACY_USER_KEYS is False
+    with pytest.raises(ApiAuthError) as rejected:
+        await ApiGateway().authorize(fake_db, "42")
+    assert rejected.value.status_code == 401
+
+    monkeypatch.setattr(gateway_module, "LEGACY_USER_KEYS", True)
+    gateway = ApiGateway()
+    assert (await gateway.authorize(fake_db, "42")).legacy
+    with pytest.raises(ApiAuthError) as rejected:
+        await gateway.authorize(fake_db, "42", require_subscription=False, allow_legacy=False)
+    assert rejected.value.status_code == 401
+    assert (await gateway.authorize(fake_db, "nt_good", allow_legacy=False)).user_id == 7
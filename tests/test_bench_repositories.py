@@ -0,0 +1,134 @@
+"""
+Unit tests for the repository benchmark (scripts/bench_repositories.py).
+"""
+
+import json
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+import pytest
+
+from database import LotteryRepository
+from scripts.bench_repositories import (
+    HOLDERS_PER_SNAPSHOT, PinnedPool, dataset_sizes, diff_reports, kol_rows, lottery_rows,
+    plan_summary, snapshot_rows
+)
+from utils.address import address_key
+
+NOW = datetime(2026, 1, 1)
+
+EXPLAIN = [{
+    "Plan": {
+        "Node Type": "Limit", "Actual Rows": 20,
+        "Plans": [{
+            "Node Type": "Sort", "Actual Rows": 20,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "kols", "Actual Rows": 900},
+                {"Node Type": "Index Scan", "Relation Name": "kol_calls", "Actual Rows": 5},
+            ],
+        }],
+    },
+    "Planning Time": 0.1234,
+    "Execution Time": 12.3456,
+}]
+
+
+class FakeConnection:
+    """Answers pick_winner's statements"""
+
+    async def fetchrow(self, query, *args):
+        return {"user_id": 42}
+
+    async def execute(self, query, *args):
+        return "UPDATE 1"
+
+
+def _method(p50=10.0, p99=20.0, seq_scans=()):
+    return {"p50_ms": p50, "p99_ms": p99, "queries": [{"seq_scans": list(seq_scans)}]}
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_snapshot_generator_shape_and_volume():
+    """Test snapshots come 20 per token per moment, ranked by share, with wallet keys."""
+    sizes = dataset_sizes(0.01)
+    assert sizes["tokens"] == 100 and sizes["snapshots_per_token"] == 10
+    assert dataset_sizes(1)["tokens"] * 10 * HOLDERS_PER_SNAPSHOT >= 2_000_000
+
+    rows = list(snapshot_rows(sizes, seed=0, now=NOW))
+    hot = sizes["hot_snapshots"] * HOLDERS_PER_SNAPSHOT
+    assert len(rows) == hot + (sizes["tokens"] - 1) * sizes["snapshots_per_token"] * HOLDERS_PER_SNAPSHOT
+
+    first = rows[:HOLDERS_PER_SNAPSHOT]
+    assert [row[4] for row in first] == list(range(1, HOLDERS_PER_SNAPSHOT + 1))
+    assert [row[3] for row in first] == sorted((row[3] for row in first), reverse=True)
+    assert len({row[1] for row in first}) == HOLDERS_PER_SNAPSHOT
+    assert 40 <= float(sum(row[3] for row in first)) <= 90.01
+    assert all(row[6] == address_key(row[1]) for row in first)
+
+
+@pytest.mark.unit
+def test_generators_are_seeded_and_whales_recur():
+    """Test the same seed gives the same rows and some wallets top many tokens."""
+    sizes = dataset_sizes(0.01)
+    assert list(islice(snapshot_rows(sizes, 5, NOW), 200)) == list(islice(snapshot_rows(sizes, 5, NOW), 200))
+    assert list(islice(snapshot_rows(sizes, 5, NOW), 200)) != list(islice(snapshot_rows(sizes, 6, NOW), 200))
+
+    top_tokens = {}
+    for token, wallet, _, _, rank, _, _ in snapshot_rows(sizes, 0, NOW):
+        if rank <= 5:
+            top_tokens.setdefault(wallet, set()).add(token)
+    assert max(len(tokens) for tokens in top_tokens.values()) >= 3  # get_whales has answers
+
+
+@pytest.mark.unit
+def test_lottery_and_kol_generators():
+    """Test past draws have one winner each, the open draw is undrawn, KOLs carry JSONB lists."""
+    sizes = dataset_sizes(0.01)
+    entries = list(lottery_rows(sizes, 0, NOW))
+    assert len(entries) == sizes["lottery_entries"]
+    assert sum(1 for entry in entries if entry[3] is None) == sizes["open_entries"]
+    winners = Counter(entry[3] for entry in entries if entry[4])
+    assert set(winners.values()) == {1}
+    assert all(not entry[4] for entry in entries if entry[3] is None)
+
+    kols = list(kol_rows(sizes, 0))
+    assert len({kol[1] for kol in kols}) == sizes["kols"]  # x_handle is UNIQUE
+    assert all(isinstance(kol[2], list) and kol[2] for kol in kols)
+    assert all(kol[6] < 2 ** 31 for kol in kols)  # avg_views is INTEGER
+
+
+@pytest.mark.unit
+async def test_pinned_pool_records_repository_queries():
+    """Test a real repository runs on the pinned connection and every statement is recorded."""
+    pool = PinnedPool(FakeConnection())
+    assert await LotteryRepository(pool).pick_winner(7) == 42
+
+    assert len(pool.queries) == 3
+    assert "ORDER BY RANDOM()" in pool.queries[0][0] and pool.queries[0][1] == ()
+    assert pool.queries[1][1] == (7,)
+    assert pool.queries[2][1] == (42, 7)
+
+
+@pytest.mark.unit
+def test_plan_summary_and_regression_diff():
+    """Test plans condense to timings and seq scans, and slowdowns / new scans / failures are flagged."""
+    summary = plan_summary(json.dumps(EXPLAIN))
+    assert summary == {"root": "Limit", "rows": 20, "planning_ms": 0.123,
+                       "execution_ms": 12.346, "seq_scans": ["kols"]}
+
+    baseline = {"methods": {"kols.get_leaderboard": _method(), "wallets.get_whales": _method(0.2, 0.4)}}
+    assert diff_reports(baseline, {"methods": {"kols.get_leaderboard": _method(11, 24),
+                                               "wallets.get_whales": _method(0.9, 1.2)}}, 0.25) == []
+
+    current = {"methods": {"kols.get_leaderboard": _method(10, 40, seq_scans=["kols"]),
+                           "wallets.get_whales": {"error": "timeout"}}}
+    assert diff_reports(baseline, current, 0.25) == [
+        "kols.get_leaderboard: p99_ms 20.0 -> 40",
+        "kols.get_leaderboard: now seq-scans kols",
+        "wallets.get_whales: failed (timeout)",
+    ]
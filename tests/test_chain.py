@@ -0,0 +1,170 @@
+"""
+Unit tests for the chain backends (in-memory FakeChain).
+"""
+
+import asyncio
+import pytest
+
+from pytoniq.liteclient.client import RunGetMethodError
+
+from chain import FakeChain, Transfer, TransferPending, create_backend, PytoniqBackend
+from confirmer import seal_transaction
+
+HASH_A = "a1" * 32
+
+
+async def _outcomes(chain, calls):
+    results = []
+    for _ in range(calls):
+        try:
+            await chain.get_account_state("EQ")
+            results.append("ok")
+        except ConnectionError:
+            results.append("fail")
+    return results
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_transfer_lands_as_wallet_and_destination_transactions():
+    """Test a multi-message transfer is one wallet tx the confirmer can read."""
+    chain = FakeChain(seed=7)
+    wallet = await chain.wallet_address()
+    user = "EQ" + "B" * 46
+
+    tx_hash = await chain.send_transfer([
+        Transfer(wallet, 0.005, "MemeSeal:" + HASH_A[:16]),
+        Transfer(user, 1.5, "NotaryTON Payout"),
+    ])
+    txs = await chain.get_transactions(wallet, limit=10)
+
+    sent = next(tx for tx in txs if tx.tx_hash == tx_hash)
+    assert seal_transaction(sent).prefixes == [HASH_A[:16]]
+    assert [tx.lt for tx in txs] == sorted((tx.lt for tx in txs), reverse=True)
+    assert (await chain.get_transactions(user, limit=1))[0].in_value == 1_500_000_000
+    assert await chain.run_get_method(wallet, "seqno") == [1]
+
+
+@pytest.mark.unit
+async def test_same_seed_gives_the_same_failures_and_hashes():
+    """Test failure injection and tx hashes are reproducible per seed."""
+    first, second = FakeChain(seed=3, failure_rate=0.3), FakeChain(seed=3, failure_rate=0.3)
+    outcomes = await _outcomes(first, 40)
+    assert outcomes == await _outcomes(second, 40)
+    assert 0 < outcomes.count("fail") < 40
+    assert first.get_stats()["fake"]["failures_injected"] == outcomes.count("fail")
+
+    assert first.deposit("EQ", 1).tx_hash == second.deposit("EQ", 1).tx_hash
+    assert FakeChain(seed=4).deposit("EQ", 1).tx_hash != FakeChain(seed=3).deposit("EQ", 1).tx_hash
+
+
+@pytest.mark.unit
+async def test_scripted_failures_and_payments():
+    """Test fail_next breaks exactly the next calls and deposits show up as payments."""
+    chain = FakeChain()
+    wallet = await chain.wallet_address()
+    chain.deposit(wallet, 0.3, comment="123456")
+
+    chain.fail_next(2)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await chain.get_transactions(wallet, limit=10)
+    (payment,) = await chain.get_transactions(wallet, limit=10)
+    assert (payment.in_value, payment.in_comment) == (300_000_000, "123456")
+    assert (await chain.get_transactions(wallet, limit=10, to_lt=payment.lt)) == []
+
+
+@pytest.mark.unit
+async def test_transfers_in_one_block_land_together():
+    """Test concurrent transfers wait for block boundaries, one per seqno."""
+    chain = FakeChain(block_time=0.05)
+    wallet = await chain.wallet_address()
+    await asyncio.gather(*(chain.send_transfer([Transfer(wallet, 0.001, str(i))]) for i in range(3)))
+    assert chain.seqno == 3
+    assert chain.height == 3  # The wallet lock puts each transfer in its own block
+
+
+@pytest.mark.unit
+async def test_contracts_get_methods_and_dns():
+    """Test deployed code, get-method answers and DNS lookups."""
+    chain = FakeChain()
+    chain.set_contract("EQc", b"code", {"get_jetton_data": [1000], "echo": lambda stack: stack})
+    chain.dns["notary.ton"] = "EQc"
+
+    assert (await chain.get_account_state("EQc")).code == b"code"
+    assert (await chain.get_account_state("EQnone")).status == "uninitialized"
+    assert await chain.run_get_method("EQc", "echo", [5]) == [5]
+    with pytest.raises(RunGetMethodError):
+        await chain.run_get_method("EQnone", "seqno")
+    assert await chain.resolve_dns("Notary.TON ") == "EQc"
+    assert isinstance(create_backend("pytoniq", "word " * 24), PytoniqBackend)
+    assert create_backend("fake", None, wallet="EQw").wallet == "EQw"
+
+
+class _StuckWallet:
+    """A V5R1 wallet whose seqno only moves when told to"""
+
+    def __init__(self):
+        self.seqno = 5
+        self.private_key = b"k"
+        self.wallet_id = 1
+        self.land = False
+        self.sent = []
+        self.provider = "routed"
+        self.providers = []  # Provider each transfer was sent through
+
+    async def get_seqno(self):
+        return self.seqno
+
+    def create_wallet_internal_message(self, destination, value, body):
+        return (destination, value, body)
+
+    def raw_create_transfer_msg(self, private_key, seqno, wallet_id, messages, valid_until):
+        return (seqno, valid_until, messages)
+
+    async def send_external(self, body):
+        self.sent.append(body)
+        self.providers.append(self.provider)
+        self.seqno += self.land
+
+
+class _PinningRouter:
+    """Hands out one pinned provider per transfer"""
+
+    def __init__(self):
+        self.pins = 0
+
+    async def pin(self):
+        self.pins += 1
+        return f"pinned-{self.pins}"
+
+    def provider(self):
+        return "routed"
+
+
+@pytest.mark.unit
+async def test_pytoniq_transfer_that_does_not_land_is_pending_not_resent():
+    """Test a broadcast that doesn't land raises TransferPending and its seqno isn't reused."""
+    backend = PytoniqBackend("word " * 24, router=_PinningRouter())
+    wallet = backend._wallet = _StuckWallet()
+    waits = []
+
+    async def wait_for_seqno(wallet, seqno, seconds):
+        waits.append(seqno)
+        if len(waits) == 2:
+            wallet.seqno, wallet.land = 6, True  # The pending transfer lands while we wait
+        return wallet.seqno > seqno
+
+    backend._wait_for_seqno = wait_for_seqno
+    with pytest.raises(TransferPending) as pending:
+        await backend.send_transfer([Transfer("0:" + "ab" * 32, 1.0, "payout")])
+    assert pending.value.seqno == 5 and wallet.sent[0][0] == 5
+
+    # The next transfer waits out the pending one instead of signing with seqno 5 again
+    await backend.send_transfer([Transfer("0:" + "ab" * 32, 1.0, "next")])
+    assert waits == [5, 5, 6]
+    assert [body[0] for body in wallet.sent] == [5, 6]
+    assert wallet.providers == ["pinned-1", "pinned-2"] and wallet.provider == "routed"
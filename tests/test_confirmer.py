@@ -0,0 +1,151 @@
+"""
+Unit tests for the seal confirmation tracker (wallet scan -> real tx hashes).
+"""
+
+import time
+import pytest
+from types import SimpleNamespace
+
+from pytoniq_core import begin_cell
+
+from chain import pytoniq_transaction
+from confirmer import SealConfirmer, ChainTx, match_seals, parse_seal_comment, seal_transaction
+from database import Notarization
+from tests.conftest import FakeDB, FakeNotarizations
+from verify_cache import verify_cache
+
+HASH_A = "a1" * 32
+HASH_B = "b2" * 32
+HASH_C = "c3" * 32
+
+
+def _db(rows):
+    return FakeDB(notarizations=FakeNotarizations(rows))
+
+
+def _tx(lt, *prefixes, tx_hash=None):
+    return ChainTx(tx_hash=tx_hash or f"tx{lt}", lt=lt, utime=int(time.time()), prefixes=list(prefixes))
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_seal_comments_are_parsed():
+    """Test every comment format we send yields its hash prefix."""
+    assert parse_seal_comment("MemeSeal:" + HASH_A[:16]) == HASH_A[:16]
+    assert parse_seal_comment("MemeSeal:Screenshot:" + HASH_A[:12].upper()) == HASH_A[:12]
+    assert parse_seal_comment("NotaryTON:File:" + HASH_B[:16]) == HASH_B[:16]
+    assert parse_seal_comment("NotaryTON:My:Coin:" + HASH_C[:12]) == HASH_C[:12]
+    assert parse_seal_comment("MemeSeal:WalletDeploy") is None
+    assert parse_seal_comment("NotaryTON Payout") is None
+
+
+@pytest.mark.unit
+def test_outgoing_comments_are_read_from_a_transaction():
+    """Test seal_transaction reads text comments and skips other bodies."""
+    comment = begin_cell().store_uint(0, 32).store_snake_string("MemeSeal:" + HASH_A[:16]).end_cell()
+    jetton = begin_cell().store_uint(0x0f8a7ea5, 32).end_cell()
+    tx = SimpleNamespace(
+        lt=10, now=1700000000, cell=SimpleNamespace(hash=b"\x01" * 32), in_msg=None,
+        out_msgs=[SimpleNamespace(body=comment), SimpleNamespace(body=jetton), SimpleNamespace(body=None)]
+    )
+    chain_tx = seal_transaction(pytoniq_transaction(tx))
+    assert chain_tx.prefixes == [HASH_A[:16]]
+    assert chain_tx.tx_hash == "01" * 32 and chain_tx.lt == 10
+
+
+@pytest.mark.unit
+def test_one_batch_transfer_confirms_many_seals():
+    """Test a multi-seal transfer matches each comment; repeats go oldest first."""
+    pending = [
+        Notarization(id=1, contract_hash=HASH_A, tx_hash="memeseal_file"),
+        Notarization(id=2, contract_hash=HASH_B, tx_hash="screenshot"),
+        Notarization(id=3, contract_hash=HASH_A, tx_hash="memeseal_file"),
+    ]
+    transactions = [
+        _tx(20, HASH_A[:16]),
+        _tx(10, HASH_A[:16], HASH_B[:12], HASH_C[:16]),
+    ]
+    confirmations, leftover = match_seals(transactions, pending)
+
+    assert confirmations == [(1, HASH_A, "tx10", 10), (2, HASH_B, "tx10", 10), (3, HASH_A, "tx20", 20)]
+    assert [(tx.lt, tx.prefixes) for tx in leftover] == [(10, [HASH_C[:16]])]
+
+
+@pytest.mark.unit
+async def test_confirm_pass_writes_once_and_carries_early_comments():
+    """Test one scan is one batched write, and a comment seen early matches later."""
+    rows = [Notarization(id=1, contract_hash=HASH_A, tx_hash="api"),
+            Notarization(id=2, contract_hash=HASH_B, tx_hash="api")]
+    db = _db(rows)
+    verify_cache.put(rows[0])
+    chain = [_tx(5), _tx(7, HASH_A[:16], HASH_B[:16], HASH_C[:16])]
+    seen_lts = []
+
+    async def fetch(to_lt, limit):
+        seen_lts.append(to_lt)
+        return [tx for tx in chain if tx.lt > to_lt]
+
+    confirmer = SealConfirmer()
+    assert await confirmer.confirm_once(db, fetch) == 2
+    assert len(db.notarizations.batches) == 1
+    assert rows[0].tx_hash == "tx7" and rows[0].source == "api" and rows[0].tx_lt == 7
+    assert verify_cache.get(HASH_A) is None  # Stale copy dropped
+    assert confirmer.get_stats()["unmatched"] == 1
+
+    # HASH_C's notarization is written after its transaction was scanned
+    rows.append(Notarization(id=3, contract_hash=HASH_C, tx_hash="memeseal_file"))
+    assert await confirmer.confirm_once(db, fetch) == 1
+    assert rows[2].tx_hash == "tx7"
+    assert seen_lts == [0, 7]
+    assert confirmer.get_stats()["unmatched"] == 0
+
+
+@pytest.mark.unit
+async def test_scan_pages_back_to_the_last_lt(monkeypatch):
+    """Test a burst bigger than one fetch is read page by page down to last_lt."""
+    monkeypatch.setattr("confirmer.MAX_SCAN_TXS", 3)
+    hashes = [f"{i:02x}" * 32 for i in range(1, 11)]
+    rows = [Notarization(id=i, contract_hash=h) for i, h in enumerate(hashes)]
+    db = _db(rows[:2])
+    chain = [_tx(1, hashes[0][:16]), _tx(2, hashes[1][:16])]
+    starts = []
+
+    async def fetch(to_lt, limit, start=None):
+        starts.append(start.lt if start else None)
+        newest_first = [tx for tx in reversed(chain) if tx.lt > to_lt and (start is None or tx.lt <= start.lt)]
+        return newest_first[:limit]
+
+    confirmer = SealConfirmer()
+    assert await confirmer.confirm_once(db, fetch) == 2
+    assert confirmer.last_lt == 2
+
+    # 8 seals land between passes: more than two pages
+    db.notarizations.rows.extend(rows[2:])
+    chain += [_tx(lt, hashes[lt - 1][:16]) for lt in range(3, 11)]
+    starts.clear()
+    assert await confirmer.confirm_once(db, fetch) == 8
+    assert starts == [None, 8, 6, 4]
+    assert confirmer.last_lt == 10
+    assert all(n.tx_lt is not None for n in rows)
+
+
+@pytest.mark.unit
+async def test_failed_write_rescans_the_same_range():
+    """Test the scan cursor only advances after the batch is written."""
+    db = _db([Notarization(id=1, contract_hash=HASH_A)])
+
+    async def fail(confirmations):
+        raise ConnectionError("db down")
+
+    db.notarizations.confirm_batch = fail
+
+    async def fetch(to_lt, limit):
+        return [_tx(9, HASH_A[:16])] if to_lt < 9 else []
+
+    confirmer = SealConfirmer()
+    with pytest.raises(ConnectionError):
+        await confirmer.confirm_once(db, fetch)
+    assert confirmer.last_lt == 0
@@ -0,0 +1,95 @@
+"""
+Unit tests for the durable crawl job queue workers.
+"""
+
+import pytest
+from datetime import datetime
+
+from database import CrawlJob
+from crawl_queue import CrawlWorkerPool, backoff_delay, BACKOFF_BASE, BACKOFF_MAX
+from crawler import TokenCrawler
+from tests.conftest import FakeDB, FakeJobQueue
+
+
+def _db():
+    return FakeDB(crawl_jobs=FakeJobQueue(CrawlJob, order=lambda j: (-j.priority, j.next_run_at), failed="dead"))
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_backoff_grows_exponentially_and_caps():
+    """Test retry delays double per attempt up to the cap."""
+    assert backoff_delay(1, jitter=0) == BACKOFF_BASE
+    assert backoff_delay(3, jitter=0) == BACKOFF_BASE * 4
+    assert backoff_delay(50, jitter=0) == BACKOFF_MAX
+
+
+@pytest.mark.unit
+async def test_batch_claims_by_priority_and_acks_results():
+    """Test that successes complete and failures go back with backoff."""
+    db = _db()
+    db.crawl_jobs.add(address="EQlow", priority=5)
+    db.crawl_jobs.add(address="EQhigh", priority=10)
+    db.crawl_jobs.add(address="EQbad", priority=10)
+    seen = []
+
+    async def process(jobs):
+        seen.extend(job.address for job in jobs)
+        return {job.id: "timeout" for job in jobs if job.address == "EQbad"}
+
+    pool = CrawlWorkerPool(process=process, batch_size=2)
+    assert await pool.run_batch(db, "w:0") == 2
+
+    assert sorted(seen) == ["EQbad", "EQhigh"]
+    jobs = {job.address: job for job in db.crawl_jobs.rows.values()}
+    assert jobs["EQhigh"].status == "done"
+    assert jobs["EQbad"].status == "pending"
+    assert jobs["EQbad"].next_run_at > datetime.now()
+    assert pool.metrics.as_dict()["retried"] == 1
+
+
+@pytest.mark.unit
+async def test_job_dead_lettered_after_max_attempts():
+    """Test that a job failing every attempt ends up dead."""
+    db = _db()
+    job = db.crawl_jobs.add(address="EQbad")
+
+    async def process(jobs):
+        raise RuntimeError("provider down")
+
+    pool = CrawlWorkerPool(process=process, max_attempts=3)
+    for _ in range(3):
+        job.next_run_at = datetime.now()  # Skip the backoff wait
+        await pool.run_batch(db, "w:0")
+
+    assert job.status == "dead"
+    assert job.attempts == 3
+    assert job.last_error == "provider down"
+    assert pool.metrics.dead == 1
+
+
+@pytest.mark.unit
+async def test_crawler_reports_failed_jobs_by_id():
+    """Test that process_jobs maps stage failures back to job ids."""
+    crawler = TokenCrawler()
+    done = []
+
+    async def run_pipeline(items):
+        for item in items:
+            if item.address == "EQ2":
+                item.error = "fetch: boom"
+            done.append(item.symbol)
+
+    crawler._run_pipeline = run_pipeline
+    jobs = [
+        CrawlJob(id=1, address="EQ1", payload={"symbol": "ONE"}),
+        CrawlJob(id=2, address="EQ2", payload={"symbol": "TWO"}),
+        CrawlJob(id=3, address="EQ3", kind="mystery"),
+    ]
+    errors = await crawler.process_jobs(jobs)
+
+    assert done == ["ONE", "TWO"]
+    assert errors == {2: "fetch: boom", 3: "unknown job kind: mystery"}
@@ -0,0 +1,171 @@
+"""
+Unit tests for the crawler pipeline and provider rate limiting.
+"""
+
+import asyncio
+import time
+import pytest
+
+import crawler as crawler_module
+from crawler import TokenCrawler, CrawlItem, FETCH_CONCURRENCY
+from memescan.api import MemeScanClient
+from memescan.models import Token, SafetyLevel
+from memescan.ratelimit import TokenBucket
+from database import TrackedToken
+from tests.conftest import FakeDB
+
+
+class _PipelineCrawler(TokenCrawler):
+    """Crawler with I/O stages replaced by timed no-ops"""
+
+    def __init__(self, count: int):
+        super().__init__()
+        self.count = count
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.announced = []
+
+    async def _discover(self):
+        return [CrawlItem(f"EQ{i}", f"T{i}") for i in range(self.count)]
+
+    async def _fetch(self, item):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        item.analysis = Token(address=item.address, symbol=item.symbol, name=item.symbol,
+                              holder_count=5, safety_level=SafetyLevel.DANGER,
+                              dev_wallet_percent=60)
+
+    async def _persist(self, item):
+        item.announcements.append((self._record, {"address": item.address}))
+
+    async def _record(self, address):
+        self.announced.append(address)
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_pipeline_runs_every_item_through_all_stages():
+    """Test that items flow to announce with concurrent fetches."""
+    crawler = _PipelineCrawler(count=12)
+    await crawler._run_pipeline(await crawler._discover())
+
+    assert sorted(crawler.announced) == sorted(f"EQ{i}" for i in range(12))
+    assert crawler.max_in_flight == min(FETCH_CONCURRENCY, 12)
+    assert crawler.stage_counts["persist"] == 12
+
+
+@pytest.mark.unit
+async def test_pipeline_survives_stage_failure():
+    """Test that one failing item doesn't stall the rest."""
+    crawler = _PipelineCrawler(count=3)
+    original = crawler._fetch
+
+    async def flaky(item):
+        if item.address == "EQ1":
+            raise RuntimeError("boom")
+        await original(item)
+
+    crawler._fetch = flaky
+    items = await crawler._discover()
+    await crawler._run_pipeline(items)
+
+    assert sorted(crawler.announced) == ["EQ0", "EQ2"]
+    assert [item.error for item in items] == [None, "fetch: boom", None]
+
+
+@pytest.mark.unit
+async def test_failed_announcement_does_not_fail_the_item():
+    """Test a failed post is counted while the item (and its job) succeeds."""
+    crawler = _PipelineCrawler(count=2)
+
+    async def offline(address):
+        if address == "EQ0":
+            raise ConnectionError("X is down")
+        crawler.announced.append(address)
+
+    crawler._record = offline
+    items = await crawler._discover()
+    await crawler._run_pipeline(items)
+
+    assert crawler.announced == ["EQ1"]
+    assert [item.error for item in items] == [None, None]
+    assert crawler.announce_failures == 1
+
+
+@pytest.mark.unit
+async def test_token_bucket_paces_after_burst():
+    """Test that a bucket allows its burst, then refills at its rate."""
+    bucket = TokenBucket(rate=50, burst=2)
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+
+    assert time.monotonic() - started >= 0.035
+
+
+class _CountingTonAPI:
+    def __init__(self):
+        self.calls = []
+
+    async def get_jetton_holders(self, address, limit=100, offset=0):
+        self.calls.append("holders")
+        await asyncio.sleep(0)
+        return [{"balance": "600"}, {"balance": "400"}]
+
+    async def get_jetton_info(self, address):
+        self.calls.append("jetton_info")
+        return {"total_supply": "1000", "metadata": {"symbol": "FROG", "name": "Frog"}}
+
+
+@pytest.mark.unit
+async def test_fetch_context_fetches_each_resource_once():
+    """Test that analysis, snapshot and whale-diff reads share one fetch per resource."""
+    client = MemeScanClient()
+    client.tonapi = _CountingTonAPI()
+    ctx = client.fetch_context("EQfrog")
+
+    analysis = await client.analyze_token_safety("EQfrog", ctx=ctx)
+    holders = await ctx.holders(limit=20)
+    info = await ctx.jetton_info()
+
+    assert analysis.symbol == "FROG" and analysis.dev_wallet_percent == 60
+    assert len(holders) == 2 and info["total_supply"] == "1000"
+    assert sorted(client.tonapi.calls) == ["holders", "jetton_info"]
+
+
+class _EmptyHoldersTonAPI(_CountingTonAPI):
+    async def get_jetton_holders(self, address, limit=100, offset=0):
+        return []
+
+
+class _RecheckTokens:
+    def __init__(self, token):
+        self.token = token
+        self.updates = []
+        self.rugged = []
+
+    async def get(self, address):
+        return self.token
+
+    async def update_current_state(self, address, holders, top_holder_pct):
+        self.updates.append((address, holders, top_holder_pct))
+
+    async def mark_rugged(self, address):
+        self.rugged.append(address)
+
+
+@pytest.mark.unit
+async def test_empty_holder_scan_is_not_a_dev_exit(monkeypatch):
+    """Test that a scan with no holders fails the re-check instead of reading 0% as a dev exit."""
+    tokens = _RecheckTokens(TrackedToken(address="EQfrog", symbol="FROG", initial_top_holder_pct=60))
+    monkeypatch.setattr(crawler_module, "db", FakeDB(tokens=tokens))
+    crawler = TokenCrawler()
+    crawler.client.tonapi = _EmptyHoldersTonAPI()
+
+    assert await crawler.recheck_token("EQfrog") is None
+    assert tokens.rugged == [] and tokens.updates == []
@@ -0,0 +1,41 @@
+"""
+Unit tests for keyset pagination cursors.
+"""
+
+import pytest
+from datetime import datetime
+
+from database import Notarization
+from utils.cursor import encode_cursor, decode_cursor, next_cursor
+
+
+TS = datetime(2025, 12, 23, 10, 30, 0, 123456)
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_cursor_roundtrip():
+    """Test that int ids and address keys survive encoding."""
+    assert decode_cursor(encode_cursor(TS, 42)) == (TS, 42)
+    assert decode_cursor(encode_cursor(TS, "EQB4XClemsAbLvlDjobh")) == (TS, "EQB4XClemsAbLvlDjobh")
+
+
+@pytest.mark.unit
+def test_cursor_rejects_garbage():
+    """Test that malformed cursors decode to None instead of raising."""
+    assert decode_cursor("") is None
+    assert decode_cursor("not a cursor!") is None
+    assert decode_cursor(encode_cursor(TS, 1)[:-4]) is None
+
+
+@pytest.mark.unit
+def test_next_cursor_only_on_full_pages():
+    """Test that a short page ends pagination and a full page points past its last row."""
+    rows = [Notarization(id=i, timestamp=TS) for i in (3, 2)]
+
+    assert next_cursor(rows, 3, "timestamp", "id") is None
+    assert decode_cursor(next_cursor(rows, 2, "timestamp", "id")) == (TS, 2)
+    assert decode_cursor(next_cursor([{"called_at": TS, "id": 9}], 1, "called_at", "id")) == (TS, 9)
@@ -0,0 +1,131 @@
+"""
+Unit tests for streaming bulk export encoders.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+
+import data_export
+from data_export import stream_export, ExportStats
+from database import EXPORT_DATASETS
+from tests.conftest import FakeDB
+
+
+ROWS = [
+    {"id": i, "token_address": "EQtoken", "event_type": "whale_exit",
+     "event_data": {"pct_sold": 12.5, "wallet": "EQwhale"},
+     "created_at": datetime(2025, 12, 1, 10, i)}
+    for i in range(5)
+]
+
+
+class _Tokens:
+    async def iter_export(self, dataset, since=None, batch_size=2000):
+        rows = [r for r in ROWS if since is None or r["created_at"] >= since]
+        for start in range(0, len(rows), 2):
+            yield rows[start:start + 2]
+
+
+async def _collect(fmt, since=None):
+    stats = ExportStats(dataset="events", fmt=fmt, since=since)
+    data = b"".join([chunk async for chunk in stream_export(FakeDB(tokens=_Tokens()), "events", fmt, since, stats)])
+    return data, stats
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_ndjson_export_and_stats():
+    """Test one JSON object per row, with rows/bytes counted and the next watermark set."""
+    data, stats = await _collect("ndjson")
+    lines = data.decode().splitlines()
+
+    assert len(lines) == 5
+    assert json.loads(lines[0])["event_data"] == {"pct_sold": 12.5, "wallet": "EQwhale"}
+    assert stats.rows == 5 and stats.bytes == len(data)
+    assert stats.as_dict()["next_since"] == "2025-12-01T10:04:00"
+    assert stats.as_dict()["complete"]
+
+
+@pytest.mark.unit
+async def test_csv_export_with_since():
+    """Test a header row plus only rows at or after the watermark."""
+    data, stats = await _collect("csv", since=datetime(2025, 12, 1, 10, 3))
+    rows = list(csv.reader(io.StringIO(data.decode())))
+
+    assert rows[0] == ["id", "token_address", "event_type", "event_data", "created_at"]
+    assert [r[0] for r in rows[1:]] == ["3", "4"]
+    assert json.loads(rows[1][3])["wallet"] == "EQwhale"
+
+
+@pytest.mark.unit
+async def test_parquet_export():
+    """Test that the streamed Parquet file reads back intact (needs pyarrow)."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    data, _ = await _collect("parquet")
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 5
+    assert table.column("id").to_pylist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.unit
+async def test_parquet_types_come_from_the_columns_not_the_first_batch():
+    """Test that a column NULL throughout the first batch keeps its declared type."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    rugged_at = datetime(2025, 12, 2)
+
+    class _NullFirst(_Tokens):
+        async def iter_export(self, dataset, since=None, batch_size=2000):
+            yield [{"address": "EQa", "rugged_at": None, "current_holder_count": None}]
+            yield [{"address": "EQb", "rugged_at": rugged_at, "current_holder_count": 3}]
+
+    data = b"".join([chunk async for chunk in data_export._encode_parquet(
+        _NullFirst().iter_export("tokens"), ["address", "rugged_at", "current_holder_count"], "tokens"
+    )])
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.schema.field("rugged_at").type == pa.timestamp("us")
+    assert table.column("rugged_at").to_pylist() == [None, rugged_at]
+    assert table.column("current_holder_count").to_pylist() == [None, 3]
+
+
+@pytest.mark.unit
+def test_every_export_column_has_a_parquet_type():
+    """Test that PARQUET_TYPES declares exactly the columns each dataset exports."""
+    for dataset, (_, columns, _) in EXPORT_DATASETS.items():
+        assert sorted(data_export.PARQUET_TYPES[dataset]) == sorted(columns)
+
+
+@pytest.mark.unit
+async def test_exports_beyond_the_cap_wait_for_a_slot(monkeypatch):
+    """Test a second export doesn't open a cursor while the only slot is held."""
+    monkeypatch.setattr(data_export, "export_slots", asyncio.Semaphore(1))
+    gate = asyncio.Event()
+    opened = []
+
+    class _SlowTokens(_Tokens):
+        async def iter_export(self, dataset, since=None, batch_size=2000):
+            opened.append(dataset)
+            await gate.wait()
+            async for batch in super().iter_export(dataset, since, batch_size):
+                yield batch
+
+    async def drain():
+        stats = ExportStats(dataset="events", fmt="ndjson")
+        return b"".join([chunk async for chunk in stream_export(FakeDB(tokens=_SlowTokens()), "events", "ndjson", None, stats)])
+
+    first, second = asyncio.create_task(drain()), asyncio.create_task(drain())
+    await asyncio.sleep(0.01)
+    assert opened == ["events"] and data_export.export_slots.locked()
+
+    gate.set()
+    assert len((await first).splitlines()) == len((await second).splitlines()) == 5
+    assert opened == ["events", "events"] and not data_export.export_slots.locked()
@@ -163,3 +163,46 @@ async def test_multiple_notarizations(test_db, sample_user_id):
         ) as cursor:
             count = (await cursor.fetchone())[0]
             assert count == 3
+
+
+@pytest.mark.unit
+def test_user_balance_includes_ledger_tail():
+    """Test that reads fold the uncompacted ledger tail into the compacted row."""
+    from database import UserRepository
+
+    row = {
+        "user_id": 111111111,
+        "total_paid": 1.0,
+        "referral_count": 3,
+        "referral_earnings": 0.5,
+        "total_withdrawn": 0.2,
+        "tail_paid": -0.05,
+        "tail_earned": 0.25,
+        "tail_withdrawn": 0.0,
+        "tail_referrals": 2,
+    }
+    user = UserRepository._row_to_user(row)
+
+    assert user.total_paid == pytest.approx(0.95)
+    assert user.referral_count == 5
+    assert user.available_balance == pytest.approx(0.55)
+
+
+@pytest.mark.unit
+def test_user_balance_before_referral_backfill():
+    """Test that a NULL referral_count (pre-backfill row) reads as the tail only."""
+    from database import UserRepository
+
+    row = {
+        "user_id": 111111111,
+        "referral_count": None,
+        "referral_earnings": None,
+        "tail_paid": 0,
+        "tail_earned": 0,
+        "tail_withdrawn": 0,
+        "tail_referrals": 1,
+    }
+    user = UserRepository._row_to_user(row)
+
+    assert user.referral_count == 1
+    assert user.available_balance == 0
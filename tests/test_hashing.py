@@ -0,0 +1,57 @@
+"""
+Unit tests for contract hash encoding and prefix ranges.
+"""
+
+import pytest
+
+from utils.hashing import hash_data, hash_to_bytes, hash_prefix_range
+
+
+HASH = hash_data(b"MemeSeal")
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_hash_to_bytes_roundtrip():
+    """Test that full hex hashes encode to 32 bytes, in either case."""
+    assert hash_to_bytes(HASH).hex() == HASH
+    assert hash_to_bytes(HASH.upper()) == hash_to_bytes(HASH)
+
+
+@pytest.mark.unit
+def test_hash_to_bytes_rejects_invalid():
+    """Test that short, non-hex or padded input is rejected."""
+    assert hash_to_bytes(HASH[:-2]) is None
+    assert hash_to_bytes("g" * 64) is None
+    assert hash_to_bytes(HASH[:31] + " " + HASH[32:]) is None
+    assert hash_to_bytes("") is None
+
+
+@pytest.mark.unit
+def test_prefix_range_contains_matches():
+    """Test that the range covers hashes with the prefix and nothing else."""
+    for length in (8, 9, 17, 64):
+        low, high = hash_prefix_range(HASH[:length])
+        assert low <= hash_to_bytes(HASH) <= high
+        assert low.hex().startswith(HASH[:length])
+        assert high.hex().startswith(HASH[:length])
+
+
+@pytest.mark.unit
+def test_prefix_range_odd_nibble():
+    """Test that an odd-length prefix pads the last nibble both ways."""
+    low, high = hash_prefix_range("ffffffff0")
+
+    assert low == bytes.fromhex("ffffffff00" + "00" * 27)
+    assert high == bytes.fromhex("ffffffff0f" + "ff" * 27)
+
+
+@pytest.mark.unit
+def test_prefix_range_rejects_short_or_invalid():
+    """Test that prefixes under 8 hex chars or with non-hex chars return None."""
+    assert hash_prefix_range("abcdef1") is None
+    assert hash_prefix_range("abcdefgh") is None
+    assert hash_prefix_range(HASH + "0") is None
@@ -0,0 +1,117 @@
+"""
+Unit tests for holder distribution analytics (memescan/holders.py).
+"""
+
+import pytest
+
+from memescan.api import FetchContext, MemeScanClient
+from memescan.holders import concentration_metrics, HOLDER_PAGE_SIZE
+
+
+class _PagedTonAPI:
+    """Serves `count` holders largest-first, one page per call"""
+
+    def __init__(self, count: int, holders_count: int = 0, failures: int = 0):
+        self.balances = [count - i for i in range(count)]
+        self.holders_count = holders_count or count
+        self.failures = failures  # Requests after the first page that fail (429)
+        self.calls = []
+
+    async def get_jetton_holders(self, address, limit=100, offset=0):
+        self.calls.append((offset, limit))
+        if offset and self.failures:
+            self.failures -= 1
+            return None
+        return [{"balance": str(b)} for b in self.balances[offset:offset + limit]]
+
+    async def get_jetton_info(self, address):
+        supply = sum(self.balances)
+        return {"total_supply": str(supply), "holders_count": self.holders_count,
+                "metadata": {"symbol": "WIDE", "name": "Widely Held"}}
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_metrics_match_hand_computed_values():
+    """Test top-k, HHI, Nakamoto and Gini on a 50/30/20 split."""
+    metrics = concentration_metrics([30, 50, 20], total_supply=100)
+
+    assert metrics.top1_pct == pytest.approx(50)
+    assert metrics.top10_pct == pytest.approx(100)
+    assert metrics.hhi == pytest.approx(3800)
+    assert metrics.nakamoto == 2
+    assert metrics.gini == pytest.approx(0.2)
+
+
+@pytest.mark.unit
+def test_vectorized_metrics_match_definitions():
+    """Test the NumPy metrics against their textbook definitions on a long tail."""
+    balances = [float(b ** 2) for b in range(1, 500)]
+    supply = sum(balances) * 1.25
+    metrics = concentration_metrics(balances, supply, complete=True)
+
+    ordered = sorted(balances, reverse=True)
+    shares = [b / supply * 100 for b in ordered]
+    mean_diff = sum(abs(a - b) for a in balances for b in balances) / len(balances) ** 2
+    running = [sum(ordered[:k]) for k in range(1, len(ordered) + 1)]
+
+    assert metrics.top1_pct == pytest.approx(shares[0])
+    assert metrics.top10_pct == pytest.approx(sum(shares[:10]))
+    assert metrics.top20_pct == pytest.approx(sum(shares[:20]))
+    assert metrics.hhi == pytest.approx(sum(share * share for share in shares))
+    assert metrics.gini == pytest.approx(mean_diff / (2 * sum(balances) / len(balances)))
+    assert metrics.nakamoto == next(k for k, total in enumerate(running, 1) if total > supply / 2)
+
+
+@pytest.mark.unit
+def test_equal_holders_have_zero_gini_and_no_majority():
+    """Test that an even split has Gini 0 and no Nakamoto within the scan."""
+    metrics = concentration_metrics([10] * 4, total_supply=100)
+
+    assert metrics.gini == pytest.approx(0)
+    assert metrics.nakamoto is None
+
+
+@pytest.mark.unit
+async def test_holder_scan_pages_up_to_the_limit():
+    """Test that holders are fetched page by page and capped at max_holders."""
+    tonapi = _PagedTonAPI(2500)
+    full = await FetchContext(tonapi, "EQwide", max_holders=0).holder_scan()
+    assert full.complete and full.scanned == 2500
+    assert [offset for offset, _ in tonapi.calls] == [0, HOLDER_PAGE_SIZE, 2 * HOLDER_PAGE_SIZE]
+
+    tonapi.calls.clear()
+    capped = await FetchContext(tonapi, "EQwide", max_holders=1500).holder_scan()
+    assert not capped.complete and capped.scanned == 1500
+    assert tonapi.calls == [(0, HOLDER_PAGE_SIZE), (HOLDER_PAGE_SIZE, 500)]
+
+
+@pytest.mark.unit
+async def test_failed_holder_page_is_not_the_end_of_the_list():
+    """Test a throttled page is retried, and a page that keeps failing leaves the scan incomplete."""
+    tonapi = _PagedTonAPI(1500, failures=2)
+    retried = await FetchContext(tonapi, "EQwide", max_holders=0).holder_scan()
+    assert retried.complete and retried.scanned == 1500
+    assert [offset for offset, _ in tonapi.calls] == [0, HOLDER_PAGE_SIZE, HOLDER_PAGE_SIZE, HOLDER_PAGE_SIZE]
+
+    tonapi = _PagedTonAPI(1500, failures=99)
+    partial = await FetchContext(tonapi, "EQwide", max_holders=0).holder_scan()
+    assert not partial.complete and partial.scanned == HOLDER_PAGE_SIZE
+
+
+@pytest.mark.unit
+async def test_analysis_reports_real_holder_count():
+    """Test that holder_count comes from jetton info, not the page length."""
+    client = MemeScanClient()
+    client.tonapi = _PagedTonAPI(150, holders_count=12000)
+
+    token = await client.analyze_token_safety(
+        "EQwide", ctx=FetchContext(client.tonapi, "EQwide", max_holders=150)
+    )
+
+    assert token.holder_count == 12000
+    assert token.holder_metrics.scanned == 150
+    assert token.holder_metrics.nakamoto is not None
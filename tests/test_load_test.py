@@ -0,0 +1,137 @@
+"""
+Unit tests for the load-test harness (scripts/load_test.py, scripts/bot_api_stub.py).
+"""
+
+import hashlib
+import io
+import pytest
+from aiohttp import web
+from aiogram import Bot
+from aiogram.types import Update
+
+from scripts.bot_api_stub import BotApiStub, point_bots_at
+from scripts.load_test import (
+    Traffic, DEFAULT_MIX, LOAD_BOT_TOKEN, drive, summarize, diff_reports, parse_mix,
+    response_ok, sealed_file_hash
+)
+
+
+def _traffic(mix=None, seed=0):
+    return Traffic(mix or DEFAULT_MIX, users=[7_000_000_001, 7_000_000_002],
+                   contracts=["0:" + "ab" * 32], wallet="EQwallet", webhook_path="/webhook/x", seed=seed)
+
+
+def _report(rps=100.0, p50=10.0, p99=40.0, error_rate=0.0):
+    return {"routes": {"verify": {"requests": 1000, "rps": rps, "error_rate": error_rate,
+                                  "p50_ms": p50, "p90_ms": p99, "p99_ms": p99}}}
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_synthesized_updates_are_valid_telegram_updates():
+    """Test every webhook payload parses as an aiogram Update of the right kind."""
+    traffic = _traffic()
+    seen = set()
+    for _ in range(300):
+        route, method, path, body = traffic.next()
+        seen.add(route)
+        if path == "/webhook/x":
+            update = Update(**body)
+            kind = {"document": update.message and update.message.document,
+                    "photo": update.message and update.message.photo,
+                    "command": update.message and update.message.text,
+                    "inline": update.inline_query}[route]
+            assert kind
+        elif route == "tonapi":
+            (tx,) = body["transactions"]
+            assert tx["account"]["address"] == "EQwallet" and tx["in_msg"]["value"] > 0
+    assert seen == set(DEFAULT_MIX)
+
+    # Same seed, same stream
+    first, second = _traffic(seed=3), _traffic(seed=3)
+    assert [first.next()[2] for _ in range(50)] == [second.next()[2] for _ in range(50)]
+
+
+@pytest.mark.unit
+async def test_bot_api_stub_answers_aiogram_calls():
+    """Test the stub returns valid results and serves the bytes verify hits expect."""
+    stub = BotApiStub()
+    bot = Bot(token=LOAD_BOT_TOKEN)
+    point_bots_at(await stub.start(), bot)
+    try:
+        message = await bot.send_message(7_000_000_001, "⏳ Sealing...")
+        edited = await bot.edit_message_text("✅ Sealed", chat_id=7_000_000_001, message_id=message.message_id)
+        assert edited.message_id == message.message_id
+        file = await bot.get_file("doc5")
+        buffer = io.BytesIO()
+        await bot.download_file(file.file_path, buffer)
+        assert hashlib.sha256(buffer.getvalue()).hexdigest() == sealed_file_hash("doc5")
+        assert await bot.answer_inline_query("1", results=[]) is True
+    finally:
+        await bot.session.close()
+        await stub.stop()
+    assert stub.stats["calls"]["sendMessage"] == 1 and stub.stats["downloads"] == 1
+
+
+@pytest.mark.unit
+async def test_drive_records_latency_and_errors_per_route():
+    """Test the driver times every request and counts application-level errors."""
+    async def webhook(request):
+        return web.json_response({"ok": True})
+
+    async def verify(request):
+        return web.json_response({"verified": False, "error": "db down"})
+
+    app = web.Application()
+    app.router.add_post("/webhook/x", webhook)
+    app.router.add_get("/api/v1/verify/{hash}", verify)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        traffic = _traffic(mix={"command": 1, "verify": 1})
+        samples, seconds = await drive(base_url, traffic, duration=10, concurrency=4, max_requests=40)
+    finally:
+        await runner.cleanup()
+
+    routes = summarize(samples, seconds)
+    assert sum(route["requests"] for route in routes.values()) == 40
+    assert routes["command"]["error_rate"] == 0.0
+    assert routes["verify"]["error_rate"] == 1.0
+    assert routes["command"]["p50_ms"] <= routes["command"]["p99_ms"]
+
+
+@pytest.mark.unit
+def test_baseline_diff_flags_only_real_regressions():
+    """Test throughput, latency and error regressions past the tolerance are reported."""
+    baseline = _report()
+    assert diff_reports(baseline, _report(rps=90, p50=11, p99=44), tolerance=0.2) == []
+    assert diff_reports(baseline, _report(p50=0.5), tolerance=0.2) == []
+    assert diff_reports(_report(p50=1), _report(p50=4), tolerance=0.2) == []  # Under the noise floor
+
+    regressions = diff_reports(baseline, _report(rps=50, p99=80, error_rate=0.05), tolerance=0.2)
+    assert regressions == [
+        "verify: rps 100.0 -> 50",
+        "verify: p99_ms 40.0 -> 80",
+        "verify: error_rate 0.0 -> 0.05",
+    ]
+
+
+@pytest.mark.unit
+def test_mix_parsing_and_error_detection():
+    """Test --mix parsing and which responses count as errors."""
+    assert parse_mix("document=3, verify") == {"document": 3, "verify": 1}
+    with pytest.raises(ValueError):
+        parse_mix("documents=3")
+
+    assert response_ok(200, {"ok": True})
+    assert response_ok(202, {"success": True, "job_id": 1})
+    assert response_ok(200, {"verified": False})  # A miss is an answer
+    assert not response_ok(200, {"success": False, "error": "Missing api_key"})
+    assert not response_ok(429, {"success": False})
+    assert not response_ok(500, None)
@@ -0,0 +1,164 @@
+"""
+Unit tests for the notification bus (persistent outbox + channel senders).
+"""
+
+import asyncio
+import time
+import pytest
+from datetime import datetime, timedelta
+
+import notify_bus
+from database import OutboxMessage
+from memescan.ratelimit import TokenBucket
+from notify_bus import NotificationBus, ChannelSender, XSender, RateLimited, DIGEST_KINDS
+from tests.conftest import FakeDB, FakeJobQueue
+
+
+class _Outbox(FakeJobQueue):
+    """In-memory stand-in for OutboxRepository"""
+
+    def __init__(self):
+        super().__init__(OutboxMessage, order=lambda r: (-r.priority, r.id), due="available_at",
+                         running="sending", done="sent")
+
+    async def enqueue(self, channel, kind, payload, priority=0, delay_seconds=0):
+        return self.add(channel=channel, kind=kind, priority=priority, payload=payload,
+                        available_at=datetime.now() + timedelta(seconds=delay_seconds)).id
+
+    async def claim(self, channel, digest_kinds, digest_max=50):
+        due = [r for r in self.due_jobs() if r.channel == channel]
+        if not due:
+            return []
+        claimed = [due[0]]
+        if due[0].kind in digest_kinds:
+            claimed = [r for r in self.rows.values() if r.channel == channel
+                       and r.kind == due[0].kind and r.status == "pending"][:digest_max]
+        return self._claim(claimed)
+
+    async def mark_sent(self, ids, external_id=None):
+        self._complete(ids, external_id=external_id)
+
+    async def mark_failed(self, ids, error, retry_in):
+        self._fail(ids, error, retry_in)
+
+
+class _Sender(ChannelSender):
+    name = "telegram"
+
+    def __init__(self, error=None):
+        super().__init__(TokenBucket(rate=1000, burst=100))
+        self.sent = []
+        self.error = error
+
+    async def send(self, payload):
+        if self.error:
+            raise self.error
+        self.sent.append(payload)
+        return str(len(self.sent))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDB(outbox=_Outbox())
+    monkeypatch.setattr(notify_bus, "db", fake)
+    monkeypatch.setattr(notify_bus, "DIGEST_WINDOW", 0)
+    return fake
+
+
+def _bus(sender):
+    bus = NotificationBus()
+    bus._initialized = True  # No env credentials in tests
+    bus.add_sender(sender)
+    return bus
+
+
+async def _drain(bus, sender, db):
+    while True:
+        messages = await db.outbox.claim(sender.name, DIGEST_KINDS)
+        if not messages:
+            return
+        await bus.deliver(sender, messages)
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_seal_burst_becomes_one_digest_after_the_rug(fake_db):
+    """Test that 30 queued seals go out as one post, behind a later rug alert."""
+    sender = _Sender()
+    bus = _bus(sender)
+    for n in range(30):
+        await bus.publish("seal", telegram_text=f"seal {n}",
+                          data={"hash": f"{n:064x}", "pot_stars": n, "pot_ton": 0.5, "next_draw": "Sunday"})
+    await bus.publish("rug", telegram_text="RUG ALERT", data={"symbol": "SCAM"})
+
+    await _drain(bus, sender, fake_db)
+
+    assert len(sender.sent) == 2
+    assert sender.sent[0]["text"] == "RUG ALERT"
+    assert "30 bags sealed" in sender.sent[1]["text"]
+    assert "29⭐" in sender.sent[1]["text"]  # Latest pot
+    metrics = bus.metrics["telegram"].as_dict()
+    assert metrics["posts"] == 2
+    assert metrics["messages"] == 31
+    assert metrics["merged"] == 29
+    assert all(row.status == "sent" for row in fake_db.outbox.rows.values())
+
+
+@pytest.mark.unit
+async def test_rate_limited_post_stays_queued_and_channel_backs_off(fake_db):
+    """Test a 429 keeps the post pending and holds the channel's bucket."""
+    sender = _Sender(error=RateLimited(30))
+    bus = _bus(sender)
+    await bus.publish("rug", telegram_text="RUG ALERT")
+
+    messages = await fake_db.outbox.claim("telegram", DIGEST_KINDS)
+    assert await bus.deliver(sender, messages) is False
+
+    row = fake_db.outbox.rows[1]
+    assert row.status == "pending"
+    assert row.available_at > datetime.now() + timedelta(seconds=25)
+    assert sender.bucket.available < 0
+    assert bus.metrics["telegram"].throttled == 1
+
+
+@pytest.mark.unit
+async def test_permanent_failure_is_not_retried(fake_db):
+    """Test a forbidden post is marked failed instead of retried."""
+    sender = _Sender(error=notify_bus.PermanentFailure("forbidden"))
+    bus = _bus(sender)
+    await bus.publish("lottery", telegram_text="winner!")
+
+    messages = await fake_db.outbox.claim("telegram", DIGEST_KINDS)
+    await bus.deliver(sender, messages)
+    assert fake_db.outbox.rows[1].status == "failed"
+
+
+@pytest.mark.unit
+async def test_x_sender_does_not_block_event_loop():
+    """Test tweepy's blocking create_tweet runs off the event loop."""
+    class _Response:
+        data = {"id": 42}
+
+    class _BlockingClient:
+        def create_tweet(self, text):
+            time.sleep(0.3)
+            return _Response()
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        tweet_id = await XSender(_BlockingClient()).send({"text": "gm"})
+    finally:
+        task.cancel()
+    assert tweet_id == "42"
+    assert ticks >= 10
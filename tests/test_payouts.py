@@ -0,0 +1,117 @@
+"""
+Unit tests for pending payout reconciliation (payouts.py).
+"""
+
+import time
+import pytest
+
+from chain import FakeChain, Transfer, TransferPending, TRANSFER_TTL
+from payouts import PayoutReconciler, PendingPayout, payout_memo, PAYOUT_GRACE
+from tests.conftest import FakeDB
+
+USER = "EQ" + "B" * 46
+
+
+class _BotState:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def get_prefix(self, prefix):
+        return {key: value for key, value in self.values.items() if key.startswith(prefix)}
+
+
+class _Users:
+    def __init__(self):
+        self.ledger = {}
+
+    async def append_ledger(self, user_id, kind, amount, source_tx=None):
+        if (user_id, kind, source_tx) in self.ledger:
+            return False
+        self.ledger[(user_id, kind, source_tx)] = amount
+        return True
+
+
+def _db():
+    return FakeDB(bot_state=_BotState(), users=_Users())
+
+
+async def _pay(chain, db, reconciler, ref, amount=1.0):
+    """Withdrawal the way bot.py sends it; True if it landed at once"""
+    memo = payout_memo("NotaryTON Referral Payout", ref)
+    try:
+        await chain.send_transfer([Transfer(USER, amount, memo)])
+        return True
+    except TransferPending as pending:
+        await reconciler.add(db, PendingPayout(ref, 1, amount, memo, pending.valid_until,
+                                               failure_kind="withdrawal", failure_amount=-amount))
+        return False
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_late_landing_payout_is_settled_not_repaid():
+    """Test a payout that lands after TransferPending is marked landed with no ledger change."""
+    chain, db, reconciler = FakeChain(), _db(), PayoutReconciler()
+    chain.stall_next(1, land=True)
+    assert not await _pay(chain, db, reconciler, "wd1")
+
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 1, "expired": 0}
+    assert db.bot_state.values == {} and db.users.ledger == {}
+    assert len(await chain.get_transactions(USER, limit=10)) == 1  # Paid exactly once
+
+
+@pytest.mark.unit
+async def test_payout_that_never_lands_is_reversed_once_expired(monkeypatch):
+    """Test an unlanded payout stays pending until valid_until + grace, then is reversed once."""
+    chain, db, reconciler = FakeChain(), _db(), PayoutReconciler()
+    chain.stall_next(1, land=False)
+    assert not await _pay(chain, db, reconciler, "wd2", amount=2.0)
+
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 0, "expired": 0}
+    assert reconciler.get_stats()["pending"] == 1
+
+    later = time.time() + TRANSFER_TTL + PAYOUT_GRACE + 1
+    monkeypatch.setattr("payouts.time.time", lambda: later)
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 0, "expired": 1}
+    assert db.users.ledger == {(1, "withdrawal", "wd2:failed"): -2.0}
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 0, "expired": 0}
+
+
+@pytest.mark.unit
+async def test_memo_ref_tells_same_amount_payouts_apart():
+    """Test only the payout whose memo landed is settled."""
+    chain, db, reconciler = FakeChain(), _db(), PayoutReconciler()
+    chain.stall_next(1, land=False)
+    chain.stall_next(1, land=True)
+    await _pay(chain, db, reconciler, "a")
+    await _pay(chain, db, reconciler, "b")
+
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 1, "expired": 0}
+    assert list(db.bot_state.values) == ["payout:a"]
+
+
+@pytest.mark.unit
+async def test_full_scan_page_never_expires_an_older_payout(monkeypatch):
+    """Test a payout older than the scanned page is kept pending rather than reversed."""
+    chain, db, reconciler = FakeChain(), _db(), PayoutReconciler()
+    chain.stall_next(1, land=False)
+    await _pay(chain, db, reconciler, "old")
+    monkeypatch.setattr("payouts.SCAN_TXS", 3)
+    for i in range(3):
+        await chain.send_transfer([Transfer(USER, 0.01, f"seal {i}")])
+
+    later = time.time() + TRANSFER_TTL + PAYOUT_GRACE + 1
+    monkeypatch.setattr("payouts.time.time", lambda: later)
+    for tx in chain.accounts[chain.wallet].transactions:
+        tx.utime = int(later)  # The page only reaches back to "now"
+    assert await reconciler.reconcile_once(db, chain) == {"landed": 0, "expired": 0}
+    assert db.users.ledger == {}
@@ -0,0 +1,73 @@
+"""
+Unit tests for the offline provider stub (scripts/provider_stub.py).
+"""
+
+import pytest
+
+from memescan.api import MemeScanClient, TonAPI, GeckoTerminalAPI, StonFiAPI
+from memescan.ratelimit import TokenBucket
+from scripts.provider_stub import (
+    ProviderStub, StubConfig, synthetic_fixtures, point_clients_at, NEW_POOLS_PAGE
+)
+
+
+@pytest.fixture
+async def stub_client(monkeypatch):
+    """Start a stub and point a fresh client at it; yields (stub, client)"""
+    started = []
+
+    async def start(fixtures, **config):
+        for api in (TonAPI, GeckoTerminalAPI, StonFiAPI):
+            monkeypatch.setattr(api, "BASE_URL", api.BASE_URL)
+            monkeypatch.setattr(api, "limiter", TokenBucket(rate=1000, burst=1000))
+        stub = ProviderStub(fixtures, StubConfig(**config))
+        point_clients_at(await stub.start())
+        client = MemeScanClient()
+        started.append((stub, client))
+        return stub, client
+
+    yield start
+    for stub, client in started:
+        await client.close()
+        await stub.stop()
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_synthetic_replay_drives_discovery_and_analysis(stub_client):
+    """Test that the crawler's provider calls are served from fixtures."""
+    stub, client = await stub_client(synthetic_fixtures(30))
+
+    first_page = await client.get_new_launches(limit=NEW_POOLS_PAGE)
+    second_page = await client.get_new_launches(limit=NEW_POOLS_PAGE)
+    assert len(first_page) == NEW_POOLS_PAGE
+    assert len(second_page) == 10
+    assert first_page[0].address != second_page[0].address
+
+    analysis = await client.analyze_token_safety(first_page[0].address)
+    assert analysis.symbol == "BENCH0"
+    assert analysis.holder_count > 0
+    assert stub.stats["misses"] == 0
+
+
+@pytest.mark.unit
+async def test_injected_429_penalizes_the_provider_bucket(stub_client):
+    """Test that a stubbed 429 is counted and backs the client off."""
+    stub, client = await stub_client({}, rate_429=1.0, retry_after=2)
+
+    assert await client.tonapi.get_jetton_info("EQmissing") is None
+    assert client.tonapi.throttled == 1
+    assert TonAPI.limiter.available < 0
+    assert stub.stats["throttled"] == 1
+
+
+@pytest.mark.unit
+async def test_missing_fixture_is_a_404(stub_client):
+    """Test that unknown paths miss instead of hitting the network."""
+    stub, client = await stub_client({})
+
+    assert await client.gecko.get_token("EQnothing") is None
+    assert stub.stats["misses"] == 1
@@ -0,0 +1,97 @@
+"""
+Unit tests for the adaptive rug re-check scheduler.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from database import TrackedToken
+from rug_scheduler import recheck_interval, RecheckScheduler, MIN_INTERVAL, GONE
+from tests.conftest import FakeDB
+
+
+def _token(address, hours_old, score=50, top_pct=10, holders=100):
+    return TrackedToken(
+        address=address,
+        first_seen=datetime.now() - timedelta(hours=hours_old),
+        safety_score=score,
+        current_top_holder_pct=top_pct,
+        current_holder_count=holders,
+    )
+
+
+class _Tokens:
+    async def count_recent_events(self, address, event_types, since):
+        return 0
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_young_risky_tokens_checked_far_more_often():
+    """Test that a 2h-old 70% dev token is checked in seconds, a stable week-old one rarely."""
+    risky = recheck_interval(age_hours=2, safety_score=20, top_holder_pct=70)
+    stable = recheck_interval(age_hours=24 * 7, safety_score=90, top_holder_pct=5)
+
+    assert risky <= 20
+    assert stable >= 3600
+    assert recheck_interval(2, 20, 70, holder_volatility=0.5, whale_events=2) == MIN_INTERVAL
+
+
+@pytest.mark.unit
+def test_budget_stretches_all_intervals_proportionally():
+    """Test that demand above the budget yields a load factor > 1."""
+    scheduler = RecheckScheduler(check=None, per_minute=6)
+    for i in range(10):
+        scheduler.upsert(_token(f"EQ{i}", hours_old=1, score=10))
+
+    assert scheduler.load_factor > 1
+    assert abs(scheduler._demand / scheduler.load_factor - scheduler.budget.rate) < 1e-9
+
+
+@pytest.mark.unit
+async def test_run_once_reschedules_and_drops_rugs():
+    """Test that checked tokens are rescheduled and rugged ones removed."""
+    results = {"EQsafe": (120, 10.0, False), "EQrug": (3, 0.5, True)}
+    checked = []
+
+    async def check(address):
+        checked.append(address)
+        return results[address]
+
+    scheduler = RecheckScheduler(check=check, per_minute=600)
+    scheduler.upsert(_token("EQsafe", hours_old=1))
+    scheduler.upsert(_token("EQrug", hours_old=1))
+    for entry in scheduler._entries.values():
+        scheduler._schedule(entry, 0)  # Due now
+
+    await scheduler.run_once(FakeDB(tokens=_Tokens()), timeout=1)
+    await scheduler.run_once(FakeDB(tokens=_Tokens()), timeout=1)
+
+    assert sorted(checked) == ["EQrug", "EQsafe"]
+    assert len(scheduler) == 1
+    assert scheduler._entries["EQsafe"].holder_count == 120
+    assert await scheduler.run_once(FakeDB(tokens=_Tokens()), timeout=0.01) is None
+
+
+@pytest.mark.unit
+async def test_gone_tokens_dropped_failed_ones_retried():
+    """Test that an untracked token is removed, not counted and retried as a failure."""
+    results = {"EQgone": GONE, "EQflaky": None}
+
+    async def check(address):
+        return results[address]
+
+    scheduler = RecheckScheduler(check=check, per_minute=600)
+    scheduler.upsert(_token("EQgone", hours_old=1))
+    scheduler.upsert(_token("EQflaky", hours_old=1))
+    for entry in scheduler._entries.values():
+        scheduler._schedule(entry, 0)
+
+    await scheduler.run_once(FakeDB(tokens=_Tokens()), timeout=1)
+    await scheduler.run_once(FakeDB(tokens=_Tokens()), timeout=1)
+
+    assert list(scheduler._entries) == ["EQflaky"]
+    assert scheduler.failures == 1
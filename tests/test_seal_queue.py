@@ -0,0 +1,233 @@
+"""
+Unit tests for the seal job workers (batched sends, retries, waiters).
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+
+from chain import TransferPending
+from database import SealJob
+import seal_queue
+from seal_queue import (
+    SealWorkerPool, PermanentSealError, PublicResolver, check_callback_url, render, retry_delay, RETRY_MAX
+)
+from tests.conftest import FakeDB, FakeJobQueue
+
+
+class _SealJobs(FakeJobQueue):
+    """In-memory stand-in for SealJobRepository"""
+
+    def __init__(self):
+        super().__init__(SealJob)
+
+    async def enqueue(self, user_id, source, payload, contract_hash=None, callback_url=None, max_attempts=5):
+        return self.add(user_id=user_id, source=source, payload=payload, contract_hash=contract_hash,
+                        callback_url=callback_url, max_attempts=max_attempts)
+
+    async def complete(self, job_id, contract_hash, tx_hash=None):
+        if self.rows[job_id].status != "running":
+            return False
+        self._complete([job_id], contract_hash=contract_hash, tx_hash=tx_hash, finished_at=datetime.now())
+        return True
+
+    async def fail(self, job_id, error, retry_in, contract_hash=None):
+        self._fail([job_id], error, retry_in, contract_hash=contract_hash or self.rows[job_id].contract_hash)
+
+
+def _db():
+    return FakeDB(seal_jobs=_SealJobs())
+
+
+class _App:
+    """prepare/send/finish hooks recording what the pool asked for"""
+
+    def __init__(self, send_errors=0):
+        self.transfers = []
+        self.finished = []
+        self.send_errors = send_errors
+
+    async def prepare(self, job):
+        if job.payload.get("missing"):
+            raise PermanentSealError("Failed to fetch contract")
+        contract_hash = job.payload["data"] * 64
+        return contract_hash, render(job.payload["comment"], hash16=contract_hash[:16]), 0.005
+
+    async def send(self, seals):
+        if self.send_errors:
+            self.send_errors -= 1
+            raise ConnectionError("liteserver crashed")
+        self.transfers.append([seal.comment for seal in seals])
+
+    async def finish(self, job):
+        self.finished.append((job.id, job.status))
+
+
+def _pool(app, **kwargs):
+    return SealWorkerPool(prepare=app.prepare, send=app.send, finish=app.finish, **kwargs)
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_claimed_jobs_go_out_in_one_transfer():
+    """Test a batch of jobs is prepared and sent as one wallet transfer."""
+    db, app = _db(), _App()
+    pool = _pool(app, batch_size=10)
+    for data in "abc":
+        await pool.enqueue(db, 1, "api", {"data": data, "comment": "NotaryTON:API:{hash16}"})
+
+    assert await pool.run_batch(db, "w1") == 3
+    assert app.transfers == [["NotaryTON:API:" + d * 16 for d in "abc"]]
+    assert [job.status for job in db.seal_jobs.rows.values()] == ["done"] * 3
+    assert app.finished == [(1, "done"), (2, "done"), (3, "done")]
+    assert pool.metrics.as_dict()["seals_per_transfer"] == 3
+
+
+@pytest.mark.unit
+async def test_completion_is_recorded_before_the_finish_hook_once():
+    """Test a failing finish hook can't undo a seal, and a job completed elsewhere isn't settled again."""
+    db, app = _db(), _App()
+    pool = _pool(app)
+
+    async def broken_finish(job):
+        app.finished.append((job.id, db.seal_jobs.rows[job.id].status))
+        raise RuntimeError("telegram down")
+
+    pool.finish = broken_finish
+    job = await pool.enqueue(db, 1, "api", {"data": "a", "comment": "{hash16}"})
+    await pool.run_batch(db, "w1")
+    assert app.finished == [(job.id, "done")]  # Stored (with its effects) before the hook ran
+
+    # A stale worker whose job was released and completed by another one
+    pool.finish = app.finish
+    again = await pool.enqueue(db, 1, "api", {"data": "b", "comment": "{hash16}"})
+    claimed = await db.seal_jobs.claim("w2")
+    await db.seal_jobs.complete(again.id, "b" * 64)
+    db.seal_jobs.claim = lambda worker_id, limit=50: asyncio.sleep(0, claimed)
+    await pool.run_batch(db, "w1")
+    assert app.finished == [(job.id, "done")]
+    assert pool.metrics.sealed == 1
+
+
+@pytest.mark.unit
+async def test_failed_sends_retry_then_fail():
+    """Test a failing transfer is retried with backoff, then marked failed once."""
+    db, app = _db(), _App(send_errors=99)
+    pool = _pool(app)
+    job = await pool.enqueue(db, 1, "memeseal_file", {"data": "a", "comment": "MemeSeal:{hash16}"})
+
+    for _ in range(job.max_attempts):
+        await pool.run_batch(db, "w1")
+        db.seal_jobs.make_due()
+    assert job.status == "failed"
+    assert job.contract_hash == "a" * 64  # Kept so a retry doesn't re-download
+    assert app.finished == [(job.id, "failed")]
+    assert pool.metrics.retried == job.max_attempts - 1
+    assert retry_delay(1) < retry_delay(2) <= retry_delay(50) == RETRY_MAX
+
+
+@pytest.mark.unit
+async def test_permanent_error_does_not_block_the_batch():
+    """Test an unsealable job fails at once while the rest are sent."""
+    db, app = _db(), _App()
+    pool = _pool(app)
+    bad = await pool.enqueue(db, 1, "api", {"missing": True, "comment": "x"})
+    good = await pool.enqueue(db, 1, "api", {"data": "b", "comment": "{hash16}"})
+
+    await pool.run_batch(db, "w1")
+    assert (bad.status, bad.attempts) == ("failed", 1)
+    assert bad.last_error == "Failed to fetch contract"
+    assert good.status == "done"
+    assert app.transfers == [["b" * 16]]
+
+
+@pytest.mark.unit
+async def test_pending_transfer_is_never_resent():
+    """Test a transfer that may still land completes its jobs instead of retrying them."""
+    db, app = _db(), _App()
+    pool = _pool(app)
+    sends = []
+
+    async def slow_liteserver(seals):
+        sends.append([seal.comment for seal in seals])
+        raise TransferPending(seqno=7, valid_until=0)
+
+    pool.send = slow_liteserver
+    jobs = [await pool.enqueue(db, 1, "api", {"data": d, "comment": "{hash16}"}) for d in "ab"]
+    await pool.run_batch(db, "w1")
+    db.seal_jobs.make_due()
+    assert await pool.run_batch(db, "w1") == 0
+
+    assert len(sends) == 1
+    assert [(job.status, job.tx_hash, job.attempts) for job in jobs] == [("done", None, 1)] * 2
+    assert pool.metrics.as_dict()["unconfirmed_transfers"] == 1
+
+
+@pytest.mark.unit
+async def test_waiters_get_the_finished_job():
+    """Test wait() resolves on completion, for finished jobs and on timeout."""
+    db, app = _db(), _App()
+    pool = _pool(app)
+    job = await pool.enqueue(db, 1, "api", {"data": "c", "comment": "{hash16}"})
+    other = await pool.enqueue(db, 1, "api", {"data": "d", "comment": "{hash16}"})
+
+    waiter = asyncio.create_task(pool.wait(db, job.id, timeout=5))
+    await asyncio.sleep(0)
+    await pool.run_batch(db, "w1")
+    assert (await waiter).contract_hash == "c" * 64
+    assert (await pool.wait(db, other.id, timeout=0.01)).status == "done"
+
+    late = await pool.enqueue(db, 1, "api", {"data": "e", "comment": "{hash16}"})
+    assert await pool.wait(db, late.id, timeout=0.01) is None
+    assert pool._waiters == {}
+
+
+@pytest.mark.unit
+async def test_wait_sees_jobs_finished_by_another_instance(monkeypatch):
+    """Test wait() polls the table instead of relying on this process's workers."""
+    monkeypatch.setattr(seal_queue, "WAIT_POLL", 0.01)
+    db, app = _db(), _App()
+    pool = _pool(app)
+    job = await pool.enqueue(db, 1, "api", {"data": "f", "comment": "{hash16}"})
+
+    waiter = asyncio.create_task(pool.wait(db, job.id, timeout=5))
+    await asyncio.sleep(0.02)
+    await db.seal_jobs.claim("elsewhere")
+    await db.seal_jobs.complete(job.id, "f" * 64, "tx")
+    assert (await asyncio.wait_for(waiter, 1)).tx_hash == "tx"
+    assert pool._waiters == {}
+
+
+@pytest.mark.unit
+async def test_callback_urls_must_be_public(monkeypatch):
+    """Test callbacks to private, loopback and link-local hosts are refused."""
+    check_callback_url("https://hooks.example.com/seal")
+    check_callback_url("https://8.8.8.8/seal")
+    for url in ("http://hooks.example.com/", "https://localhost/", "https://127.0.0.1:8443/",
+                "https://10.1.2.3/", "https://169.254.169.254/latest", "https://[::1]/",
+                "https://[fd00::1]/", "https:///x", None):
+        with pytest.raises(ValueError):
+            check_callback_url(url)
+
+    async def answers(self, host, port=0, family=None):
+        return [{"host": "10.0.0.5"}, {"host": "93.184.216.34"}]
+
+    monkeypatch.setattr(seal_queue.ThreadedResolver, "resolve", answers)
+    assert await PublicResolver().resolve("hooks.example.com") == [{"host": "93.184.216.34"}]
+
+    async def private(self, host, port=0, family=None):
+        return [{"host": "192.168.1.1"}]
+
+    monkeypatch.setattr(seal_queue.ThreadedResolver, "resolve", private)
+    with pytest.raises(OSError):
+        await PublicResolver().resolve("rebind.example.com")
+
+
+@pytest.mark.unit
+def test_render_leaves_user_text_alone():
+    """Test templates with user-supplied braces render without errors."""
+    text = render("File: `{0} {name}`\nHash: `{hash}`", hash="ab" * 32)
+    assert text == "File: `{0} {name}`\nHash: `" + "ab" * 32 + "`"
@@ -0,0 +1,159 @@
+"""
+Unit tests for the shared Telegram send engine.
+"""
+
+import asyncio
+import time
+import pytest
+
+import telegram_sender as sender_module
+from telegram_sender import TelegramSender, Priority, chat_interval
+
+
+class _FloodWait(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Flood control exceeded, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Bot:
+    """Records send_message calls; optional errors raised first, in order"""
+
+    def __init__(self, token, errors=None):
+        self.token = token
+        self.errors = list(errors or [])
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+        return {"chat_id": chat_id, "text": text}
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_group_chats_are_paced_slower_than_users():
+    """Test per-chat intervals follow Telegram's user vs group limits."""
+    assert chat_interval(12345) == sender_module.PRIVATE_CHAT_INTERVAL
+    assert chat_interval(-100123) == sender_module.GROUP_CHAT_INTERVAL
+    assert chat_interval("@MemeSealTON") == sender_module.GROUP_CHAT_INTERVAL
+
+
+@pytest.mark.unit
+async def test_payments_go_before_marketing():
+    """Test queued messages are sent in priority order."""
+    bot = _Bot("a")
+    sender = TelegramSender()
+    sender.submit(1, "promo", bots=[bot], priority=Priority.MARKETING)
+    sender.submit(2, "notice", bots=[bot], priority=Priority.SERVICE)
+    paid = sender.submit(3, "paid", bots=[bot], priority=Priority.PAYMENT)
+
+    assert (await paid)["text"] == "paid"
+    await sender.stop()
+    assert [text for _, text, _ in bot.sent] == ["paid", "notice", "promo"]
+
+
+@pytest.mark.unit
+async def test_one_chat_is_paced_without_blocking_others(monkeypatch):
+    """Test a busy chat waits its interval while other chats go straight out."""
+    monkeypatch.setattr(sender_module, "PRIVATE_CHAT_INTERVAL", 0.1)
+    bot = _Bot("a")
+    sender = TelegramSender()
+    first = [sender.submit(1, f"busy {n}", bots=[bot]) for n in range(3)]
+    other = sender.submit(2, "other", bots=[bot])
+
+    await other
+    assert len(bot.sent) == 2  # busy 0 and other, busy 1 still paced
+    for future in first:
+        await future
+    await sender.stop()
+
+    busy = [at for chat, _, at in bot.sent if chat == 1]
+    assert busy[1] - busy[0] >= 0.09
+    assert busy[2] - busy[1] >= 0.09
+    assert sender.metrics.deferred >= 2
+
+
+@pytest.mark.unit
+async def test_global_bucket_caps_messages_per_second():
+    """Test distinct chats still share the bot's messages-per-second budget."""
+    bot = _Bot("a")
+    sender = TelegramSender(rate=20)
+    started = time.monotonic()
+    futures = [sender.submit(chat, "hi", bots=[bot]) for chat in range(30)]
+    for future in futures:
+        await future
+    await sender.stop()
+    # 20 burst, then 10 more at 20/s
+    assert time.monotonic() - started >= 0.45
+    assert len(bot.sent) == 30
+
+
+@pytest.mark.unit
+async def test_flood_wait_requeues_message():
+    """Test retry_after pauses the chat and the message is sent afterwards."""
+    bot = _Bot("a", errors=[_FloodWait(0.05)])
+    sender = TelegramSender()
+    result = await sender.send(1, "paid", bots=[bot], priority=Priority.PAYMENT)
+    await sender.stop()
+
+    assert result["text"] == "paid"
+    assert sender.metrics.flood_waits == 1
+    assert sender.metrics.sent == 1
+
+
+@pytest.mark.unit
+async def test_flood_wait_pauses_the_whole_bot():
+    """Test a 429 holds back other chats on the same bot, not just the one that hit it."""
+    bot = _Bot("a", errors=[_FloodWait(0.1)])
+    sender = TelegramSender()
+    flooded = sender.submit(1, "first", bots=[bot])
+    await asyncio.sleep(0.02)
+    started = time.monotonic()
+    await sender.send(2, "other chat", bots=[bot])
+    await flooded
+    await sender.stop()
+
+    assert time.monotonic() - started >= 0.07
+    assert sender.metrics.deferred >= 1
+
+
+@pytest.mark.unit
+async def test_stop_drains_the_queue_then_fails_what_is_left(monkeypatch):
+    """Test stop() sends paced messages first, and fails only those past the timeout."""
+    monkeypatch.setattr(sender_module, "PRIVATE_CHAT_INTERVAL", 0.05)
+    bot = _Bot("a")
+    sender = TelegramSender()
+    paced = [sender.submit(1, f"paid {n}", bots=[bot], priority=Priority.PAYMENT) for n in range(3)]
+    await sender.stop()
+    assert [(await future)["text"] for future in paced] == ["paid 0", "paid 1", "paid 2"]
+
+    stuck = _Bot("b", errors=[_FloodWait(5)])
+    late = sender.submit(2, "promo", bots=[stuck], priority=Priority.MARKETING)
+    await asyncio.sleep(0.02)
+    await sender.stop(timeout=0.05)
+    with pytest.raises(RuntimeError, match="stopped"):
+        await late
+
+
+@pytest.mark.unit
+async def test_falls_back_to_next_bot_then_fails():
+    """Test a user unreachable by one bot is tried with the next, once."""
+    blocked = _Bot("memeseal", errors=[Exception("Forbidden: bot was blocked")])
+    fallback = _Bot("notaryton")
+    sender = TelegramSender()
+    result = await sender.send(1, "paid", bots=[blocked, None, fallback])
+
+    assert result["text"] == "paid"
+    assert blocked.sent == [] and len(fallback.sent) == 1
+    assert sender.metrics.fallbacks == 1
+
+    dead = _Bot("dead", errors=[Exception("chat not found")])
+    with pytest.raises(Exception, match="chat not found"):
+        await sender.send(2, "hello", bots=[dead])
+    await sender.stop()
+    assert sender.metrics.failed == 1
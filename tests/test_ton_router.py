@@ -0,0 +1,161 @@
+"""
+Unit tests for the liteserver router (health scores, circuit breaker, hedging).
+"""
+
+import asyncio
+import pytest
+
+import ton_router
+from ton_router import LiteserverRouter, NoLiteserverError, OPEN, CLOSED, BREAKER_THRESHOLD
+from pytoniq.liteclient.client import RunGetMethodError
+
+
+class _Liteserver:
+    """Fake liteserver client with a fixed delay and optional failures"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.connects = 0
+        self.closed = 0
+
+    async def connect(self):
+        self.connects += 1
+
+    async def close(self):
+        self.closed += 1
+
+    async def _answer(self, method):
+        self.calls.append(method)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return self.name
+
+    async def get_account_state(self, address):
+        return await self._answer("get_account_state")
+
+    async def get_masterchain_info(self):
+        return await self._answer("get_masterchain_info")
+
+    async def raw_send_message(self, boc):
+        return await self._answer("raw_send_message")
+
+    async def run_get_method(self, address, method, stack):
+        self.calls.append(method)
+        raise RunGetMethodError(address, method, -256)
+
+
+def _router(*servers):
+    async def load():
+        return list(servers)
+    return LiteserverRouter(load, request_timeout=1)
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+async def test_requests_share_one_connection_and_prefer_the_fastest():
+    """Test clients connect once and traffic moves to the lower-latency server."""
+    slow, fast = _Liteserver("slow", delay=0.03), _Liteserver("fast", delay=0.0)
+    router = _router(slow, fast)
+
+    # Unknown servers are tried in order; failover teaches the router about both
+    slow.fail = True
+    assert await router.request("get_account_state", "EQ") == "fast"
+    slow.fail = False
+    for _ in range(3):
+        await router.request("get_account_state", "EQ", hedge=False)
+    await router.request("raw_send_message", b"boc")
+
+    assert router.ranked()[0] == 1
+    assert fast.calls[-1] == "raw_send_message"
+    assert (slow.connects, fast.connects) == (1, 1)
+    assert router.get_stats()["failovers"] == 1
+
+
+@pytest.mark.unit
+async def test_breaker_opens_after_repeated_failures_and_probe_closes_it(monkeypatch):
+    """Test a dead server stops getting traffic and comes back via one probe."""
+    dead, alive = _Liteserver("dead", fail=True), _Liteserver("alive")
+    router = _router(dead, alive)
+
+    for _ in range(BREAKER_THRESHOLD):
+        assert await router.request("raw_send_message", b"boc") == "alive"
+        router.health[1].ewma_ms = 10_000  # Keep the dead one first in line
+    assert router.health[0].state == OPEN
+    assert dead.closed == 1  # Dropped so the probe reconnects fresh
+
+    await router.request("raw_send_message", b"boc")
+    assert dead.calls.count("raw_send_message") == BREAKER_THRESHOLD  # Not hammered
+
+    dead.fail = False
+    monkeypatch.setattr(router.health[0], "opened_at", -1e9)
+    router.ranked()  # Cooled down: starts the probe
+    await asyncio.sleep(0.01)
+    assert router.health[0].state == CLOSED
+    assert dead.calls[-1] == "get_masterchain_info"
+
+
+@pytest.mark.unit
+async def test_slow_reads_are_hedged_to_the_next_server(monkeypatch):
+    """Test a read duplicated after the hedge delay returns the first answer."""
+    monkeypatch.setattr(ton_router, "HEDGE_DEFAULT_MS", 20)
+    stuck, quick = _Liteserver("stuck", delay=0.5), _Liteserver("quick")
+    router = _router(stuck, quick)
+
+    assert await router.request("get_account_state", "EQ") == "quick"
+    stats = router.get_stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+    assert router.health[0].failures == 0  # The loser was cancelled, not blamed
+
+    # Sends are never duplicated
+    quick.delay = 0.1
+    await router.request("raw_send_message", b"boc")
+    assert stuck.calls.count("raw_send_message") + quick.calls.count("raw_send_message") == 1
+    assert router.get_stats()["hedged"] == 1
+
+
+@pytest.mark.unit
+async def test_pinned_provider_stays_on_one_server(monkeypatch):
+    """Test pinned calls are neither hedged nor failed over to another server."""
+    monkeypatch.setattr(ton_router, "HEDGE_DEFAULT_MS", 1)
+    best, other = _Liteserver("best", delay=0.02), _Liteserver("other")
+    router = _router(best, other)
+
+    pinned = await router.pin()
+    assert await pinned.get_account_state("EQ") == "best"
+    assert await pinned.raw_send_message(b"boc") == "best"
+    best.fail = True
+    with pytest.raises(ConnectionError):
+        await pinned.get_account_state("EQ")
+    assert other.calls == []
+    assert router.get_stats()["pinned"] == 1 and router.get_stats()["hedged"] == 0
+
+
+@pytest.mark.unit
+async def test_get_method_errors_are_answers_not_outages():
+    """Test a contract's exit code is raised at once and not held against the server."""
+    first, second = _Liteserver("first"), _Liteserver("second")
+    router = _router(first, second)
+
+    with pytest.raises(RunGetMethodError):
+        await router.provider().run_get_method(address="EQ", method="seqno", stack=[])
+    assert second.calls == []
+    assert router.health[0].failures == 0
+
+
+@pytest.mark.unit
+async def test_all_circuits_open_fails_fast():
+    """Test requests fail immediately once every server is open-circuit."""
+    router = _router(_Liteserver("a", fail=True))
+    for _ in range(BREAKER_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            await router.request("get_account_state", "EQ")
+    with pytest.raises(NoLiteserverError):
+        await router.request("get_account_state", "EQ")
+    assert router.get_stats()["closed"] == 0
@@ -0,0 +1,127 @@
+"""
+Unit tests for the verify cache (LRU + Bloom filter of sealed hashes).
+"""
+
+import pytest
+from datetime import datetime
+
+from database import Notarization
+from tests.conftest import FakeDB, FakeNotarizations
+from utils.hashing import hash_data, hash_to_bytes
+import verify_cache
+from verify_cache import BloomFilter, VerifyCache
+
+
+SEALED = [hash_data(str(i).encode()) for i in range(200)]
+UNSEALED = [hash_data(f"missing-{i}".encode()) for i in range(200)]
+
+
+def _db(hashes):
+    return FakeDB(notarizations=FakeNotarizations(
+        [Notarization(id=i, contract_hash=h) for i, h in enumerate(hashes)]
+    ))
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_bloom_has_no_false_negatives():
+    """Test that every added key is reported present."""
+    bloom = BloomFilter(capacity=1000)
+    for contract_hash in SEALED:
+        bloom.add(hash_to_bytes(contract_hash))
+
+    assert all(hash_to_bytes(h) in bloom for h in SEALED)
+    assert sum(hash_to_bytes(h) in bloom for h in UNSEALED) <= 2
+
+
+@pytest.mark.unit
+async def test_lookup_skips_database_for_misses_and_repeats():
+    """Test that misses stop at the Bloom filter and hits stop at the LRU."""
+    db = _db(SEALED)
+    cache = VerifyCache()
+    await cache.load(db)
+
+    assert await cache.lookup(db, UNSEALED[0]) is None
+    assert db.notarizations.queries == 0
+
+    first = await cache.lookup(db, SEALED[0])
+    again = await cache.lookup(db, SEALED[0])
+    assert first is again
+    assert db.notarizations.queries == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+async def test_added_seal_passes_bloom():
+    """Test that a seal added after load is not rejected."""
+    db = _db(SEALED)
+    cache = VerifyCache()
+    await cache.load(db)
+
+    new_hash = UNSEALED[1]
+    cache.add(db.notarizations.add(Notarization(id=999, contract_hash=new_hash)))
+
+    assert (await cache.lookup(db, new_hash)).id == 999
+
+
+@pytest.mark.unit
+async def test_refresh_picks_up_seals_from_other_processes():
+    """Test a seal written elsewhere after load stops being rejected once refreshed."""
+    db = _db(SEALED)
+    cache = VerifyCache()
+    await cache.load(db)
+
+    new_hash = UNSEALED[2]
+    db.notarizations.add(Notarization(id=1000, contract_hash=new_hash, timestamp=datetime.now()))
+    assert await cache.lookup(db, new_hash) is None
+
+    assert await cache.refresh(db) == 1
+    assert (await cache.lookup(db, new_hash)).id == 1000
+    assert await cache.refresh(db) == 0  # Already in the filter
+
+
+@pytest.mark.unit
+async def test_lookup_many_uses_one_query():
+    """Test that a batch costs at most one query and skips cached/unsealed hashes."""
+    db = _db(SEALED)
+    cache = VerifyCache()
+    await cache.load(db)
+    await cache.lookup(db, SEALED[0])
+
+    batch = SEALED[:50] + UNSEALED[:50] + [SEALED[1], "not-a-hash"]
+    found = await cache.lookup_many(db, batch)
+
+    assert db.notarizations.queries == 2
+    assert set(found) == {hash_to_bytes(h) for h in SEALED[:50]}
+
+
+@pytest.mark.unit
+async def test_unconfirmed_seals_expire_from_the_lru(monkeypatch):
+    """Test that an unconfirmed seal is re-read after its TTL, a confirmed one is not."""
+    monkeypatch.setattr(verify_cache, "UNCONFIRMED_TTL", 0)
+    db = _db(SEALED[:2])
+    db.notarizations.rows[1].confirmed_at = datetime.now()
+    cache = VerifyCache()
+    await cache.load(db)
+
+    for _ in range(2):
+        await cache.lookup(db, SEALED[0])
+        await cache.lookup(db, SEALED[1])
+
+    assert db.notarizations.queries == 3
+    assert cache.get(SEALED[0]) is None and len(cache) == 1
+
+
+@pytest.mark.unit
+def test_lru_evicts_oldest():
+    """Test that the LRU stays within maxsize, evicting least recently used."""
+    cache = VerifyCache(maxsize=2)
+    for i in range(3):
+        cache.put(Notarization(id=i, contract_hash=SEALED[i]))
+
+    assert len(cache) == 2
+    assert cache.get(SEALED[0]) is None
+    assert cache.get(SEALED[2]).id == 2
@@ -0,0 +1,90 @@
+"""
+Unit tests for the in-memory known wallet label index.
+"""
+
+import json
+import pytest
+
+from database import KnownWallet
+from wallet_labels import LabelIndex, WalletLabel
+
+
+BOUNCEABLE = "EQB4XClemsAbLvlDjobh-VjUn7oEy9CITWPoG9WkTO2qRx_m"
+MASTERCHAIN = "Ef-8DxboHIl9wqClB9BWOYn5M0umlyFMiONJRIVhjaYv9T2y"
+
+
+# ========================
+# Tests
+# ========================
+
+@pytest.mark.unit
+def test_label_notes_parsed_once():
+    """Test that notes JSON is parsed into typed fields."""
+    wallet = KnownWallet(
+        address=BOUNCEABLE,
+        label="cex",
+        owner_name="weex",
+        notes=json.dumps({"website": "https://www.weex.com", "tags": ["has-custodial-wallets"]}),
+    )
+    label = WalletLabel.from_row(wallet)
+
+    assert label.category == "cex"
+    assert label.name == "weex"
+    assert label.website == "https://www.weex.com"
+    assert label.tags == ("has-custodial-wallets",)
+    assert not label.is_scammer
+    with pytest.raises(TypeError):
+        label.notes["website"] = "https://evil.example"  # Shared by every lookup
+
+
+@pytest.mark.unit
+def test_label_bad_notes_ignored():
+    """Test that malformed notes do not break indexing."""
+    label = WalletLabel.from_row(KnownWallet(address=BOUNCEABLE, label="scammer", notes="{not json"))
+
+    assert label.is_scammer
+    assert label.notes == {}
+
+
+@pytest.mark.unit
+def test_label_source_comes_from_the_column():
+    """Test a manual relabel keeps the dataset's notes but is not dataset-owned."""
+    notes = json.dumps({"source": "ton-labels", "website": "https://www.weex.com"})
+    imported = WalletLabel.from_row(KnownWallet(address=BOUNCEABLE, label="cex", notes=notes, source="ton-labels"))
+    relabeled = WalletLabel.from_row(KnownWallet(address=BOUNCEABLE, label="scammer", notes=notes))
+
+    assert imported.source == "ton-labels"
+    assert relabeled.source == ""
+    assert relabeled.website == "https://www.weex.com"
+
+
+@pytest.mark.unit
+def test_index_matches_all_address_forms():
+    """Test that bounceable, non-bounceable and raw forms hit the same entry."""
+    index = LabelIndex()
+    index.swap([
+        WalletLabel(address=BOUNCEABLE, category="cex", name="weex"),
+        WalletLabel(address=MASTERCHAIN, category="validator", name="elector"),
+    ])
+
+    assert len(index) == 2
+    assert index.get(BOUNCEABLE).name == "weex"
+    assert index.get("UQB4XClemsAbLvlDjobh-VjUn7oEy9CITWPoG9WkTO2qR0Ij").name == "weex"
+    assert index.get("0:785c295e9ac01b2ef9438e86e1f958d49fba04cbd0884d63e81bd5a44cedaa47").name == "weex"
+    assert index.get("Uf-8DxboHIl9wqClB9BWOYn5M0umlyFMiONJRIVhjaYv9WB3").name == "elector"
+    assert index.get("not-an-address") is None
+
+
+@pytest.mark.unit
+def test_load_ton_labels_records():
+    """Test that the compiled dataset maps to known_wallets records."""
+    from wallet_labels import load_ton_labels
+
+    meta, records = load_ton_labels()
+
+    assert len(records) == meta["total"]
+    assert "addresses" not in meta
+    address, label, owner_name, notes = records[0]
+    assert label
+    # The one-time schema backfill matched this marker to set known_wallets.source
+    assert '"source": "ton-labels"' in notes
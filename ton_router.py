@@ -0,0 +1,397 @@
+"""
+Liteserver Router
+=================
+One long-lived connection per mainnet liteserver, picked by health
+instead of a fresh LiteBalancer (config download + handshake with every
+server) per operation.
+
+Per server we track:
+- EWMA latency and error rate -> a score; requests go to the best one
+- a circuit breaker: BREAKER_THRESHOLD consecutive failures open it and
+  the server gets no traffic for a cooldown (doubling while it stays
+  down). Once the cooldown passes one cheap probe decides whether it
+  closes again.
+
+Read-only calls (account state, transactions, get-methods) are hedged:
+if the first server hasn't answered by its p90 latency, the same request
+goes to the next server and the first answer wins. Failures fail over
+straight away. Sends are never duplicated; they fail over only on error.
+
+Servers sit at slightly different heights, so reads that must agree with
+each other (a wallet's seqno before a send, the send, and the seqno
+check after it) go through `pin()`: one server, no hedging, no failover.
+
+A RunGetMethodError is the contract's answer (e.g. -256 for a wallet
+that isn't deployed), so it is returned as-is and not held against the
+server.
+
+Usage:
+    from ton_router import ton_router
+
+    state = await ton_router.request("get_account_state", address)
+    txs = await ton_router.request("get_transactions", address, count=10)
+
+    # pytoniq contracts take the router as their provider
+    wallet = await WalletV5R1.from_mnemonic(provider=ton_router.provider(), mnemonics=words)
+
+    wallet.provider = await ton_router.pin()  # seqno, send and landing on one server
+
+    await ton_router.stop()
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import aiohttp
+from pytoniq import LiteClient
+from pytoniq.liteclient.client import RunGetMethodError
+
+MAINNET_CONFIG_URL = "https://ton.org/global-config.json"
+REQUEST_TIMEOUT = 10  # seconds per attempt
+CONNECT_TIMEOUT = 5
+MAX_TRIES = 3  # Servers tried per request (hedges included)
+BREAKER_THRESHOLD = 3  # Consecutive failures that open a server's circuit
+BREAKER_COOLDOWN = 15  # seconds; doubles on every failed probe
+BREAKER_MAX_COOLDOWN = 300
+EWMA_ALPHA = 0.2
+ERROR_PENALTY = 4  # A server failing half its requests scores 3x its latency
+UNKNOWN_LATENCY_MS = 500  # Score for servers with no samples yet
+LATENCY_WINDOW = 50
+HEDGE_MIN_MS = 100
+HEDGE_DEFAULT_MS = 800  # Until the server has enough samples for a p90
+
+HEDGED_METHODS = {
+    "get_account_state", "raw_get_account_state", "run_get_method",
+    "get_transactions", "raw_get_transactions", "get_masterchain_info",
+}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class NoLiteserverError(Exception):
+    """Every liteserver is open-circuit (or none could be loaded)"""
+
+
+@dataclass
+class LiteserverHealth:
+    """Latency, errors and circuit state of one liteserver"""
+    index: int
+    ewma_ms: float = 0.0
+    error_rate: float = 0.0  # EWMA of failures, 0..1
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: str = CLOSED
+    opened_at: float = 0.0
+    cooldown: float = BREAKER_COOLDOWN
+    connected: bool = False
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    @property
+    def score(self) -> float:
+        """Lower is better"""
+        return (self.ewma_ms or UNKNOWN_LATENCY_MS) * (1 + ERROR_PENALTY * self.error_rate)
+
+    def p90_ms(self) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.9) - 1]
+
+    def cooled_down(self, now: float) -> bool:
+        return self.state == OPEN and now - self.opened_at >= self.cooldown
+
+    def record_success(self, seconds: float) -> bool:
+        """Returns True if this closed the circuit"""
+        ms = seconds * 1000
+        self.ewma_ms = ms if not self.ewma_ms else (1 - EWMA_ALPHA) * self.ewma_ms + EWMA_ALPHA * ms
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.latencies.append(ms)
+        self.requests += 1
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state, self.cooldown = CLOSED, BREAKER_COOLDOWN
+            return True
+        return False
+
+    def record_failure(self, now: float) -> bool:
+        """Returns True if this opened the circuit"""
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.state, self.opened_at = OPEN, now
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+            return True
+        if self.state == CLOSED and self.consecutive_failures >= BREAKER_THRESHOLD:
+            self.state, self.opened_at = OPEN, now
+            return True
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        p90 = self.p90_ms()
+        return {
+            "index": self.index,
+            "state": self.state,
+            "ewma_ms": round(self.ewma_ms, 1),
+            "p90_ms": round(p90, 1) if p90 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "connected": self.connected,
+        }
+
+
+async def mainnet_liteservers() -> List[LiteClient]:
+    """One (unconnected) client per liteserver in the mainnet config"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
+        async with session.get(MAINNET_CONFIG_URL) as resp:
+            config = await resp.json(content_type=None)
+    return [
+        LiteClient.from_config(config, ls_i=i, trust_level=1, timeout=REQUEST_TIMEOUT)
+        for i in range(len(config["liteservers"]))
+    ]
+
+
+class LiteserverRouter:
+    """
+    Health-scored routing over a fixed set of liteserver clients.
+
+    `load()` returns the clients (unconnected); each needs async
+    connect()/close() and the pytoniq request methods. `final_errors`
+    are answers, not server faults.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[List[Any]]],
+        request_timeout: float = REQUEST_TIMEOUT,
+        max_tries: int = MAX_TRIES,
+        final_errors: tuple = (RunGetMethodError,)
+    ):
+        self.load = load
+        self.request_timeout = request_timeout
+        self.max_tries = max_tries
+        self.final_errors = final_errors
+        self.clients: List[Any] = []
+        self.health: List[LiteserverHealth] = []
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "exhausted": 0,
+                      "pinned": 0}
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._connecting: Dict[int, asyncio.Task] = {}
+        self._probes: Dict[int, asyncio.Task] = {}
+
+    # ========================
+    # Requests
+    # ========================
+
+    async def request(self, method: str, /, *args, hedge: Optional[bool] = None, **kwargs):
+        """
+        Run a client method on the healthiest server(s); see module docstring.
+        `method` is positional-only: run_get_method takes its own `method=`.
+        """
+        await self._ensure_loaded()
+        hedge = method in HEDGED_METHODS if hedge is None else hedge
+        order = self.ranked()[:self.max_tries]
+        if not order:
+            self.stats["exhausted"] += 1
+            raise NoLiteserverError("all liteservers are open-circuit")
+        self.stats["requests"] += 1
+
+        pending: Dict[asyncio.Task, int] = {}
+        launched = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal launched
+            index = order[launched]
+            launched += 1
+            pending[asyncio.create_task(self._attempt(index, method, args, kwargs))] = index
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if hedge and launched < len(order):
+                    timeout = self.hedge_delay(order[launched - 1])
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats["hedged"] += 1
+                    launch()
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if index != order[0]:
+                            self.stats["hedge_wins" if order[0] in pending.values() else "failovers"] += 1
+                        return task.result()
+                    if isinstance(error, self.final_errors):
+                        raise error
+                    last_error = error
+                    if launched < len(order):
+                        launch()
+            self.stats["exhausted"] += 1
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def hedge_delay(self, index: int) -> float:
+        """Seconds to wait on a server before duplicating the request"""
+        p90 = self.health[index].p90_ms()
+        return max(HEDGE_MIN_MS, p90 if p90 is not None else HEDGE_DEFAULT_MS) / 1000
+
+    def ranked(self) -> List[int]:
+        """Closed-circuit servers, best score first; starts probes for cooled-down ones"""
+        now = time.monotonic()
+        for health in self.health:
+            if health.cooled_down(now) and health.index not in self._probes:
+                health.state = HALF_OPEN
+                self._probes[health.index] = asyncio.create_task(self._probe(health.index))
+        ready = [h for h in self.health if h.state == CLOSED]
+        return [h.index for h in sorted(ready, key=lambda h: (h.score, h.index))]
+
+    def provider(self) -> "RoutedProvider":
+        """A pytoniq LiteClient stand-in for contracts and wallets"""
+        return RoutedProvider(self)
+
+    async def pin(self) -> "PinnedProvider":
+        """A provider bound to the current best server, for reads that must agree"""
+        await self._ensure_loaded()
+        order = self.ranked()
+        if not order:
+            self.stats["exhausted"] += 1
+            raise NoLiteserverError("all liteservers are open-circuit")
+        self.stats["pinned"] += 1
+        return PinnedProvider(self, order[0])
+
+    # ========================
+    # Internals
+    # ========================
+
+    async def _ensure_loaded(self) -> None:
+        if self.clients:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.clients:
+                return
+            try:
+                clients = await self.load()
+            except Exception as e:
+                raise NoLiteserverError(f"failed to load liteservers: {e}") from e
+            self.health = [LiteserverHealth(index=i) for i in range(len(clients))]
+            self.clients = clients
+            print(f"🛰️ Liteserver router ready with {len(clients)} servers")
+
+    async def _attempt(self, index: int, method: str, args: tuple, kwargs: dict):
+        health = self.health[index]
+        started = time.monotonic()
+        try:
+            await self._connect(index)
+            result = await asyncio.wait_for(
+                getattr(self.clients[index], method)(*args, **kwargs), self.request_timeout
+            )
+        except asyncio.CancelledError:
+            raise  # Lost a hedge race: no verdict on the server
+        except self.final_errors:
+            health.record_success(time.monotonic() - started)
+            raise
+        except Exception as e:
+            await self._record_failure(index, e)
+            raise
+        if health.record_success(time.monotonic() - started):
+            print(f"✅ Liteserver {index} recovered")
+        return result
+
+    async def _connect(self, index: int) -> None:
+        """Connect once; concurrent requests share the handshake"""
+        if self.health[index].connected:
+            return
+        task = self._connecting.get(index)
+        if task is None:
+            task = asyncio.create_task(
+                asyncio.wait_for(self.clients[index].connect(), CONNECT_TIMEOUT)
+            )
+            self._connecting[index] = task
+        try:
+            await asyncio.shield(task)
+            self.health[index].connected = True
+        finally:
+            if task.done() and self._connecting.get(index) is task:
+                del self._connecting[index]
+
+    async def _record_failure(self, index: int, error: Exception) -> None:
+        health = self.health[index]
+        if health.record_failure(time.monotonic()):
+            print(f"🔌 Liteserver {index} circuit open for {health.cooldown:.0f}s: "
+                  f"{str(error)[:80] or type(error).__name__}")
+            await self._disconnect(index)  # Reconnect fresh when it's probed
+
+    async def _disconnect(self, index: int) -> None:
+        health = self.health[index]
+        if health.connected:
+            health.connected = False
+            try:
+                await self.clients[index].close()
+            except Exception:
+                pass
+
+    async def _probe(self, index: int) -> None:
+        """One cheap request decides whether a cooled-down server comes back"""
+        try:
+            await self._attempt(index, "get_masterchain_info", (), {})
+        except Exception:
+            pass
+        finally:
+            self._probes.pop(index, None)
+
+    async def stop(self) -> None:
+        for task in list(self._probes.values()) + list(self._connecting.values()):
+            task.cancel()
+        for index in range(len(self.clients)):
+            await self._disconnect(index)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "servers": len(self.health),
+            "closed": sum(1 for h in self.health if h.state == CLOSED),
+            "liteservers": [h.as_dict() for h in sorted(self.health, key=lambda h: (h.score, h.index))],
+        }
+
+
+class RoutedProvider:
+    """Forwards the LiteClient methods pytoniq contracts call to the router"""
+
+    def __init__(self, router: LiteserverRouter):
+        self._router = router
+
+    def __getattr__(self, method: str):
+        async def call(*args, **kwargs):
+            return await self._router.request(method, *args, **kwargs)
+        return call
+
+
+class PinnedProvider:
+    """Forwards LiteClient methods to one server; its errors are raised, not failed over"""
+
+    def __init__(self, router: LiteserverRouter, index: int):
+        self._router = router
+        self.index = index
+
+    def __getattr__(self, method: str):
+        async def call(*args, **kwargs):
+            self._router.stats["requests"] += 1
+            return await self._router._attempt(self.index, method, args, kwargs)
+        return call
+
+
+# Global router
+ton_router = LiteserverRouter(mainnet_liteservers)
@@ -2,5 +2,7 @@
 MemeSeal TON - Utilities Package
 """
 from .i18n import get_text, user_languages, TRANSLATIONS
-from .hashing import hash_file, hash_data
+from .hashing import hash_file, hash_data, hash_to_bytes, hash_prefix_range
 from .memo import generate_payment_memo, payment_memo_lookup
+from .address import parse_address, address_key, to_raw, to_friendly, same_address, is_valid_address
+from .cursor import encode_cursor, decode_cursor, next_cursor
@@ -0,0 +1,114 @@
+"""
+MemeSeal TON - Address Codec
+Parse and convert TON addresses between raw and user-friendly forms.
+
+A TON account is (workchain, 32-byte hash). It can be written as:
+- raw:            "0:785c...aa47" / "-1:bc0f...2ff5"
+- user-friendly:  48 chars of base64/base64url over
+                  flags(1) + workchain(1) + hash(32) + crc16(2)
+                  e.g. EQ.. (bounceable), UQ.. (non-bounceable), Ef../Uf.. (masterchain)
+
+address_key() returns the canonical 33-byte key (signed workchain byte + hash)
+stored in the *_key BYTEA columns, so lookups and joins ignore the form.
+"""
+import base64
+from functools import lru_cache
+from typing import Optional, Tuple
+
+BOUNCEABLE_TAG = 0x11
+NON_BOUNCEABLE_TAG = 0x51
+TESTNET_FLAG = 0x80
+
+
+def crc16(data: bytes) -> bytes:
+    """CRC16-XMODEM as used by TON user-friendly addresses (big-endian)"""
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc.to_bytes(2, "big")
+
+
+@lru_cache(maxsize=65536)
+def parse_address(address: str) -> Optional[Tuple[int, bytes]]:
+    """Parse any address form to (workchain, hash). Returns None if invalid."""
+    if not address:
+        return None
+    address = address.strip()
+
+    # Raw form: "wc:hex"
+    if ":" in address:
+        wc_part, _, hash_part = address.partition(":")
+        try:
+            workchain = int(wc_part)
+            account = bytes.fromhex(hash_part)
+        except ValueError:
+            return None
+        if len(account) != 32 or not -128 <= workchain <= 127:
+            return None
+        return workchain, account
+
+    # User-friendly form: 48 chars base64 or base64url
+    if len(address) != 48:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(address.replace("+", "-").replace("/", "_"))
+    except (ValueError, TypeError):
+        return None
+    if len(data) != 36 or crc16(data[:34]) != data[34:]:
+        return None
+    if data[0] & ~TESTNET_FLAG not in (BOUNCEABLE_TAG, NON_BOUNCEABLE_TAG):
+        return None
+    workchain = int.from_bytes(data[1:2], "big", signed=True)
+    return workchain, data[2:34]
+
+
+def is_valid_address(address: str) -> bool:
+    """Check if a string is a valid TON address in any form"""
+    return parse_address(address) is not None
+
+
+def address_key(address: str) -> Optional[bytes]:
+    """Canonical 33-byte key (workchain byte + hash) for DB columns"""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    workchain, account = parsed
+    return workchain.to_bytes(1, "big", signed=True) + account
+
+
+def to_raw(address: str) -> Optional[str]:
+    """Convert any address form to raw 'wc:hex'"""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    workchain, account = parsed
+    return f"{workchain}:{account.hex()}"
+
+
+def to_friendly(
+    address: str,
+    bounceable: bool = True,
+    testnet: bool = False,
+    url_safe: bool = True
+) -> Optional[str]:
+    """Convert any address form to user-friendly base64 (EQ../UQ..)"""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    workchain, account = parsed
+    tag = BOUNCEABLE_TAG if bounceable else NON_BOUNCEABLE_TAG
+    if testnet:
+        tag |= TESTNET_FLAG
+    data = bytes([tag]) + workchain.to_bytes(1, "big", signed=True) + account
+    data += crc16(data)
+    encode = base64.urlsafe_b64encode if url_safe else base64.b64encode
+    return encode(data).decode()
+
+
+def same_address(a: str, b: str) -> bool:
+    """Compare two addresses regardless of form"""
+    key_a = address_key(a)
+    return key_a is not None and key_a == address_key(b)
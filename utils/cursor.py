@@ -0,0 +1,47 @@
+"""
+MemeSeal TON - Keyset Cursors
+Opaque page cursors for "newest first" listings.
+
+A cursor is the (timestamp, tiebreaker) keyset of the last row on a page,
+where the tiebreaker is the row's primary key (an int id or an address).
+The next page is then "WHERE (ts, key) < (cursor)" on an index over
+(ts DESC, key DESC), which costs the same at any depth, unlike OFFSET.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple, Union
+
+Keyset = Tuple[datetime, Union[int, str]]
+
+
+def encode_cursor(timestamp: datetime, key: Union[int, str]) -> str:
+    """Encode a row's keyset as an opaque URL-safe cursor"""
+    raw = json.dumps([timestamp.isoformat(), key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Keyset]:
+    """Decode a cursor back to (timestamp, key). Returns None if malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, key = json.loads(raw)
+        if not isinstance(key, (int, str)) or isinstance(key, bool):
+            return None
+        return datetime.fromisoformat(timestamp), key
+    except (ValueError, TypeError):
+        return None
+
+
+def next_cursor(rows, limit: int, timestamp_attr: str, key_attr: str) -> Optional[str]:
+    """Cursor for the page after `rows`, or None if this was the last page"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+    timestamp = get(timestamp_attr)
+    if timestamp is None:
+        return None
+    return encode_cursor(timestamp, get(key_attr))
@@ -3,6 +3,7 @@ MemeSeal TON - Hashing Utilities
 SHA-256 hashing for files and data
 """
 import hashlib
+from typing import Optional, Tuple
 
 
 def hash_file(file_path: str) -> str:
@@ -17,3 +18,34 @@ def hash_file(file_path: str) -> str:
 def hash_data(data: bytes) -> str:
     """SHA-256 hash of raw data"""
     return hashlib.sha256(data).hexdigest()
+
+
+HASH_BYTES = 32
+MIN_PREFIX_CHARS = 8
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def hash_to_bytes(contract_hash: str) -> Optional[bytes]:
+    """Full 64-char hex hash to the 32 bytes stored in notarizations.hash_bin"""
+    if not contract_hash or len(contract_hash) != HASH_BYTES * 2:
+        return None
+    if not _HEX_DIGITS.issuperset(contract_hash):
+        return None
+    return bytes.fromhex(contract_hash)
+
+
+def hash_prefix_range(prefix: str) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Inclusive (low, high) bytea bounds covering every hash starting with a
+    hex prefix, for a range scan on the hash_bin index. Odd-length prefixes
+    are fine: the trailing nibble is padded with 0s for low and Fs for high.
+    Returns None if the prefix is too short, too long or not hex.
+    """
+    prefix = (prefix or "").strip().lower()
+    if not MIN_PREFIX_CHARS <= len(prefix) <= HASH_BYTES * 2:
+        return None
+    if not _HEX_DIGITS.issuperset(prefix):
+        return None
+    low = bytes.fromhex(prefix.ljust(HASH_BYTES * 2, "0"))
+    high = bytes.fromhex(prefix.ljust(HASH_BYTES * 2, "f"))
+    return low, high
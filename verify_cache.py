@@ -0,0 +1,288 @@
+"""
+Seal Verification Cache
+=======================
+In-process fast path for /api/v1/verify, the /verify page and the bot's
+hash check. A seal only changes once, when the confirmer backfills its
+on-chain tx hash, so:
+
+- confirmed seals live in an LRU until evicted (no TTL)
+- unconfirmed seals expire from it after UNCONFIRMED_TTL: the confirmer
+  only invalidates its own process's copy, and other processes pick up
+  the tx hash when theirs expires
+- negative results are answered by a Bloom filter of every sealed hash,
+  built from the database at startup and updated on each local insert
+
+Seals written by other processes reach the filter through run(): every
+REFRESH_INTERVAL it adds the hashes sealed since the last pass, and it
+rebuilds the whole filter every REBUILD_INTERVAL or once it is over
+capacity. Only Bloom false positives (~0.1%) and LRU misses for sealed
+hashes reach Postgres.
+
+Usage:
+    from verify_cache import verify_cache
+
+    # On startup
+    await verify_cache.load(db)
+    asyncio.create_task(verify_cache.run(db))
+
+    # After a seal is written
+    verify_cache.add(notarization)
+
+    # In handlers
+    notarization = await verify_cache.lookup(db, contract_hash)
+    found = await verify_cache.lookup_many(db, contract_hashes)  # {hash_bin: ...}
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, List
+
+from utils.hashing import hash_to_bytes
+
+REFRESH_INTERVAL = 10  # seconds between pulls of other processes' new seals
+REFRESH_OVERLAP = 300  # Each pull reaches back this far for late commits
+REBUILD_INTERVAL = 6 * 3600  # Full rebuild, dropping drift and over-capacity
+UNCONFIRMED_TTL = 30  # seconds an unconfirmed seal is served from the LRU
+
+
+class BloomFilter:
+    """
+    Bloom filter over 32-byte SHA-256 digests.
+
+    The keys are already uniformly distributed, so bit positions are derived
+    from the key bytes with double hashing instead of rehashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: bytes):
+        h1 = int.from_bytes(key[:8], "big")
+        h2 = int.from_bytes(key[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def saturated(self) -> bool:
+        """True once inserts exceed capacity and the error rate degrades"""
+        return self.count > self.capacity
+
+
+class VerifyCache:
+    """
+    LRU of sealed notarizations plus a Bloom filter of all sealed hashes.
+
+    Until load() succeeds the Bloom filter is not trusted and every miss
+    goes to the database, so a failed rebuild only costs speed.
+    """
+
+    def __init__(self, maxsize: int = 50000, error_rate: float = 0.001):
+        self.maxsize = maxsize
+        self.error_rate = error_rate
+        self._entries: "OrderedDict[bytes, object]" = OrderedDict()
+        self._expires: Dict[bytes, float] = {}  # Unconfirmed entries -> monotonic expiry
+        self._bloom: Optional[BloomFilter] = None
+        self._pending: Optional[list] = None  # Inserts seen while a rebuild runs
+        self._synced_to: Optional[datetime] = None  # Newest seal timestamp pulled by refresh()
+        self._built: float = 0.0  # monotonic time of the last full build
+        self._task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[datetime] = None
+        self.hits = 0
+        self.bloom_rejects = 0
+        self.db_lookups = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._bloom is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def load(self, db) -> int:
+        """Rebuild the Bloom filter from every stored hash and swap it in"""
+        self._pending = []
+        self._synced_to = None  # The next refresh reaches back REFRESH_OVERLAP
+        try:
+            total = await db.notarizations.count()
+            bloom = BloomFilter(max(total * 2, 100000), self.error_rate)
+            async for hash_bin in db.notarizations.iter_hash_bins():
+                bloom.add(bytes(hash_bin))
+            # Seals written after the cursor's snapshot
+            for hash_bin in self._pending:
+                bloom.add(hash_bin)
+            self._bloom = bloom
+        finally:
+            self._pending = None
+        self.loaded_at = datetime.now()
+        self._built = time.monotonic()
+        print(f"🔐 Verify cache Bloom filter built ({bloom.count} hashes, "
+              f"{len(bloom._bits) // 1024} KB)")
+        return bloom.count
+
+    def add(self, notarization) -> None:
+        """Record a newly written seal. Keeps the original seal if cached."""
+        hash_bin = hash_to_bytes(notarization.contract_hash)
+        if hash_bin is None:
+            return
+        if self._pending is not None:
+            self._pending.append(hash_bin)
+        if self._bloom is not None:
+            self._bloom.add(hash_bin)
+            if self._bloom.saturated:
+                print("⚠️ Verify cache Bloom filter over capacity - rebuilding on next refresh")
+
+    async def refresh(self, db) -> int:
+        """Add hashes sealed (by any process) since the last refresh. Returns how many were new."""
+        if self._bloom is None:
+            return 0
+        rows = await db.notarizations.get_hash_bins_since(self._synced_to, REFRESH_OVERLAP)
+        added = 0
+        for hash_bin, timestamp in rows:
+            if hash_bin not in self._bloom:
+                self._bloom.add(hash_bin)
+                added += 1
+            if self._synced_to is None or timestamp > self._synced_to:
+                self._synced_to = timestamp
+        return added
+
+    async def run(self, db) -> None:
+        """Keep the Bloom filter in step with the database until stop()"""
+        self._task = asyncio.current_task()
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            try:
+                if (not self.loaded or self._bloom.saturated
+                        or time.monotonic() - self._built >= REBUILD_INTERVAL):
+                    await self.load(db)
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Verify cache refresh failed: {e}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def invalidate(self, contract_hash: str) -> None:
+        """Drop a cached seal (e.g. after its tx_hash is corrected)"""
+        hash_bin = hash_to_bytes(contract_hash)
+        if hash_bin is not None:
+            self._entries.pop(hash_bin, None)
+            self._expires.pop(hash_bin, None)
+
+    def get(self, contract_hash: str):
+        """Cached seal for a hash, or None (does not consult the database)"""
+        hash_bin = hash_to_bytes(contract_hash)
+        if hash_bin is None:
+            return None
+        notarization = self._entries.get(hash_bin)
+        if notarization is None:
+            return None
+        if self._expires.get(hash_bin, math.inf) <= time.monotonic():
+            del self._entries[hash_bin]
+            del self._expires[hash_bin]
+            return None
+        self._entries.move_to_end(hash_bin)
+        return notarization
+
+    def put(self, notarization) -> None:
+        """Cache a seal loaded from the database (unconfirmed ones for UNCONFIRMED_TTL)"""
+        hash_bin = hash_to_bytes(notarization.contract_hash)
+        if hash_bin is None:
+            return
+        self._entries[hash_bin] = notarization
+        self._entries.move_to_end(hash_bin)
+        if notarization.confirmed_at is None:
+            self._expires[hash_bin] = time.monotonic() + UNCONFIRMED_TTL
+        else:
+            self._expires.pop(hash_bin, None)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._expires.pop(evicted, None)
+
+    def might_exist(self, contract_hash: str) -> bool:
+        """False only when the hash is definitely not sealed"""
+        hash_bin = hash_to_bytes(contract_hash)
+        if hash_bin is None:
+            return False
+        return self._bloom is None or hash_bin in self._bloom
+
+    async def lookup(self, db, contract_hash: str):
+        """Resolve a hash to its original seal: LRU, then Bloom, then database"""
+        notarization = self.get(contract_hash)
+        if notarization is not None:
+            self.hits += 1
+            return notarization
+
+        if not self.might_exist(contract_hash):
+            self.bloom_rejects += 1
+            return None
+
+        self.db_lookups += 1
+        notarization = await db.notarizations.get_by_hash(contract_hash)
+        if notarization is not None:
+            self.put(notarization)
+        return notarization
+
+    async def lookup_many(self, db, contract_hashes: List[str]) -> Dict[bytes, object]:
+        """
+        Resolve many hashes with at most one database query.
+
+        Returns {hash_bin: Notarization} for the sealed ones.
+        """
+        found = {}
+        missing = []
+        seen = set()
+        for contract_hash in contract_hashes:
+            hash_bin = hash_to_bytes(contract_hash)
+            if hash_bin is None or hash_bin in seen:
+                continue
+            seen.add(hash_bin)
+            notarization = self.get(contract_hash)
+            if notarization is not None:
+                self.hits += 1
+                found[hash_bin] = notarization
+            elif not self.might_exist(contract_hash):
+                self.bloom_rejects += 1
+            else:
+                missing.append(contract_hash)
+
+        if missing:
+            self.db_lookups += len(missing)
+            rows = await db.notarizations.get_by_hashes(missing)
+            for hash_bin, notarization in rows.items():
+                self.put(notarization)
+                found[hash_bin] = notarization
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._entries),
+            "bloom_hashes": self._bloom.count if self._bloom else 0,
+            "hits": self.hits,
+            "bloom_rejects": self.bloom_rejects,
+            "db_lookups": self.db_lookups,
+        }
+
+
+# Global verify cache
+verify_cache = VerifyCache()
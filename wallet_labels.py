@@ -0,0 +1,166 @@
+"""
+Known Wallet Label Index
+========================
+Immutable in-process index over the known_wallets table (ton-labels + manual
+labels). Loaded once at startup and hot-swapped after imports, so entity
+detection in /api/v1/rugscore and scoring is a dict lookup with no I/O.
+
+Keys are canonical address keys (utils.address.address_key), so bounceable
+(EQ/Ef), non-bounceable (UQ/Uf) and raw forms of the same account all hit.
+
+Usage:
+    from wallet_labels import label_index
+
+    # On startup / after an import
+    await label_index.load(db)
+
+    # Bulk import the ton-labels dataset
+    meta, records = load_ton_labels()
+    diff = await db.wallets.import_labels(records, source=TON_LABELS_SOURCE)
+
+    # In handlers
+    label = label_index.get(address)
+    if label and label.is_scammer:
+        ...
+"""
+
+import json
+from datetime import datetime
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Tuple, List, Mapping
+
+from utils.address import address_key
+
+TON_LABELS_PATH = Path(__file__).parent / "scripts" / "ton-labels-compiled.json"
+TON_LABELS_SOURCE = "ton-labels"
+
+
+@dataclass(frozen=True)
+class WalletLabel:
+    """Known wallet label with notes pre-parsed into typed fields."""
+    address: str  # As stored in known_wallets
+    category: str  # 'cex', 'dex', 'validator', 'scammer', ...
+    name: Optional[str] = None
+    subcategory: str = ""
+    description: str = ""
+    website: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    source: str = ""  # Dataset that owns the label, "" for a manual one
+    notes: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}), compare=False)  # Read-only
+
+    @property
+    def is_scammer(self) -> bool:
+        return self.category == 'scammer'
+
+    @classmethod
+    def from_row(cls, row) -> "WalletLabel":
+        """Build from a known_wallets row (or KnownWallet), parsing notes once."""
+        get = row.get if hasattr(row, 'get') else lambda key: getattr(row, key, None)
+
+        notes = {}
+        raw_notes = get('notes')
+        if raw_notes:
+            try:
+                notes = json.loads(raw_notes)
+            except (ValueError, TypeError):
+                notes = {}
+            if not isinstance(notes, dict):
+                notes = {}
+
+        return cls(
+            address=get('address') or "",
+            category=get('label') or "",
+            name=get('owner_name'),
+            subcategory=notes.get('subcategory') or "",
+            description=notes.get('description') or "",
+            website=notes.get('website'),
+            tags=tuple(notes.get('tags') or ()),
+            source=get('source') or "",  # known_wallets.source; notes may predate a manual relabel
+            notes=MappingProxyType(notes),
+        )
+
+
+class LabelIndex:
+    """
+    Read-mostly label index.
+
+    The mapping is never mutated in place: load()/swap() build a new mapping
+    and replace the reference in one assignment, so concurrent readers always
+    see either the old or the new snapshot.
+    """
+
+    def __init__(self):
+        self._labels: Mapping[bytes, WalletLabel] = MappingProxyType({})
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def get(self, address: str) -> Optional[WalletLabel]:
+        """Look up a label by any address form."""
+        if not address:
+            return None
+        key = address_key(address)
+        if key is None:
+            return None
+        return self._labels.get(key)
+
+    def swap(self, labels) -> int:
+        """Replace the index with a new set of WalletLabel entries."""
+        index = {}
+        for label in labels:
+            key = address_key(label.address)
+            if key is not None:
+                index[key] = label
+        self._labels = MappingProxyType(index)
+        self.loaded_at = datetime.now()
+        return len(index)
+
+    async def load(self, db) -> int:
+        """(Re)load all labels from known_wallets and swap them in."""
+        rows = await db.wallets.get_all_labels()
+        count = self.swap(WalletLabel.from_row(row) for row in rows)
+        print(f"🏷️ Wallet label index loaded ({count} addresses)")
+        return count
+
+
+def load_ton_labels(
+    path: Path = TON_LABELS_PATH
+) -> Tuple[Dict[str, Any], List[Tuple[str, str, str, Optional[str]]]]:
+    """
+    Read the compiled ton-labels dataset into known_wallets records.
+
+    Returns:
+        (metadata without addresses, [(address, label, owner_name, notes), ...])
+    """
+    with open(path, "rb") as f:
+        data = json.loads(f.read())
+
+    records = []
+    for address, info in data.pop('addresses', {}).items():
+        label = info.get('category', 'unknown')
+        owner_name = info.get('label') or info.get('organization', '')
+
+        notes_data = {
+            'website': info.get('website'),
+            'subcategory': info.get('subcategory'),
+            'description': info.get('description'),
+            'tags': info.get('tags', []),
+            'source': TON_LABELS_SOURCE
+        }
+        notes_data = {k: v for k, v in notes_data.items() if v}
+        notes = json.dumps(notes_data) if notes_data else None
+
+        records.append((address, label, owner_name, notes))
+
+    return data, records
+
+
+# Global label index
+label_index = LabelIndex()